@@ -13,7 +13,10 @@ import {
     parseRoomsCount,
     parsePrice,
     parseArea,
-    saveProperty,
+    saveProperties,
+    reportScrapingBatch,
+    startScrapingJob,
+    finishScrapingJob,
     sleep,
 } from '../../shared/src';
 
@@ -75,6 +78,9 @@ async function main() {
 
     const rateLimiter = new RateLimiter(RATE_LIMITS.bezrealitky.requestsPerMinute);
     let totalScraped = 0;
+    let errorsCount = 0;
+    let saveFailed = false;
+    const jobId = await startScrapingJob(SOURCES.bezrealitky);
 
     console.log(`Starting bezrealitky.cz scraper`);
     console.log(`Cities: ${cities.join(', ')}`);
@@ -104,60 +110,45 @@ async function main() {
 
         log.info(`Processing: ${request.url}`);
 
+        // Determine property type and transaction type from URL
+        const propertyType = request.url.includes('/byt') ? 'apartment' : 'house';
+        const transactionType = request.url.includes('/prodej') ? 'sale' : 'rent';
+
+        const fetchStarted = Date.now();
+
         // Wait for page to load
         await page.waitForLoadState('networkidle', { timeout: 30000 }).catch(() => {});
 
         // Extract __NEXT_DATA__ from script tag
         const nextDataScript = await page.$('script#__NEXT_DATA__');
+        const nextDataText = nextDataScript ? await nextDataScript.textContent() : null;
+        const fetchMs = Date.now() - fetchStarted;
 
-        if (nextDataScript) {
-            const nextDataText = await nextDataScript.textContent();
+        const parseStarted = Date.now();
+        const batch: PropertyData[] = [];
+        const batchErrors: string[] = [];
+        let hasListings = false;
 
+        if (nextDataScript) {
             if (nextDataText) {
                 try {
                     const nextData = JSON.parse(nextDataText) as { props: NextDataProps };
                     const listings = nextData.props?.pageProps?.listings || [];
-
-                    // Determine property type and transaction type from URL
-                    const url = request.url;
-                    const propertyType = url.includes('/byt') ? 'apartment' : 'house';
-                    const transactionType = url.includes('/prodej') ? 'sale' : 'rent';
+                    hasListings = listings.length > 0;
 
                     for (const listing of listings) {
-                        if (totalScraped >= maxProperties) break;
+                        if (totalScraped + batch.length >= maxProperties) break;
 
                         try {
-                            const propertyData = parseListingFromNextData(listing, propertyType, transactionType);
-
-                            // Save to backend
-                            await saveProperty(propertyData);
-
-                            // Also push to Apify dataset
-                            await Actor.pushData(propertyData);
-
-                            totalScraped++;
-
-                            if (totalScraped % 25 === 0) {
-                                log.info(`Scraped ${totalScraped} properties...`);
-                            }
+                            batch.push(parseListingFromNextData(listing, propertyType, transactionType));
                         } catch (error) {
                             log.error(`Error processing listing ${listing.id}: ${error}`);
+                            batchErrors.push(`Parsing listing ${listing.id}: ${error}`);
                         }
                     }
-
-                    // Check for next page
-                    if (listings.length > 0 && totalScraped < maxProperties) {
-                        const currentUrl = new URL(request.url);
-                        const currentPage = parseInt(currentUrl.searchParams.get('page') || '1', 10);
-                        currentUrl.searchParams.set('page', (currentPage + 1).toString());
-
-                        await enqueueLinks({
-                            urls: [currentUrl.toString()],
-                            label: 'listing',
-                        });
-                    }
                 } catch (error) {
                     log.error(`Error parsing __NEXT_DATA__: ${error}`);
+                    batchErrors.push(`Parsing __NEXT_DATA__ of ${request.url}: ${error}`);
                 }
             }
         } else {
@@ -167,7 +158,7 @@ async function main() {
             const propertyCards = await page.$$('[data-testid="property-card"], .property-card, article.listing');
 
             for (const card of propertyCards) {
-                if (totalScraped >= maxProperties) break;
+                if (totalScraped + batch.length >= maxProperties) break;
 
                 try {
                     const title = await card.$eval('h2, .title', el => el.textContent?.trim() || '').catch(() => '');
@@ -178,11 +169,8 @@ async function main() {
 
                     if (!title || !link) continue;
 
-                    const propertyType = request.url.includes('/byt') ? 'apartment' : 'house';
-                    const transactionType = request.url.includes('/prodej') ? 'sale' : 'rent';
-
-                    const propertyData: PropertyData = {
-                        external_id: link.split('/').pop() || `br-${Date.now()}-${totalScraped}`,
+                    batch.push({
+                        external_id: link.split('/').pop() || `br-${Date.now()}-${totalScraped + batch.length}`,
                         source: SOURCES.bezrealitky,
                         title,
                         property_type: propertyType as 'apartment' | 'house',
@@ -192,16 +180,47 @@ async function main() {
                         area_usable: parseArea(areaText),
                         main_image_url: imageUrl,
                         url: link.startsWith('http') ? link : `${BASE_URL}${link}`,
-                    };
-
-                    await saveProperty(propertyData);
-                    await Actor.pushData(propertyData);
-                    totalScraped++;
+                    });
                 } catch (error) {
                     log.error(`Error processing card: ${error}`);
+                    batchErrors.push(`Parsing card on ${request.url}: ${error}`);
                 }
             }
         }
+        const parseMs = Date.now() - parseStarted;
+
+        // One bulk upsert per result page
+        const writeStarted = Date.now();
+        const { failed, errors } = await saveProperties(batch, batch.length || 1, jobId);
+        const writeMs = Date.now() - writeStarted;
+
+        // Also push to Apify dataset
+        await Actor.pushData(batch);
+
+        totalScraped += batch.length;
+        errorsCount += batchErrors.length + failed;
+        saveFailed = saveFailed || failed > 0;
+        await reportScrapingBatch(jobId, {
+            rows: batch.length,
+            errors_count: batchErrors.length + failed,
+            errors: [...batchErrors, ...errors],
+            fetch_ms: fetchMs,
+            parse_ms: parseMs,
+            write_ms: writeMs,
+        });
+        log.info(`Scraped ${totalScraped} properties...`);
+
+        // Check for next page
+        if (hasListings && totalScraped < maxProperties) {
+            const currentUrl = new URL(request.url);
+            const currentPage = parseInt(currentUrl.searchParams.get('page') || '1', 10);
+            currentUrl.searchParams.set('page', (currentPage + 1).toString());
+
+            await enqueueLinks({
+                urls: [currentUrl.toString()],
+                label: 'listing',
+            });
+        }
     });
 
     const crawler = new PlaywrightCrawler({
@@ -217,10 +236,21 @@ async function main() {
         },
     });
 
-    await crawler.run(startUrls);
+    try {
+        await crawler.run(startUrls);
+    } catch (error) {
+        await finishScrapingJob(jobId, 'failed', errorsCount, String(error));
+        throw error;
+    }
 
     console.log(`\nScraping complete. Total properties scraped: ${totalScraped}`);
 
+    // A run cut short by maxProperties (or with unsaved batches) didn't record
+    // the whole inventory, so it must not count towards deactivating unseen
+    // listings
+    const complete = !saveFailed && totalScraped < maxProperties;
+    await finishScrapingJob(jobId, complete ? 'completed' : 'partial', errorsCount);
+
     await Actor.exit();
 }
 
@@ -5,14 +5,17 @@ import {
     RATE_LIMITS,
     API_ENDPOINTS,
     CadastralData,
+    CadastralQueueItem,
+    CadastralResult,
     EnrichmentInput,
     RateLimiter,
-    updateCadastralData,
-    getPropertiesWithoutCadastral,
+    getCadastralQueue,
+    saveCadastralResults,
     sleep,
 } from '../../shared/src';
 
 const CUZK_WFS_URL = API_ENDPOINTS.cuzkWfs;
+const QUEUE_PAGE_SIZE = 100;
 
 interface WfsFeature {
     'cp:CadastralParcel'?: {
@@ -95,28 +98,23 @@ function parseWfsResponse(xmlData: string): CadastralData | null {
 }
 
 /**
- * Fetch cadastral data for a point
+ * Fetch cadastral data for a point; null = no parcel there, throws if WFS fails
  */
 async function fetchCadastralData(lat: number, lng: number): Promise<CadastralData | null> {
-    try {
-        const url = buildWfsRequest(lat, lng);
-
-        const response = await axios.get(url, {
-            headers: {
-                'Accept': 'application/xml',
-            },
-            timeout: 30000,
-        });
+    const url = buildWfsRequest(lat, lng);
 
-        if (response.status === 200 && response.data) {
-            return parseWfsResponse(response.data);
-        }
+    const response = await axios.get(url, {
+        headers: {
+            'Accept': 'application/xml',
+        },
+        timeout: 30000,
+    });
 
-        return null;
-    } catch (error) {
-        console.error(`Error fetching cadastral data for (${lat}, ${lng}):`, error);
-        return null;
+    if (response.status === 200 && response.data) {
+        return parseWfsResponse(response.data);
     }
+
+    return null;
 }
 
 /**
@@ -161,6 +159,13 @@ async function fetchFromRuian(lat: number, lng: number): Promise<CadastralData |
     }
 }
 
+/**
+ * Look up a point: RUIAN first (more detailed), WFS as the fallback
+ */
+async function lookup(lat: number, lng: number): Promise<CadastralData | null> {
+    return (await fetchFromRuian(lat, lng)) || (await fetchCadastralData(lat, lng));
+}
+
 async function main() {
     await Actor.init();
 
@@ -168,75 +173,81 @@ async function main() {
 
     const rateLimiter = new RateLimiter(RATE_LIMITS.cuzk.requestsPerMinute);
     let enriched = 0;
+    let notFound = 0;
     let failed = 0;
 
     console.log('Starting CUZK cadastral data fetcher');
 
-    // Get properties that need enrichment
-    let properties: Array<{ id: number; lat: number; lng: number }>;
+    if (input.coordinates && input.coordinates.length > 0) {
+        // Direct coordinates provided (for testing); nothing is written back
+        for (const [i, c] of input.coordinates.entries()) {
+            await rateLimiter.wait();
+            const cadastralData = await lookup(c.lat, c.lng).catch((error) => {
+                console.error(`Error looking up (${c.lat}, ${c.lng}):`, error);
+                return null;
+            });
+            await Actor.pushData({ property_id: i, lat: c.lat, lng: c.lng, ...cadastralData });
+        }
+        await Actor.exit();
+        return;
+    }
 
     if (input.propertyIds && input.propertyIds.length > 0) {
-        // Specific properties requested
-        // Would need to fetch their coordinates
-        console.log(`Processing ${input.propertyIds.length} specific properties`);
-        properties = []; // Would fetch from API
-    } else if (input.coordinates && input.coordinates.length > 0) {
-        // Direct coordinates provided (for testing)
-        properties = input.coordinates.map((c, i) => ({
-            id: i,
-            lat: c.lat,
-            lng: c.lng,
-        }));
-    } else {
-        // Fetch properties without cadastral data from backend
-        console.log('Fetching properties without cadastral data...');
-        properties = await getPropertiesWithoutCadastral(100);
+        // Listings are taken from the backend queue; specific ids are not supported yet
+        console.log(`Ignoring ${input.propertyIds.length} requested property ids, draining the queue instead`);
     }
 
-    console.log(`Processing ${properties.length} properties`);
+    // Listings whose lookup failed stay queued; skip them for the rest of this run
+    const attempted = new Set<number>();
 
-    for (const prop of properties) {
-        await rateLimiter.wait();
+    while (!input.maxItems || attempted.size < input.maxItems) {
+        const queue = (await getCadastralQueue(QUEUE_PAGE_SIZE)).filter((item) => !attempted.has(item.id));
+        if (queue.length === 0) break;
 
-        try {
-            console.log(`Fetching cadastral data for property ${prop.id} at (${prop.lat}, ${prop.lng})`);
-
-            // Try RUIAN first (more detailed), fall back to WFS
-            let cadastralData = await fetchFromRuian(prop.lat, prop.lng);
+        // One upstream lookup per cell: listings in the same building share it
+        const byCell = new Map<string, CadastralQueueItem[]>();
+        for (const item of queue) {
+            attempted.add(item.id);
+            byCell.set(item.cell, [...(byCell.get(item.cell) || []), item]);
+        }
 
-            if (!cadastralData) {
-                cadastralData = await fetchCadastralData(prop.lat, prop.lng);
+        const results: CadastralResult[] = [];
+        for (const [cell, items] of byCell) {
+            await rateLimiter.wait();
+
+            const { lat, lng } = items[0];
+            let cadastralData: CadastralData | null;
+            try {
+                cadastralData = await lookup(lat, lng);
+            } catch (error) {
+                failed += items.length;
+                console.error(`Error looking up cell ${cell} at (${lat}, ${lng}):`, error);
+                continue;
             }
 
+            // Misses are posted too, so the backend stops queueing them for a while
+            for (const item of items) {
+                results.push({ property_id: item.id, ...cadastralData });
+            }
             if (cadastralData) {
-                // Update property in backend
-                await updateCadastralData(prop.id, cadastralData);
-
-                // Push to dataset
-                await Actor.pushData({
-                    property_id: prop.id,
-                    ...cadastralData,
-                });
-
-                enriched++;
-                console.log(`Enriched property ${prop.id}: ${cadastralData.cadastral_number}`);
+                enriched += items.length;
+                await Actor.pushData(items.map((item) => ({ property_id: item.id, ...cadastralData })));
+                console.log(`Cell ${cell}: ${cadastralData.cadastral_number} for ${items.length} listings`);
             } else {
-                failed++;
-                console.warn(`No cadastral data found for property ${prop.id}`);
+                notFound += items.length;
+                console.warn(`No cadastral data found in cell ${cell} (${items.length} listings)`);
             }
-        } catch (error) {
-            failed++;
-            console.error(`Error processing property ${prop.id}:`, error);
         }
 
-        // Progress update
-        if ((enriched + failed) % 10 === 0) {
-            console.log(`Progress: ${enriched} enriched, ${failed} failed`);
+        if (!(await saveCadastralResults(results))) {
+            break;
         }
+        console.log(`Progress: ${enriched} enriched, ${notFound} not found, ${failed} failed`);
     }
 
     console.log(`\nEnrichment complete:`);
     console.log(`  - Enriched: ${enriched}`);
+    console.log(`  - Not found: ${notFound}`);
     console.log(`  - Failed: ${failed}`);
 
     await Actor.exit();
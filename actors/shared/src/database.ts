@@ -1,80 +1,158 @@
 import { API_ENDPOINTS } from './constants';
-import { PropertyData, CadastralData } from './types';
+import { PropertyData, CadastralQueueItem, CadastralResult, ScrapingBatchReport } from './types';
 
 const BACKEND_URL = API_ENDPOINTS.backend;
 
-export async function saveProperty(property: PropertyData): Promise<void> {
+function jobQuery(jobId?: number | null): string {
+    return jobId ? `?job_id=${jobId}` : '';
+}
+
+export async function startScrapingJob(source: string): Promise<number | null> {
     try {
-        const response = await fetch(`${BACKEND_URL}/api/v1/properties`, {
+        const response = await fetch(`${BACKEND_URL}/api/v1/scraping/jobs`, {
             method: 'POST',
             headers: {
                 'Content-Type': 'application/json',
             },
-            body: JSON.stringify(property),
+            body: JSON.stringify({ source }),
         });
 
         if (!response.ok) {
             const error = await response.text();
-            console.error(`Failed to save property ${property.external_id}: ${error}`);
+            console.error(`Failed to start scraping job for ${source}: ${error}`);
+            return null;
         }
+        const job = await response.json();
+        return job.id;
     } catch (error) {
-        console.error(`Error saving property ${property.external_id}:`, error);
-        throw error;
+        console.error(`Error starting scraping job for ${source}:`, error);
+        return null;
     }
 }
 
-export async function saveProperties(properties: PropertyData[]): Promise<{
-    saved: number;
-    failed: number;
-}> {
-    let saved = 0;
-    let failed = 0;
+export async function finishScrapingJob(
+    jobId: number | null,
+    status: 'completed' | 'partial' | 'failed',
+    errorsCount: number = 0,
+    errorMessage?: string
+): Promise<void> {
+    if (!jobId) return;
+    try {
+        const response = await fetch(`${BACKEND_URL}/api/v1/scraping/jobs/${jobId}/finish`, {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json',
+            },
+            body: JSON.stringify({
+                status,
+                errors_count: errorsCount,
+                error_message: errorMessage,
+            }),
+        });
 
-    for (const property of properties) {
-        try {
-            await saveProperty(property);
-            saved++;
-        } catch {
-            failed++;
+        if (!response.ok) {
+            const error = await response.text();
+            console.error(`Failed to finish scraping job ${jobId}: ${error}`);
         }
+    } catch (error) {
+        console.error(`Error finishing scraping job ${jobId}:`, error);
     }
-
-    return { saved, failed };
 }
 
-export async function updateCadastralData(
-    propertyId: number,
-    cadastralData: CadastralData
+export async function reportScrapingBatch(
+    jobId: number | null,
+    report: ScrapingBatchReport
 ): Promise<void> {
+    if (!jobId) return;
     try {
-        const response = await fetch(`${BACKEND_URL}/api/v1/properties/${propertyId}`, {
-            method: 'PATCH',
+        const response = await fetch(`${BACKEND_URL}/api/v1/scraping/jobs/${jobId}/batches`, {
+            method: 'POST',
             headers: {
                 'Content-Type': 'application/json',
             },
-            body: JSON.stringify(cadastralData),
+            body: JSON.stringify(report),
         });
 
         if (!response.ok) {
             const error = await response.text();
-            console.error(`Failed to update cadastral data for ${propertyId}: ${error}`);
+            console.error(`Failed to report batch for scraping job ${jobId}: ${error}`);
         }
     } catch (error) {
-        console.error(`Error updating cadastral data for ${propertyId}:`, error);
+        // Telemetry must never stop a scrape
+        console.error(`Error reporting batch for scraping job ${jobId}:`, error);
+    }
+}
+
+export async function saveProperty(property: PropertyData, jobId?: number | null): Promise<void> {
+    try {
+        const response = await fetch(`${BACKEND_URL}/api/v1/properties${jobQuery(jobId)}`, {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json',
+            },
+            body: JSON.stringify(property),
+        });
+
+        if (!response.ok) {
+            const error = await response.text();
+            console.error(`Failed to save property ${property.external_id}: ${error}`);
+        }
+    } catch (error) {
+        console.error(`Error saving property ${property.external_id}:`, error);
         throw error;
     }
 }
 
-export async function getPropertiesWithoutCadastral(limit: number = 100): Promise<Array<{
-    id: number;
-    lat: number;
-    lng: number;
-}>> {
+export async function saveProperties(
+    properties: PropertyData[],
+    batchSize: number = 500,
+    jobId?: number | null
+): Promise<{
+    saved: number;
+    failed: number;
+    errors: string[];
+}> {
+    let saved = 0;
+    let failed = 0;
+    const errors: string[] = [];
+
+    // One bulk upsert per batch instead of one request per listing
+    for (let i = 0; i < properties.length; i += batchSize) {
+        const batch = properties.slice(i, i + batchSize);
+        try {
+            const response = await fetch(`${BACKEND_URL}/api/v1/properties/bulk${jobQuery(jobId)}`, {
+                method: 'POST',
+                headers: {
+                    'Content-Type': 'application/json',
+                },
+                body: JSON.stringify(batch),
+            });
+
+            if (!response.ok) {
+                const error = await response.text();
+                console.error(`Failed to save batch of ${batch.length} properties: ${error}`);
+                errors.push(`HTTP ${response.status}: ${error}`);
+                failed += batch.length;
+                continue;
+            }
+            saved += batch.length;
+        } catch (error) {
+            console.error(`Error saving batch of ${batch.length} properties:`, error);
+            errors.push(String(error));
+            failed += batch.length;
+        }
+    }
+
+    return { saved, failed, errors };
+}
+
+export async function getCadastralQueue(limit: number = 100): Promise<CadastralQueueItem[]> {
     try {
         const response = await fetch(
-            `${BACKEND_URL}/api/v1/properties?page_size=${limit}&cadastral_number=null`,
+            `${BACKEND_URL}/api/v1/properties/cadastral/queue?limit=${limit}`,
             {
-                method: 'GET',
+                // POST: listings in already looked-up cells are filled on the way
+                method: 'POST',
                 headers: {
                     'Content-Type': 'application/json',
                 },
@@ -82,19 +160,39 @@ export async function getPropertiesWithoutCadastral(limit: number = 100): Promis
         );
 
         if (!response.ok) {
-            throw new Error(`Failed to fetch properties: ${response.statusText}`);
+            throw new Error(`Failed to fetch cadastral queue: ${response.statusText}`);
         }
 
         const data = await response.json();
-        return data.items
-            .filter((p: any) => p.coordinates)
-            .map((p: any) => ({
-                id: p.id,
-                lat: p.coordinates.lat,
-                lng: p.coordinates.lng,
-            }));
+        if (data.filled_from_cache) {
+            console.log(`${data.filled_from_cache} listings filled from the parcel cache`);
+        }
+        return data.items;
     } catch (error) {
-        console.error('Error fetching properties:', error);
+        console.error('Error fetching cadastral queue:', error);
         return [];
     }
 }
+
+export async function saveCadastralResults(results: CadastralResult[]): Promise<boolean> {
+    if (results.length === 0) return true;
+    try {
+        const response = await fetch(`${BACKEND_URL}/api/v1/properties/cadastral`, {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json',
+            },
+            body: JSON.stringify(results),
+        });
+
+        if (!response.ok) {
+            const error = await response.text();
+            console.error(`Failed to save ${results.length} cadastral results: ${error}`);
+            return false;
+        }
+        return true;
+    } catch (error) {
+        console.error(`Error saving ${results.length} cadastral results:`, error);
+        return false;
+    }
+}
@@ -53,6 +53,16 @@ export interface ScrapingInput {
     startUrls?: string[];
 }
 
+// Timings of one scraped batch (e.g. a result page), in milliseconds
+export interface ScrapingBatchReport {
+    rows: number;
+    errors_count?: number;
+    errors?: string[];
+    fetch_ms: number;
+    parse_ms: number;
+    write_ms: number;
+}
+
 export interface CadastralData {
     cadastral_number?: string;
     cadastral_area?: string;
@@ -62,6 +72,24 @@ export interface CadastralData {
     historical_prices?: HistoricalPrice[];
 }
 
+// A listing waiting for a parcel lookup (POST /properties/cadastral/queue)
+export interface CadastralQueueItem {
+    id: number;
+    lat: number;
+    lng: number;
+    cell: string;  // geohash cell; one lookup answers the whole cell
+}
+
+// Lookup answer for POST /properties/cadastral; no cadastral_number = nothing found
+export interface CadastralResult {
+    property_id: number;
+    cadastral_number?: string;
+    cadastral_area?: string;
+    ownership_type?: string;
+    liens_count?: number;
+    encumbrances?: string;
+}
+
 export interface HistoricalPrice {
     date: string;
     price: number;
@@ -71,6 +99,7 @@ export interface HistoricalPrice {
 export interface EnrichmentInput {
     propertyIds?: number[];
     coordinates?: { lat: number; lng: number }[];
+    maxItems?: number;  // stop after this many queued listings (default: drain the queue)
 }
 
 export interface SrealityEstate {
@@ -14,7 +14,10 @@ import {
     parseRoomsCount,
     extractCity,
     extractDistrict,
-    saveProperty,
+    saveProperties,
+    reportScrapingBatch,
+    startScrapingJob,
+    finishScrapingJob,
 } from '../../shared/src';
 
 const SREALITY_API = API_ENDPOINTS.sreality;
@@ -123,6 +126,10 @@ async function main() {
 
     const rateLimiter = new RateLimiter(RATE_LIMITS.sreality.requestsPerMinute);
     let totalScraped = 0;
+    let errorsCount = 0;
+    let fetchFailed = false;
+    let saveFailed = false;
+    const jobId = await startScrapingJob(SOURCES.sreality);
 
     console.log(`Starting sreality.cz scraper`);
     console.log(`Cities: ${cities.join(', ')}`);
@@ -157,50 +164,72 @@ async function main() {
                 while (hasMore && totalScraped < maxProperties) {
                     await rateLimiter.wait();
 
+                    const fetchStarted = Date.now();
+                    let response: SrealityResponse;
                     try {
-                        const response = await fetchEstates(category, regionId, page);
-                        const estates = response._embedded?.estates || [];
-
-                        if (estates.length === 0) {
-                            hasMore = false;
-                            break;
-                        }
-
-                        for (const estate of estates) {
-                            if (totalScraped >= maxProperties) break;
-
-                            try {
-                                // Optionally fetch detail for more info
-                                // await rateLimiter.wait();
-                                // const detail = await fetchEstateDetail(estate.hash_id);
-
-                                const propertyData = parseEstate(estate, propType, transType);
-
-                                // Save to backend
-                                await saveProperty(propertyData);
-
-                                // Also push to Apify dataset
-                                await Actor.pushData(propertyData);
-
-                                totalScraped++;
+                        response = await fetchEstates(category, regionId, page);
+                    } catch (error) {
+                        console.error(`Error fetching page ${page}:`, error);
+                        errorsCount++;
+                        fetchFailed = true;
+                        await reportScrapingBatch(jobId, {
+                            rows: 0,
+                            errors: [`Fetching ${categoryKey} page ${page}: ${error}`],
+                            fetch_ms: Date.now() - fetchStarted,
+                            parse_ms: 0,
+                            write_ms: 0,
+                        });
+                        break;
+                    }
+                    const fetchMs = Date.now() - fetchStarted;
 
-                                if (totalScraped % 50 === 0) {
-                                    console.log(`Scraped ${totalScraped} properties...`);
-                                }
-                            } catch (error) {
-                                console.error(`Error processing estate ${estate.hash_id}:`, error);
-                            }
-                        }
+                    const estates = response._embedded?.estates || [];
+                    if (estates.length === 0) {
+                        break;
+                    }
 
-                        // Check if there are more pages
-                        if (page * response.per_page >= response.result_size) {
-                            hasMore = false;
-                        } else {
-                            page++;
+                    // Optionally fetch detail for more info
+                    // await rateLimiter.wait();
+                    // const detail = await fetchEstateDetail(estate.hash_id);
+                    const parseStarted = Date.now();
+                    const batch: PropertyData[] = [];
+                    const batchErrors: string[] = [];
+                    for (const estate of estates.slice(0, maxProperties - totalScraped)) {
+                        try {
+                            batch.push(parseEstate(estate, propType, transType));
+                        } catch (error) {
+                            console.error(`Error processing estate ${estate.hash_id}:`, error);
+                            batchErrors.push(`Parsing estate ${estate.hash_id}: ${error}`);
                         }
-                    } catch (error) {
-                        console.error(`Error fetching page ${page}:`, error);
+                    }
+                    const parseMs = Date.now() - parseStarted;
+
+                    // One bulk upsert per result page
+                    const writeStarted = Date.now();
+                    const { failed, errors } = await saveProperties(batch, batch.length || 1, jobId);
+                    const writeMs = Date.now() - writeStarted;
+
+                    // Also push to Apify dataset
+                    await Actor.pushData(batch);
+
+                    totalScraped += batch.length;
+                    errorsCount += batchErrors.length + failed;
+                    saveFailed = saveFailed || failed > 0;
+                    await reportScrapingBatch(jobId, {
+                        rows: batch.length,
+                        errors_count: batchErrors.length + failed,
+                        errors: [...batchErrors, ...errors],
+                        fetch_ms: fetchMs,
+                        parse_ms: parseMs,
+                        write_ms: writeMs,
+                    });
+                    console.log(`Scraped ${totalScraped} properties...`);
+
+                    // Check if there are more pages
+                    if (page * response.per_page >= response.result_size) {
                         hasMore = false;
+                    } else {
+                        page++;
                     }
                 }
             }
@@ -209,6 +238,12 @@ async function main() {
 
     console.log(`\nScraping complete. Total properties scraped: ${totalScraped}`);
 
+    // Runs cut short (maxProperties, a failed page or an unsaved batch) didn't
+    // record the whole inventory, so they must not count towards deactivating
+    // unseen listings
+    const complete = !fetchFailed && !saveFailed && totalScraped < maxProperties;
+    await finishScrapingJob(jobId, complete ? 'completed' : 'partial', errorsCount);
+
     await Actor.exit();
 }
 
@@ -0,0 +1,219 @@
+"""
+Admission control and load shedding.
+
+Every API route belongs to a priority class: cheap reads (detail lookups,
+single predictions, job bookkeeping) > lists (search, map, facets, ingest)
+> analytics aggregations > batch jobs (batch and full re-scoring,
+exports, seeding). Routes not listed in ``ROUTE_CLASSES`` are cheap.
+
+At most one request per pooled database connection runs at a time, and
+each class is capped at its share of the pool, so heatmaps or a
+``predict-all`` can never take the connections detail lookups need.
+Requests over the limit wait in priority order until their class
+deadline; when a class queue is full or the deadline passes the request
+is shed with 503 and ``Retry-After``. Limits are per worker process, like
+the pool they protect.
+"""
+
+import asyncio
+import math
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Deque, List, Optional
+
+from starlette.routing import Match
+
+from app.config import get_settings
+from app.metrics import ADMISSION_IN_FLIGHT, ADMISSION_QUEUE_DEPTH, ADMISSION_REJECTIONS, ADMISSION_WAIT
+
+settings = get_settings()
+
+API = settings.api_v1_prefix
+
+# "METHOD route template" -> priority class
+ROUTE_CLASSES = {
+    f"GET {API}/properties": 'list',
+    f"GET {API}/properties/map": 'list',
+    f"GET {API}/properties/facets": 'list',
+    f"GET {API}/properties/changes": 'list',
+    f"GET {API}/properties/{{property_id}}/similar": 'list',
+    f"POST {API}/properties/bulk": 'list',
+    f"POST {API}/properties/cadastral/queue": 'list',
+    f"POST {API}/properties/cadastral": 'list',
+    f"GET {API}/saved-searches/{{search_id}}/matches": 'list',
+    f"POST {API}/chatbot/recommend": 'list',
+    f"GET {API}/analytics/price-trends": 'analytics',
+    f"GET {API}/analytics/market-overview": 'analytics',
+    f"GET {API}/analytics/heatmap": 'analytics',
+    f"GET {API}/analytics/cities": 'analytics',
+    f"GET {API}/analytics/room-distribution": 'analytics',
+    f"GET {API}/analytics/assessment-distribution": 'analytics',
+    f"POST {API}/predictions/batch": 'batch',
+    f"POST {API}/predictions/predict-all": 'batch',
+    f"GET {API}/export/properties": 'batch',
+    f"POST {API}/seed/sample-data": 'batch',
+    f"POST {API}/scraping/sweep": 'batch',
+}
+
+# Never queued: long-lived streams (no pooled connection) and probes
+EXEMPT_PREFIXES = (f"{API}/stream/", "/health", "/metrics", "/docs", "/redoc", "/openapi.json")
+
+
+@dataclass
+class PriorityClass:
+    name: str
+    priority: int  # lower runs first
+    limit: int
+    queue_size: int
+    timeout: float
+    running: int = 0
+    waiters: Deque[asyncio.Future] = field(default_factory=deque)
+
+
+class AdmissionController:
+    """Priority admission over ``capacity`` slots; lives on the event loop."""
+
+    def __init__(self, capacity: int, classes: List[PriorityClass]):
+        self.capacity = capacity
+        self.running = 0
+        self.classes = {c.name: c for c in classes}
+        self._by_priority = sorted(classes, key=lambda c: c.priority)
+
+    @classmethod
+    def from_settings(cls) -> "AdmissionController":
+        capacity = settings.db_pool_size + settings.db_max_overflow
+
+        def share(fraction: float) -> int:
+            return max(1, min(capacity, math.floor(capacity * fraction)))
+
+        timeout = settings.admission_queue_timeout_seconds
+        return cls(capacity, [
+            PriorityClass('cheap', 0, capacity, settings.admission_queue_size, timeout),
+            PriorityClass('list', 1, share(settings.admission_list_share), settings.admission_queue_size, timeout),
+            PriorityClass(
+                'analytics', 2, share(settings.admission_analytics_share), settings.admission_queue_size, timeout
+            ),
+            PriorityClass(
+                'batch', 3, share(settings.admission_batch_share), settings.admission_queue_size,
+                settings.admission_batch_queue_timeout_seconds
+            ),
+        ])
+
+    def _can_run(self, pclass: PriorityClass) -> bool:
+        return self.running < self.capacity and pclass.running < pclass.limit
+
+    def _start(self, pclass: PriorityClass):
+        self.running += 1
+        pclass.running += 1
+        ADMISSION_IN_FLIGHT.set(pclass.running, pclass.name)
+
+    def _queued_ahead(self, pclass: PriorityClass) -> bool:
+        # Waiters of this or a higher priority class go first, unless their
+        # own class cap is what holds them back
+        return any(
+            c.waiters and c.running < c.limit
+            for c in self._by_priority if c.priority <= pclass.priority
+        )
+
+    async def acquire(self, name: str) -> Optional[str]:
+        """Wait for a slot; returns None once admitted, else the rejection reason."""
+        pclass = self.classes[name]
+        if self._can_run(pclass) and not self._queued_ahead(pclass):
+            self._start(pclass)
+            ADMISSION_WAIT.observe(0.0, name)
+            return None
+        if len(pclass.waiters) >= pclass.queue_size:
+            return 'queue_full'
+
+        waiter = asyncio.get_running_loop().create_future()
+        pclass.waiters.append(waiter)
+        ADMISSION_QUEUE_DEPTH.set(len(pclass.waiters), name)
+        self._dispatch()
+        started = time.perf_counter()
+        try:
+            await asyncio.wait_for(waiter, pclass.timeout)
+        except asyncio.TimeoutError:
+            return 'timeout'
+        except asyncio.CancelledError:
+            # Client went away; hand back a slot granted in the meantime
+            if waiter.done() and not waiter.cancelled():
+                self.release(name)
+            raise
+        finally:
+            if waiter in pclass.waiters:
+                pclass.waiters.remove(waiter)
+            ADMISSION_QUEUE_DEPTH.set(len(pclass.waiters), name)
+        ADMISSION_WAIT.observe(time.perf_counter() - started, name)
+        return None
+
+    def release(self, name: str):
+        pclass = self.classes[name]
+        self.running -= 1
+        pclass.running -= 1
+        ADMISSION_IN_FLIGHT.set(pclass.running, pclass.name)
+        self._dispatch()
+
+    def _dispatch(self):
+        # Highest priority first; a class at its own cap doesn't block the
+        # classes below it from using the remaining slots
+        for pclass in self._by_priority:
+            while pclass.waiters and self._can_run(pclass):
+                waiter = pclass.waiters.popleft()
+                if waiter.done():
+                    continue
+                self._start(pclass)
+                waiter.set_result(None)
+            if self.running >= self.capacity:
+                return
+
+
+class AdmissionMiddleware:
+    """Admits each API request through ``controller`` by its route's class."""
+
+    def __init__(self, app, router, controller: Optional[AdmissionController] = None):
+        self.app = app
+        self.router = router
+        self.controller = controller or AdmissionController.from_settings()
+
+    def classify(self, scope) -> Optional[str]:
+        if scope['path'].startswith(EXEMPT_PREFIXES) or scope['method'] == 'OPTIONS':
+            return None
+        for route in self.router.routes:
+            match, _ = route.matches(scope)
+            if match == Match.FULL:
+                return ROUTE_CLASSES.get(f"{scope['method']} {route.path}", 'cheap')
+        return None
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+        name = self.classify(scope)
+        if name is None:
+            await self.app(scope, receive, send)
+            return
+
+        rejected = await self.controller.acquire(name)
+        if rejected:
+            ADMISSION_REJECTIONS.inc(name, rejected)
+            await self._reject(send, self.controller.classes[name])
+            return
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.controller.release(name)
+
+    @staticmethod
+    async def _reject(send, pclass: PriorityClass):
+        body = b'{"detail":"Server busy, retry later"}'
+        await send({
+            'type': 'http.response.start',
+            'status': 503,
+            'headers': [
+                (b'content-type', b'application/json'),
+                (b'content-length', str(len(body)).encode()),
+                (b'retry-after', str(max(1, math.ceil(pclass.timeout))).encode()),
+            ],
+        })
+        await send({'type': 'http.response.body', 'body': body})
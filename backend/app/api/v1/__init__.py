@@ -1,8 +1,14 @@
 from fastapi import APIRouter
-from app.api.v1.endpoints import properties, predictions, analytics
+from app.api.v1.endpoints import properties, predictions, analytics, saved_searches, stream, export, scraping, seed, chatbot
 
 api_router = APIRouter()
 
 api_router.include_router(properties.router, prefix="/properties", tags=["properties"])
 api_router.include_router(predictions.router, prefix="/predictions", tags=["predictions"])
 api_router.include_router(analytics.router, prefix="/analytics", tags=["analytics"])
+api_router.include_router(saved_searches.router, prefix="/saved-searches", tags=["saved-searches"])
+api_router.include_router(stream.router, prefix="/stream", tags=["stream"])
+api_router.include_router(export.router, prefix="/export", tags=["export"])
+api_router.include_router(scraping.router, prefix="/scraping", tags=["scraping"])
+api_router.include_router(seed.router, prefix="/seed", tags=["seed"])
+api_router.include_router(chatbot.router, prefix="/chatbot", tags=["chatbot"])
@@ -1,55 +1,93 @@
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
-from typing import Optional, List
+from typing import Optional, List, Literal
+from datetime import date, datetime, timedelta, timezone
 
-from app.database import get_db
+from app.config import get_settings
+from app.database import get_read_db
+from app.http_cache import data_version_validators
 from app.services.property_service import PropertyService
-from app.schemas.property import AnalyticsPriceTrend, MarketOverview, HeatmapData
+from app.services.analytics_snapshot import get_listing_snapshot
+from app.services.price_index_service import PriceIndexService
+from app.schemas.property import (
+    AnalyticsPriceTrend, PriceTrendSeries, MarketOverview, HeatmapData
+)
 
 router = APIRouter()
+settings = get_settings()
 
+_validators = data_version_validators(settings.http_cache_analytics_max_age, snapshot=True)
 
-@router.get("/price-trends", response_model=List[AnalyticsPriceTrend])
+
+@router.get("/price-trends", response_model=PriceTrendSeries, dependencies=[Depends(_validators)])
 def get_price_trends(
     city: Optional[str] = None,
     property_type: Optional[str] = None,
-    days: int = Query(90, ge=7, le=365),
-    db: Session = Depends(get_db)
+    transaction_type: str = "sale",
+    days: int = Query(90, ge=7, le=3650),
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    granularity: Literal["day", "week"] = "day",
+    db: Session = Depends(get_read_db)
 ):
-    """Get price trends over time."""
-    service = PropertyService(db)
-    trends = service.get_price_trends(
+    """
+    Get price index series over time.
+
+    Built from the price_history rollup, so repricing of existing listings
+    is reflected. ``start_date``/``end_date`` override ``days``.
+    """
+    # The rollup is bucketed by UTC day
+    end_date = end_date or datetime.now(timezone.utc).date()
+    start_date = start_date or end_date - timedelta(days=days)
+    if start_date > end_date:
+        raise HTTPException(status_code=400, detail="start_date must not be after end_date")
+
+    service = PriceIndexService(db)
+    trends = service.get_series(
+        transaction_type=transaction_type,
         city=city,
         property_type=property_type,
-        days=days
+        start_date=start_date,
+        end_date=end_date,
+        granularity=granularity
     )
 
-    return [
-        AnalyticsPriceTrend(
-            date=t['date'],
-            avg_price=t['avg_price'],
-            avg_price_per_sqm=t['avg_price_per_sqm'],
-            count=t['count']
-        )
-        for t in trends
-    ]
+    return PriceTrendSeries(
+        trends=[AnalyticsPriceTrend(**t) for t in trends],
+        granularity=granularity,
+        start_date=start_date,
+        end_date=end_date,
+        period_days=(end_date - start_date).days
+    )
 
 
-@router.get("/market-overview", response_model=MarketOverview)
-def get_market_overview(db: Session = Depends(get_db)):
+@router.get("/market-overview", response_model=MarketOverview, dependencies=[Depends(_validators)])
+def get_market_overview(
+    dedupe: bool = Query(False, description="Hide cross-source duplicates"),
+    db: Session = Depends(get_read_db)
+):
     """Get overall market statistics."""
+    snapshot = get_listing_snapshot()
+    if snapshot:
+        return snapshot.market_overview(dedupe=dedupe)
+
     service = PropertyService(db)
-    return service.get_market_overview()
+    return service.get_market_overview(dedupe=dedupe)
 
 
-@router.get("/heatmap", response_model=List[HeatmapData])
+@router.get("/heatmap", response_model=List[HeatmapData], dependencies=[Depends(_validators)])
 def get_heatmap_data(
     city: Optional[str] = None,
-    db: Session = Depends(get_db)
+    dedupe: bool = Query(False, description="Hide cross-source duplicates"),
+    db: Session = Depends(get_read_db)
 ):
     """Get price heatmap data for visualization."""
-    service = PropertyService(db)
-    data = service.get_heatmap_data(city=city)
+    snapshot = get_listing_snapshot()
+    if snapshot:
+        data = snapshot.heatmap(city=city, dedupe=dedupe)
+    else:
+        service = PropertyService(db)
+        data = service.get_heatmap_data(city=city, dedupe=dedupe)
 
     return [
         HeatmapData(lat=d['lat'], lng=d['lng'], intensity=d['intensity'])
@@ -57,9 +95,16 @@ def get_heatmap_data(
     ]
 
 
-@router.get("/cities")
-def get_cities(db: Session = Depends(get_db)):
+@router.get("/cities", dependencies=[Depends(_validators)])
+def get_cities(
+    dedupe: bool = Query(False, description="Hide cross-source duplicates"),
+    db: Session = Depends(get_read_db)
+):
     """Get list of cities with property counts."""
+    snapshot = get_listing_snapshot()
+    if snapshot:
+        return snapshot.cities_with_counts(dedupe=dedupe)
+
     from app.models.property import Property
     from sqlalchemy import func
 
@@ -68,7 +113,8 @@ def get_cities(db: Session = Depends(get_db)):
         func.count(Property.id).label('count')
     ).filter(
         Property.is_active == True,
-        Property.address_city.isnot(None)
+        Property.address_city.isnot(None),
+        *([Property.canonical_id.is_(None)] if dedupe else [])
     ).group_by(
         Property.address_city
     ).order_by(
@@ -81,12 +127,17 @@ def get_cities(db: Session = Depends(get_db)):
     ]
 
 
-@router.get("/room-distribution")
+@router.get("/room-distribution", dependencies=[Depends(_validators)])
 def get_room_distribution(
     city: Optional[str] = None,
-    db: Session = Depends(get_db)
+    dedupe: bool = Query(False, description="Hide cross-source duplicates"),
+    db: Session = Depends(get_read_db)
 ):
     """Get distribution of room types."""
+    snapshot = get_listing_snapshot()
+    if snapshot:
+        return snapshot.room_distribution(city=city, dedupe=dedupe)
+
     from app.models.property import Property
     from sqlalchemy import func
 
@@ -101,6 +152,8 @@ def get_room_distribution(
 
     if city:
         query = query.filter(Property.address_city.ilike(f"%{city}%"))
+    if dedupe:
+        query = query.filter(Property.canonical_id.is_(None))
 
     results = query.group_by(Property.rooms).order_by(Property.rooms).all()
 
@@ -114,12 +167,17 @@ def get_room_distribution(
     ]
 
 
-@router.get("/assessment-distribution")
+@router.get("/assessment-distribution", dependencies=[Depends(_validators)])
 def get_assessment_distribution(
     city: Optional[str] = None,
-    db: Session = Depends(get_db)
+    dedupe: bool = Query(False, description="Hide cross-source duplicates"),
+    db: Session = Depends(get_read_db)
 ):
     """Get distribution of price assessments."""
+    snapshot = get_listing_snapshot()
+    if snapshot:
+        return snapshot.assessment_distribution(city=city, dedupe=dedupe)
+
     from app.models.property import Property
     from sqlalchemy import func
 
@@ -133,6 +191,8 @@ def get_assessment_distribution(
 
     if city:
         query = query.filter(Property.address_city.ilike(f"%{city}%"))
+    if dedupe:
+        query = query.filter(Property.canonical_id.is_(None))
 
     results = query.group_by(Property.price_assessment).all()
 
@@ -140,3 +200,12 @@ def get_assessment_distribution(
         {"assessment": r.price_assessment, "count": r.count}
         for r in results
     ]
+
+
+@router.get("/snapshot")
+def get_snapshot_status():
+    """Get status of the in-process analytics snapshot."""
+    snapshot = get_listing_snapshot()
+    if not snapshot:
+        return {"enabled": settings.analytics_snapshot_enabled, "loaded": False}
+    return {"enabled": True, "loaded": True, **snapshot.stats()}
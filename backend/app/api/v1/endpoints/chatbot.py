@@ -0,0 +1,20 @@
+from fastapi import APIRouter, Depends
+from sqlalchemy.orm import Session
+
+from app.database import get_db
+from app.services.recommendation_service import RecommendationService
+from app.schemas.property import ChatbotRequest, ChatbotResponse
+
+router = APIRouter()
+
+
+@router.post("/recommend", response_model=ChatbotResponse)
+def recommend(request: ChatbotRequest, db: Session = Depends(get_db)):
+    """
+    Listings for a free-text request in Czech or English.
+
+    The message is compiled by a rule-based parser (no language model)
+    into filters and ranking preferences; below-market listings rank first.
+    """
+    service = RecommendationService(db)
+    return service.recommend(request.message, limit=request.limit)
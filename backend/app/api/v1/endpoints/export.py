@@ -0,0 +1,43 @@
+from datetime import datetime
+from typing import Literal, Optional
+
+from fastapi import APIRouter, Depends, Header, Request
+from fastapi.responses import StreamingResponse
+
+from app.api.v1.endpoints.properties import get_property_filter
+from app.database import read_engine_for
+from app.schemas.property import PropertyFilter
+from app.services.export_service import FORMATS, PropertyExporter, compress, negotiate_encoding
+
+router = APIRouter()
+
+
+@router.get("/properties")
+def export_properties(
+    request: Request,
+    format: Literal["ndjson", "csv", "parquet"] = "ndjson",
+    filters: PropertyFilter = Depends(get_property_filter),
+    accept_encoding: Optional[str] = Header(None)
+):
+    """
+    Stream all active listings matching the filters.
+
+    NDJSON and CSV are compressed with zstd or gzip when the client
+    accepts it; Parquet uses zstd-compressed row groups.
+    """
+    encoding = negotiate_encoding(accept_encoding, format)
+    exporter = PropertyExporter(filters, bind=read_engine_for(request))
+
+    filename = f"properties-{datetime.utcnow():%Y%m%d-%H%M%S}.{format}"
+    headers = {
+        "Content-Disposition": f'attachment; filename="{filename}"',
+        "Vary": "Accept-Encoding",
+    }
+    if encoding:
+        headers["Content-Encoding"] = encoding
+
+    return StreamingResponse(
+        compress(exporter.stream(format), encoding),
+        media_type=FORMATS[format],
+        headers=headers
+    )
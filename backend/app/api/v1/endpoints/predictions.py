@@ -4,15 +4,14 @@ from typing import List
 
 from app.database import get_db
 from app.services.property_service import PropertyService
+from app.services.saved_search_service import match_saved_searches
 from app.ml.predictor import PricePredictor
 from app.schemas.property import (
     PredictionRequest, PredictionResponse,
     BatchPredictionRequest, BatchPredictionResponse
 )
-from app.config import get_settings
 
 router = APIRouter()
-settings = get_settings()
 
 # Initialize predictor (singleton)
 predictor = PricePredictor()
@@ -43,6 +42,7 @@ def batch_predict(
     updated = 0
     failed = 0
     errors = []
+    rescored = []
 
     for property_id in request.property_ids:
         try:
@@ -74,26 +74,14 @@ def batch_predict(
 
             result = predictor.predict(features)
 
-            # Calculate assessment
+            # The database derives the deviation and assessment bucket
             if property.price:
-                actual_price = float(property.price)
-                predicted_price = result['predicted_price']
-                deviation = (actual_price - predicted_price) / predicted_price
-
-                if deviation < settings.price_below_market_threshold:
-                    assessment = 'below_market'
-                elif deviation > settings.price_above_market_threshold:
-                    assessment = 'above_market'
-                else:
-                    assessment = 'at_market'
-
                 service.update_prediction(
                     property_id=property_id,
-                    predicted_price=predicted_price,
-                    confidence=result['confidence'],
-                    assessment=assessment,
-                    deviation_percent=deviation * 100
+                    predicted_price=result['predicted_price'],
+                    confidence=result['confidence']
                 )
+                rescored.append(property_id)
                 updated += 1
             else:
                 errors.append(f"Property {property_id} has no price")
@@ -103,6 +91,9 @@ def batch_predict(
             errors.append(f"Property {property_id}: {str(e)}")
             failed += 1
 
+    # Re-scored listings may now be below market for someone's search
+    match_saved_searches(db, rescored)
+
     return BatchPredictionResponse(
         updated_count=updated,
         failed_count=failed,
@@ -1,22 +1,37 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 from sqlalchemy.orm import Session
 from sqlalchemy import func
-from geoalchemy2.functions import ST_X, ST_Y
-from typing import Optional
+from typing import Optional, List, Literal
 from decimal import Decimal
 
-from app.database import get_db
-from app.services.property_service import PropertyService
+from app.config import get_settings
+from app.database import get_db, get_read_db
+from app.http_cache import data_version_validators, property_validators
+from app.responses import FastJSONResponse
+from app.services.property_service import (
+    SORTABLE_FIELDS, PropertyService, encode_change_token, decode_change_token
+)
+from app.services.analytics_snapshot import get_listing_snapshot
+from app.services.cadastral_service import CadastralService
+from app.services.cache import TTLCache, filter_cache_key
+from app.services.saved_search_service import match_saved_searches
+from app.services.scraping_service import ScrapingService
 from app.schemas.property import (
     PropertyResponse, PropertyListResponse, PropertyMapResponse,
-    PropertyFilter, PropertyCreate, PropertyUpdate, Coordinates
+    PropertyFilter, PropertyCreate, PropertyUpdate, Coordinates,
+    PropertyBulkUpsertResponse, PropertyFacetsResponse, SimilarPropertyResponse,
+    PropertyChange, PropertyChangesResponse,
+    CadastralQueueResponse, CadastralResult, CadastralResultsResponse
 )
 
 router = APIRouter()
+settings = get_settings()
 
+_facets_cache = TTLCache(maxsize=1024, ttl=settings.facets_cache_ttl_seconds)
+_list_validators = data_version_validators(settings.http_cache_list_max_age)
 
-@router.get("", response_model=PropertyListResponse)
-def get_properties(
+
+def get_property_filter(
     source: Optional[str] = None,
     property_type: Optional[str] = None,
     transaction_type: Optional[str] = None,
@@ -30,14 +45,10 @@ def get_properties(
     has_balcony: Optional[bool] = None,
     has_parking: Optional[bool] = None,
     has_elevator: Optional[bool] = None,
-    page: int = Query(1, ge=1),
-    page_size: int = Query(20, ge=1, le=100),
-    sort_by: str = "scraped_at",
-    sort_order: str = "desc",
-    db: Session = Depends(get_db)
-):
-    service = PropertyService(db)
-    filters = PropertyFilter(
+    dedupe: bool = Query(False, description="Hide cross-source duplicates")
+) -> PropertyFilter:
+    """Listing filters shared by the list, facets and export endpoints."""
+    return PropertyFilter(
         source=source,
         property_type=property_type,
         transaction_type=transaction_type,
@@ -50,35 +61,49 @@ def get_properties(
         price_assessment=price_assessment,
         has_balcony=has_balcony,
         has_parking=has_parking,
-        has_elevator=has_elevator
+        has_elevator=has_elevator,
+        dedupe=dedupe or None
     )
 
-    properties, total = service.get_properties(
-        filters=filters,
-        page=page,
-        page_size=page_size,
-        sort_by=sort_by,
-        sort_order=sort_order
-    )
+
+@router.get("", response_model=PropertyListResponse, dependencies=[Depends(_list_validators)])
+def get_properties(
+    filters: PropertyFilter = Depends(get_property_filter),
+    page: int = Query(1, ge=1),
+    page_size: int = Query(20, ge=1, le=100),
+    sort_by: str = Query("scraped_at", description=f"One of: {', '.join(SORTABLE_FIELDS)}"),
+    sort_order: Literal["asc", "desc"] = "desc",
+    view: Literal["list", "full"] = Query(
+        "list", description="list leaves out description and images; full includes them"
+    ),
+    db: Session = Depends(get_read_db)
+):
+    service = PropertyService(db)
+
+    try:
+        items, total = service.get_property_rows(
+            filters=filters,
+            page=page,
+            page_size=page_size,
+            sort_by=sort_by,
+            sort_order=sort_order,
+            full=view == "full"
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
     pages = (total + page_size - 1) // page_size
 
-    # Convert to response with coordinates
-    items = []
-    for prop in properties:
-        response = property_to_response_with_coords(prop, db)
-        items.append(response)
-
-    return PropertyListResponse(
-        items=items,
-        total=total,
-        page=page,
-        page_size=page_size,
-        pages=pages
-    )
+    return FastJSONResponse({
+        'items': items,
+        'total': total,
+        'page': page,
+        'page_size': page_size,
+        'pages': pages
+    })
 
 
-@router.get("/map", response_model=PropertyMapResponse)
+@router.get("/map", response_model=PropertyMapResponse, dependencies=[Depends(_list_validators)])
 def get_properties_for_map(
     south: float = Query(..., description="South bound latitude"),
     west: float = Query(..., description="West bound longitude"),
@@ -89,8 +114,9 @@ def get_properties_for_map(
     price_min: Optional[Decimal] = None,
     price_max: Optional[Decimal] = None,
     price_assessment: Optional[str] = None,
+    dedupe: bool = False,
     limit: int = Query(500, ge=1, le=1000),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     service = PropertyService(db)
     filters = PropertyFilter(
@@ -98,7 +124,8 @@ def get_properties_for_map(
         transaction_type=transaction_type,
         price_min=price_min,
         price_max=price_max,
-        price_assessment=price_assessment
+        price_assessment=price_assessment,
+        dedupe=dedupe or None
     )
 
     items = service.get_properties_in_bounds(
@@ -110,11 +137,91 @@ def get_properties_for_map(
         limit=limit
     )
 
-    return PropertyMapResponse(items=items, total=len(items))
+    return FastJSONResponse({'items': items, 'total': len(items)})
+
+
+@router.get("/facets", response_model=PropertyFacetsResponse)
+def get_property_facets(
+    response: Response,
+    filters: PropertyFilter = Depends(get_property_filter),
+    db: Session = Depends(get_read_db)
+):
+    """Facet counts and price/area histograms for the current filter."""
+    response.headers["Cache-Control"] = f"public, max-age={settings.facets_cache_ttl_seconds}"
+
+    snapshot = get_listing_snapshot()
+    if snapshot:
+        return snapshot.facets(filters)
+
+    service = PropertyService(db)
+    return _facets_cache.get_or_compute(
+        filter_cache_key(filters),
+        lambda: service.get_facets(filters)
+    )
+
 
+@router.get("/changes", response_model=PropertyChangesResponse)
+def get_property_changes(
+    since: Optional[str] = Query(None, description="next_token from the previous call; omit for a full sync"),
+    limit: int = Query(500, ge=1, le=settings.changes_max_page_size),
+    # Primary only: the feed's horizon comes from the primary's open transactions
+    db: Session = Depends(get_db)
+):
+    """
+    Listings changed since a continuation token, in (updated_at, id) order.
+
+    Covers new, updated, repriced, re-scored and deactivated listings.
+    Keep calling with ``next_token`` while ``has_more`` is true, then poll
+    with the last token.
+    """
+    position = None
+    if since:
+        try:
+            position = decode_change_token(since)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
 
-@router.get("/{property_id}", response_model=PropertyResponse)
-def get_property(property_id: int, db: Session = Depends(get_db)):
+    service = PropertyService(db)
+    rows, has_more = service.get_changes(
+        since=position,
+        limit=limit,
+        settle_seconds=settings.changes_settle_seconds
+    )
+
+    next_token = since
+    if rows:
+        next_token = encode_change_token(rows[-1].updated_at, rows[-1].id)
+
+    return PropertyChangesResponse(
+        items=[PropertyChange(**row._asdict()) for row in rows],
+        next_token=next_token,
+        has_more=has_more
+    )
+
+
+@router.post("/cadastral/queue", response_model=CadastralQueueResponse)
+def take_cadastral_queue(
+    limit: int = Query(100, ge=1, le=settings.cadastral_queue_max_items),
+    db: Session = Depends(get_db)
+):
+    """
+    Active listings still lacking cadastral data, in coordinate (geohash) order.
+
+    Every listing returned needs an upstream lookup; ones in an already
+    looked-up cell are filled from the parcel cache instead, which is why
+    this is a POST. Post the answers, including misses, to
+    ``POST /properties/cadastral``.
+    """
+    items, filled = CadastralService(db).get_queue(limit)
+    return {'items': items, 'filled_from_cache': filled}
+
+
+@router.get(
+    "/{property_id}",
+    response_model=PropertyResponse,
+    dependencies=[Depends(property_validators)]
+)
+def get_property(property_id: int, db: Session = Depends(get_read_db)):
     service = PropertyService(db)
     property = service.get_property(property_id)
 
@@ -124,25 +231,33 @@ def get_property(property_id: int, db: Session = Depends(get_db)):
     return property_to_response_with_coords(property, db)
 
 
-@router.get("/{property_id}/similar", response_model=list[PropertyResponse])
+@router.get(
+    "/{property_id}/similar",
+    response_model=list[SimilarPropertyResponse],
+    dependencies=[Depends(_list_validators)]
+)
 def get_similar_properties(
     property_id: int,
     radius_km: float = Query(5.0, ge=0.5, le=50),
     limit: int = Query(10, ge=1, le=50),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
+    """Most similar listings nearby, ranked by weighted feature distance."""
     service = PropertyService(db)
-    properties = service.get_similar_properties(
+    similar = service.get_similar_properties(
         property_id=property_id,
         radius_km=radius_km,
         limit=limit
     )
 
-    return [property_to_response_with_coords(p, db) for p in properties]
+    return FastJSONResponse([
+        {**item, 'similarity_score': score, 'distance_km': round(km, 2)}
+        for item, score, km in similar
+    ])
 
 
-@router.get("/{property_id}/price-history")
-def get_price_history(property_id: int, db: Session = Depends(get_db)):
+@router.get("/{property_id}/price-history", dependencies=[Depends(_list_validators)])
+def get_price_history(property_id: int, db: Session = Depends(get_read_db)):
     service = PropertyService(db)
     property = service.get_property(property_id)
 
@@ -159,13 +274,65 @@ def get_price_history(property_id: int, db: Session = Depends(get_db)):
     ]
 
 
+def require_running_job(db: Session, job_id: Optional[int]):
+    """Reject ingest stamped with an unknown or already finished scraping job."""
+    if job_id is None:
+        return
+    job = ScrapingService(db).get_job(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Scraping job not found")
+    if job.status != 'running':
+        raise HTTPException(status_code=409, detail=f"Scraping job {job_id} is {job.status}")
+
+
 @router.post("", response_model=PropertyResponse)
-def create_property(property_data: PropertyCreate, db: Session = Depends(get_db)):
+def create_property(
+    property_data: PropertyCreate,
+    job_id: Optional[int] = Query(None, description="Scraping job that saw this listing"),
+    db: Session = Depends(get_db)
+):
+    require_running_job(db, job_id)
     service = PropertyService(db)
-    property = service.create_property(property_data)
+    property = service.create_property(property_data, job_id=job_id)
+    match_saved_searches(db, [property.id])
     return property_to_response_with_coords(property, db)
 
 
+@router.post("/bulk", response_model=PropertyBulkUpsertResponse)
+def bulk_upsert_properties(
+    properties: List[PropertyCreate],
+    job_id: Optional[int] = Query(None, description="Scraping job that saw these listings"),
+    db: Session = Depends(get_db)
+):
+    """Insert or update a batch of scraped properties in one round trip."""
+    if len(properties) > settings.bulk_upsert_max_items:
+        raise HTTPException(
+            status_code=413,
+            detail=f"At most {settings.bulk_upsert_max_items} properties per batch"
+        )
+
+    require_running_job(db, job_id)
+    service = PropertyService(db)
+    result = service.bulk_upsert_properties(properties, job_id=job_id)
+    match_saved_searches(db, result.pop('property_ids', []))
+    return result
+
+
+@router.post("/cadastral", response_model=CadastralResultsResponse)
+def save_cadastral_results(
+    results: List[CadastralResult],
+    db: Session = Depends(get_db)
+):
+    """Store a batch of parcel lookups and cache them for their neighbours."""
+    if len(results) > settings.bulk_upsert_max_items:
+        raise HTTPException(
+            status_code=413,
+            detail=f"At most {settings.bulk_upsert_max_items} results per batch"
+        )
+
+    return CadastralService(db).save_results(results)
+
+
 @router.patch("/{property_id}", response_model=PropertyResponse)
 def update_property(
     property_id: int,
@@ -178,23 +345,15 @@ def update_property(
     if not property:
         raise HTTPException(status_code=404, detail="Property not found")
 
+    match_saved_searches(db, [property.id])
     return property_to_response_with_coords(property, db)
 
 
 def property_to_response_with_coords(property, db: Session) -> PropertyResponse:
     """Convert property model to response with coordinates extracted."""
-    from app.models.property import Property
-
     coordinates = None
-    if property.coordinates:
-        # Query to extract lat/lng from geometry
-        result = db.query(
-            ST_Y(Property.coordinates).label('lat'),
-            ST_X(Property.coordinates).label('lng')
-        ).filter(Property.id == property.id).first()
-
-        if result and result.lat and result.lng:
-            coordinates = Coordinates(lat=result.lat, lng=result.lng)
+    if property.lat is not None and property.lng is not None:
+        coordinates = Coordinates(lat=property.lat, lng=property.lng)
 
     return PropertyResponse(
         id=property.id,
@@ -0,0 +1,108 @@
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+
+from app.config import get_settings
+from app.database import get_db
+from app.services.property_service import decode_change_token, encode_change_token
+from app.services.saved_search_service import SavedSearchService
+from app.schemas.property import (
+    BoundingBox, PropertyFilter, SavedSearchCreate, SavedSearchResponse,
+    SavedSearchMatchItem, SavedSearchMatchFeed
+)
+
+router = APIRouter()
+settings = get_settings()
+
+
+@router.post("", response_model=SavedSearchResponse)
+def create_saved_search(data: SavedSearchCreate, db: Session = Depends(get_db)):
+    """Save a listing filter; matching listings are recorded as they are ingested."""
+    if data.bounds and (
+        data.bounds.south > data.bounds.north or data.bounds.west > data.bounds.east
+    ):
+        raise HTTPException(status_code=422, detail="Invalid bounding box")
+
+    service = SavedSearchService(db)
+    return saved_search_to_response(service.create_search(data))
+
+
+@router.get("", response_model=list[SavedSearchResponse])
+def get_saved_searches(db: Session = Depends(get_db)):
+    service = SavedSearchService(db)
+    return [saved_search_to_response(s) for s in service.get_searches()]
+
+
+@router.get("/{search_id}", response_model=SavedSearchResponse)
+def get_saved_search(search_id: int, db: Session = Depends(get_db)):
+    service = SavedSearchService(db)
+    search = service.get_search(search_id)
+
+    if not search:
+        raise HTTPException(status_code=404, detail="Saved search not found")
+
+    return saved_search_to_response(search)
+
+
+@router.delete("/{search_id}", status_code=204)
+def delete_saved_search(search_id: int, db: Session = Depends(get_db)):
+    service = SavedSearchService(db)
+    if not service.delete_search(search_id):
+        raise HTTPException(status_code=404, detail="Saved search not found")
+
+
+@router.get("/{search_id}/matches", response_model=SavedSearchMatchFeed)
+def get_saved_search_matches(
+    search_id: int,
+    after: Optional[str] = Query(None, description="next_token from the previous call; omit to start over"),
+    limit: int = Query(50, ge=1, le=500),
+    # Primary only: the feed's horizon comes from the primary's open transactions
+    db: Session = Depends(get_db)
+):
+    """
+    Feed of listings that matched the search, oldest first.
+
+    Pass the returned ``next_token`` on the next call to get only newer
+    matches.
+    """
+    position = None
+    if after:
+        try:
+            position = decode_change_token(after)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+    service = SavedSearchService(db)
+    if not service.get_search(search_id):
+        raise HTTPException(status_code=404, detail="Saved search not found")
+
+    matches = service.get_matches(
+        search_id, after=position, limit=limit, settle_seconds=settings.changes_settle_seconds
+    )
+    items = [SavedSearchMatchItem(**m._asdict()) for m in matches]
+
+    return SavedSearchMatchFeed(
+        items=items,
+        next_token=encode_change_token(items[-1].matched_at, items[-1].id) if items else after
+    )
+
+
+def saved_search_to_response(search) -> SavedSearchResponse:
+    bounds = None
+    if search.bounds_south is not None:
+        bounds = BoundingBox(
+            south=search.bounds_south,
+            west=search.bounds_west,
+            north=search.bounds_north,
+            east=search.bounds_east
+        )
+
+    return SavedSearchResponse(
+        id=search.id,
+        name=search.name,
+        filters=PropertyFilter.model_validate(search.filters or {}),
+        bounds=bounds,
+        is_active=search.is_active,
+        created_at=search.created_at
+    )
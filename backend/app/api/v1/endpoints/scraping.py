@@ -0,0 +1,124 @@
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+
+from app.database import get_db
+from app.services.scraping_service import ScrapingService
+from app.schemas.property import (
+    ScrapingJobCreate, ScrapingJobFinish, ScrapingJobResponse,
+    ScrapingBatchReport, ScrapingJobBatchResponse, ScrapingSourceSeries
+)
+
+router = APIRouter()
+
+
+@router.post("/jobs", response_model=ScrapingJobResponse)
+def start_scraping_job(data: ScrapingJobCreate, db: Session = Depends(get_db)):
+    """Open a scraper run; pass its id as ``job_id`` when saving listings."""
+    service = ScrapingService(db)
+    return service.start_job(data.source)
+
+
+@router.get("/jobs", response_model=List[ScrapingJobResponse])
+def get_scraping_jobs(
+    source: Optional[str] = None,
+    status: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=500),
+    db: Session = Depends(get_db)
+):
+    """Latest scraper runs, newest first, with throughput and phase totals."""
+    service = ScrapingService(db)
+    return service.get_jobs(source=source, status=status, limit=limit)
+
+
+@router.get("/jobs/series", response_model=List[ScrapingSourceSeries])
+def get_scraping_series(
+    source: Optional[str] = None,
+    days: int = Query(30, ge=1, le=365),
+    db: Session = Depends(get_db)
+):
+    """Per-source time series of run throughput and mean batch timings."""
+    service = ScrapingService(db)
+    return service.get_series(days=days, source=source)
+
+
+@router.get("/jobs/{job_id}", response_model=ScrapingJobResponse)
+def get_scraping_job(job_id: int, db: Session = Depends(get_db)):
+    service = ScrapingService(db)
+    job = service.get_job(job_id)
+
+    if not job:
+        raise HTTPException(status_code=404, detail="Scraping job not found")
+
+    return job
+
+
+@router.get("/jobs/{job_id}/batches", response_model=List[ScrapingJobBatchResponse])
+def get_scraping_job_batches(
+    job_id: int,
+    after_id: int = Query(0, ge=0),
+    limit: int = Query(500, ge=1, le=5000),
+    db: Session = Depends(get_db)
+):
+    """Per-batch timings of a run in report order; poll with ``after_id`` while it runs."""
+    service = ScrapingService(db)
+    if not service.get_job(job_id):
+        raise HTTPException(status_code=404, detail="Scraping job not found")
+
+    return service.get_batches(job_id, after_id=after_id, limit=limit)
+
+
+@router.post("/jobs/{job_id}/batches", response_model=ScrapingJobResponse)
+def report_scraping_batch(
+    job_id: int,
+    report: ScrapingBatchReport,
+    db: Session = Depends(get_db)
+):
+    """Record fetch/parse/write timings and error samples of one scraper batch."""
+    service = ScrapingService(db)
+    job = service.get_job(job_id)
+
+    if not job:
+        raise HTTPException(status_code=404, detail="Scraping job not found")
+    if job.status != 'running':
+        raise HTTPException(status_code=409, detail=f"Scraping job {job_id} is {job.status}")
+
+    return service.record_batch(job, report)
+
+
+@router.post("/jobs/{job_id}/finish", response_model=ScrapingJobResponse)
+def finish_scraping_job(
+    job_id: int,
+    data: ScrapingJobFinish,
+    db: Session = Depends(get_db)
+):
+    """Close a run; a completed run also deactivates listings its source no longer lists."""
+    service = ScrapingService(db)
+    job = service.get_job(job_id)
+
+    if not job:
+        raise HTTPException(status_code=404, detail="Scraping job not found")
+    if job.status != 'running':
+        raise HTTPException(status_code=409, detail=f"Scraping job {job_id} is {job.status}")
+
+    return service.finish_job(
+        job,
+        status=data.status,
+        errors_count=data.errors_count,
+        error_message=data.error_message
+    )
+
+
+@router.post("/sweep")
+def deactivate_stale_listings(
+    source: str,
+    missed_runs: int = Query(3, ge=1, le=50),
+    db: Session = Depends(get_db)
+):
+    """Deactivate listings of a source unseen for ``missed_runs`` completed runs."""
+    service = ScrapingService(db)
+    return {
+        "source": source,
+        "deactivated": service.deactivate_stale(source, missed_runs)
+    }
@@ -0,0 +1,45 @@
+from fastapi import APIRouter, Depends, HTTPException, Response
+from sqlalchemy.orm import Session
+
+from app.database import get_db
+from app.services.seed_service import SeedService
+from app.schemas.property import SeedRequest, SeedStatus
+from app.config import get_settings
+
+router = APIRouter()
+settings = get_settings()
+
+
+@router.get("/status", response_model=SeedStatus)
+def get_seed_status(db: Session = Depends(get_db)):
+    """Listing counts from table statistics and the progress of the latest seeding run."""
+    return SeedService(db).status()
+
+
+@router.post("/sample-data", response_model=SeedStatus)
+def seed_sample_data(request: SeedRequest, response: Response, db: Session = Depends(get_db)):
+    """
+    Generate and bulk-load sample listings with price history.
+
+    Small runs (up to ``seed_sync_max_count``) answer once loaded; larger
+    ones answer 202 right away and report progress via ``GET /seed/status``.
+    """
+    count = request.count or settings.seed_default_count
+    if count > settings.seed_max_count:
+        raise HTTPException(status_code=400, detail=f"count must be at most {settings.seed_max_count}")
+
+    service = SeedService(db)
+    run = service.start(
+        count,
+        clear_existing=request.clear_existing,
+        run_predictions=request.run_predictions,
+        seed=request.seed,
+        wait=count <= settings.seed_sync_max_count
+    )
+    if run is None:
+        raise HTTPException(status_code=409, detail="A seeding run is already in progress")
+    if run.status == 'failed':
+        raise HTTPException(status_code=500, detail=f"Seeding failed: {run.error}")
+    if run.status == 'running':
+        response.status_code = 202
+    return service.status()
@@ -0,0 +1,71 @@
+import asyncio
+from typing import Optional
+
+from fastapi import APIRouter, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+
+from app.config import get_settings
+from app.services.listing_stream import EVENT_TYPES, get_listing_stream
+
+router = APIRouter()
+settings = get_settings()
+
+
+@router.get("/listings")
+async def stream_listings(
+    request: Request,
+    types: Optional[str] = Query(
+        None, description="Comma-separated event types: created, repriced, deactivated, rescored"
+    )
+):
+    """
+    Server-Sent Events stream of listing changes.
+
+    Each event carries id, price, assessment and lat/lng. A ``resync``
+    event means events were dropped (slow client or listener reconnect)
+    and the client should refetch.
+    """
+    selected = None
+    if types:
+        selected = {t.strip() for t in types.split(",") if t.strip()}
+        unknown = selected - EVENT_TYPES
+        if unknown:
+            raise HTTPException(status_code=422, detail=f"Unknown event types: {', '.join(sorted(unknown))}")
+
+    stream = get_listing_stream()
+    if len(stream.subscribers) >= settings.stream_max_clients:
+        raise HTTPException(status_code=503, detail="Too many stream clients")
+
+    subscriber = stream.subscribe(selected)
+
+    async def frames():
+        try:
+            yield b"retry: 5000\n\n"
+            while True:
+                try:
+                    frame = await asyncio.wait_for(
+                        subscriber.queue.get(), timeout=settings.stream_keepalive_seconds
+                    )
+                except asyncio.TimeoutError:
+                    if await request.is_disconnected():
+                        break
+                    frame = b": keepalive\n\n"
+                yield frame
+        finally:
+            stream.unsubscribe(subscriber)
+
+    return StreamingResponse(
+        frames(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@router.get("/status")
+def stream_status():
+    stream = get_listing_stream()
+    return {
+        "connected": stream.connected,
+        "clients": len(stream.subscribers),
+        "events_received": stream.events_received
+    }
@@ -0,0 +1,53 @@
+"""
+Backfill distance_to_center for existing properties.
+
+Usage:
+    python -m app.commands.backfill_distance_to_center [--batch-size N] [--all]
+"""
+
+import argparse
+import logging
+
+from app.config import get_settings
+from app.database import SessionLocal
+from app.services.distance_service import backfill_distance_to_center
+
+logger = logging.getLogger(__name__)
+
+
+def main():
+    settings = get_settings()
+
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=settings.distance_backfill_batch_size,
+        help="Rows per SELECT/UPDATE chunk"
+    )
+    parser.add_argument(
+        "--all",
+        action="store_true",
+        help="Recompute rows that already have a distance (e.g. after adding city centers)"
+    )
+    args = parser.parse_args()
+
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+
+    db = SessionLocal()
+    try:
+        updated = backfill_distance_to_center(
+            db,
+            batch_size=args.batch_size,
+            only_missing=not args.all
+        )
+        logger.info(f"Backfill finished, {updated} properties updated")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""
+Check that every supported listing sort is served by an index.
+
+Usage:
+    python -m app.commands.check_sort_plans [--page-size 20]
+
+EXPLAINs the list page query for each field in SORTABLE_FIELDS, in both
+directions, unfiltered and filtered by the most common transaction and
+property type. Exits non-zero if any plan sorts rows or reads the
+properties table without an index. Run it against a realistically sized,
+analyzed database (e.g. the benchmark dataset); on a near-empty table the
+planner rightly prefers a sequential scan.
+"""
+
+import argparse
+import json
+import logging
+import sys
+from typing import Iterator, List, Tuple
+
+from sqlalchemy import func, text
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.orm import Session
+
+from app.database import SessionLocal
+from app.models.property import Property
+from app.schemas.property import PropertyFilter
+from app.services.property_service import SORTABLE_FIELDS, PropertyService
+
+logger = logging.getLogger(__name__)
+
+INDEX_SCANS = ('Index Scan', 'Index Only Scan')
+SORTS = ('Sort', 'Incremental Sort')
+
+
+def _nodes(plan: dict) -> Iterator[dict]:
+    yield plan
+    for child in plan.get('Plans', []):
+        yield from _nodes(child)
+
+
+def plan_problems(plan: dict) -> List[str]:
+    """What keeps a plan from being an index-ordered read of properties."""
+    problems = []
+    for node in _nodes(plan):
+        if node['Node Type'] in SORTS:
+            problems.append(f"{node['Node Type']} on {', '.join(node.get('Sort Key', []))}")
+        elif node.get('Relation Name') == 'properties' and node['Node Type'] not in INDEX_SCANS:
+            problems.append(f"{node['Node Type']} on properties")
+    return problems
+
+
+def sort_plans(db: Session, page_size: int = 20) -> Iterator[Tuple[str, List[str]]]:
+    """(sort description, plan problems) for every supported sort and segment variant."""
+    segment = db.query(Property.transaction_type, Property.property_type).filter(
+        Property.is_active == True,
+        Property.transaction_type.isnot(None),
+        Property.property_type.isnot(None)
+    ).group_by(Property.transaction_type, Property.property_type).order_by(
+        func.count().desc()
+    ).first()
+    variants = {'unfiltered': PropertyFilter()}
+    if segment:
+        variants[f"{segment.transaction_type}/{segment.property_type}"] = PropertyFilter(
+            transaction_type=segment.transaction_type, property_type=segment.property_type
+        )
+
+    service = PropertyService(db)
+    for sort_by in SORTABLE_FIELDS:
+        for sort_order in ('desc', 'asc'):
+            for label, filters in variants.items():
+                query = service.page_query(filters, 1, page_size, sort_by, sort_order)
+                sql = str(query.statement.compile(
+                    dialect=postgresql.dialect(), compile_kwargs={'literal_binds': True}
+                ))
+                result = db.execute(text(f"EXPLAIN (FORMAT JSON) {sql}")).scalar()
+                plan = (json.loads(result) if isinstance(result, str) else result)[0]['Plan']
+                yield f"{sort_by} {sort_order} ({label})", plan_problems(plan)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--page-size", type=int, default=20, help="Rows per page (LIMIT)")
+    args = parser.parse_args()
+
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+
+    db = SessionLocal()
+    failures = 0
+    try:
+        for sort, problems in sort_plans(db, args.page_size):
+            if problems:
+                failures += 1
+                logger.error(f"{sort}: {'; '.join(problems)}")
+            else:
+                logger.info(f"{sort}: index scan")
+    finally:
+        db.close()
+
+    if failures:
+        logger.error(f"{failures} sort plans are not index scans")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
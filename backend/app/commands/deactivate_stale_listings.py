@@ -0,0 +1,50 @@
+"""
+Deactivate listings that recent scraper runs no longer see.
+
+Usage:
+    python -m app.commands.deactivate_stale_listings [--source sreality] [--missed-runs 3]
+
+The sweep also runs whenever a scraping job completes; use this to catch
+up or to apply a different window by hand.
+"""
+
+import argparse
+import logging
+
+from app.config import get_settings
+from app.database import SessionLocal
+from app.services.scraping_service import ScrapingService
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--source", help="Only sweep this source (default: all sources with jobs)")
+    parser.add_argument(
+        "--missed-runs",
+        type=int,
+        default=settings.stale_listing_missed_runs or 3,
+        help="Completed runs a listing must be missing from"
+    )
+    args = parser.parse_args()
+
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+
+    db = SessionLocal()
+    try:
+        service = ScrapingService(db)
+        sources = [args.source] if args.source else service.get_sources()
+        for source in sources:
+            deactivated = service.deactivate_stale(source, args.missed_runs)
+            logger.info(f"{source}: {deactivated} listings deactivated")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,41 @@
+"""
+Cluster cross-source duplicate listings and store their canonical ids.
+
+Usage:
+    python -m app.commands.dedupe_properties
+
+Meant to run nightly after the scrapers; ``dedupe=true`` on the listing,
+map and analytics endpoints reads the result.
+"""
+
+import argparse
+import logging
+
+from app.database import SessionLocal
+from app.services.dedup_service import DedupService
+
+logger = logging.getLogger(__name__)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.parse_args()
+
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+
+    db = SessionLocal()
+    try:
+        result = DedupService(db).run()
+        logger.info(
+            f"{result['duplicates']} of {result['listings']} listings are duplicates "
+            f"({result['changed']} changed)"
+        )
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
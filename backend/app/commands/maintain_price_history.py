@@ -0,0 +1,66 @@
+"""
+Maintain price_history partitions: create upcoming months, compact old
+months to one row per property and drop months past retention.
+
+Usage:
+    python -m app.commands.maintain_price_history
+
+Run daily or monthly from cron, after app.commands.refresh_price_index so
+the rollup has seen every intra-month price change before compaction.
+"""
+
+import argparse
+import logging
+
+from app.config import get_settings
+from app.database import SessionLocal
+from app.services.price_history_service import PriceHistoryMaintenance
+
+logger = logging.getLogger(__name__)
+
+
+def main():
+    settings = get_settings()
+
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument(
+        "--months-ahead",
+        type=int,
+        default=settings.price_history_partitions_ahead,
+        help="Monthly partitions to create ahead of the current month"
+    )
+    parser.add_argument(
+        "--compact-after",
+        type=int,
+        default=settings.price_history_compact_after_months,
+        help="Compact months older than this many months"
+    )
+    parser.add_argument(
+        "--retention",
+        type=int,
+        default=settings.price_history_retention_months,
+        help="Drop months older than this many months (0 keeps everything)"
+    )
+    args = parser.parse_args()
+
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+
+    db = SessionLocal()
+    try:
+        maintenance = PriceHistoryMaintenance(db)
+        maintenance.ensure_partitions(months_ahead=args.months_ahead)
+        compacted = maintenance.compact(older_than_months=args.compact_after)
+        dropped = maintenance.drop_expired(retention_months=args.retention)
+        logger.info(
+            f"price_history maintenance finished: {len(compacted)} partitions compacted, "
+            f"{len(dropped)} dropped"
+        )
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+"""
+Apply the configured price assessment thresholds to every listing.
+
+Usage:
+    python -m app.commands.rebucket_price_assessments
+
+Copies PRICE_BELOW_MARKET_THRESHOLD / PRICE_ABOVE_MARKET_THRESHOLD into
+the database and re-buckets all listings in one UPDATE; no predictions
+are re-run. Run it after changing either setting.
+"""
+
+import argparse
+import logging
+
+from app.config import get_settings
+from app.database import SessionLocal
+from app.services.property_service import PropertyService
+
+logger = logging.getLogger(__name__)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.parse_args()
+
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+
+    settings = get_settings()
+    db = SessionLocal()
+    try:
+        changed = PropertyService(db).rebucket_price_assessments(
+            settings.price_below_market_threshold, settings.price_above_market_threshold
+        )
+        logger.info(
+            f"Thresholds {settings.price_below_market_threshold:+.2%} / "
+            f"{settings.price_above_market_threshold:+.2%} applied, {changed} listings re-bucketed"
+        )
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
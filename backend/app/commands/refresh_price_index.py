@@ -0,0 +1,41 @@
+"""
+Bring the price_index_daily rollup up to date.
+
+Usage:
+    python -m app.commands.refresh_price_index [--since YYYY-MM-DD] [--until YYYY-MM-DD]
+
+Run periodically (e.g. hourly from cron); without --since it resumes from
+the last rolled-up day.
+"""
+
+import argparse
+import logging
+from datetime import date
+
+from app.database import SessionLocal
+from app.services.price_index_service import PriceIndexService
+
+logger = logging.getLogger(__name__)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--since", type=date.fromisoformat, help="First day to (re)compute")
+    parser.add_argument("--until", type=date.fromisoformat, help="Last day to compute (default: today)")
+    args = parser.parse_args()
+
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+
+    db = SessionLocal()
+    try:
+        days = PriceIndexService(db).refresh(since=args.since, until=args.until)
+        logger.info(f"Price index refresh finished, {days} days computed")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+"""
+Load generated sample listings with price history and predictions.
+
+Usage:
+    python -m app.commands.seed_sample_data [--rows 100000] [--seed 42] [--clear] [--no-predictions]
+
+Same as POST /api/v1/seed/sample-data, without the API's size limits.
+Listings are stored with source 'sample'; --clear removes earlier sample
+listings first and never touches scraped data.
+"""
+
+import argparse
+import logging
+import sys
+
+from app.config import get_settings
+from app.database import SessionLocal
+from app.services.seed_service import SeedService
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=settings.seed_default_count, help="Listings to generate")
+    parser.add_argument("--seed", type=int, help="RNG seed (default: random)")
+    parser.add_argument("--clear", action="store_true", help="Remove earlier sample listings first")
+    parser.add_argument("--no-predictions", action="store_true", help="Leave listings unscored")
+    args = parser.parse_args()
+
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+
+    db = SessionLocal()
+    try:
+        run = SeedService(db).start(
+            args.rows,
+            clear_existing=args.clear,
+            run_predictions=not args.no_predictions,
+            seed=args.seed
+        )
+        if run.status != 'completed':
+            sys.exit(1)
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,17 +1,148 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker, declarative_base
+import itertools
+import logging
+import random
+import threading
+import time
+from typing import Optional
+
+from fastapi import Request
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session, sessionmaker, declarative_base
+from sqlalchemy.sql import Select
+from sqlalchemy.sql.elements import TextClause
+from sqlalchemy.sql.dml import UpdateBase
+from starlette.datastructures import MutableHeaders
+
 from app.config import get_settings
+from app.metrics import DB_QUERY_LATENCY, DB_SLOW_QUERIES, DB_READ_SESSIONS, current_query_stats
 
+logger = logging.getLogger(__name__)
 settings = get_settings()
 
 engine = create_engine(
     settings.database_url,
     pool_pre_ping=True,
-    pool_size=10,
-    max_overflow=20
+    pool_size=settings.db_pool_size,
+    max_overflow=settings.db_max_overflow
 )
 
+# Streaming replicas for read-only endpoints (see get_read_db)
+replica_engines = [
+    create_engine(
+        url,
+        pool_pre_ping=True,
+        pool_size=settings.db_pool_size,
+        max_overflow=settings.db_max_overflow,
+        connect_args={'connect_timeout': 3}
+    )
+    for url in settings.database_replica_urls_list
+]
+
+# Set on responses to writes; the client reads from the primary until then
+READ_PRIMARY_COOKIE = 'db_read_primary_until'
+
+# Seconds the replica is behind the primary; 0 when caught up, and on a
+# server that is not in recovery (a plain second database as a stand-in).
+# NULL when no WAL receiver is streaming: a replica cut off from its
+# upstream has replayed everything it received, so receive = replay
+# would read as "caught up" forever. The receiver status is only visible
+# to pg_read_all_stats; without it a running receiver counts as streaming.
+_LAG_SQL = text("""
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN NOT EXISTS (
+            SELECT 1 FROM pg_stat_wal_receiver WHERE COALESCE(status, 'streaming') = 'streaming'
+        ) THEN NULL
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+    END
+""")
+
+
+def _is_write(clause) -> bool:
+    if clause is None:
+        return False
+    if isinstance(clause, UpdateBase):
+        return True
+    if isinstance(clause, Select):
+        return clause._for_update_arg is not None
+    if isinstance(clause, TextClause):
+        return not clause.text.lstrip().upper().startswith(('SELECT', 'WITH', 'SHOW', 'EXPLAIN'))
+    return False
+
+
+class RoutingSession(Session):
+    """
+    Session that reads from ``read_engine`` and writes to the primary.
+
+    The first flush or DML statement moves the whole session to the
+    primary, so a request never reads around its own writes.
+    """
+
+    def __init__(self, *args, read_engine: Optional[Engine] = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.read_engine = read_engine
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is not None:
+            return bind
+        if self.read_engine is not None:
+            if not self._flushing and not _is_write(clause):
+                return self.read_engine
+            self.read_engine = None
+        return engine
+
+
+class ReplicaSelector:
+    """
+    Round-robin over the replicas whose replay lag is acceptable.
+
+    Lag is measured at most every ``replica_lag_check_seconds`` per replica
+    by whichever request gets there first; the others use the last reading.
+    An unreachable replica, or one whose WAL receiver is not streaming,
+    counts as lagging until the next check.
+    """
+
+    def __init__(self, engines):
+        self.engines = engines
+        self._lag = {id(e): (float('-inf'), None) for e in engines}
+        self._checking = {id(e): threading.Lock() for e in engines}
+        self._turn = itertools.count()
+
+    def lag(self, replica: Engine) -> Optional[float]:
+        checked_at, lag = self._lag[id(replica)]
+        lock = self._checking[id(replica)]
+        if time.monotonic() - checked_at >= settings.replica_lag_check_seconds and lock.acquire(blocking=False):
+            try:
+                with replica.connect() as conn:
+                    lag = conn.execute(_LAG_SQL).scalar()
+                if lag is None:
+                    logger.warning(f"Replica {replica.url.host} is not streaming from the primary")
+                else:
+                    lag = float(lag)
+            except Exception as e:
+                logger.warning(f"Replica {replica.url.host} unavailable: {e}")
+                lag = None
+            finally:
+                self._lag[id(replica)] = (time.monotonic(), lag)
+                lock.release()
+        return lag
+
+    def choose(self) -> Optional[Engine]:
+        usable = [
+            replica for replica in self.engines
+            if (lag := self.lag(replica)) is not None and lag <= settings.replica_max_lag_seconds
+        ]
+        if not usable:
+            return None
+        return usable[next(self._turn) % len(usable)]
+
+
+replicas = ReplicaSelector(replica_engines)
+
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+ReadSessionLocal = sessionmaker(class_=RoutingSession, autocommit=False, autoflush=False, bind=engine)
 
 Base = declarative_base()
 
@@ -22,3 +153,126 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+def read_engine_for(request: Request) -> Engine:
+    """Replica to serve a read-only request from, or the primary."""
+    if not replica_engines:
+        return engine
+    try:
+        sticky = float(request.cookies.get(READ_PRIMARY_COOKIE, 0)) > time.time()
+    except ValueError:
+        sticky = False
+    if sticky:
+        DB_READ_SESSIONS.inc('primary_after_write')
+        return engine
+    replica = replicas.choose()
+    if replica is None:
+        DB_READ_SESSIONS.inc('primary_replica_lag')
+        return engine
+    DB_READ_SESSIONS.inc('replica')
+    return replica
+
+
+def get_read_db(request: Request):
+    """
+    Session for read-only endpoints: reads go to a replica when one is
+    configured and fresh enough, writes (and everything after them) to
+    the primary.
+    """
+    db = ReadSessionLocal(read_engine=read_engine_for(request))
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+class ReadYourWritesMiddleware:
+    """
+    Marks clients that just wrote so their next reads skip the replicas.
+
+    The mark is an HttpOnly cookie, so it only comes back on cross-origin
+    requests that send credentials (the frontend's fetches use
+    ``credentials: 'include'``, CORS allows them) from a same-site origin.
+    """
+
+    SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http' or scope['method'] in self.SAFE_METHODS:
+            await self.app(scope, receive, send)
+            return
+
+        async def send_with_cookie(message):
+            if message['type'] == 'http.response.start' and message['status'] < 400:
+                window = settings.read_your_writes_seconds
+                headers = MutableHeaders(scope=message)
+                headers.append(
+                    'Set-Cookie',
+                    f"{READ_PRIMARY_COOKIE}={time.time() + window:.0f}; Max-Age={window}; "
+                    "Path=/; HttpOnly; SameSite=Lax"
+                )
+            await send(message)
+
+        await self.app(scope, receive, send_with_cookie)
+
+
+def _start_query_timer(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('query_started', []).append(time.perf_counter())
+
+
+def _record_query(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info['query_started'].pop()
+    elapsed = time.perf_counter() - started
+    DB_QUERY_LATENCY.observe(elapsed)
+
+    stats = current_query_stats.get()
+    if stats is not None:
+        stats.count += 1
+        stats.seconds += elapsed
+
+    if settings.slow_query_ms and elapsed * 1000 >= settings.slow_query_ms:
+        DB_SLOW_QUERIES.inc()
+        plan = None
+        if not executemany and random.random() < settings.slow_query_explain_sample_rate:
+            plan = _explain(cursor, statement, parameters)
+        logger.warning(
+            f"Slow query ({elapsed * 1000:.0f} ms): {statement}"
+            + (f"\n{plan}" if plan else "")
+        )
+
+
+def _discard_query_timer(context):
+    # A failed statement never reaches after_cursor_execute
+    if context.connection is not None and context.connection.info.get('query_started'):
+        context.connection.info['query_started'].pop()
+
+
+def _explain(cursor, statement: str, parameters):
+    """Plan of a statement, taken on its connection inside a savepoint."""
+    # EXPLAIN without ANALYZE plans the statement but never runs it
+    if not statement.lstrip().upper().startswith(('SELECT', 'WITH', 'UPDATE', 'DELETE', 'INSERT')):
+        return None
+    explain_cursor = cursor.connection.cursor()
+    try:
+        explain_cursor.execute("SAVEPOINT slow_query_explain")
+        try:
+            explain_cursor.execute("EXPLAIN " + statement, parameters)
+            return '\n'.join(row[0] for row in explain_cursor.fetchall())
+        finally:
+            explain_cursor.execute("ROLLBACK TO SAVEPOINT slow_query_explain")
+            explain_cursor.execute("RELEASE SAVEPOINT slow_query_explain")
+    except Exception as e:
+        logger.debug(f"Could not EXPLAIN slow query: {e}")
+        return None
+    finally:
+        explain_cursor.close()
+
+
+for _engine in (engine, *replica_engines):
+    event.listen(_engine, "before_cursor_execute", _start_query_timer)
+    event.listen(_engine, "after_cursor_execute", _record_query)
+    event.listen(_engine, "handle_error", _discard_query_timer)
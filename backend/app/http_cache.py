@@ -0,0 +1,165 @@
+"""
+HTTP cache validators and conditional GET.
+
+Property detail responses carry an ETag and Last-Modified from the
+listing's ``updated_at``. List, map and analytics responses carry an ETag
+from the ``listing_data_version`` sequence, which every transaction that
+wrote the listing tables bumps as it commits, combined with the route and
+query string.
+
+The validators are computed by a route dependency before the endpoint
+runs: a matching ``If-None-Match`` (or ``If-Modified-Since``) costs one
+primary-key or sequence read and answers 304 without querying or
+serialising the payload. ``CacheHeadersMiddleware`` adds the validators
+and the route's ``Cache-Control`` to successful responses.
+"""
+
+import hashlib
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Callable, Optional
+
+from fastapi import Depends, HTTPException, Request
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+from starlette.datastructures import MutableHeaders
+
+from app.config import get_settings
+from app.database import engine, get_read_db
+from app.models.property import Property
+from app.services.analytics_snapshot import get_listing_snapshot
+
+settings = get_settings()
+
+_STATE_KEY = 'cache_headers'
+
+# Version last read from the database and when this process first saw it
+_seen_lock = threading.Lock()
+_seen_version: Optional[int] = None
+_seen_at = 0.0
+
+
+def cache_control(max_age: int) -> str:
+    return f"public, max-age={max_age}" if max_age > 0 else "no-cache"
+
+
+def get_data_version(db: Session) -> Optional[int]:
+    """
+    Current listing data version, or None while it has not settled.
+
+    The version moves during a writer's commit, however long the writer
+    ran, but just before its rows become visible, and replicas replay
+    them later still. A version newer than ``http_cache_settle_seconds``
+    may still be hiding rows, so no validator is issued for it yet;
+    otherwise a client could be told "not modified" for data it never
+    received.
+    """
+    global _seen_version, _seen_at
+    # Always from the primary: replicas only see sequence advances in
+    # WAL-logged batches
+    version = db.execute(
+        text("SELECT last_value FROM listing_data_version"), bind_arguments={'bind': engine}
+    ).scalar()
+    now = time.monotonic()
+    with _seen_lock:
+        if version != _seen_version:
+            _seen_version, _seen_at = version, now
+        settled = now - _seen_at >= settings.http_cache_settle_seconds
+    return version if settled else None
+
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    # Weak comparison (RFC 9110 13.1.2)
+    tags = [tag.strip() for tag in if_none_match.split(',')]
+    return '*' in tags or any(tag.removeprefix('W/') == etag.removeprefix('W/') for tag in tags)
+
+
+def _not_modified(request: Request, etag: str, last_modified: Optional[datetime] = None) -> bool:
+    if_none_match = request.headers.get('if-none-match')
+    if if_none_match is not None:
+        return _etag_matches(if_none_match, etag)
+    if_modified_since = request.headers.get('if-modified-since')
+    if if_modified_since and last_modified is not None:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        if since.tzinfo is None:
+            since = since.replace(tzinfo=timezone.utc)
+        return last_modified.replace(microsecond=0) <= since
+    return False
+
+
+def _validate(request: Request, headers: dict, last_modified: Optional[datetime] = None):
+    """Answer 304 if the client's copy is current, else stash the headers for the response."""
+    if _not_modified(request, headers['ETag'], last_modified):
+        raise HTTPException(status_code=304, headers=headers)
+    setattr(request.state, _STATE_KEY, headers)
+
+
+def data_version_validators(max_age: int, snapshot: bool = False) -> Callable:
+    """
+    Route dependency validating against the data version and the request URL.
+
+    ``snapshot`` routes may answer from the in-process analytics snapshot,
+    whose version is folded into the ETag as well.
+    """
+    def dependency(request: Request, db: Session = Depends(get_read_db)):
+        if request.method not in ('GET', 'HEAD'):
+            return
+        version = get_data_version(db)
+        if version is None:
+            setattr(request.state, _STATE_KEY, {'Cache-Control': 'no-cache'})
+            return
+        listing_snapshot = get_listing_snapshot() if snapshot else None
+        if listing_snapshot:
+            version = f"{version}.{listing_snapshot.version}"
+        query = '&'.join(sorted(request.url.query.split('&'))) if request.url.query else ''
+        digest = hashlib.blake2b(f"{request.url.path}?{query}".encode(), digest_size=8).hexdigest()
+        _validate(request, {
+            'ETag': f'W/"{version}-{digest}"',
+            'Cache-Control': cache_control(max_age),
+        })
+
+    return dependency
+
+
+def property_validators(request: Request, property_id: int, db: Session = Depends(get_read_db)):
+    """Route dependency validating a single listing against its ``updated_at``."""
+    if request.method not in ('GET', 'HEAD'):
+        return
+    updated_at = db.query(Property.updated_at).filter(Property.id == property_id).scalar()
+    if updated_at is None:
+        # Unknown listing (the route answers 404) or never stamped
+        return
+    updated_at = updated_at.astimezone(timezone.utc)
+    _validate(request, {
+        'ETag': f'W/"{property_id}-{int(updated_at.timestamp() * 1_000_000)}"',
+        'Last-Modified': format_datetime(updated_at, usegmt=True),
+        'Cache-Control': cache_control(settings.http_cache_detail_max_age),
+    }, last_modified=updated_at)
+
+
+class CacheHeadersMiddleware:
+    """Adds the validators a route dependency computed to its 200 response."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http' or scope['method'] not in ('GET', 'HEAD'):
+            await self.app(scope, receive, send)
+            return
+
+        async def send_with_validators(message):
+            if message['type'] == 'http.response.start' and message['status'] == 200:
+                cache_headers = scope.get('state', {}).get(_STATE_KEY)
+                if cache_headers:
+                    headers = MutableHeaders(scope=message)
+                    for name, value in cache_headers.items():
+                        headers[name] = value
+            await send(message)
+
+        await self.app(scope, receive, send_with_validators)
@@ -1,10 +1,21 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
 from contextlib import asynccontextmanager
 import logging
 
+from sqlalchemy.exc import SQLAlchemyError
+
+from app.admission import AdmissionMiddleware
 from app.config import get_settings
 from app.api.v1 import api_router
+from app.database import SessionLocal, ReadYourWritesMiddleware, replica_engines
+from app.http_cache import CacheHeadersMiddleware
+from app.metrics import RequestMetricsMiddleware, render_metrics
+from app.services.analytics_snapshot import start_snapshot_refresher, stop_snapshot_refresher
+from app.services.similarity_service import start_similarity_refresher, stop_similarity_refresher
+from app.services.listing_stream import stop_listing_stream
+from app.services.property_service import PropertyService
 
 # Configure logging
 logging.basicConfig(
@@ -16,11 +27,43 @@ logger = logging.getLogger(__name__)
 settings = get_settings()
 
 
+def check_price_assessment_thresholds():
+    """Warn when the configured thresholds differ from the database's copy."""
+    configured = (settings.price_below_market_threshold, settings.price_above_market_threshold)
+    db = SessionLocal()
+    try:
+        stored = PropertyService(db).get_price_assessment_thresholds()
+    except SQLAlchemyError as e:
+        logger.warning(f"Could not read price assessment thresholds: {e}")
+        return
+    finally:
+        db.close()
+
+    if stored is None:
+        logger.warning(
+            "No price assessment thresholds in the database; "
+            "run python -m app.commands.rebucket_price_assessments"
+        )
+    # The table keeps four decimal places
+    elif any(round(c, 4) != round(s, 4) for c, s in zip(configured, stored)):
+        logger.warning(
+            f"Configured price assessment thresholds {configured[0]:+.2%} / {configured[1]:+.2%} "
+            f"differ from the {stored[0]:+.2%} / {stored[1]:+.2%} listings are bucketed with; "
+            f"run python -m app.commands.rebucket_price_assessments to apply them"
+        )
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Application lifespan handler."""
     logger.info("Starting Czech Real Estate Analyzer API")
+    check_price_assessment_thresholds()
+    start_snapshot_refresher(SessionLocal)
+    start_similarity_refresher(SessionLocal)
     yield
+    await stop_listing_stream()
+    stop_similarity_refresher()
+    stop_snapshot_refresher()
     logger.info("Shutting down Czech Real Estate Analyzer API")
 
 
@@ -31,6 +74,11 @@ app = FastAPI(
     lifespan=lifespan
 )
 
+# Per-class concurrency limits and load shedding; inside CORS so 503s
+# still carry the CORS headers
+if settings.admission_enabled:
+    app.add_middleware(AdmissionMiddleware, router=app.router)
+
 # CORS middleware - origins configurable via CORS_ORIGINS environment variable
 app.add_middleware(
     CORSMiddleware,
@@ -41,6 +89,18 @@ app.add_middleware(
 )
 logger.info(f"CORS enabled for origins: {settings.cors_origins_list}")
 
+# Clients that just wrote read from the primary for a while
+if replica_engines:
+    app.add_middleware(ReadYourWritesMiddleware)
+    logger.info(f"Routing read-only endpoints to {len(replica_engines)} replica(s)")
+
+# ETag / Last-Modified / Cache-Control from the routes' conditional GET checks
+app.add_middleware(CacheHeadersMiddleware)
+
+# Per-route latency and query counts (and timing headers in debug mode)
+if settings.metrics_enabled or settings.debug:
+    app.add_middleware(RequestMetricsMiddleware, timing_headers=settings.debug)
+
 # Include API routes
 app.include_router(api_router, prefix=settings.api_v1_prefix)
 
@@ -58,3 +118,10 @@ def root():
 @app.get("/health")
 def health_check():
     return {"status": "healthy"}
+
+
+if settings.metrics_enabled:
+    @app.get("/metrics", include_in_schema=False)
+    def metrics():
+        """Prometheus metrics of this worker process."""
+        return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
@@ -0,0 +1,228 @@
+import bisect
+import threading
+import time
+from collections import defaultdict
+from contextvars import ContextVar
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from starlette.datastructures import MutableHeaders
+
+# Prometheus text exposition for this process. Each worker process keeps
+# its own registry, so scrape every worker (or run a single one).
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 250)
+
+
+def _escape(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels_text(names: Sequence[str], values: Sequence[str], extra: str = '') -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+class Counter:
+    def __init__(self, name: str, documentation: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self._values: Dict[Tuple[str, ...], float] = defaultdict(float)
+        if not self.labels:
+            self._values[()] = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, *label_values: str, amount: float = 1.0):
+        with self._lock:
+            self._values[label_values] += amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            items = sorted(self._values.items())
+        for label_values, value in items:
+            lines.append(f"{self.name}{_labels_text(self.labels, label_values)} {value:g}")
+        return lines
+
+
+class Gauge:
+    def __init__(self, name: str, documentation: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self._values: Dict[Tuple[str, ...], float] = defaultdict(float)
+        if not self.labels:
+            self._values[()] = 0.0
+        self._lock = threading.Lock()
+
+    def set(self, value: float, *label_values: str):
+        with self._lock:
+            self._values[label_values] = value
+
+    def inc(self, *label_values: str, amount: float = 1.0):
+        with self._lock:
+            self._values[label_values] += amount
+
+    def dec(self, *label_values: str, amount: float = 1.0):
+        self.inc(*label_values, amount=-amount)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} gauge"]
+        with self._lock:
+            items = sorted(self._values.items())
+        for label_values, value in items:
+            lines.append(f"{self.name}{_labels_text(self.labels, label_values)} {value:g}")
+        return lines
+
+
+class Histogram:
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labels: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self.buckets = tuple(buckets)
+        # Per label set: [non-cumulative bucket counts..., +Inf count], sum
+        self._series: Dict[Tuple[str, ...], Tuple[List[int], List[float]]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *label_values: str):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = ([0] * (len(self.buckets) + 1), [0.0])
+            series[0][index] += 1
+            series[1][0] += value
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            items = sorted((key, (list(counts), total[0])) for key, (counts, total) in self._series.items())
+        for label_values, (counts, total) in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += count
+                le = '+Inf' if bound == float('inf') else f'{bound:g}'
+                labels = _labels_text(self.labels, label_values, 'le="%s"' % le)
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _labels_text(self.labels, label_values)
+            lines.append(f"{self.name}_sum{labels} {total:.6f}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+HTTP_REQUESTS = Counter(
+    'http_requests_total', 'HTTP requests by route and status.', ('method', 'route', 'status')
+)
+HTTP_LATENCY = Histogram(
+    'http_request_duration_seconds', 'HTTP request latency by route.', ('method', 'route')
+)
+HTTP_QUERIES = Histogram(
+    'http_request_db_queries', 'Database queries issued per HTTP request.', ('method', 'route'),
+    buckets=QUERY_COUNT_BUCKETS
+)
+DB_QUERY_LATENCY = Histogram('db_query_duration_seconds', 'Database statement latency.')
+DB_SLOW_QUERIES = Counter('db_slow_queries_total', 'Statements over the slow query threshold.')
+DB_READ_SESSIONS = Counter(
+    'db_read_sessions_total', 'Read-only request sessions by the database they read from.', ('target',)
+)
+
+SINGLE_FLIGHT_CALLS = Counter('single_flight_calls_total', 'Coalescable calls actually executed.', ('call',))
+SINGLE_FLIGHT_COALESCED = Counter(
+    'single_flight_coalesced_total', 'Calls answered by an identical call already in flight.', ('call',)
+)
+ADMISSION_IN_FLIGHT = Gauge('admission_in_flight', 'Admitted requests running, by priority class.', ('class',))
+ADMISSION_QUEUE_DEPTH = Gauge('admission_queue_depth', 'Requests waiting for admission, by priority class.', ('class',))
+ADMISSION_WAIT = Histogram(
+    'admission_wait_seconds', 'Time admitted requests waited in the queue.', ('class',)
+)
+ADMISSION_REJECTIONS = Counter(
+    'admission_rejections_total', 'Requests shed with 503, by priority class and reason.', ('class', 'reason')
+)
+
+_METRICS = [
+    HTTP_REQUESTS, HTTP_LATENCY, HTTP_QUERIES, DB_QUERY_LATENCY, DB_SLOW_QUERIES, DB_READ_SESSIONS,
+    ADMISSION_IN_FLIGHT, ADMISSION_QUEUE_DEPTH, ADMISSION_WAIT, ADMISSION_REJECTIONS,
+    SINGLE_FLIGHT_CALLS, SINGLE_FLIGHT_COALESCED,
+]
+
+
+def render_metrics() -> str:
+    lines = []
+    for metric in _METRICS:
+        lines.extend(metric.render())
+    return '\n'.join(lines) + '\n'
+
+
+class QueryStats:
+    """Statements issued while serving one request."""
+
+    __slots__ = ('count', 'seconds')
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+
+
+# Set by the request middleware; sync endpoints see it from the threadpool
+# because the context is copied into the worker thread
+current_query_stats: ContextVar[Optional[QueryStats]] = ContextVar('current_query_stats', default=None)
+
+
+class RequestMetricsMiddleware:
+    """
+    Records latency, status and query count per route template.
+
+    With ``timing_headers`` every response also carries ``X-Query-Count``
+    and a ``Server-Timing`` entry for database and total time.
+    """
+
+    def __init__(self, app, timing_headers: bool = False):
+        self.app = app
+        self.timing_headers = timing_headers
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        stats = QueryStats()
+        token = current_query_stats.set(stats)
+        started = time.perf_counter()
+        status = 500
+
+        async def send_with_timing(message):
+            nonlocal status
+            if message['type'] == 'http.response.start':
+                status = message['status']
+                if self.timing_headers:
+                    total_ms = (time.perf_counter() - started) * 1000
+                    headers = MutableHeaders(scope=message)
+                    headers.append('X-Query-Count', str(stats.count))
+                    headers.append(
+                        'Server-Timing',
+                        f'db;dur={stats.seconds * 1000:.1f};desc="{stats.count} queries", '
+                        f'total;dur={total_ms:.1f}'
+                    )
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            current_query_stats.reset(token)
+            # The router stores the matched route in the scope; label by its
+            # template so /properties/{property_id} is one series
+            route = getattr(scope.get('route'), 'path_format', None) or 'unmatched'
+            method = scope['method']
+            HTTP_REQUESTS.inc(method, route, str(status))
+            HTTP_LATENCY.observe(time.perf_counter() - started, method, route)
+            HTTP_QUERIES.observe(stats.count, method, route)
@@ -46,6 +46,9 @@ class PricePredictor:
         'has_cellar': False
     }
 
+    # Fallback base price per sqm for Praha apartments (CZK)
+    BASE_PRICE_PER_SQM = 120000
+
     # City price multipliers (approximate)
     CITY_MULTIPLIERS = {
         'Praha': 1.0,
@@ -55,6 +58,23 @@ class PricePredictor:
         'default': 0.5
     }
 
+    CONDITION_MULTIPLIERS = {
+        'new': 1.15,
+        'renovated': 1.05,
+        'good': 1.0,
+        'original': 0.85,
+        'to_renovate': 0.70
+    }
+
+    # Fallback per-feature bonuses on the price per sqm
+    FEATURE_BONUSES = {
+        'has_balcony': 0.02,
+        'has_terrace': 0.04,
+        'has_parking': 0.03,
+        'has_elevator': 0.01,
+        'has_cellar': 0.01
+    }
+
     def __init__(self):
         self.model = None
         self.encoder = None
@@ -99,21 +119,40 @@ class PricePredictor:
         else:
             return self._predict_fallback(features)
 
-    def _predict_with_model(self, features: Dict[str, Any]) -> Dict[str, Any]:
-        """Make prediction using trained ML model."""
-        # Prepare features
-        prepared = self._prepare_features(features)
-
-        # Create DataFrame
-        df = pd.DataFrame([prepared])
+    def predict_many(self, features: pd.DataFrame) -> pd.DataFrame:
+        """
+        Predict prices for a frame of properties in one pass.
 
+        Columns are the keys ``predict`` accepts (missing ones take the
+        defaults). Returns predicted_price, confidence and price_per_sqm
+        aligned with the input index.
+        """
+        prepared = self._prepare_frame(features)
+        if self.model_loaded:
+            predicted = np.exp(self.model.predict(self._encode(prepared)))
+            confidence = 0.85
+        else:
+            predicted = self._fallback_frame(prepared, features) * prepared['area_usable'].to_numpy()
+            confidence = 0.60
+
+        area = prepared['area_usable'].to_numpy()
+        price_per_sqm = np.divide(predicted, area, out=np.zeros(len(area)), where=area > 0)
+        return pd.DataFrame({
+            'predicted_price': np.round(predicted, 0),
+            'confidence': confidence,
+            'price_per_sqm': np.round(price_per_sqm, 0)
+        }, index=features.index)
+
+    def _encode(self, df: pd.DataFrame) -> pd.DataFrame:
+        """One-hot encode categoricals and scale numericals for the model."""
         # Encode categorical features
         categorical_cols = [c for c in self.CATEGORICAL_FEATURES if c in df.columns]
         if categorical_cols and self.encoder:
             encoded = self.encoder.transform(df[categorical_cols])
             encoded_df = pd.DataFrame(
                 encoded,
-                columns=self.encoder.get_feature_names_out(categorical_cols)
+                columns=self.encoder.get_feature_names_out(categorical_cols),
+                index=df.index
             )
             df = df.drop(columns=categorical_cols)
             df = pd.concat([df, encoded_df], axis=1)
@@ -122,6 +161,15 @@ class PricePredictor:
         numerical_cols = [c for c in self.NUMERICAL_FEATURES if c in df.columns]
         if numerical_cols and self.scaler:
             df[numerical_cols] = self.scaler.transform(df[numerical_cols])
+        return df
+
+    def _predict_with_model(self, features: Dict[str, Any]) -> Dict[str, Any]:
+        """Make prediction using trained ML model."""
+        # Prepare features
+        prepared = self._prepare_features(features)
+
+        # Create DataFrame
+        df = self._encode(pd.DataFrame([prepared]))
 
         # Predict (model predicts log(price))
         log_prediction = self.model.predict(df)[0]
@@ -142,8 +190,7 @@ class PricePredictor:
         Fallback prediction using simple rules when no model is available.
         Based on Czech real estate market averages.
         """
-        # Base price per sqm for Praha apartments (CZK)
-        base_price_per_sqm = 120000
+        base_price_per_sqm = self.BASE_PRICE_PER_SQM
 
         area = features.get('area_usable', self.DEFAULTS['area_usable'])
         city = features.get('city', self.DEFAULTS['city'])
@@ -158,14 +205,7 @@ class PricePredictor:
         type_mult = 1.0 if property_type == 'apartment' else 0.85
 
         # Condition adjustment
-        condition_mults = {
-            'new': 1.15,
-            'renovated': 1.05,
-            'good': 1.0,
-            'original': 0.85,
-            'to_renovate': 0.70
-        }
-        cond_mult = condition_mults.get(condition, 1.0)
+        cond_mult = self.CONDITION_MULTIPLIERS.get(condition, 1.0)
 
         # Room count adjustment (smaller = higher per sqm)
         rooms_mult = 1.0
@@ -186,16 +226,9 @@ class PricePredictor:
 
         # Features adjustment
         features_bonus = 0
-        if features.get('has_balcony'):
-            features_bonus += 0.02
-        if features.get('has_terrace'):
-            features_bonus += 0.04
-        if features.get('has_parking'):
-            features_bonus += 0.03
-        if features.get('has_elevator'):
-            features_bonus += 0.01
-        if features.get('has_cellar'):
-            features_bonus += 0.01
+        for feat, bonus in self.FEATURE_BONUSES.items():
+            if features.get(feat):
+                features_bonus += bonus
 
         # Distance to center adjustment
         distance = features.get('distance_to_center', 5.0)
@@ -250,6 +283,63 @@ class PricePredictor:
 
         return prepared
 
+    def _prepare_frame(self, features: pd.DataFrame) -> pd.DataFrame:
+        """Column-wise ``_prepare_features`` for a whole frame."""
+        prepared = pd.DataFrame(index=pd.RangeIndex(len(features)))
+
+        def column(feat):
+            if feat not in features.columns:
+                return pd.Series(self.DEFAULTS[feat], index=prepared.index)
+            return features[feat].reset_index(drop=True)
+
+        for feat in self.NUMERICAL_FEATURES:
+            prepared[feat] = pd.to_numeric(column(feat), errors='coerce').fillna(self.DEFAULTS[feat]).astype(float)
+        for feat in self.CATEGORICAL_FEATURES:
+            values = column(feat)
+            prepared[feat] = values.where(values.notna() & (values != ''), self.DEFAULTS[feat]).astype(str)
+        for feat in self.BOOLEAN_FEATURES:
+            prepared[feat] = column(feat).fillna(self.DEFAULTS[feat]).astype(bool)
+        return prepared
+
+    def _fallback_frame(self, prepared: pd.DataFrame, features: pd.DataFrame) -> np.ndarray:
+        """Vectorised ``_predict_fallback``; returns the price per sqm."""
+        city_mult = prepared['city'].map(self.CITY_MULTIPLIERS).fillna(self.CITY_MULTIPLIERS['default']).to_numpy()
+        type_mult = np.where(prepared['property_type'] == 'apartment', 1.0, 0.85)
+        cond_mult = prepared['condition'].map(self.CONDITION_MULTIPLIERS).fillna(1.0).to_numpy()
+
+        rooms = prepared['rooms_count'].to_numpy()
+        rooms_mult = np.select([(rooms > 0) & (rooms <= 1), rooms >= 4], [1.1, 0.95], 1.0)
+
+        floor = prepared['floor'].to_numpy()
+        floors_total = prepared['floors_total'].to_numpy()
+        floor_mult = np.select([floor == 0, (floors_total > 0) & (floor == floors_total)], [0.95, 1.02], 1.0)
+
+        features_bonus = sum(
+            prepared[feat].to_numpy() * bonus for feat, bonus in self.FEATURE_BONUSES.items()
+        )
+
+        # Like the scalar path, an explicit None distance gets no adjustment
+        if 'distance_to_center' in features.columns:
+            distance = pd.to_numeric(features['distance_to_center'], errors='coerce').fillna(0).to_numpy()
+        else:
+            distance = np.full(len(prepared), self.DEFAULTS['distance_to_center'])
+        distance_mult = np.select(
+            [(distance > 0) & (distance < 2), (distance > 0) & (distance < 5), distance > 10],
+            [1.15, 1.05, 0.90],
+            1.0
+        )
+
+        return (
+            self.BASE_PRICE_PER_SQM
+            * city_mult
+            * type_mult
+            * cond_mult
+            * rooms_mult
+            * floor_mult
+            * distance_mult
+            * (1 + features_bonus)
+        )
+
     def get_feature_importance(self) -> Optional[Dict[str, float]]:
         """Get feature importance from trained model."""
         if not self.model_loaded or not hasattr(self.model, 'feature_importances_'):
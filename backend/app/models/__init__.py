@@ -1,3 +1,9 @@
-from app.models.property import Property, PriceHistory, ScrapingJob, MLModel, CityCenter
+from app.models.property import (
+    Property, PriceHistory, PriceIndexDaily, SavedSearch, SavedSearchMatch,
+    ScrapingJob, ScrapingJobBatch, MLModel, CadastralParcel, CityCenter
+)
 
-__all__ = ["Property", "PriceHistory", "ScrapingJob", "MLModel", "CityCenter"]
+__all__ = [
+    "Property", "PriceHistory", "PriceIndexDaily", "SavedSearch", "SavedSearchMatch",
+    "ScrapingJob", "ScrapingJobBatch", "MLModel", "CadastralParcel", "CityCenter"
+]
@@ -1,9 +1,12 @@
 from sqlalchemy import (
-    Column, Integer, String, Numeric, Boolean, Text, DateTime, ForeignKey, JSON
+    Column, Computed, FetchedValue, Integer, BigInteger, String, Numeric, Boolean, Text, DateTime, Date,
+    ForeignKey, JSON, Float
 )
 from sqlalchemy.orm import relationship
+from sqlalchemy.dialects.postgresql import JSONB
 from geoalchemy2 import Geometry
-from datetime import datetime
+from datetime import datetime, timezone
+from typing import Optional
 from app.database import Base
 
 
@@ -20,7 +23,11 @@ class Property(Base):
     property_type = Column(String(50))
     transaction_type = Column(String(50))
     price = Column(Numeric(15, 2))
-    price_per_sqm = Column(Numeric(10, 2))
+    # Derived columns are computed by PostgreSQL (generated columns and the
+    # properties_price_assessment trigger); the backend never writes them
+    price_per_sqm = Column(
+        Numeric(10, 2), Computed("CASE WHEN area_usable > 0 THEN round(price / area_usable, 2) END")
+    )
     currency = Column(String(10), default="CZK")
 
     # Size and layout
@@ -51,12 +58,18 @@ class Property(Base):
     address_zip = Column(String(20))
     address_country = Column(String(100), default="Czech Republic")
     coordinates = Column(Geometry("POINT", srid=4326))
+    lat = Column(Float, Computed("ST_Y(coordinates)"))
+    lng = Column(Float, Computed("ST_X(coordinates)"))
+    geohash = Column(String(12), Computed("ST_GeoHash(coordinates, 12)"))
     distance_to_center = Column(Numeric(10, 2))
 
     # ML predictions
     predicted_price = Column(Numeric(15, 2))
-    price_assessment = Column(String(20))
-    price_deviation_percent = Column(Numeric(5, 2))
+    price_assessment = Column(String(20), server_default=FetchedValue(), server_onupdate=FetchedValue())
+    price_deviation_percent = Column(Numeric(6, 2), Computed(
+        "CASE WHEN predicted_price > 0 THEN "
+        "LEAST(round((price - predicted_price) / predicted_price * 100, 2), 9999.99) END"
+    ))
     prediction_confidence = Column(Numeric(5, 4))
     predicted_at = Column(DateTime(timezone=True))
 
@@ -67,6 +80,7 @@ class Property(Base):
     liens_count = Column(Integer, default=0)
     encumbrances = Column(Text)
     historical_prices = Column(JSON)
+    cadastral_checked_at = Column(DateTime(timezone=True))
 
     # Media
     images = Column(JSON)
@@ -78,6 +92,11 @@ class Property(Base):
     scraped_at = Column(DateTime(timezone=True), default=datetime.utcnow)
     updated_at = Column(DateTime(timezone=True), default=datetime.utcnow, onupdate=datetime.utcnow)
     is_active = Column(Boolean, default=True)
+    # When is_active last went false; set by the properties_deactivated_at trigger
+    deactivated_at = Column(DateTime(timezone=True), server_default=FetchedValue(), server_onupdate=FetchedValue())
+    last_seen_job_id = Column(Integer, ForeignKey("scraping_jobs.id", ondelete="SET NULL"))
+    # Cross-source duplicate of this listing; NULL for canonical listings
+    canonical_id = Column(Integer, ForeignKey("properties.id", ondelete="SET NULL"))
 
     # Relationships
     price_history = relationship("PriceHistory", back_populates="property", cascade="all, delete-orphan")
@@ -86,14 +105,66 @@ class Property(Base):
 class PriceHistory(Base):
     __tablename__ = "price_history"
 
-    id = Column(Integer, primary_key=True, index=True)
-    property_id = Column(Integer, ForeignKey("properties.id", ondelete="CASCADE"))
+    # Partitioned by recorded_at month, so it is part of the primary key
+    id = Column(BigInteger, primary_key=True, autoincrement=True)
+    property_id = Column(Integer, ForeignKey("properties.id", ondelete="CASCADE"), nullable=False)
     price = Column(Numeric(15, 2), nullable=False)
-    recorded_at = Column(DateTime(timezone=True), default=datetime.utcnow)
+    recorded_at = Column(DateTime(timezone=True), primary_key=True, default=datetime.utcnow)
 
     property = relationship("Property", back_populates="price_history")
 
 
+class PriceIndexDaily(Base):
+    """Daily price index rollup built from price_history.
+
+    ``city``/``property_type`` of ``'*'`` hold totals across that dimension.
+    """
+    __tablename__ = "price_index_daily"
+
+    transaction_type = Column(String(50), primary_key=True)
+    city = Column(String(255), primary_key=True)
+    property_type = Column(String(50), primary_key=True)
+    bucket_date = Column(Date, primary_key=True)
+    listings_count = Column(Integer, nullable=False, default=0)
+    avg_price = Column(Numeric(15, 2))
+    avg_price_per_sqm = Column(Numeric(10, 2))
+    median_price_per_sqm = Column(Numeric(10, 2))
+    new_listings = Column(Integer, nullable=False, default=0)
+    removed_listings = Column(Integer, nullable=False, default=0)
+    price_changes = Column(Integer, nullable=False, default=0)
+    log_change_sum = Column(Numeric(18, 8), nullable=False, default=0)
+    computed_at = Column(DateTime(timezone=True), default=datetime.utcnow)
+
+
+class SavedSearch(Base):
+    __tablename__ = "saved_searches"
+
+    id = Column(Integer, primary_key=True, index=True)
+    name = Column(String(255), nullable=False)
+    filters = Column(JSONB, nullable=False, default=dict)
+    bounds_south = Column(Float)
+    bounds_west = Column(Float)
+    bounds_north = Column(Float)
+    bounds_east = Column(Float)
+    is_active = Column(Boolean, default=True)
+    created_at = Column(DateTime(timezone=True), default=datetime.utcnow)
+    updated_at = Column(DateTime(timezone=True), default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
+class SavedSearchMatch(Base):
+    __tablename__ = "saved_search_matches"
+
+    id = Column(BigInteger, primary_key=True, autoincrement=True)
+    saved_search_id = Column(Integer, ForeignKey("saved_searches.id", ondelete="CASCADE"), nullable=False)
+    property_id = Column(Integer, ForeignKey("properties.id", ondelete="CASCADE"), nullable=False)
+    event = Column(String(20), nullable=False)
+    price = Column(Numeric(15, 2))
+    price_assessment = Column(String(20))
+    # NOW() in the database: the matching transaction's start, which the
+    # match feed pages on
+    matched_at = Column(DateTime(timezone=True), server_default=FetchedValue())
+
+
 class ScrapingJob(Base):
     __tablename__ = "scraping_jobs"
 
@@ -104,9 +175,45 @@ class ScrapingJob(Base):
     properties_new = Column(Integer, default=0)
     properties_updated = Column(Integer, default=0)
     errors_count = Column(Integer, default=0)
+    properties_deactivated = Column(Integer, default=0)
     started_at = Column(DateTime(timezone=True), default=datetime.utcnow)
     completed_at = Column(DateTime(timezone=True))
     error_message = Column(Text)
+    # Telemetry totals over the batches reported so far
+    batches_count = Column(Integer, default=0)
+    rows_processed = Column(Integer, default=0)
+    fetch_ms = Column(Float, default=0)
+    parse_ms = Column(Float, default=0)
+    write_ms = Column(Float, default=0)
+    error_samples = Column(JSONB, default=list)
+
+    @property
+    def duration_seconds(self) -> Optional[float]:
+        """Wall-clock run time so far (or in total, once finished)."""
+        if self.started_at is None:
+            return None
+        end = self.completed_at or datetime.now(timezone.utc)
+        return max((end - self.started_at).total_seconds(), 0.0)
+
+    @property
+    def rows_per_second(self) -> Optional[float]:
+        duration = self.duration_seconds
+        if not duration or not self.rows_processed:
+            return None
+        return self.rows_processed / duration
+
+
+class ScrapingJobBatch(Base):
+    __tablename__ = "scraping_job_batches"
+
+    id = Column(BigInteger, primary_key=True, autoincrement=True)
+    job_id = Column(Integer, ForeignKey("scraping_jobs.id", ondelete="CASCADE"), nullable=False)
+    rows_count = Column(Integer, default=0)
+    errors_count = Column(Integer, default=0)
+    fetch_ms = Column(Float, default=0)
+    parse_ms = Column(Float, default=0)
+    write_ms = Column(Float, default=0)
+    recorded_at = Column(DateTime(timezone=True), default=datetime.utcnow)
 
 
 class MLModel(Base):
@@ -123,6 +230,19 @@ class MLModel(Base):
     model_path = Column(String(500))
 
 
+class CadastralParcel(Base):
+    """Parcel lookup result for a geohash cell; no cadastral_number = nothing found."""
+    __tablename__ = "cadastral_parcels"
+
+    cell = Column(String(12), primary_key=True)
+    cadastral_number = Column(String(50))
+    cadastral_area = Column(String(255))
+    ownership_type = Column(String(100))
+    liens_count = Column(Integer)
+    encumbrances = Column(Text)
+    fetched_at = Column(DateTime(timezone=True), nullable=False, default=datetime.utcnow)
+
+
 class CityCenter(Base):
     __tablename__ = "city_centers"
 
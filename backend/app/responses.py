@@ -0,0 +1,31 @@
+"""
+orjson-encoded responses for large listing payloads.
+
+Endpoints that return hundreds of rows hand plain dicts to
+``FastJSONResponse`` instead of building a Pydantic model per row. The
+output matches what the response models would produce: Decimals as
+strings and UTC datetimes with a ``Z`` suffix.
+"""
+
+from decimal import Decimal
+from typing import Any
+
+import orjson
+from fastapi.responses import JSONResponse
+
+_OPTIONS = orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
+
+def _default(value: Any):
+    if isinstance(value, Decimal):
+        return str(value)
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+
+def dumps(content: Any) -> bytes:
+    return orjson.dumps(content, default=_default, option=_OPTIONS)
+
+
+class FastJSONResponse(JSONResponse):
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
@@ -1,15 +1,31 @@
 from app.schemas.property import (
     PropertyBase, PropertyCreate, PropertyUpdate, PropertyResponse,
-    PropertyListResponse, PropertyMapResponse, PropertyFilter,
+    PropertyBulkUpsertResponse, PropertyListResponse, PropertyMapResponse,
+    PropertyChange, PropertyChangesResponse,
+    CadastralQueueItem, CadastralQueueResponse, CadastralResult, CadastralResultsResponse,
+    PropertyFilter, PropertyFacetsResponse, HistogramBucket, SimilarPropertyResponse,
+    BoundingBox, SavedSearchCreate, SavedSearchResponse, SavedSearchMatchItem, SavedSearchMatchFeed,
+    ScrapingJobCreate, ScrapingJobFinish, ScrapingJobResponse,
+    ScrapingBatchReport, ScrapingJobBatchResponse, ScrapingSeriesPoint, ScrapingSourceSeries,
+    SeedRequest, SeedRunStatus, SeedStatus,
+    ChatbotRequest, PropertyRecommendation, ChatbotResponse,
     PriceHistoryResponse, PredictionRequest, PredictionResponse,
     BatchPredictionRequest, BatchPredictionResponse,
-    AnalyticsPriceTrend, MarketOverview, HeatmapData
+    AnalyticsPriceTrend, PriceTrendSeries, MarketOverview, HeatmapData
 )
 
 __all__ = [
     "PropertyBase", "PropertyCreate", "PropertyUpdate", "PropertyResponse",
-    "PropertyListResponse", "PropertyMapResponse", "PropertyFilter",
+    "PropertyBulkUpsertResponse", "PropertyListResponse", "PropertyMapResponse",
+    "PropertyChange", "PropertyChangesResponse",
+    "CadastralQueueItem", "CadastralQueueResponse", "CadastralResult", "CadastralResultsResponse",
+    "PropertyFilter", "PropertyFacetsResponse", "HistogramBucket", "SimilarPropertyResponse",
+    "BoundingBox", "SavedSearchCreate", "SavedSearchResponse", "SavedSearchMatchItem",
+    "SavedSearchMatchFeed", "ScrapingJobCreate", "ScrapingJobFinish", "ScrapingJobResponse",
+    "ScrapingBatchReport", "ScrapingJobBatchResponse", "ScrapingSeriesPoint", "ScrapingSourceSeries",
+    "SeedRequest", "SeedRunStatus", "SeedStatus",
+    "ChatbotRequest", "PropertyRecommendation", "ChatbotResponse",
     "PriceHistoryResponse", "PredictionRequest", "PredictionResponse",
     "BatchPredictionRequest", "BatchPredictionResponse",
-    "AnalyticsPriceTrend", "MarketOverview", "HeatmapData"
+    "AnalyticsPriceTrend", "PriceTrendSeries", "MarketOverview", "HeatmapData"
 ]
@@ -1,6 +1,6 @@
 from pydantic import BaseModel, Field
-from typing import Optional, List
-from datetime import datetime
+from typing import Optional, List, Dict, Literal
+from datetime import datetime, date
 from decimal import Decimal
 from enum import Enum
 
@@ -75,10 +75,21 @@ class PropertyCreate(PropertyBase):
     main_image_url: Optional[str] = None
 
 
+class PropertyBulkUpsertResponse(BaseModel):
+    inserted: int
+    updated: int
+    price_history_recorded: int
+
+
 class PropertyUpdate(BaseModel):
     title: Optional[str] = None
     price: Optional[Decimal] = None
     is_active: Optional[bool] = None
+    cadastral_number: Optional[str] = None
+    cadastral_area: Optional[str] = None
+    ownership_type: Optional[str] = None
+    liens_count: Optional[int] = None
+    encumbrances: Optional[str] = None
 
 
 class PropertyResponse(PropertyBase):
@@ -109,6 +120,11 @@ class PropertyResponse(PropertyBase):
         from_attributes = True
 
 
+class SimilarPropertyResponse(PropertyResponse):
+    similarity_score: float
+    distance_km: float
+
+
 class PropertyListResponse(BaseModel):
     items: List[PropertyResponse]
     total: int
@@ -134,6 +150,56 @@ class PropertyMapResponse(BaseModel):
     total: int
 
 
+class PropertyChange(BaseModel):
+    id: int
+    external_id: str
+    source: str
+    is_active: bool
+    property_type: Optional[str] = None
+    transaction_type: Optional[str] = None
+    address_city: Optional[str] = None
+    price: Optional[Decimal] = None
+    area_usable: Optional[Decimal] = None
+    rooms: Optional[str] = None
+    predicted_price: Optional[Decimal] = None
+    price_assessment: Optional[str] = None
+    lat: Optional[float] = None
+    lng: Optional[float] = None
+    updated_at: datetime
+
+
+class PropertyChangesResponse(BaseModel):
+    items: List[PropertyChange]
+    next_token: Optional[str] = None
+    has_more: bool = False
+
+
+class CadastralQueueItem(BaseModel):
+    id: int
+    lat: float
+    lng: float
+    cell: str  # geohash cell; one lookup answers every listing in it
+
+
+class CadastralQueueResponse(BaseModel):
+    items: List[CadastralQueueItem]
+    filled_from_cache: int = 0
+
+
+class CadastralResult(BaseModel):
+    property_id: int
+    cadastral_number: Optional[str] = None  # None = no parcel found
+    cadastral_area: Optional[str] = None
+    ownership_type: Optional[str] = None
+    liens_count: Optional[int] = None
+    encumbrances: Optional[str] = None
+
+
+class CadastralResultsResponse(BaseModel):
+    updated: int
+    cached_cells: int
+
+
 class PropertyFilter(BaseModel):
     source: Optional[str] = None
     property_type: Optional[str] = None
@@ -148,6 +214,209 @@ class PropertyFilter(BaseModel):
     has_balcony: Optional[bool] = None
     has_parking: Optional[bool] = None
     has_elevator: Optional[bool] = None
+    # Hide cross-source duplicates (keep canonical listings only)
+    dedupe: Optional[bool] = None
+
+
+class BoundingBox(BaseModel):
+    south: float
+    west: float
+    north: float
+    east: float
+
+
+class SavedSearchCreate(BaseModel):
+    name: str
+    filters: PropertyFilter = PropertyFilter()
+    bounds: Optional[BoundingBox] = None
+
+
+class SavedSearchResponse(BaseModel):
+    id: int
+    name: str
+    filters: PropertyFilter
+    bounds: Optional[BoundingBox] = None
+    is_active: bool = True
+    created_at: Optional[datetime] = None
+
+
+class SavedSearchMatchItem(BaseModel):
+    id: int
+    property_id: int
+    event: str
+    price: Optional[Decimal] = None
+    price_assessment: Optional[str] = None
+    matched_at: datetime
+    title: Optional[str] = None
+    property_type: Optional[str] = None
+    address_city: Optional[str] = None
+    area_usable: Optional[Decimal] = None
+    url: Optional[str] = None
+    main_image_url: Optional[str] = None
+
+
+class SavedSearchMatchFeed(BaseModel):
+    items: List[SavedSearchMatchItem]
+    next_token: Optional[str] = None
+
+
+class ScrapingJobCreate(BaseModel):
+    source: str
+
+
+class ScrapingJobFinish(BaseModel):
+    # 'partial' runs (e.g. stopped at a max-properties cap) don't count
+    # towards the stale-listing sweep
+    status: Literal['completed', 'partial', 'failed'] = 'completed'
+    errors_count: int = 0
+    error_message: Optional[str] = None
+
+
+class ScrapingBatchReport(BaseModel):
+    """Timings of one scraper batch (e.g. one result page), in milliseconds."""
+    rows: int = Field(0, ge=0)
+    errors_count: int = Field(0, ge=0)
+    errors: List[str] = []  # sample messages; only the first few per job are kept
+    fetch_ms: float = Field(0, ge=0)
+    parse_ms: float = Field(0, ge=0)
+    write_ms: float = Field(0, ge=0)
+
+
+class ScrapingJobResponse(BaseModel):
+    id: int
+    source: str
+    status: str
+    properties_found: int = 0
+    properties_new: int = 0
+    properties_updated: int = 0
+    properties_deactivated: int = 0
+    errors_count: int = 0
+    started_at: Optional[datetime] = None
+    completed_at: Optional[datetime] = None
+    error_message: Optional[str] = None
+    batches_count: int = 0
+    rows_processed: int = 0
+    fetch_ms: float = 0
+    parse_ms: float = 0
+    write_ms: float = 0
+    error_samples: List[str] = []
+    duration_seconds: Optional[float] = None
+    rows_per_second: Optional[float] = None
+
+    class Config:
+        from_attributes = True
+
+
+class ScrapingJobBatchResponse(BaseModel):
+    id: int
+    rows_count: int = 0
+    errors_count: int = 0
+    fetch_ms: float = 0
+    parse_ms: float = 0
+    write_ms: float = 0
+    recorded_at: datetime
+
+    class Config:
+        from_attributes = True
+
+
+class ScrapingSeriesPoint(BaseModel):
+    job_id: int
+    started_at: Optional[datetime] = None
+    status: str
+    rows_processed: int = 0
+    errors_count: int = 0
+    duration_seconds: Optional[float] = None
+    rows_per_second: Optional[float] = None
+    # Mean per-batch phase timings
+    fetch_ms: Optional[float] = None
+    parse_ms: Optional[float] = None
+    write_ms: Optional[float] = None
+
+
+class ScrapingSourceSeries(BaseModel):
+    source: str
+    points: List[ScrapingSeriesPoint]
+
+
+class ChatbotRequest(BaseModel):
+    message: str = Field(..., min_length=1, max_length=500)
+    limit: int = Field(5, ge=1, le=20)
+
+
+class PropertyRecommendation(BaseModel):
+    id: int
+    title: str
+    price: float
+    price_formatted: str
+    location: str
+    rooms: str
+    area: float
+    property_type: str
+    condition: Optional[str] = None
+    main_image_url: Optional[str] = None
+    price_assessment: Optional[str] = None
+    match_reasons: List[str] = []
+    score: float
+
+
+class ChatbotResponse(BaseModel):
+    message: str
+    recommendations: List[PropertyRecommendation]
+    filters: PropertyFilter  # what the message was compiled to
+
+
+class SeedRequest(BaseModel):
+    count: Optional[int] = Field(None, ge=1)  # default: seed_default_count
+    clear_existing: bool = False  # remove earlier sample listings first; scraped ones are kept
+    run_predictions: bool = True
+    seed: Optional[int] = Field(None, ge=0)  # same seed, same listings
+
+
+class SeedRunStatus(BaseModel):
+    status: str
+    phase: str
+    count: int
+    seed: int
+    run_predictions: bool
+    loaded: int = 0
+    price_points: int = 0
+    predicted: int = 0
+    started_at: datetime
+    finished_at: Optional[datetime] = None
+    elapsed_seconds: float = 0
+    rows_per_second: Optional[float] = None
+    error: Optional[str] = None
+
+    class Config:
+        from_attributes = True
+
+
+class SeedStatus(BaseModel):
+    total_properties: int
+    sample_properties: int
+    sample_data_ready: bool
+    estimated: bool = True  # counts come from table statistics
+    run: Optional[SeedRunStatus] = None
+
+
+class HistogramBucket(BaseModel):
+    min: float
+    max: Optional[float] = None
+    count: int
+
+
+class PropertyFacetsResponse(BaseModel):
+    total: int
+    city: Dict[str, int]
+    property_type: Dict[str, int]
+    transaction_type: Dict[str, int]
+    source: Dict[str, int]
+    rooms: Dict[str, int]
+    price_assessment: Dict[str, int]
+    features: Dict[str, int]
+    price_histogram: List[HistogramBucket]
+    area_histogram: List[HistogramBucket]
 
 
 class PriceHistoryResponse(BaseModel):
@@ -200,6 +469,19 @@ class AnalyticsPriceTrend(BaseModel):
     avg_price: float
     avg_price_per_sqm: float
     count: int
+    median_price_per_sqm: float = 0
+    price_index: float = 100
+    new_listings: int = 0
+    removed_listings: int = 0
+    price_changes: int = 0
+
+
+class PriceTrendSeries(BaseModel):
+    trends: List[AnalyticsPriceTrend]
+    granularity: str
+    start_date: date
+    end_date: date
+    period_days: int
 
 
 class MarketOverview(BaseModel):
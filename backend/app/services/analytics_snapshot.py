@@ -0,0 +1,536 @@
+"""
+In-process columnar snapshot of active listings.
+
+Keeps the analytic columns of every active property as compact NumPy
+arrays (categoricals dictionary-encoded, ~45 bytes per listing) and answers
+the ``/analytics/*`` aggregations and filter facets without touching
+PostgreSQL. The snapshot is loaded once and then refreshed from
+``updated_at`` deltas by a background thread.
+
+Enabled with ``ANALYTICS_SNAPSHOT_ENABLED=true``.
+"""
+
+import logging
+import threading
+import time
+from dataclasses import dataclass, fields
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.config import get_settings
+from app.models.property import Property
+from app.services.background import PeriodicTask
+from app.schemas.property import PropertyFilter
+from app.services.cache import filter_cache_key
+from app.services.property_service import (
+    PRICE_HISTOGRAM_BOUNDS, AREA_HISTOGRAM_BOUNDS, histogram_buckets
+)
+from app.services.watermark import ChangeWatermark
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+# Bit positions in the packed feature flag column
+FLAG_BITS = {
+    'has_balcony': 0,
+    'has_terrace': 1,
+    'has_parking': 2,
+    'has_garage': 3,
+    'has_elevator': 4,
+    'has_cellar': 5,
+    'has_garden': 6,
+}
+# Set for cross-source duplicates (canonical_id IS NOT NULL)
+_DUPLICATE_BIT = 7
+
+_LOAD_CHUNK_ROWS = 50_000
+_RESULT_CACHE_SIZE = 256
+_CELL_KEY_BASE = 1 << 32
+
+
+class _Dictionary:
+    """Append-only string dictionary; ``None`` encodes to -1."""
+
+    def __init__(self):
+        self.values: List[str] = []
+        self._codes: Dict[str, int] = {}
+
+    def encode(self, value: Optional[str]) -> int:
+        if value is None:
+            return -1
+        code = self._codes.get(value)
+        if code is None:
+            code = len(self.values)
+            self._codes[value] = code
+            self.values.append(value)
+        return code
+
+    def code_of(self, value: str) -> int:
+        """Code of an exact value, or -2 (matches nothing) if unseen."""
+        return self._codes.get(value, -2)
+
+    def codes_where(self, predicate: Callable[[str], bool]) -> np.ndarray:
+        return np.array(
+            [code for code, value in enumerate(self.values) if predicate(value)],
+            dtype=np.int32
+        )
+
+
+@dataclass
+class _Columns:
+    id: np.ndarray
+    city: np.ndarray
+    property_type: np.ndarray
+    transaction_type: np.ndarray
+    source: np.ndarray
+    rooms: np.ndarray
+    assessment: np.ndarray
+    flags: np.ndarray
+    price: np.ndarray
+    price_per_sqm: np.ndarray
+    area: np.ndarray
+    lat: np.ndarray
+    lng: np.ndarray
+    scraped_at: np.ndarray
+
+    DTYPES = {
+        'id': np.int32,
+        'city': np.int32,
+        'property_type': np.int8,
+        'transaction_type': np.int8,
+        'source': np.int8,
+        'rooms': np.int16,
+        'assessment': np.int8,
+        'flags': np.uint8,
+        'price': np.float32,
+        'price_per_sqm': np.float32,
+        'area': np.float32,
+        'lat': np.float32,
+        'lng': np.float32,
+        'scraped_at': np.int64,  # epoch seconds
+    }
+
+    @classmethod
+    def empty(cls) -> "_Columns":
+        return cls(**{name: np.empty(0, dtype=dtype) for name, dtype in cls.DTYPES.items()})
+
+    def __len__(self) -> int:
+        return self.id.shape[0]
+
+    @property
+    def nbytes(self) -> int:
+        return sum(getattr(self, f.name).nbytes for f in fields(self))
+
+    def take(self, selector) -> "_Columns":
+        return _Columns(**{f.name: getattr(self, f.name)[selector] for f in fields(self)})
+
+    def concat(self, other: "_Columns") -> "_Columns":
+        return _Columns(**{
+            f.name: np.concatenate([getattr(self, f.name), getattr(other, f.name)])
+            for f in fields(self)
+        })
+
+
+def _float_or_nan(value) -> float:
+    return float(value) if value is not None else np.nan
+
+
+class ListingSnapshot:
+    """Columnar copy of active listings with vectorised aggregations."""
+
+    def __init__(self):
+        self.cities = _Dictionary()
+        self.property_types = _Dictionary()
+        self.transaction_types = _Dictionary()
+        self.sources = _Dictionary()
+        self.rooms = _Dictionary()
+        self.assessments = _Dictionary()
+
+        self._columns = _Columns.empty()
+        self._watermark = ChangeWatermark(settings.changes_settle_seconds)
+        self._version = 0
+        self._results: Dict[tuple, object] = {}
+        self._refresh_lock = threading.Lock()
+
+    @property
+    def loaded(self) -> bool:
+        return self._watermark.position is not None
+
+    @property
+    def version(self) -> int:
+        return self._version
+
+    def stats(self) -> dict:
+        columns = self._columns
+        return {
+            'rows': len(columns),
+            'bytes': columns.nbytes,
+            'version': self._version,
+            'watermark': self._watermark.position.isoformat() if self._watermark.position else None,
+        }
+
+    # Loading
+
+    def refresh(self, db: Session) -> int:
+        """Apply rows changed since the last refresh; returns rows read."""
+        with self._refresh_lock:
+            query = select(
+                Property.id,
+                Property.is_active,
+                Property.address_city,
+                Property.property_type,
+                Property.transaction_type,
+                Property.source,
+                Property.rooms,
+                Property.price_assessment,
+                Property.has_balcony,
+                Property.has_terrace,
+                Property.has_parking,
+                Property.has_garage,
+                Property.has_elevator,
+                Property.has_cellar,
+                Property.has_garden,
+                Property.canonical_id,
+                Property.price,
+                Property.price_per_sqm,
+                Property.area_usable,
+                Property.lat,
+                Property.lng,
+                Property.scraped_at,
+                Property.updated_at
+            )
+            since = self._watermark.start(db)
+            if since is None:
+                query = query.where(Property.is_active == True)
+            else:
+                # Everything a transaction open at the last refresh could
+                # have committed since (see ChangeWatermark)
+                query = query.where(Property.updated_at >= since)
+
+            result = db.execute(query.execution_options(yield_per=_LOAD_CHUNK_ROWS))
+
+            columns = self._columns
+            rows_read = 0
+            for chunk in result.partitions():
+                chunk = [r for r in chunk if self._watermark.is_new(r.id, r.updated_at)]
+                if not chunk:
+                    continue
+                delta, removed_ids = self._encode(chunk)
+                rows_read += len(chunk)
+
+                changed = np.concatenate([delta.id, removed_ids])
+                if len(columns) and changed.shape[0]:
+                    columns = columns.take(~np.isin(columns.id, changed))
+                columns = columns.concat(delta)
+
+            if rows_read or since is None:
+                self._columns = columns
+                self._version += 1
+                self._results = {}
+            self._watermark.advance()
+
+            return rows_read
+
+    def _encode(self, rows):
+        n = len(rows)
+        active = np.fromiter((bool(r.is_active) for r in rows), dtype=bool, count=n)
+        ids = np.fromiter((r.id for r in rows), dtype=np.int32, count=n)
+
+        flags = np.zeros(n, dtype=np.uint8)
+        for name, bit in FLAG_BITS.items():
+            values = np.fromiter((bool(getattr(r, name)) for r in rows), dtype=bool, count=n)
+            flags |= values.astype(np.uint8) << bit
+        duplicate = np.fromiter((r.canonical_id is not None for r in rows), dtype=bool, count=n)
+        flags |= duplicate.astype(np.uint8) << _DUPLICATE_BIT
+
+        columns = _Columns(
+            id=ids,
+            city=np.fromiter((self.cities.encode(r.address_city) for r in rows), dtype=np.int32, count=n),
+            property_type=np.fromiter((self.property_types.encode(r.property_type) for r in rows), dtype=np.int8, count=n),
+            transaction_type=np.fromiter((self.transaction_types.encode(r.transaction_type) for r in rows), dtype=np.int8, count=n),
+            source=np.fromiter((self.sources.encode(r.source) for r in rows), dtype=np.int8, count=n),
+            rooms=np.fromiter((self.rooms.encode(r.rooms) for r in rows), dtype=np.int16, count=n),
+            assessment=np.fromiter((self.assessments.encode(r.price_assessment) for r in rows), dtype=np.int8, count=n),
+            flags=flags,
+            price=np.fromiter((_float_or_nan(r.price) for r in rows), dtype=np.float32, count=n),
+            price_per_sqm=np.fromiter((_float_or_nan(r.price_per_sqm) for r in rows), dtype=np.float32, count=n),
+            area=np.fromiter((_float_or_nan(r.area_usable) for r in rows), dtype=np.float32, count=n),
+            lat=np.fromiter((_float_or_nan(r.lat) for r in rows), dtype=np.float32, count=n),
+            lng=np.fromiter((_float_or_nan(r.lng) for r in rows), dtype=np.float32, count=n),
+            scraped_at=np.fromiter(
+                (int(r.scraped_at.timestamp()) if r.scraped_at else 0 for r in rows),
+                dtype=np.int64, count=n
+            ),
+        )
+
+        return columns.take(active), ids[~active]
+
+    # Filtering
+
+    def _mask(self, columns: _Columns, filters: Optional[PropertyFilter], exclude: str = None) -> np.ndarray:
+        """Boolean row mask for a PropertyFilter, optionally ignoring one field."""
+        mask = np.ones(len(columns), dtype=bool)
+        if filters is None:
+            return mask
+
+        def apply(name, value):
+            return value is not None and value != '' and name != exclude
+
+        if apply('source', filters.source):
+            mask &= columns.source == self.sources.code_of(filters.source)
+        if apply('property_type', filters.property_type):
+            mask &= columns.property_type == self.property_types.code_of(filters.property_type)
+        if apply('transaction_type', filters.transaction_type):
+            mask &= columns.transaction_type == self.transaction_types.code_of(filters.transaction_type)
+        if apply('city', filters.city):
+            mask &= np.isin(columns.city, self._city_codes(filters.city))
+        if apply('rooms', filters.rooms):
+            mask &= columns.rooms == self.rooms.code_of(filters.rooms)
+        if apply('price_assessment', filters.price_assessment):
+            mask &= columns.assessment == self.assessments.code_of(filters.price_assessment)
+        if filters.price_min and exclude != 'price':
+            mask &= columns.price >= float(filters.price_min)
+        if filters.price_max and exclude != 'price':
+            mask &= columns.price <= float(filters.price_max)
+        if filters.area_min and exclude != 'area':
+            mask &= columns.area >= float(filters.area_min)
+        if filters.area_max and exclude != 'area':
+            mask &= columns.area <= float(filters.area_max)
+        for name in ('has_balcony', 'has_parking', 'has_elevator'):
+            value = getattr(filters, name)
+            if value is not None and name != exclude:
+                mask &= ((columns.flags >> FLAG_BITS[name]) & 1).astype(bool) == value
+        if filters.dedupe:
+            mask &= ((columns.flags >> _DUPLICATE_BIT) & 1) == 0
+        return mask
+
+    def _city_codes(self, city: str) -> np.ndarray:
+        # Same semantics as address_city ILIKE '%city%'
+        needle = city.lower()
+        return self.cities.codes_where(lambda value: needle in value.lower())
+
+    def _cached(self, key: tuple, compute: Callable[[_Columns], object]):
+        """Memoise a result for the current snapshot version."""
+        results = self._results
+        if key in results:
+            return results[key]
+        value = compute(self._columns)
+        if len(results) >= _RESULT_CACHE_SIZE:
+            results.clear()
+        results[key] = value
+        return value
+
+    # Aggregations
+
+    @staticmethod
+    def _group(codes: np.ndarray, values: np.ndarray, size: int):
+        """Per-code count and mean of non-NaN values (SQL COUNT(*)/AVG semantics)."""
+        valid = codes >= 0
+        codes = codes[valid]
+        values = values[valid]
+        counts = np.bincount(codes, minlength=size)
+        present = ~np.isnan(values)
+        sums = np.bincount(codes[present], weights=values[present], minlength=size)
+        value_counts = np.bincount(codes[present], minlength=size)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            means = np.where(value_counts > 0, sums / np.maximum(value_counts, 1), 0.0)
+        return counts, means
+
+    @staticmethod
+    def _mean(values: np.ndarray) -> float:
+        present = values[~np.isnan(values)]
+        return float(present.astype(np.float64).mean()) if present.shape[0] else 0.0
+
+    def market_overview(self, dedupe: bool = False) -> dict:
+        def compute(columns: _Columns) -> dict:
+            if dedupe:
+                columns = columns.take(self._mask(columns, PropertyFilter(dedupe=True)))
+            return self._market_overview(columns)
+        return self._cached(('market_overview', dedupe), compute)
+
+    def _market_overview(self, columns: _Columns) -> dict:
+        price = columns.price.astype(np.float64)
+        assessment_counts = np.bincount(
+            columns.assessment[columns.assessment >= 0],
+            minlength=len(self.assessments.values)
+        )
+
+        def assessment_count(name: str) -> int:
+            code = self.assessments.code_of(name)
+            return int(assessment_counts[code]) if code >= 0 else 0
+
+        def breakdown(codes: np.ndarray, dictionary: _Dictionary) -> dict:
+            counts, means = self._group(codes, price, len(dictionary.values))
+            return {
+                dictionary.values[code]: {'count': int(counts[code]), 'avg_price': float(means[code])}
+                for code in np.flatnonzero(counts)
+                if dictionary.values[code]
+            }
+
+        return {
+            'total_properties': len(columns),
+            'avg_price': self._mean(columns.price),
+            'avg_price_per_sqm': self._mean(columns.price_per_sqm),
+            'below_market_count': assessment_count('below_market'),
+            'at_market_count': assessment_count('at_market'),
+            'above_market_count': assessment_count('above_market'),
+            'by_city': breakdown(columns.city, self.cities),
+            'by_property_type': breakdown(columns.property_type.astype(np.int32), self.property_types),
+        }
+
+    def cities_with_counts(self, dedupe: bool = False) -> List[dict]:
+        def compute(columns: _Columns) -> List[dict]:
+            codes = columns.city[self._mask(columns, PropertyFilter(dedupe=dedupe or None))]
+            counts = np.bincount(codes[codes >= 0], minlength=len(self.cities.values))
+            order = np.argsort(-counts, kind='stable')
+            return [
+                {'city': self.cities.values[code], 'count': int(counts[code])}
+                for code in order
+                if counts[code]
+            ]
+        return self._cached(('cities', dedupe), compute)
+
+    def room_distribution(self, city: Optional[str] = None, dedupe: bool = False) -> List[dict]:
+        def compute(columns: _Columns) -> List[dict]:
+            mask = self._mask(columns, PropertyFilter(city=city, dedupe=dedupe or None))
+            counts, means = self._group(
+                columns.rooms[mask].astype(np.int32),
+                columns.price[mask].astype(np.float64),
+                len(self.rooms.values)
+            )
+            return [
+                {'rooms': self.rooms.values[code], 'count': int(counts[code]), 'avg_price': float(means[code])}
+                for code in sorted(np.flatnonzero(counts), key=lambda c: self.rooms.values[c])
+            ]
+        return self._cached(('room_distribution', city, dedupe), compute)
+
+    def assessment_distribution(self, city: Optional[str] = None, dedupe: bool = False) -> List[dict]:
+        def compute(columns: _Columns) -> List[dict]:
+            mask = self._mask(columns, PropertyFilter(city=city, dedupe=dedupe or None))
+            codes = columns.assessment[mask]
+            counts = np.bincount(codes[codes >= 0], minlength=len(self.assessments.values))
+            return [
+                {'assessment': self.assessments.values[code], 'count': int(counts[code])}
+                for code in np.flatnonzero(counts)
+            ]
+        return self._cached(('assessment_distribution', city, dedupe), compute)
+
+    def heatmap(self, city: Optional[str] = None, grid_size: float = 0.01, dedupe: bool = False) -> List[dict]:
+        def compute(columns: _Columns) -> List[dict]:
+            mask = self._mask(columns, PropertyFilter(city=city, dedupe=dedupe or None))
+            mask &= ~np.isnan(columns.lat) & ~np.isnan(columns.price_per_sqm)
+            if not mask.any():
+                return []
+            lat_cell = np.floor(columns.lat[mask].astype(np.float64) / grid_size + 0.5).astype(np.int64)
+            lng_cell = np.floor(columns.lng[mask].astype(np.float64) / grid_size + 0.5).astype(np.int64)
+            # Pack both cell indexes into one int64 key for a 1-D unique
+            keys = lat_cell * _CELL_KEY_BASE + (lng_cell + _CELL_KEY_BASE // 2)
+            cells, codes = np.unique(keys, return_inverse=True)
+            _, intensity = self._group(codes, columns.price_per_sqm[mask].astype(np.float64), cells.shape[0])
+            max_intensity = intensity.max()
+            cell_lat = cells // _CELL_KEY_BASE
+            cell_lng = cells % _CELL_KEY_BASE - _CELL_KEY_BASE // 2
+            return [
+                {
+                    'lat': float(cell_lat[i] * grid_size),
+                    'lng': float(cell_lng[i] * grid_size),
+                    'intensity': float(intensity[i] / max_intensity) if max_intensity else 0
+                }
+                for i in range(cells.shape[0])
+            ]
+        return self._cached(('heatmap', city, grid_size, dedupe), compute)
+
+    def facets(self, filters: PropertyFilter) -> dict:
+        """
+        Counts per categorical value and feature flag for a filter.
+
+        Each facet is computed with its own filter removed, so the UI can
+        show the alternatives to the currently selected value.
+        """
+        def compute(columns: _Columns) -> dict:
+            result = {}
+            for name, codes, dictionary in (
+                ('city', columns.city, self.cities),
+                ('property_type', columns.property_type, self.property_types),
+                ('transaction_type', columns.transaction_type, self.transaction_types),
+                ('source', columns.source, self.sources),
+                ('rooms', columns.rooms, self.rooms),
+                ('price_assessment', columns.assessment, self.assessments),
+            ):
+                selected = codes[self._mask(columns, filters, exclude=name)].astype(np.int32)
+                counts = np.bincount(selected[selected >= 0], minlength=len(dictionary.values))
+                result[name] = {
+                    dictionary.values[code]: int(counts[code])
+                    for code in np.flatnonzero(counts)
+                }
+
+            result['features'] = {}
+            for name, bit in FLAG_BITS.items():
+                mask = self._mask(columns, filters, exclude=name)
+                result['features'][name] = int(((columns.flags[mask] >> bit) & 1).sum())
+
+            for name, values, bounds in (
+                ('price', columns.price, PRICE_HISTOGRAM_BOUNDS),
+                ('area', columns.area, AREA_HISTOGRAM_BOUNDS),
+            ):
+                selected = values[self._mask(columns, filters, exclude=name)]
+                selected = selected[~np.isnan(selected)]
+                # np.digitize matches PostgreSQL width_bucket() numbering
+                buckets = np.bincount(np.digitize(selected, bounds), minlength=len(bounds) + 1)
+                result[f'{name}_histogram'] = histogram_buckets(
+                    bounds, {i: int(c) for i, c in enumerate(buckets) if c}
+                )
+
+            result['total'] = int(self._mask(columns, filters).sum())
+            return result
+        return self._cached(('facets',) + filter_cache_key(filters), compute)
+
+
+_snapshot: Optional[ListingSnapshot] = None
+_refresher: Optional[PeriodicTask] = None
+
+
+def get_listing_snapshot() -> Optional[ListingSnapshot]:
+    """The loaded snapshot, or None when disabled or still loading."""
+    if _snapshot is not None and _snapshot.loaded:
+        return _snapshot
+    return None
+
+
+def _refresh_snapshot(db: Session):
+    started = time.monotonic()
+    rows = _snapshot.refresh(db)
+    if rows:
+        stats = _snapshot.stats()
+        logger.info(
+            f"Analytics snapshot refreshed: {rows} rows read, "
+            f"{stats['rows']} active, {stats['bytes'] / 1e6:.1f} MB "
+            f"in {time.monotonic() - started:.2f}s"
+        )
+
+
+def start_snapshot_refresher(session_factory) -> None:
+    """Load the snapshot and keep it fresh in a daemon thread."""
+    global _snapshot, _refresher
+
+    if not settings.analytics_snapshot_enabled or _refresher is not None:
+        return
+
+    _snapshot = ListingSnapshot()
+    _refresher = PeriodicTask(
+        "analytics-snapshot",
+        settings.analytics_snapshot_refresh_seconds,
+        _refresh_snapshot,
+        session_factory
+    )
+    _refresher.start()
+
+
+def stop_snapshot_refresher() -> None:
+    global _refresher
+    if _refresher is not None:
+        _refresher.stop()
+        _refresher = None
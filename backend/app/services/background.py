@@ -0,0 +1,52 @@
+import logging
+import threading
+from typing import Callable, Optional
+
+from sqlalchemy.orm import Session
+
+logger = logging.getLogger(__name__)
+
+
+class PeriodicTask:
+    """
+    Run ``task(db)`` in a daemon thread every ``interval`` seconds.
+
+    Each run gets a fresh session from ``session_factory``; failures are
+    logged and retried on the next tick.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        interval: float,
+        task: Callable[[Session], None],
+        session_factory: Callable[[], Session]
+    ):
+        self.name = name
+        self.interval = interval
+        self.task = task
+        self.session_factory = session_factory
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread = None
+
+    def _run(self):
+        while not self._stop.is_set():
+            db = self.session_factory()
+            try:
+                self.task(db)
+            except Exception as e:
+                logger.warning(f"{self.name} failed: {e}")
+            finally:
+                db.close()
+            self._stop.wait(self.interval)
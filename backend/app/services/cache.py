@@ -0,0 +1,229 @@
+import asyncio
+import functools
+import inspect
+import threading
+import time
+from collections import OrderedDict
+from decimal import Decimal
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+
+from app.database import engine
+from app.metrics import SINGLE_FLIGHT_CALLS, SINGLE_FLIGHT_COALESCED
+from app.schemas.property import PropertyFilter
+
+
+class _Call:
+    __slots__ = ('done', 'value', 'error', 'waiters', 'finished')
+
+    def __init__(self):
+        self.finished = False
+        self.done = threading.Event()
+        self.value: Any = None
+        self.error: Optional[BaseException] = None
+        self.waiters: List[Tuple[asyncio.AbstractEventLoop, asyncio.Future]] = []
+
+
+def _settle(future: asyncio.Future, call: _Call):
+    if future.done():
+        return
+    if call.error is not None:
+        future.set_exception(call.error)
+    else:
+        future.set_result(call.value)
+
+
+class SingleFlight:
+    """
+    Coalesces identical concurrent calls: while a call for a key is running,
+    other callers with the same key wait for it and share its result (or
+    exception) instead of running it again.
+
+    Works across threadpool threads and event loop tasks alike; sync
+    callers block on an event, async callers await a future. Shared results
+    must be treated as read-only.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._calls: Dict[Hashable, _Call] = {}
+        self._lock = threading.Lock()
+
+    def _join(self, key: Hashable) -> Tuple[_Call, bool]:
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                SINGLE_FLIGHT_COALESCED.inc(self.name)
+                return call, False
+            call = self._calls[key] = _Call()
+        SINGLE_FLIGHT_CALLS.inc(self.name)
+        return call, True
+
+    def _finish(self, key: Hashable, call: _Call):
+        with self._lock:
+            del self._calls[key]
+            call.finished = True
+            waiters = call.waiters
+        call.done.set()
+        for loop, future in waiters:
+            loop.call_soon_threadsafe(_settle, future, call)
+
+    @staticmethod
+    def _result(call: _Call) -> Any:
+        if call.error is not None:
+            raise call.error
+        return call.value
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        call, leader = self._join(key)
+        if not leader:
+            call.done.wait()
+            return self._result(call)
+        try:
+            call.value = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            self._finish(key, call)
+        return call.value
+
+    async def do_async(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        call, leader = self._join(key)
+        if not leader:
+            future = asyncio.get_running_loop().create_future()
+            with self._lock:
+                if not call.finished:
+                    call.waiters.append((future.get_loop(), future))
+            if call.finished:
+                return self._result(call)
+            return await asyncio.shield(future)
+        try:
+            call.value = await fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            self._finish(key, call)
+        return call.value
+
+
+def _normalise(value: Any) -> Hashable:
+    if isinstance(value, PropertyFilter):
+        return filter_cache_key(value)
+    if isinstance(value, Decimal):
+        return str(value.normalize())
+    if isinstance(value, (list, tuple)):
+        return tuple(_normalise(v) for v in value)
+    if isinstance(value, dict):
+        return tuple(sorted((k, _normalise(v)) for k, v in value.items()))
+    return value
+
+
+def single_flight(method: Callable) -> Callable:
+    """
+    Coalesce concurrent calls of a service method with equal arguments.
+
+    Arguments are bound to the signature (defaults applied) and normalised,
+    so ``f(filters)`` and ``f(filters=filters, page=1)`` share a call.
+    Whether the service's session reads from the primary or a replica is
+    part of the key, so a read that must see the primary (e.g. right after
+    the client wrote) never gets a replica's answer. Sync and ``async``
+    methods are both supported.
+    """
+    signature = inspect.signature(method)
+    flight = SingleFlight(method.__qualname__)
+
+    def key_of(self, args, kwargs) -> Hashable:
+        bound = signature.bind(self, *args, **kwargs)
+        bound.apply_defaults()
+        arguments = tuple(
+            (name, _normalise(value)) for name, value in bound.arguments.items() if name != 'self'
+        )
+        db = getattr(self, 'db', None)
+        primary = db is None or db.get_bind() is engine
+        return (primary, arguments)
+
+    if inspect.iscoroutinefunction(method):
+        @functools.wraps(method)
+        async def async_wrapper(self, *args, **kwargs):
+            return await flight.do_async(key_of(self, args, kwargs), lambda: method(self, *args, **kwargs))
+        return async_wrapper
+
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        return flight.do(key_of(self, args, kwargs), lambda: method(self, *args, **kwargs))
+    return wrapper
+
+
+class TTLCache:
+    """Small thread-safe LRU cache whose entries expire after ``ttl`` seconds."""
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 60.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._flight = SingleFlight('TTLCache')
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    del self._data[key]
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None):
+        expires = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._data[key] = (expires, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def get_or_compute(self, key: Hashable, compute: Callable[[], Any]) -> Any:
+        """Cached value, or compute it once however many callers miss at the same time."""
+        missing = object()
+        value = self.get(key, missing)
+        if value is missing:
+            def fill():
+                value = compute()
+                self.set(key, value)
+                return value
+            value = self._flight.do(key, fill)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+def filter_cache_key(filters: Optional[PropertyFilter]) -> tuple:
+    """
+    Canonical, hashable form of a PropertyFilter.
+
+    Unset fields are dropped, strings are trimmed (city also case-folded,
+    matching its ILIKE semantics) and decimals normalised, so equivalent
+    requests share one cache entry.
+    """
+    if filters is None:
+        return ()
+
+    items = []
+    for name, value in sorted(filters.model_dump(exclude_none=True).items()):
+        if isinstance(value, str):
+            value = value.strip()
+            if not value:
+                continue
+            if name == 'city':
+                value = value.casefold()
+        elif isinstance(value, Decimal):
+            value = str(value.normalize())
+        items.append((name, value))
+    return tuple(items)
@@ -0,0 +1,194 @@
+"""
+Cadastral enrichment.
+
+The ``cuzk-fetcher`` actor drains a queue of active listings that have
+coordinates but no parcel yet, looks each one up at the ČÚZK WFS and posts
+the answers back in bulk. Upstream allows a handful of requests a minute,
+so the backend's job is to spend as few of them as possible:
+
+* the queue walks listings in geohash order, so neighbouring listings
+  arrive together and share one lookup per cell;
+* every answer is also stored in ``cadastral_parcels`` under its geohash
+  cell (about a building). Queued listings in a cell that is already
+  cached are filled straight from the cache and never handed out;
+* a listing where nothing was found is stamped with
+  ``cadastral_checked_at`` and only queued again after
+  ``cadastral_retry_days``.
+"""
+
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable, List, Set, Tuple
+
+from sqlalchemy import Integer, String, Text, cast, column, func, or_, tuple_, update, values
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from app.config import get_settings
+from app.models.property import CadastralParcel, Property
+from app.schemas.property import CadastralResult
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+CADASTRAL_FIELDS = {
+    'cadastral_number': String(50),
+    'cadastral_area': String(255),
+    'ownership_type': String(100),
+    'liens_count': Integer(),
+    'encumbrances': Text(),
+}
+
+# Queue order; must match idx_properties_cadastral_queue
+QUEUE_ORDER = Property.geohash
+
+# Pages read per queue request while skipping listings filled from the cache
+QUEUE_MAX_ROUNDS = 10
+
+
+def listing_cell():
+    """Parcel cache cell of a listing: its geohash cut to the cell precision."""
+    return func.left(Property.geohash, settings.cadastral_cell_precision)
+
+
+class CadastralService:
+    def __init__(self, db: Session):
+        self.db = db
+
+    def _queue_conditions(self) -> list:
+        retry_before = datetime.now(timezone.utc) - timedelta(days=settings.cadastral_retry_days)
+        return [
+            Property.is_active == True,
+            Property.cadastral_number.is_(None),
+            Property.coordinates.isnot(None),
+            or_(Property.cadastral_checked_at.is_(None), Property.cadastral_checked_at < retry_before),
+        ]
+
+    def _cached_parcels(self, cells: Set[str]) -> Dict[str, dict]:
+        """Fresh cache entries for ``cells``: found parcels and recent misses."""
+        if not cells:
+            return {}
+        now = datetime.now(timezone.utc)
+        rows = self.db.query(CadastralParcel).filter(
+            CadastralParcel.cell.in_(cells),
+            or_(
+                (CadastralParcel.cadastral_number.isnot(None))
+                & (CadastralParcel.fetched_at >= now - timedelta(days=settings.cadastral_cache_days)),
+                CadastralParcel.fetched_at >= now - timedelta(days=settings.cadastral_retry_days),
+            )
+        ).all()
+        return {
+            row.cell: {field: getattr(row, field) for field in CADASTRAL_FIELDS}
+            for row in rows
+        }
+
+    def get_queue(self, limit: int) -> Tuple[List[dict], int]:
+        """
+        Up to ``limit`` listings that need an upstream parcel lookup, in
+        geohash order, plus how many queued listings were filled from the
+        parcel cache on the way.
+        """
+        cell = listing_cell()
+        items = []
+        filled = 0
+        after = None
+        for _ in range(QUEUE_MAX_ROUNDS):
+            wanted = limit - len(items)
+            query = self.db.query(
+                Property.id,
+                QUEUE_ORDER.label('position'),
+                cell.label('cell'),
+                Property.lat,
+                Property.lng,
+            ).filter(*self._queue_conditions())
+            if after is not None:
+                query = query.filter(tuple_(QUEUE_ORDER, Property.id) > after)
+            page = query.order_by(QUEUE_ORDER, Property.id).limit(wanted).all()
+            if not page:
+                break
+            after = (page[-1].position, page[-1].id)
+
+            cached = self._cached_parcels({row.cell for row in page})
+            hits = [(row.id, cached[row.cell]) for row in page if row.cell in cached]
+            if hits:
+                filled += len(self._apply(hits))
+            items.extend(
+                {'id': row.id, 'lat': row.lat, 'lng': row.lng, 'cell': row.cell}
+                for row in page if row.cell not in cached
+            )
+            if len(page) < wanted or len(items) >= limit:
+                break
+
+        if filled:
+            self.db.commit()
+            logger.info(f"Filled {filled} queued listings from the parcel cache")
+        return items, filled
+
+    def _apply(self, results: Iterable[Tuple[int, dict]]) -> list:
+        """
+        Write parcel data to listings in one ``UPDATE ... FROM (VALUES ...)``.
+
+        Fields left None keep their stored value, so a miss only stamps
+        ``cadastral_checked_at``. Returns (id, cell) of the updated rows.
+        """
+        data = values(
+            column('id', Integer()),
+            *(column(field, type_) for field, type_ in CADASTRAL_FIELDS.items()),
+            name='results'
+        ).data([
+            (property_id, *(fields.get(field) for field in CADASTRAL_FIELDS))
+            for property_id, fields in results
+        ])
+        assignments = {
+            field: func.coalesce(cast(data.c[field], type_), getattr(Property, field))
+            for field, type_ in CADASTRAL_FIELDS.items()
+        }
+        stmt = update(Property).where(Property.id == data.c.id).values(
+            **assignments, cadastral_checked_at=func.now()
+        ).returning(Property.id, listing_cell().label('cell'))
+        return self.db.execute(stmt, execution_options={'synchronize_session': False}).all()
+
+    def save_results(self, results: List[CadastralResult]) -> dict:
+        """
+        Store a batch of upstream lookups: one statement updates the
+        listings, one upserts the parcel cache for their cells.
+        """
+        unique = {result.property_id: result for result in results}  # last one wins
+        if not unique:
+            return {'updated': 0, 'cached_cells': 0}
+
+        fields_by_id = {
+            property_id: result.model_dump(include=set(CADASTRAL_FIELDS))
+            for property_id, result in unique.items()
+        }
+        updated = self._apply(fields_by_id.items())
+
+        # One cache row per cell; a found parcel beats a miss in the same batch
+        parcels: Dict[str, dict] = {}
+        for row in updated:
+            if row.cell is None:
+                continue
+            fields = fields_by_id[row.id]
+            current = parcels.get(row.cell)
+            if current is None or (fields['cadastral_number'] and not current['cadastral_number']):
+                parcels[row.cell] = fields
+        if parcels:
+            stmt = insert(CadastralParcel).values([
+                {'cell': cell, **fields} for cell, fields in parcels.items()
+            ])
+            # A miss never replaces a parcel already found for the cell
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[CadastralParcel.cell],
+                set_={
+                    **{field: stmt.excluded[field] for field in CADASTRAL_FIELDS},
+                    'fetched_at': func.now(),
+                },
+                where=or_(
+                    stmt.excluded.cadastral_number.isnot(None),
+                    CadastralParcel.cadastral_number.is_(None)
+                )
+            )
+            self.db.execute(stmt)
+
+        self.db.commit()
+        return {'updated': len(updated), 'cached_cells': len(parcels)}
@@ -0,0 +1,338 @@
+"""
+Cross-source duplicate detection.
+
+The same flat is often listed on several portals. A dedup pass clusters
+active listings of different sources that describe one property and
+stores the cluster's representative in ``properties.canonical_id`` (NULL
+for representatives and unique listings), which ``dedupe=true`` filters on.
+
+Candidate pairs are generated by blocking, never by comparing all pairs:
+
+* geo blocks: ~200 m grid cell x area bucket, probed with the neighbouring
+  cells and buckets so pairs on a boundary are still found;
+* text blocks: MinHash/LSH bands over title + description shingles, for
+  listings without coordinates.
+
+Run nightly with ``python -m app.commands.dedupe_properties``.
+"""
+
+import logging
+import re
+import unicodedata
+import zlib
+from collections import defaultdict
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+
+import numpy as np
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.models.property import Property
+from app.services.distance_service import haversine_km
+
+logger = logging.getLogger(__name__)
+
+NUM_PERM = 64
+LSH_BANDS = 16
+LSH_ROWS = NUM_PERM // LSH_BANDS
+SHINGLE_SIZE = 5
+
+GEO_CELL_DEGREES = 0.002     # ~220 m latitude, ~145 m longitude in Czechia
+AREA_BUCKET_SQM = 5.0
+MAX_DISTANCE_KM = 0.15
+AREA_TOLERANCE = 0.05        # relative
+AREA_TOLERANCE_SQM = 2.0     # absolute, for small flats
+TEXT_MATCH = 0.25            # estimated Jaccard, with matching geo/area
+TEXT_ONLY_MATCH = 0.6        # estimated Jaccard, without coordinates
+MAX_BLOCK_SIZE = 200         # larger LSH buckets are boilerplate, skipped
+
+_LOAD_CHUNK_ROWS = 20_000
+_HASH_PRIME = 4294967311     # smallest prime above 2**32
+
+_rng = np.random.default_rng(20240601)
+_PERM_A = _rng.integers(1, _HASH_PRIME, size=NUM_PERM, dtype=np.uint64)
+_PERM_B = _rng.integers(0, _HASH_PRIME, size=NUM_PERM, dtype=np.uint64)
+
+_WORD = re.compile(r'\w+')
+
+
+def normalize_text(value: str) -> str:
+    """Lowercase, strip diacritics and collapse everything but words."""
+    decomposed = unicodedata.normalize('NFKD', value.lower())
+    stripped = ''.join(c for c in decomposed if not unicodedata.combining(c))
+    return ' '.join(_WORD.findall(stripped))
+
+
+def shingles(value: str, size: int = SHINGLE_SIZE) -> Set[int]:
+    """CRC32 hashes of the character shingles of normalised text."""
+    value = normalize_text(value)
+    if len(value) < size:
+        return {zlib.crc32(value.encode())} if value else set()
+    return {zlib.crc32(value[i:i + size].encode()) for i in range(len(value) - size + 1)}
+
+
+def minhash(hashes: Set[int]) -> Optional[np.ndarray]:
+    """MinHash signature (NUM_PERM uint32 values) of a shingle set."""
+    if not hashes:
+        return None
+    x = np.fromiter(hashes, dtype=np.uint64, count=len(hashes))
+    # a, x < 2**32 so a * x fits in uint64
+    values = (_PERM_A[:, None] * x[None, :] % np.uint64(_HASH_PRIME) + _PERM_B[:, None]) % np.uint64(_HASH_PRIME)
+    return values.min(axis=1).astype(np.uint32)
+
+
+def estimated_jaccard(a: Optional[np.ndarray], b: Optional[np.ndarray]) -> float:
+    if a is None or b is None:
+        return 0.0
+    return float(np.count_nonzero(a == b)) / NUM_PERM
+
+
+class _UnionFind:
+    def __init__(self):
+        self.parent: Dict[int, int] = {}
+
+    def find(self, x: int) -> int:
+        parent = self.parent
+        root = x
+        while parent.get(root, root) != root:
+            root = parent[root]
+        while parent.get(x, x) != root:
+            parent[x], x = root, parent[x]
+        return root
+
+    def union(self, a: int, b: int):
+        ra, rb = self.find(a), self.find(b)
+        if ra != rb:
+            # Smallest id becomes the root, i.e. the canonical listing
+            if ra < rb:
+                self.parent[rb] = ra
+            else:
+                self.parent[ra] = rb
+
+
+class _Listings:
+    """Columnar copy of the listings being deduplicated."""
+
+    def __init__(self):
+        self.ids: List[int] = []
+        self.source: List[str] = []
+        self.segment: List[tuple] = []
+        self.lat: List[float] = []
+        self.lng: List[float] = []
+        self.area: List[float] = []
+        self.rooms: List[Optional[str]] = []
+        self.floor: List[Optional[int]] = []
+        self.current: List[Optional[int]] = []
+        self.signatures: List[Optional[np.ndarray]] = []
+
+    def append(self, row):
+        self.ids.append(row.id)
+        self.source.append(row.source)
+        self.segment.append((row.transaction_type, row.property_type))
+        self.lat.append(row.lat if row.lat is not None else np.nan)
+        self.lng.append(row.lng if row.lng is not None else np.nan)
+        self.area.append(float(row.area_usable) if row.area_usable else np.nan)
+        self.rooms.append(row.rooms)
+        self.floor.append(row.floor)
+        self.current.append(row.canonical_id)
+        # Text is reduced to its signature right away
+        self.signatures.append(minhash(shingles(f"{row.title or ''} {row.description or ''}")))
+
+    def freeze(self) -> "_Listings":
+        self.lat = np.array(self.lat, dtype=np.float64)
+        self.lng = np.array(self.lng, dtype=np.float64)
+        self.area = np.array(self.area, dtype=np.float64)
+        return self
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+
+class DedupService:
+    def __init__(self, db: Session):
+        self.db = db
+
+    # Loading
+
+    def _load(self) -> _Listings:
+        listings = _Listings()
+        last_id = 0
+        while True:
+            chunk = self.db.query(
+                Property.id,
+                Property.source,
+                Property.transaction_type,
+                Property.property_type,
+                Property.lat,
+                Property.lng,
+                Property.area_usable,
+                Property.rooms,
+                Property.floor,
+                Property.title,
+                Property.description,
+                Property.canonical_id
+            ).filter(
+                Property.is_active == True,
+                Property.id > last_id
+            ).order_by(Property.id).limit(_LOAD_CHUNK_ROWS).all()
+            if not chunk:
+                break
+            for row in chunk:
+                listings.append(row)
+            last_id = chunk[-1].id
+        return listings.freeze()
+
+    # Candidate generation
+
+    def _geo_candidates(self, listings: _Listings) -> Iterator[Tuple[int, int]]:
+        has_geo = ~np.isnan(listings.lat) & ~np.isnan(listings.lng)
+        cell_lat = np.floor(listings.lat / GEO_CELL_DEGREES)
+        cell_lng = np.floor(listings.lng / GEO_CELL_DEGREES)
+        area_bucket = np.where(
+            np.isnan(listings.area), -1, np.floor(np.nan_to_num(listings.area) / AREA_BUCKET_SQM)
+        )
+
+        blocks: Dict[tuple, List[int]] = defaultdict(list)
+        for i in np.flatnonzero(has_geo):
+            key = (listings.segment[i], int(cell_lat[i]), int(cell_lng[i]), int(area_bucket[i]))
+            blocks[key].append(int(i))
+
+        for (segment, lat, lng, bucket), members in blocks.items():
+            # Probe each neighbouring block once (only "forward" offsets, so
+            # every pair of blocks is visited a single time)
+            for d_lat, d_lng, d_area in _FORWARD_OFFSETS:
+                if bucket < 0 and d_area:
+                    continue
+                other = members if (d_lat, d_lng, d_area) == (0, 0, 0) else blocks.get(
+                    (segment, lat + d_lat, lng + d_lng, bucket + d_area)
+                )
+                if not other:
+                    continue
+                same_block = other is members
+                for x, i in enumerate(members):
+                    for j in (members[x + 1:] if same_block else other):
+                        yield i, j
+
+    def _text_candidates(self, listings: _Listings) -> Iterator[Tuple[int, int]]:
+        """LSH bands, for listings without coordinates."""
+        has_geo = ~np.isnan(listings.lat) & ~np.isnan(listings.lng)
+        buckets: Dict[tuple, List[int]] = defaultdict(list)
+        for i, signature in enumerate(listings.signatures):
+            if signature is None:
+                continue
+            for band in range(LSH_BANDS):
+                rows = signature[band * LSH_ROWS:(band + 1) * LSH_ROWS]
+                buckets[(listings.segment[i], band, rows.tobytes())].append(i)
+
+        seen = set()
+        for members in buckets.values():
+            if len(members) < 2 or len(members) > MAX_BLOCK_SIZE:
+                continue
+            for x, i in enumerate(members):
+                for j in members[x + 1:]:
+                    if has_geo[i] and has_geo[j]:
+                        continue  # covered by geo blocking
+                    if (i, j) not in seen:
+                        seen.add((i, j))
+                        yield i, j
+
+    # Pair decision
+
+    @staticmethod
+    def _compatible(a, b) -> bool:
+        return a is None or b is None or a == b
+
+    def _is_duplicate(self, listings: _Listings, i: int, j: int) -> bool:
+        if listings.source[i] == listings.source[j]:
+            return False
+        if not self._compatible(listings.rooms[i], listings.rooms[j]):
+            return False
+        if not self._compatible(listings.floor[i], listings.floor[j]):
+            return False
+
+        area_i, area_j = listings.area[i], listings.area[j]
+        if not np.isnan(area_i) and not np.isnan(area_j):
+            if abs(area_i - area_j) > max(AREA_TOLERANCE * max(area_i, area_j), AREA_TOLERANCE_SQM):
+                return False
+        area_known = not np.isnan(area_i) and not np.isnan(area_j)
+
+        similarity = estimated_jaccard(listings.signatures[i], listings.signatures[j])
+        if np.isnan(listings.lat[i]) or np.isnan(listings.lat[j]):
+            return area_known and similarity >= TEXT_ONLY_MATCH
+
+        distance = float(haversine_km(listings.lat[i], listings.lng[i], listings.lat[j], listings.lng[j]))
+        if distance > MAX_DISTANCE_KM:
+            return False
+        # Portals geocode differently; a close match on everything else is
+        # enough, otherwise the text has to agree too
+        close = distance <= MAX_DISTANCE_KM / 3
+        layout_known = all(
+            value is not None
+            for value in (listings.rooms[i], listings.rooms[j], listings.floor[i], listings.floor[j])
+        )
+        return (close and area_known and layout_known) or similarity >= TEXT_MATCH
+
+    # Pass
+
+    def run(self) -> dict:
+        """Recluster all active listings and store the changed canonical ids."""
+        listings = self._load()
+        clusters = _UnionFind()
+        candidates = 0
+        duplicates = 0
+        for i, j in self._iter_candidates(listings):
+            candidates += 1
+            if self._is_duplicate(listings, i, j):
+                duplicates += 1
+                clusters.union(listings.ids[i], listings.ids[j])
+
+        changed_ids, changed_canonical = [], []
+        for index, property_id in enumerate(listings.ids):
+            root = clusters.find(property_id)
+            canonical = root if root != property_id else None
+            if canonical != listings.current[index]:
+                changed_ids.append(property_id)
+                changed_canonical.append(canonical)
+
+        # Inactive listings never stay pointed at (or act as) a canonical
+        self.db.execute(text("""
+            UPDATE properties SET canonical_id = NULL
+            WHERE canonical_id IS NOT NULL AND NOT is_active
+        """))
+        for start in range(0, len(changed_ids), _LOAD_CHUNK_ROWS):
+            self.db.execute(text("""
+                UPDATE properties p
+                SET canonical_id = v.canonical_id
+                FROM unnest(CAST(:ids AS integer[]), CAST(:canonical_ids AS integer[]))
+                     AS v(id, canonical_id)
+                WHERE p.id = v.id
+            """), {
+                'ids': changed_ids[start:start + _LOAD_CHUNK_ROWS],
+                'canonical_ids': changed_canonical[start:start + _LOAD_CHUNK_ROWS],
+            })
+        self.db.commit()
+
+        clustered = sum(1 for property_id in listings.ids if clusters.find(property_id) != property_id)
+        result = {
+            'listings': len(listings),
+            'candidate_pairs': candidates,
+            'duplicate_pairs': duplicates,
+            'duplicates': clustered,
+            'changed': len(changed_ids),
+        }
+        logger.info(f"Dedup pass: {result}")
+        return result
+
+    def _iter_candidates(self, listings: _Listings) -> Iterator[Tuple[int, int]]:
+        yield from self._geo_candidates(listings)
+        yield from self._text_candidates(listings)
+
+
+# Half of the 3x3x3 neighbourhood plus the block itself
+_FORWARD_OFFSETS = [(0, 0, 0)] + [
+    (d_lat, d_lng, d_area)
+    for d_lat in (-1, 0, 1)
+    for d_lng in (-1, 0, 1)
+    for d_area in (-1, 0, 1)
+    if (d_lat, d_lng, d_area) > (0, 0, 0)
+]
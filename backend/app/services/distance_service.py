@@ -0,0 +1,197 @@
+import logging
+import threading
+import time
+from decimal import Decimal
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+from geoalchemy2.functions import ST_X, ST_Y
+
+from app.config import get_settings
+from app.models.property import CityCenter
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+# Mean Earth radius (IUGG), km
+EARTH_RADIUS_KM = 6371.0088
+
+# Upper bound on points x centers evaluated at once, keeps memory flat
+# for very large batches
+_MAX_CELLS_PER_CHUNK = 4_000_000
+
+
+def haversine_km(
+    lat1: np.ndarray,
+    lng1: np.ndarray,
+    lat2: np.ndarray,
+    lng2: np.ndarray
+) -> np.ndarray:
+    """Great-circle distance in km between broadcastable arrays of degrees."""
+    lat1, lng1, lat2, lng2 = map(np.radians, (lat1, lng1, lat2, lng2))
+    dlat = lat2 - lat1
+    dlng = lng2 - lng1
+    a = np.sin(dlat / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin(dlng / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+class CityCenterIndex:
+    """In-memory set of city centers answering nearest-center queries in bulk."""
+
+    def __init__(self, names: Sequence[str], lats: Sequence[float], lngs: Sequence[float]):
+        self.names = list(names)
+        self.lats = np.asarray(lats, dtype=np.float64)
+        self.lngs = np.asarray(lngs, dtype=np.float64)
+
+    @classmethod
+    def from_db(cls, db: Session) -> "CityCenterIndex":
+        rows = db.query(
+            CityCenter.city_name,
+            ST_Y(CityCenter.coordinates).label('lat'),
+            ST_X(CityCenter.coordinates).label('lng')
+        ).order_by(CityCenter.id).all()
+        return cls(
+            [r.city_name for r in rows],
+            [r.lat for r in rows],
+            [r.lng for r in rows]
+        )
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def nearest(self, lats: np.ndarray, lngs: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Distance (km) to and index of the nearest center for each point.
+
+        Points with NaN coordinates get NaN distance and index -1.
+        """
+        lats = np.asarray(lats, dtype=np.float64)
+        lngs = np.asarray(lngs, dtype=np.float64)
+        n = lats.shape[0]
+
+        distances = np.full(n, np.nan)
+        indexes = np.full(n, -1, dtype=np.int64)
+        if n == 0 or len(self) == 0:
+            return distances, indexes
+
+        valid = ~(np.isnan(lats) | np.isnan(lngs))
+        valid_idx = np.flatnonzero(valid)
+
+        chunk = max(1, _MAX_CELLS_PER_CHUNK // len(self))
+        for start in range(0, valid_idx.shape[0], chunk):
+            sel = valid_idx[start:start + chunk]
+            # (points, 1) against (1, centers)
+            d = haversine_km(
+                lats[sel, None], lngs[sel, None],
+                self.lats[None, :], self.lngs[None, :]
+            )
+            best = np.argmin(d, axis=1)
+            indexes[sel] = best
+            distances[sel] = d[np.arange(sel.shape[0]), best]
+
+        return distances, indexes
+
+
+_index: Optional[CityCenterIndex] = None
+_index_loaded_at = 0.0
+_index_lock = threading.Lock()
+
+
+def get_city_center_index(db: Session, refresh: bool = False) -> CityCenterIndex:
+    """
+    Return the process-wide city center index.
+
+    Centers are read from the ``city_centers`` table and cached for
+    ``city_centers_cache_ttl_seconds``, so new rows are picked up
+    without a deploy.
+    """
+    global _index, _index_loaded_at
+
+    ttl = settings.city_centers_cache_ttl_seconds
+    with _index_lock:
+        expired = time.monotonic() - _index_loaded_at > ttl
+        if _index is None or refresh or expired:
+            _index = CityCenterIndex.from_db(db)
+            _index_loaded_at = time.monotonic()
+            logger.info(f"Loaded {len(_index)} city centers")
+        return _index
+
+
+def compute_distances_to_center(
+    db: Session,
+    coordinates: Sequence[Tuple[Optional[float], Optional[float]]]
+) -> List[Optional[Decimal]]:
+    """Nearest city center distance (km, 2 dp) for a batch of (lat, lng) pairs."""
+    if not coordinates:
+        return []
+
+    coords = np.array(
+        [
+            (lat if lat is not None else np.nan, lng if lng is not None else np.nan)
+            for lat, lng in coordinates
+        ],
+        dtype=np.float64
+    )
+    distances, _ = get_city_center_index(db).nearest(coords[:, 0], coords[:, 1])
+
+    return [
+        None if np.isnan(d) else Decimal(str(round(float(d), 2)))
+        for d in distances
+    ]
+
+
+def backfill_distance_to_center(
+    db: Session,
+    batch_size: int = 5000,
+    only_missing: bool = True
+) -> int:
+    """
+    Fill ``distance_to_center`` for existing properties in id-ordered chunks.
+
+    Each chunk is one SELECT and one set-based UPDATE; returns rows updated.
+    """
+    index = get_city_center_index(db, refresh=True)
+    if not len(index):
+        logger.warning("city_centers is empty, nothing to backfill")
+        return 0
+
+    missing_clause = "AND distance_to_center IS NULL" if only_missing else ""
+    select_sql = text(f"""
+        SELECT id, ST_Y(coordinates) AS lat, ST_X(coordinates) AS lng
+        FROM properties
+        WHERE id > :last_id AND coordinates IS NOT NULL {missing_clause}
+        ORDER BY id
+        LIMIT :batch_size
+    """)
+    update_sql = text("""
+        UPDATE properties p
+        SET distance_to_center = v.distance
+        FROM unnest(CAST(:ids AS integer[]), CAST(:distances AS numeric[])) AS v(id, distance)
+        WHERE p.id = v.id
+    """)
+
+    last_id = 0
+    updated = 0
+    while True:
+        rows = db.execute(select_sql, {'last_id': last_id, 'batch_size': batch_size}).all()
+        if not rows:
+            break
+
+        ids = np.fromiter((r.id for r in rows), dtype=np.int64, count=len(rows))
+        lats = np.fromiter((r.lat for r in rows), dtype=np.float64, count=len(rows))
+        lngs = np.fromiter((r.lng for r in rows), dtype=np.float64, count=len(rows))
+        distances, _ = index.nearest(lats, lngs)
+
+        db.execute(update_sql, {
+            'ids': ids.tolist(),
+            'distances': np.round(distances, 2).tolist()
+        })
+        db.commit()
+
+        updated += len(rows)
+        last_id = int(ids[-1])
+        logger.info(f"Backfilled distance_to_center up to id {last_id} ({updated} rows)")
+
+    return updated
@@ -0,0 +1,271 @@
+import logging
+import queue
+import threading
+import zlib
+from typing import Callable, Iterator, List, Optional
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+import zstandard
+from sqlalchemy import select
+from sqlalchemy.engine import Engine
+
+from app.database import engine
+from app.models.property import Property
+from app.schemas.property import PropertyFilter
+from app.services.property_service import filter_conditions
+
+logger = logging.getLogger(__name__)
+
+FORMATS = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv',
+    'parquet': 'application/vnd.apache.parquet',
+}
+
+# Exported columns: (name, expression, parquet type)
+EXPORT_COLUMNS = [
+    ('id', Property.id, pa.int32()),
+    ('external_id', Property.external_id, pa.string()),
+    ('source', Property.source, pa.string()),
+    ('title', Property.title, pa.string()),
+    ('property_type', Property.property_type, pa.string()),
+    ('transaction_type', Property.transaction_type, pa.string()),
+    ('price', Property.price, pa.float64()),
+    ('price_per_sqm', Property.price_per_sqm, pa.float64()),
+    ('currency', Property.currency, pa.string()),
+    ('area_usable', Property.area_usable, pa.float64()),
+    ('area_land', Property.area_land, pa.float64()),
+    ('rooms', Property.rooms, pa.string()),
+    ('rooms_count', Property.rooms_count, pa.float64()),
+    ('floor', Property.floor, pa.int32()),
+    ('floors_total', Property.floors_total, pa.int32()),
+    ('condition', Property.condition, pa.string()),
+    ('construction_type', Property.construction_type, pa.string()),
+    ('energy_rating', Property.energy_rating, pa.string()),
+    ('has_balcony', Property.has_balcony, pa.bool_()),
+    ('has_terrace', Property.has_terrace, pa.bool_()),
+    ('has_parking', Property.has_parking, pa.bool_()),
+    ('has_garage', Property.has_garage, pa.bool_()),
+    ('has_elevator', Property.has_elevator, pa.bool_()),
+    ('has_cellar', Property.has_cellar, pa.bool_()),
+    ('has_garden', Property.has_garden, pa.bool_()),
+    ('address_street', Property.address_street, pa.string()),
+    ('address_city', Property.address_city, pa.string()),
+    ('address_district', Property.address_district, pa.string()),
+    ('address_zip', Property.address_zip, pa.string()),
+    ('lat', Property.lat, pa.float64()),
+    ('lng', Property.lng, pa.float64()),
+    ('distance_to_center', Property.distance_to_center, pa.float64()),
+    ('predicted_price', Property.predicted_price, pa.float64()),
+    ('price_assessment', Property.price_assessment, pa.string()),
+    ('price_deviation_percent', Property.price_deviation_percent, pa.float64()),
+    ('url', Property.url, pa.string()),
+    ('scraped_at', Property.scraped_at, pa.timestamp('us', tz='UTC')),
+    ('updated_at', Property.updated_at, pa.timestamp('us', tz='UTC')),
+    ('is_active', Property.is_active, pa.bool_()),
+]
+
+PARQUET_SCHEMA = pa.schema([(name, type_) for name, _, type_ in EXPORT_COLUMNS])
+
+
+def negotiate_encoding(accept_encoding: Optional[str], fmt: str) -> Optional[str]:
+    """Pick zstd or gzip from Accept-Encoding; Parquet is compressed internally."""
+    if fmt == 'parquet' or not accept_encoding:
+        return None
+
+    accepted = set()
+    for part in accept_encoding.lower().split(','):
+        name, _, params = part.strip().partition(';')
+        if params.strip().replace(' ', '') in ('q=0', 'q=0.0', 'q=0.00', 'q=0.000'):
+            continue
+        accepted.add(name.strip())
+    for encoding in ('zstd', 'gzip'):
+        if encoding in accepted:
+            return encoding
+    return None
+
+
+def compress(chunks: Iterator[bytes], encoding: Optional[str]) -> Iterator[bytes]:
+    """Stream-compress chunks with gzip or zstd (None passes them through)."""
+    if encoding is None:
+        yield from chunks
+        return
+
+    if encoding == 'gzip':
+        compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+    else:
+        compressor = zstandard.ZstdCompressor(level=3).compressobj()
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+class PropertyExporter:
+    """
+    Streams the filtered listing set from its own connection to ``bind``
+    (the primary, or a replica for read-only requests).
+
+    Rows come from a server-side cursor (or COPY for CSV), so memory stays
+    bounded by ``batch_size`` however large the export is. The connection
+    is held only while the response streams.
+    """
+
+    def __init__(self, filters: PropertyFilter, batch_size: int = 5000, bind: Engine = engine):
+        self.filters = filters
+        self.batch_size = batch_size
+        self.bind = bind
+
+    def _sql(self, cursor, wrap: Callable[[str], str] = lambda sql: sql) -> str:
+        stmt = select(
+            *[expression.label(name) for name, expression, _ in EXPORT_COLUMNS]
+        ).where(
+            Property.is_active == True,
+            *filter_conditions(self.filters).values()
+        ).order_by(Property.id)
+        compiled = stmt.compile(dialect=engine.dialect)
+        return cursor.mogrify(wrap(str(compiled)), compiled.params).decode()
+
+    def stream(self, fmt: str) -> Iterator[bytes]:
+        writers = {'ndjson': self._ndjson, 'csv': self._csv, 'parquet': self._parquet}
+        conn = self.bind.raw_connection()
+        clean = False
+        try:
+            yield from writers[fmt](conn)
+            clean = True
+        finally:
+            # An export abandoned mid-stream may leave the connection inside
+            # a COPY or an open portal; don't hand it back to the pool
+            if clean:
+                conn.rollback()
+            else:
+                conn.invalidate()
+            conn.close()
+
+    def _rows(self, conn, sql: str) -> Iterator[List[tuple]]:
+        with conn.cursor(name='property_export') as cursor:
+            cursor.itersize = self.batch_size
+            cursor.execute(sql)
+            while True:
+                rows = cursor.fetchmany(self.batch_size)
+                if not rows:
+                    break
+                yield rows
+
+    def _ndjson(self, conn) -> Iterator[bytes]:
+        # PostgreSQL renders the JSON; Python only joins the lines
+        with conn.cursor() as cursor:
+            sql = self._sql(cursor, lambda inner: f"SELECT row_to_json(e)::text FROM ({inner}) e")
+        for rows in self._rows(conn, sql):
+            yield ('\n'.join(r[0] for r in rows) + '\n').encode()
+
+    def _csv(self, conn) -> Iterator[bytes]:
+        with conn.cursor() as cursor:
+            sql = self._sql(cursor)
+        chunks: queue.Queue = queue.Queue(maxsize=16)
+        done = object()
+        cancelled = threading.Event()
+
+        def put(item):
+            # A full queue blocks the copy until the client catches up
+            while not cancelled.is_set():
+                try:
+                    chunks.put(item, timeout=1)
+                    return
+                except queue.Full:
+                    continue
+            raise IOError("Export cancelled")
+
+        class _QueueWriter:
+            def write(self, data):
+                put(data)
+                return len(data)
+
+        def copy():
+            try:
+                with conn.cursor() as cursor:
+                    cursor.copy_expert(
+                        f"COPY ({sql}) TO STDOUT WITH (FORMAT csv, HEADER true)",
+                        _QueueWriter(),
+                        size=64 * 1024
+                    )
+                put(done)
+            except Exception as e:
+                if not cancelled.is_set():
+                    logger.warning(f"CSV export failed: {e}")
+                    try:
+                        put(e)
+                    except IOError:
+                        pass
+
+        thread = threading.Thread(target=copy, name='csv-export', daemon=True)
+        thread.start()
+        try:
+            while True:
+                item = chunks.get()
+                if item is done:
+                    break
+                if isinstance(item, Exception):
+                    raise item
+                yield item if isinstance(item, bytes) else item.encode()
+        finally:
+            cancelled.set()
+            thread.join()
+
+    def _parquet(self, conn) -> Iterator[bytes]:
+        with conn.cursor() as cursor:
+            sql = self._sql(cursor)
+        sink = _ChunkSink()
+        writer = pq.ParquetWriter(sink, PARQUET_SCHEMA, compression='zstd')
+        for rows in self._rows(conn, sql):
+            batch = pa.RecordBatch.from_arrays(
+                [_arrow_array(values, field.type) for values, field in zip(zip(*rows), PARQUET_SCHEMA)],
+                schema=PARQUET_SCHEMA
+            )
+            # One row group per batch, flushed to the client as it is written
+            writer.write_batch(batch, row_group_size=len(rows))
+            yield sink.take()
+        writer.close()
+        yield sink.take()
+
+
+def _arrow_array(values, type_) -> pa.Array:
+    if pa.types.is_floating(type_):
+        # NUMERIC columns arrive as Decimal
+        values = [None if v is None else float(v) for v in values]
+    return pa.array(values, type=type_)
+
+
+class _ChunkSink:
+    """Write-only file object handing written bytes back in chunks."""
+
+    closed = False
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+        self._position = 0
+
+    def write(self, data) -> int:
+        data = bytes(data)
+        self._chunks.append(data)
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def writable(self) -> bool:
+        return True
+
+    def take(self) -> bytes:
+        data = b''.join(self._chunks)
+        self._chunks = []
+        return data
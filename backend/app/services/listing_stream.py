@@ -0,0 +1,178 @@
+import asyncio
+import json
+import logging
+from typing import Optional, Set
+
+import psycopg2
+from sqlalchemy.engine import make_url
+
+from app.config import get_settings
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+CHANNEL = 'listing_events'
+EVENT_TYPES = {'created', 'repriced', 'deactivated', 'rescored'}
+
+# Sent to a client that fell behind, or after the listener reconnected:
+# events were lost, so the client should refetch what it shows
+RESYNC_FRAME = b"event: resync\ndata: {}\n\n"
+
+_RECONNECT_DELAYS = [1, 2, 5, 10, 30]
+
+
+class Subscriber:
+    """One connected client: a bounded queue of pre-encoded SSE frames."""
+
+    def __init__(self, queue_size: int, types: Optional[Set[str]] = None):
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.types = types
+        self.dropped = 0
+
+    def offer(self, frame: bytes):
+        try:
+            self.queue.put_nowait(frame)
+        except asyncio.QueueFull:
+            # Slow client: drop its backlog instead of buffering without
+            # bound or stalling the fan-out, and tell it to resync
+            self.dropped += self.queue.qsize()
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(RESYNC_FRAME)
+
+
+class ListingStream:
+    """
+    Fans out PostgreSQL ``listing_events`` notifications to SSE clients.
+
+    A single LISTEN connection per process is watched by the event loop;
+    each event is encoded once and handed to every subscriber's queue.
+    """
+
+    def __init__(self, dsn: str, queue_size: int):
+        self.dsn = dsn
+        self.queue_size = queue_size
+        self.subscribers: Set[Subscriber] = set()
+        self.events_received = 0
+        self._conn = None
+        self._lost: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def connected(self) -> bool:
+        return self._conn is not None
+
+    def subscribe(self, types: Optional[Set[str]] = None) -> Subscriber:
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+        subscriber = Subscriber(self.queue_size, types)
+        self.subscribers.add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber: Subscriber):
+        self.subscribers.discard(subscriber)
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self._disconnect()
+
+    def _connect(self):
+        conn = psycopg2.connect(self.dsn)
+        conn.set_isolation_level(psycopg2.extensions.ISOLATION_LEVEL_AUTOCOMMIT)
+        with conn.cursor() as cursor:
+            cursor.execute(f"LISTEN {CHANNEL}")
+        return conn
+
+    def _disconnect(self):
+        if self._conn is None:
+            return
+        try:
+            asyncio.get_running_loop().remove_reader(self._conn.fileno())
+        except (RuntimeError, ValueError):
+            pass
+        try:
+            self._conn.close()
+        except psycopg2.Error:
+            pass
+        self._conn = None
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        attempt = 0
+        reconnected = False
+        while True:
+            try:
+                self._conn = await loop.run_in_executor(None, self._connect)
+            except psycopg2.Error as e:
+                delay = _RECONNECT_DELAYS[min(attempt, len(_RECONNECT_DELAYS) - 1)]
+                attempt += 1
+                logger.warning(f"Listing stream cannot LISTEN ({e}); retrying in {delay}s")
+                await asyncio.sleep(delay)
+                continue
+
+            attempt = 0
+            if reconnected:
+                self._broadcast(RESYNC_FRAME, None)
+            reconnected = True
+            logger.info(f"Listing stream listening on '{CHANNEL}'")
+
+            self._lost = asyncio.Event()
+            loop.add_reader(self._conn.fileno(), self._on_readable)
+            await self._lost.wait()
+            self._disconnect()
+
+    def _on_readable(self):
+        try:
+            self._conn.poll()
+        except psycopg2.Error as e:
+            logger.warning(f"Listing stream connection lost: {e}")
+            self._lost.set()
+            return
+
+        while self._conn.notifies:
+            notify = self._conn.notifies.pop(0)
+            try:
+                events = json.loads(notify.payload)
+            except ValueError:
+                logger.warning("Ignoring malformed listing event payload")
+                continue
+            for event in events:
+                self.events_received += 1
+                frame = (
+                    f"event: {event['type']}\n"
+                    f"data: {json.dumps(event, separators=(',', ':'))}\n\n"
+                ).encode()
+                self._broadcast(frame, event['type'])
+
+    def _broadcast(self, frame: bytes, event_type: Optional[str]):
+        for subscriber in self.subscribers:
+            if event_type is None or subscriber.types is None or event_type in subscriber.types:
+                subscriber.offer(frame)
+
+
+_stream: Optional[ListingStream] = None
+
+
+def get_listing_stream() -> ListingStream:
+    """The process-wide stream; it starts listening on the first subscriber."""
+    global _stream
+    if _stream is None:
+        dsn = make_url(settings.database_url).set(drivername='postgresql')
+        _stream = ListingStream(
+            dsn.render_as_string(hide_password=False),
+            settings.stream_client_queue_size
+        )
+    return _stream
+
+
+async def stop_listing_stream() -> None:
+    global _stream
+    if _stream is not None:
+        await _stream.stop()
+        _stream = None
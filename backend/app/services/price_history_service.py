@@ -0,0 +1,117 @@
+import logging
+import re
+from datetime import date, datetime, timezone
+from typing import List, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+logger = logging.getLogger(__name__)
+
+_PARTITION_NAME = re.compile(r'^price_history_y(\d{4})m(\d{2})$')
+_COMPACTED = 'compacted'
+
+
+def _add_months(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+class PriceHistoryMaintenance:
+    """Partition upkeep, compaction and retention for price_history."""
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def _current_month(self) -> date:
+        today = datetime.now(timezone.utc).date()
+        return today.replace(day=1)
+
+    def list_partitions(self) -> List[Tuple[str, date, bool]]:
+        """Monthly partitions as (name, month, compacted), oldest first."""
+        rows = self.db.execute(text("""
+            SELECT c.relname AS name,
+                   obj_description(c.oid, 'pg_class') AS note
+            FROM pg_inherits i
+            JOIN pg_class c ON c.oid = i.inhrelid
+            WHERE i.inhparent = 'price_history'::regclass
+        """)).all()
+
+        partitions = []
+        for r in rows:
+            match = _PARTITION_NAME.match(r.name)
+            if match:
+                month = date(int(match.group(1)), int(match.group(2)), 1)
+                partitions.append((r.name, month, r.note == _COMPACTED))
+        return sorted(partitions, key=lambda p: p[1])
+
+    def ensure_partitions(self, months_ahead: int = 3, months_back: int = 0) -> int:
+        """Create missing monthly partitions around the current month."""
+        current = self._current_month()
+        created = self.db.execute(
+            text("SELECT ensure_price_history_partitions(:from_month, :to_month)"),
+            {
+                'from_month': _add_months(current, -months_back),
+                'to_month': _add_months(current, months_ahead),
+            }
+        ).scalar()
+        self.db.commit()
+        return created or 0
+
+    def compact(self, older_than_months: int) -> dict:
+        """
+        Downsample months older than ``older_than_months`` to one row per
+        property (its last price in the month).
+
+        A kept row that repeats the property's price from an earlier month
+        is dropped too, preserving the change-only invariant. Partitions are
+        marked once compacted and skipped on later runs.
+        """
+        cutoff = _add_months(self._current_month(), -older_than_months)
+        result = {}
+        for name, month, compacted in self.list_partitions():
+            if compacted or month >= cutoff:
+                continue
+
+            collapsed = self.db.execute(text(f"""
+                DELETE FROM {name} ph
+                USING (
+                    SELECT id, row_number() OVER (
+                        PARTITION BY property_id ORDER BY recorded_at DESC
+                    ) AS rn
+                    FROM {name}
+                ) ranked
+                WHERE ph.id = ranked.id AND ranked.rn > 1
+            """)).rowcount
+            repeated = self.db.execute(text(f"""
+                DELETE FROM {name} ph
+                WHERE ph.price = (
+                    SELECT prev.price FROM price_history prev
+                    WHERE prev.property_id = ph.property_id
+                      AND prev.recorded_at < :month_start
+                    ORDER BY prev.recorded_at DESC
+                    LIMIT 1
+                )
+            """), {'month_start': month}).rowcount
+            self.db.execute(text(f"COMMENT ON TABLE {name} IS '{_COMPACTED}'"))
+            self.db.commit()
+
+            result[name] = collapsed + repeated
+            logger.info(f"Compacted {name}: {collapsed + repeated} rows removed")
+        return result
+
+    def drop_expired(self, retention_months: int) -> List[str]:
+        """Drop monthly partitions entirely older than the retention window."""
+        if retention_months <= 0:
+            return []
+
+        cutoff = _add_months(self._current_month(), -retention_months)
+        dropped = []
+        for name, month, _ in self.list_partitions():
+            if month < cutoff:
+                self.db.execute(text(f"DROP TABLE {name}"))
+                dropped.append(name)
+        self.db.commit()
+        if dropped:
+            logger.info(f"Dropped expired price_history partitions: {', '.join(dropped)}")
+        return dropped
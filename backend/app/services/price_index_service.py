@@ -0,0 +1,230 @@
+import logging
+import math
+from datetime import date, datetime, timedelta, timezone
+from typing import List, Optional
+
+from sqlalchemy import func, text
+from sqlalchemy.orm import Session
+
+from app.models.property import PriceHistory, PriceIndexDaily
+from app.services.cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+# Marker for "all values" of a rolled-up dimension
+ALL = '*'
+
+# One day of the rollup, for every (transaction_type, city, property_type)
+# combination plus the per-city, per-type and overall totals.
+#
+# A listing counts as live on a day if it was first scraped before the day
+# ended and was still active (or deactivated_at is later). Its price is the last
+# price_history entry recorded by the end of the day, so repricing moves
+# the median instead of being invisible as with scraped_at averages. That
+# price is one (property_id, recorded_at) index probe per live listing, so
+# the cost follows the live inventory rather than the size of the history.
+_ROLLUP_DAY_SQL = text("""
+WITH repriced AS (
+    SELECT property_id, SUM(ln(price / prev_price)) AS log_change
+    FROM (
+        SELECT property_id, price, recorded_at,
+               LAG(price) OVER (PARTITION BY property_id ORDER BY recorded_at) AS prev_price
+        FROM price_history
+        WHERE recorded_at < :day_end
+          AND property_id IN (
+              SELECT property_id FROM price_history
+              WHERE recorded_at >= :day_start AND recorded_at < :day_end
+          )
+    ) moves
+    WHERE recorded_at >= :day_start AND prev_price > 0 AND price > 0
+    GROUP BY property_id
+),
+events AS (
+    SELECT p.transaction_type, p.address_city AS city, p.property_type,
+           l.price,
+           l.price / NULLIF(p.area_usable, 0) AS price_per_sqm,
+           r.log_change,
+           p.scraped_at >= :day_start AS is_new,
+           FALSE AS is_removed
+    FROM properties p
+    JOIN LATERAL (
+        SELECT ph.price
+        FROM price_history ph
+        WHERE ph.property_id = p.id AND ph.recorded_at < :day_end
+        ORDER BY ph.recorded_at DESC
+        LIMIT 1
+    ) l ON TRUE
+    LEFT JOIN repriced r ON r.property_id = p.id
+    WHERE p.scraped_at < :day_end
+      AND (p.is_active OR p.deactivated_at >= :day_end)
+    UNION ALL
+    SELECT p.transaction_type, p.address_city, p.property_type,
+           NULL, NULL, NULL, FALSE, TRUE
+    FROM properties p
+    WHERE NOT p.is_active
+      AND p.deactivated_at >= :day_start AND p.deactivated_at < :day_end
+)
+INSERT INTO price_index_daily (
+    bucket_date, transaction_type, city, property_type,
+    listings_count, avg_price, avg_price_per_sqm, median_price_per_sqm,
+    new_listings, removed_listings, price_changes, log_change_sum, computed_at
+)
+SELECT
+    CAST(:day_start AS date),
+    COALESCE(transaction_type, 'unknown'),
+    CASE WHEN GROUPING(city) = 1 THEN :all ELSE COALESCE(city, 'unknown') END,
+    CASE WHEN GROUPING(property_type) = 1 THEN :all ELSE COALESCE(property_type, 'unknown') END,
+    COUNT(*) FILTER (WHERE NOT is_removed),
+    AVG(price),
+    AVG(price_per_sqm),
+    percentile_cont(0.5) WITHIN GROUP (ORDER BY price_per_sqm),
+    COUNT(*) FILTER (WHERE is_new),
+    COUNT(*) FILTER (WHERE is_removed),
+    COUNT(log_change),
+    COALESCE(SUM(log_change), 0),
+    NOW()
+FROM events
+GROUP BY GROUPING SETS (
+    (transaction_type, city, property_type),
+    (transaction_type, city),
+    (transaction_type, property_type),
+    (transaction_type)
+)
+ON CONFLICT (transaction_type, city, property_type, bucket_date) DO UPDATE SET
+    listings_count = EXCLUDED.listings_count,
+    avg_price = EXCLUDED.avg_price,
+    avg_price_per_sqm = EXCLUDED.avg_price_per_sqm,
+    median_price_per_sqm = EXCLUDED.median_price_per_sqm,
+    new_listings = EXCLUDED.new_listings,
+    removed_listings = EXCLUDED.removed_listings,
+    price_changes = EXCLUDED.price_changes,
+    log_change_sum = EXCLUDED.log_change_sum,
+    computed_at = EXCLUDED.computed_at
+""")
+
+# Series over the rollup. Weekly rows take end-of-week levels (listings,
+# median) and sum the flows; the repeat-listing index moves by the average
+# log price change per live listing, which sums across days.
+_SERIES_SQL = text("""
+SELECT
+    date_trunc(:granularity, bucket_date)::date AS period,
+    (array_agg(listings_count ORDER BY bucket_date DESC))[1] AS listings_count,
+    (array_agg(avg_price ORDER BY bucket_date DESC))[1] AS avg_price,
+    (array_agg(avg_price_per_sqm ORDER BY bucket_date DESC))[1] AS avg_price_per_sqm,
+    (array_agg(median_price_per_sqm ORDER BY bucket_date DESC))[1] AS median_price_per_sqm,
+    SUM(new_listings) AS new_listings,
+    SUM(removed_listings) AS removed_listings,
+    SUM(price_changes) AS price_changes,
+    SUM(log_change_sum / NULLIF(listings_count, 0)) AS log_index_change
+FROM price_index_daily
+WHERE transaction_type = :transaction_type
+  AND city = :city
+  AND property_type = :property_type
+  AND bucket_date BETWEEN :start_date AND :end_date
+GROUP BY 1
+ORDER BY 1
+""")
+
+GRANULARITIES = {'day', 'week'}
+
+_city_names = TTLCache(maxsize=512, ttl=3600)
+
+
+class PriceIndexService:
+    def __init__(self, db: Session):
+        self.db = db
+
+    def rollup_day(self, day: date):
+        """(Re)compute the rollup rows for one calendar day (UTC)."""
+        day_start = datetime(day.year, day.month, day.day, tzinfo=timezone.utc)
+        self.db.execute(_ROLLUP_DAY_SQL, {
+            'day_start': day_start,
+            'day_end': day_start + timedelta(days=1),
+            'all': ALL,
+        })
+        self.db.commit()
+
+    def refresh(self, since: Optional[date] = None, until: Optional[date] = None) -> int:
+        """
+        Bring the rollup up to date; returns the number of days computed.
+
+        Without ``since`` it resumes from the last rolled-up day (which is
+        recomputed, as it may have been partial), or from the first
+        price_history entry on an empty table.
+        """
+        until = until or datetime.now(timezone.utc).date()
+        if since is None:
+            since = self.db.query(func.max(PriceIndexDaily.bucket_date)).scalar()
+        if since is None:
+            first = self.db.query(func.min(PriceHistory.recorded_at)).scalar()
+            if first is None:
+                return 0
+            since = first.astimezone(timezone.utc).date()
+
+        day = since
+        days = 0
+        while day <= until:
+            self.rollup_day(day)
+            days += 1
+            day += timedelta(days=1)
+        logger.info(f"Price index rolled up for {days} days ({since} .. {until})")
+        return days
+
+    def get_series(
+        self,
+        transaction_type: str = 'sale',
+        city: Optional[str] = None,
+        property_type: Optional[str] = None,
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None,
+        granularity: str = 'day'
+    ) -> List[dict]:
+        """Price index series; ``price_index`` is 100 at the first period."""
+        if granularity not in GRANULARITIES:
+            raise ValueError(f"granularity must be one of {sorted(GRANULARITIES)}")
+
+        end_date = end_date or datetime.now(timezone.utc).date()
+        start_date = start_date or end_date - timedelta(days=90)
+
+        rows = self.db.execute(_SERIES_SQL, {
+            'granularity': granularity,
+            'transaction_type': transaction_type,
+            'city': self._resolve_city(city, transaction_type) if city else ALL,
+            'property_type': property_type or ALL,
+            'start_date': start_date,
+            'end_date': end_date,
+        }).all()
+
+        series = []
+        log_index = 0.0
+        for i, r in enumerate(rows):
+            # The first period is the base; later periods chain its moves
+            if i:
+                log_index += float(r.log_index_change or 0)
+            series.append({
+                'date': r.period.strftime('%Y-%m-%d'),
+                'avg_price': float(r.avg_price) if r.avg_price else 0,
+                'avg_price_per_sqm': float(r.avg_price_per_sqm) if r.avg_price_per_sqm else 0,
+                'median_price_per_sqm': float(r.median_price_per_sqm) if r.median_price_per_sqm else 0,
+                'price_index': round(100 * math.exp(log_index), 4),
+                'count': r.listings_count or 0,
+                'new_listings': int(r.new_listings or 0),
+                'removed_listings': int(r.removed_listings or 0),
+                'price_changes': int(r.price_changes or 0),
+            })
+        return series
+
+    def _resolve_city(self, city: str, transaction_type: str) -> str:
+        """Map a free-text city to the stored name (case-insensitive prefix match)."""
+        key = (city.strip().casefold(), transaction_type)
+        resolved = _city_names.get(key)
+        if resolved is None:
+            match = self.db.query(PriceIndexDaily.city).filter(
+                PriceIndexDaily.transaction_type == transaction_type,
+                PriceIndexDaily.property_type == ALL,
+                PriceIndexDaily.city != ALL,
+                PriceIndexDaily.city.ilike(f"{city.strip()}%")
+            ).order_by(func.length(PriceIndexDaily.city)).limit(1).scalar()
+            resolved = match or city
+            _city_names.set(key, resolved)
+        return resolved
@@ -1,18 +1,182 @@
 from sqlalchemy.orm import Session
-from sqlalchemy import func, and_, or_, text
-from geoalchemy2.functions import ST_X, ST_Y, ST_DWithin, ST_MakePoint, ST_SetSRID
-from typing import Optional, List, Tuple
+from sqlalchemy import func, and_, case, text, tuple_, literal_column, true
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.sql.elements import ColumnElement
+from geoalchemy2 import WKTElement
+from typing import Optional, List, Tuple, Dict
 from decimal import Decimal
-from datetime import datetime, timedelta
+import base64
+from datetime import datetime
 
 from app.models.property import Property, PriceHistory
+from app.services.cache import TTLCache, single_flight
+from app.services.distance_service import compute_distances_to_center
+from app.services.watermark import commit_horizon
+from app.services.similarity_service import (
+    get_similarity_index, similarity_score, CONDITION_GRADES, DEFAULT_CONDITION_GRADE, DEFAULT_MEDIANS,
+    FEATURE_WEIGHTS as SIMILARITY_WEIGHTS, LOCATION_SCALE_KM, LOG_SCALE, CONDITION_SCALE
+)
 from app.schemas.property import (
-    PropertyCreate, PropertyUpdate, PropertyFilter, PropertyResponse,
-    PropertyMapItem, Coordinates
+    PropertyCreate, PropertyUpdate, PropertyFilter, PropertyResponse, Coordinates
 )
 
 
+# Fixed histogram bucket boundaries for facets (CZK, m2)
+PRICE_HISTOGRAM_BOUNDS = [
+    0, 1_000_000, 2_000_000, 3_000_000, 4_000_000, 5_000_000, 6_000_000,
+    8_000_000, 10_000_000, 15_000_000, 20_000_000
+]
+AREA_HISTOGRAM_BOUNDS = [0, 30, 40, 50, 60, 70, 80, 100, 120, 150, 200]
+
+# Categorical facets: filter field -> column
+FACET_COLUMNS = {
+    'city': Property.address_city,
+    'property_type': Property.property_type,
+    'transaction_type': Property.transaction_type,
+    'source': Property.source,
+    'rooms': Property.rooms,
+    'price_assessment': Property.price_assessment,
+}
+
+FEATURE_FLAGS = [
+    'has_balcony', 'has_terrace', 'has_parking', 'has_garage',
+    'has_elevator', 'has_cellar', 'has_garden'
+]
+
+# Segment medians the SQL similarity ranking imputes missing area, rooms
+# and price with, as the k-NN index does with its build-time medians
+_similarity_medians = TTLCache(maxsize=64, ttl=3600)
+
+# Sortable list fields -> column. Each has partial indexes on (column, id)
+# and (transaction_type, property_type, column, id) WHERE is_active, so a
+# sorted page is read in index order instead of sorting the live table;
+# id breaks ties so pages don't overlap
+SORTABLE_FIELDS = {
+    'scraped_at': Property.scraped_at,
+    'price': Property.price,
+    'price_per_sqm': Property.price_per_sqm,
+    'area_usable': Property.area_usable,
+}
+
+# PropertyCreate fields that are not stored as sent: coordinates are built
+# from lat/lng, and price_per_sqm is a generated column
+CREATE_EXCLUDED = {'lat', 'lng', 'price_per_sqm'}
+
+# PropertyResponse fields read as plain columns (coordinates come back as
+# lat/lng); the list view leaves out the long text and image columns
+RESPONSE_FIELDS = [name for name in PropertyResponse.model_fields if name != 'coordinates']
+LIST_VIEW_OMITTED = ('description', 'images')
+
+
+def response_columns(full: bool = True) -> list:
+    """Columns for ``response_row_dict``; ``full=False`` is the list view."""
+    return [
+        getattr(Property, name) for name in RESPONSE_FIELDS
+        if full or name not in LIST_VIEW_OMITTED
+    ] + [
+        Property.lat,
+        Property.lng,
+    ]
+
+
+def response_row_dict(row) -> dict:
+    """
+    PropertyResponse-shaped dict from a ``response_columns`` row.
+
+    Applies the model defaults without validating anything, so pages of
+    rows can go straight to ``FastJSONResponse``.
+    """
+    item = row._asdict()
+    lat = item.pop('lat')
+    lng = item.pop('lng')
+    item['coordinates'] = {'lat': lat, 'lng': lng} if lat is not None and lng is not None else None
+    item['currency'] = item['currency'] or 'CZK'
+    item['liens_count'] = item['liens_count'] or 0
+    item['is_active'] = bool(item['is_active'])
+    for flag in FEATURE_FLAGS:
+        item[flag] = bool(item[flag])
+    return item
+
+
+def filter_conditions(filters: Optional[PropertyFilter]) -> Dict[str, ColumnElement]:
+    """
+    SQL conditions for a PropertyFilter, keyed by the facet they restrict.
+
+    Price and area bounds are grouped under ``price`` and ``area``.
+    """
+    conditions = {}
+    if filters is None:
+        return conditions
+
+    if filters.source:
+        conditions['source'] = Property.source == filters.source
+    if filters.property_type:
+        conditions['property_type'] = Property.property_type == filters.property_type
+    if filters.transaction_type:
+        conditions['transaction_type'] = Property.transaction_type == filters.transaction_type
+    if filters.city:
+        conditions['city'] = Property.address_city.ilike(f"%{filters.city}%")
+    price = []
+    if filters.price_min:
+        price.append(Property.price >= filters.price_min)
+    if filters.price_max:
+        price.append(Property.price <= filters.price_max)
+    if price:
+        conditions['price'] = and_(*price)
+    area = []
+    if filters.area_min:
+        area.append(Property.area_usable >= filters.area_min)
+    if filters.area_max:
+        area.append(Property.area_usable <= filters.area_max)
+    if area:
+        conditions['area'] = and_(*area)
+    if filters.rooms:
+        conditions['rooms'] = Property.rooms == filters.rooms
+    if filters.price_assessment:
+        conditions['price_assessment'] = Property.price_assessment == filters.price_assessment
+    if filters.has_balcony is not None:
+        conditions['has_balcony'] = Property.has_balcony == filters.has_balcony
+    if filters.has_parking is not None:
+        conditions['has_parking'] = Property.has_parking == filters.has_parking
+    if filters.has_elevator is not None:
+        conditions['has_elevator'] = Property.has_elevator == filters.has_elevator
+    if filters.dedupe:
+        conditions['dedupe'] = Property.canonical_id.is_(None)
+    return conditions
+
+
+def histogram_buckets(bounds: List[float], counts: Dict[int, int]) -> List[dict]:
+    """Turn width_bucket() counts into [{min, max, count}] for fixed bounds."""
+    buckets = []
+    for i in range(1, len(bounds) + 1):
+        buckets.append({
+            'min': bounds[i - 1],
+            'max': bounds[i] if i < len(bounds) else None,
+            'count': counts.get(i, 0)
+        })
+    return buckets
+
+
+def encode_change_token(updated_at: datetime, property_id: int) -> str:
+    """Opaque continuation token for (timestamp, id) keyset feeds: listing changes, saved-search matches."""
+    raw = f"{updated_at.isoformat()}|{property_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_change_token(token: str) -> Tuple[datetime, int]:
+    """Inverse of encode_change_token; raises ValueError on a bad token."""
+    try:
+        raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4)).decode()
+        updated_at, property_id = raw.rsplit('|', 1)
+        return datetime.fromisoformat(updated_at), int(property_id)
+    except (ValueError, UnicodeDecodeError) as e:
+        raise ValueError(f"Invalid change token: {token}") from e
+
+
 class PropertyService:
+    # Read methods marked @single_flight share one execution between identical
+    # concurrent calls; callers must not mutate what they return.
+
     def __init__(self, db: Session):
         self.db = db
 
@@ -25,60 +189,175 @@ class PropertyService:
             Property.source == source
         ).first()
 
-    def get_properties(
+    @single_flight
+    def get_property_rows(
+        self,
+        filters: PropertyFilter,
+        page: int = 1,
+        page_size: int = 20,
+        sort_by: str = "scraped_at",
+        sort_order: str = "desc",
+        full: bool = False
+    ) -> Tuple[List[dict], int]:
+        """
+        One page of listings as ``response_row_dict`` dicts, plus the total.
+
+        Reads only the response columns, coordinates included, without
+        loading ORM objects.
+        """
+        query = self.page_query(filters, page, page_size, sort_by, sort_order, full)
+        total = self.db.query(func.count(Property.id)).filter(*self._list_conditions(filters)).scalar()
+        return [response_row_dict(row) for row in query.all()], total
+
+    def page_query(
         self,
         filters: PropertyFilter,
         page: int = 1,
         page_size: int = 20,
         sort_by: str = "scraped_at",
-        sort_order: str = "desc"
-    ) -> Tuple[List[Property], int]:
-        query = self.db.query(Property).filter(Property.is_active == True)
-
-        # Apply filters
-        if filters.source:
-            query = query.filter(Property.source == filters.source)
-        if filters.property_type:
-            query = query.filter(Property.property_type == filters.property_type)
-        if filters.transaction_type:
-            query = query.filter(Property.transaction_type == filters.transaction_type)
-        if filters.city:
-            query = query.filter(Property.address_city.ilike(f"%{filters.city}%"))
-        if filters.price_min:
-            query = query.filter(Property.price >= filters.price_min)
-        if filters.price_max:
-            query = query.filter(Property.price <= filters.price_max)
-        if filters.area_min:
-            query = query.filter(Property.area_usable >= filters.area_min)
-        if filters.area_max:
-            query = query.filter(Property.area_usable <= filters.area_max)
-        if filters.rooms:
-            query = query.filter(Property.rooms == filters.rooms)
-        if filters.price_assessment:
-            query = query.filter(Property.price_assessment == filters.price_assessment)
-        if filters.has_balcony is not None:
-            query = query.filter(Property.has_balcony == filters.has_balcony)
-        if filters.has_parking is not None:
-            query = query.filter(Property.has_parking == filters.has_parking)
-        if filters.has_elevator is not None:
-            query = query.filter(Property.has_elevator == filters.has_elevator)
-
-        # Get total count
-        total = query.count()
-
-        # Apply sorting
-        sort_column = getattr(Property, sort_by, Property.scraped_at)
+        sort_order: str = "desc",
+        full: bool = False
+    ):
+        """Query for one sorted page of ``response_columns`` rows."""
+        order_by = self.order_by(sort_by, sort_order)
+        return self.db.query(*response_columns(full)).filter(
+            *self._list_conditions(filters)
+        ).order_by(*order_by).offset((page - 1) * page_size).limit(page_size)
+
+    @staticmethod
+    def _list_conditions(filters: PropertyFilter) -> list:
+        return [Property.is_active == True, *filter_conditions(filters).values()]
+
+    @staticmethod
+    def order_by(sort_by: str, sort_order: str) -> list:
+        """ORDER BY for a list sort; raises ValueError for fields not in SORTABLE_FIELDS."""
+        sort_column = SORTABLE_FIELDS.get(sort_by)
+        if sort_column is None:
+            raise ValueError(
+                f"Unsupported sort_by '{sort_by}', expected one of: {', '.join(SORTABLE_FIELDS)}"
+            )
         if sort_order == "desc":
-            query = query.order_by(sort_column.desc())
-        else:
-            query = query.order_by(sort_column.asc())
+            return [sort_column.desc(), Property.id.desc()]
+        return [sort_column.asc(), Property.id.asc()]
+
+    def get_changes(
+        self,
+        since: Optional[Tuple[datetime, int]] = None,
+        limit: int = 500,
+        settle_seconds: int = 5
+    ) -> Tuple[list, bool]:
+        """
+        Listings changed after the ``(updated_at, id)`` position ``since``.
+
+        Includes deactivated listings. Rows at or after the oldest open
+        transaction's start (and from the last ``settle_seconds``) are left
+        for the next call, so a transaction that commits late with an
+        earlier ``updated_at`` is not skipped. Returns (rows, has_more).
+        """
+        horizon = commit_horizon(self.db, settle_seconds)
+        query = self.db.query(
+            Property.id,
+            Property.external_id,
+            Property.source,
+            Property.is_active,
+            Property.property_type,
+            Property.transaction_type,
+            Property.address_city,
+            Property.price,
+            Property.area_usable,
+            Property.rooms,
+            Property.predicted_price,
+            Property.price_assessment,
+            Property.lat,
+            Property.lng,
+            Property.updated_at
+        ).filter(
+            Property.updated_at < horizon
+        )
+        if since is not None:
+            query = query.filter(tuple_(Property.updated_at, Property.id) > since)
+
+        rows = query.order_by(Property.updated_at, Property.id).limit(limit + 1).all()
+        return rows[:limit], len(rows) > limit
+
+    @single_flight
+    def get_facets(self, filters: PropertyFilter) -> dict:
+        """
+        Facet counts and histograms for a filter in one scan.
+
+        Uses GROUPING SETS with one ``count(*) FILTER`` per facet; each
+        facet's count applies every filter except its own, so drill-down
+        UIs can show the alternatives to the current selection.
+        """
+        conditions = filter_conditions(filters)
+
+        def others(exclude: Optional[str] = None):
+            applied = [c for name, c in conditions.items() if name != exclude]
+            return and_(*applied) if applied else true()
+
+        # Bounds are inlined so the bucket expression is textually identical
+        # in the select list and GROUPING SETS
+        price_bucket = func.width_bucket(
+            Property.price, literal_column(f"ARRAY{PRICE_HISTOGRAM_BOUNDS}::numeric[]")
+        )
+        area_bucket = func.width_bucket(
+            Property.area_usable, literal_column(f"ARRAY{AREA_HISTOGRAM_BOUNDS}::numeric[]")
+        )
 
-        # Apply pagination
-        offset = (page - 1) * page_size
-        properties = query.offset(offset).limit(page_size).all()
+        group_columns = dict(FACET_COLUMNS, price=price_bucket, area=area_bucket)
+        select_columns = []
+        for name, column in group_columns.items():
+            select_columns.append(column.label(f'{name}_value'))
+            select_columns.append(func.grouping(column).label(f'{name}_grouping'))
+            select_columns.append(func.count().filter(others(name)).label(f'{name}_count'))
+        for flag in FEATURE_FLAGS:
+            select_columns.append(
+                func.count().filter(
+                    and_(getattr(Property, flag) == True, others(flag))
+                ).label(f'{flag}_count')
+            )
+        select_columns.append(func.count().filter(others()).label('total'))
 
-        return properties, total
+        rows = self.db.query(*select_columns).filter(
+            Property.is_active == True
+        ).group_by(
+            func.grouping_sets(
+                *[tuple_(column) for column in group_columns.values()],
+                tuple_()
+            )
+        ).all()
 
+        result = {name: {} for name in FACET_COLUMNS}
+        histograms = {'price': {}, 'area': {}}
+        total = 0
+        features = {}
+        for row in rows:
+            grouped = [
+                name for name in group_columns
+                if getattr(row, f'{name}_grouping') == 0
+            ]
+            if not grouped:
+                total = row.total
+                features = {flag: getattr(row, f'{flag}_count') for flag in FEATURE_FLAGS}
+                continue
+
+            name = grouped[0]
+            value = getattr(row, f'{name}_value')
+            count = getattr(row, f'{name}_count')
+            if value is None or not count:
+                continue
+            if name in histograms:
+                histograms[name][value] = count
+            else:
+                result[name][value] = count
+
+        result['features'] = features
+        result['price_histogram'] = histogram_buckets(PRICE_HISTOGRAM_BOUNDS, histograms['price'])
+        result['area_histogram'] = histogram_buckets(AREA_HISTOGRAM_BOUNDS, histograms['area'])
+        result['total'] = total
+        return result
+
+    @single_flight
     def get_properties_in_bounds(
         self,
         south: float,
@@ -87,11 +366,12 @@ class PropertyService:
         east: float,
         filters: Optional[PropertyFilter] = None,
         limit: int = 500
-    ) -> List[PropertyMapItem]:
+    ) -> List[dict]:
+        """Map markers in a bounding box as PropertyMapItem-shaped dicts."""
         query = self.db.query(
             Property.id,
-            ST_Y(Property.coordinates).label('lat'),
-            ST_X(Property.coordinates).label('lng'),
+            Property.lat,
+            Property.lng,
             Property.price,
             Property.price_assessment,
             Property.property_type,
@@ -123,69 +403,158 @@ class PropertyService:
                 query = query.filter(Property.price <= filters.price_max)
             if filters.price_assessment:
                 query = query.filter(Property.price_assessment == filters.price_assessment)
+            if filters.dedupe:
+                query = query.filter(Property.canonical_id.is_(None))
 
-        results = query.limit(limit).all()
+        return [r._asdict() for r in query.limit(limit).all()]
 
-        return [
-            PropertyMapItem(
-                id=r.id,
-                lat=r.lat,
-                lng=r.lng,
-                price=r.price,
-                price_assessment=r.price_assessment,
-                property_type=r.property_type,
-                rooms=r.rooms,
-                area_usable=r.area_usable,
-                main_image_url=r.main_image_url
-            )
-            for r in results
-        ]
+    def get_similarity_reference(self, property_id: int):
+        """Row with the columns the similarity scorer needs, lat/lng included."""
+        return self.db.query(
+            Property.id,
+            Property.property_type,
+            Property.transaction_type,
+            Property.lat,
+            Property.lng,
+            Property.area_usable,
+            Property.rooms_count,
+            Property.price,
+            Property.condition,
+            *[getattr(Property, flag) for flag in FEATURE_FLAGS]
+        ).filter(
+            Property.id == property_id,
+            Property.coordinates.isnot(None)
+        ).first()
 
     def get_similar_properties(
         self,
         property_id: int,
         radius_km: float = 5.0,
         limit: int = 10
-    ) -> List[Property]:
-        property = self.get_property(property_id)
-        if not property or not property.coordinates:
+    ) -> List[Tuple[dict, float, float]]:
+        """
+        Most similar active listings as (``response_row_dict`` dict,
+        similarity score, km away).
+
+        Uses the in-memory k-NN index when it is loaded; otherwise candidates
+        within ``radius_km`` (geography distance, served by the
+        ``coordinates::geography`` GIST index) are scored in SQL with the
+        same weighted distance and the same segment-median imputation.
+        """
+        reference = self.get_similarity_reference(property_id)
+        if not reference:
             return []
 
-        query = self.db.query(Property).filter(
-            Property.id != property_id,
-            Property.is_active == True,
-            Property.coordinates.isnot(None),
-            Property.property_type == property.property_type,
-            Property.transaction_type == property.transaction_type,
-            ST_DWithin(
-                Property.coordinates,
-                property.coordinates,
-                radius_km * 1000  # Convert to meters
-            )
-        )
+        index = get_similarity_index()
+        if index:
+            ranked = index.query(reference, radius_km=radius_km, limit=limit)
+        else:
+            ranked = self._rank_similar_in_sql(reference, radius_km, limit)
+        if not ranked:
+            return []
 
-        # Filter by similar area (±30%)
-        if property.area_usable:
-            area_min = float(property.area_usable) * 0.7
-            area_max = float(property.area_usable) * 1.3
-            query = query.filter(
-                Property.area_usable.between(area_min, area_max)
+        properties = {
+            row.id: response_row_dict(row) for row in self.db.query(*response_columns()).filter(
+                Property.id.in_([pid for pid, _, _ in ranked])
             )
+        }
+        return [
+            (properties[pid], score, km)
+            for pid, score, km in ranked
+            if pid in properties
+        ]
 
-        # Filter by same room count if available
-        if property.rooms:
-            query = query.filter(Property.rooms == property.rooms)
+    def _similarity_medians(self, property_type: str, transaction_type: str) -> Dict[str, float]:
+        """Median area, rooms and price of a segment's active listings (cached)."""
+        def compute():
+            columns = {'area': Property.area_usable, 'rooms': Property.rooms_count, 'price': Property.price}
+            row = self.db.query(*[
+                func.percentile_cont(0.5).within_group(case((column > 0, column))).label(name)
+                for name, column in columns.items()
+            ]).filter(
+                Property.is_active == True,
+                Property.coordinates.isnot(None),
+                Property.property_type == property_type,
+                Property.transaction_type == transaction_type
+            ).one()
+            return {
+                name: float(value) if value is not None else DEFAULT_MEDIANS[name]
+                for name, value in row._asdict().items()
+            }
+        return _similarity_medians.get_or_compute((property_type, transaction_type), compute)
+
+    def _rank_similar_in_sql(self, reference, radius_km: float, limit: int) -> List[Tuple[int, float, float]]:
+        w = SIMILARITY_WEIGHTS
+        # Missing values on either side take the segment median, as in the index
+        medians = self._similarity_medians(reference.property_type, reference.transaction_type)
+        grade_sql = "CASE p.condition " + " ".join(
+            f"WHEN '{name}' THEN {grade}" for name, grade in CONDITION_GRADES.items()
+        ) + f" ELSE {DEFAULT_CONDITION_GRADE} END"
+        flags_sql = " + ".join(
+            f"(COALESCE(p.{flag}, FALSE) <> :{flag})::int" for flag in FEATURE_FLAGS
+        )
 
-        return query.limit(limit).all()
+        sql = text(f"""
+            SELECT id, km, sqrt(
+                power(km / :location_scale * :w_location, 2)
+                + power(ln(COALESCE(area_usable, :median_area) / :area) / :log_scale * :w_area, 2)
+                + power((COALESCE(rooms_count, :median_rooms) - :rooms) * :w_rooms, 2)
+                + power(ln(COALESCE(price, :median_price) / :price) / :log_scale * :w_price, 2)
+                + power((grade - :grade) / :condition_scale * :w_condition, 2)
+                + flag_diff * power(:w_features, 2)
+            ) AS distance
+            FROM (
+                SELECT p.id, NULLIF(p.area_usable, 0) AS area_usable,
+                       NULLIF(p.rooms_count, 0) AS rooms_count, NULLIF(p.price, 0) AS price,
+                       ST_Distance(p.coordinates::geography, ref.point) / 1000 AS km,
+                       {grade_sql} AS grade,
+                       {flags_sql} AS flag_diff
+                FROM properties p,
+                     (SELECT ST_SetSRID(ST_MakePoint(:lng, :lat), 4326)::geography AS point) ref
+                WHERE p.is_active = TRUE
+                  AND p.id <> :id
+                  AND p.property_type = :property_type
+                  AND p.transaction_type = :transaction_type
+                  AND (p.price IS NULL OR p.price > 0)
+                  AND (p.area_usable IS NULL OR p.area_usable > 0)
+                  AND ST_DWithin(p.coordinates::geography, ref.point, :radius_m)
+            ) candidates
+            ORDER BY distance
+            LIMIT :limit
+        """)
+        params = {
+            'id': reference.id,
+            'lat': reference.lat,
+            'lng': reference.lng,
+            'property_type': reference.property_type,
+            'transaction_type': reference.transaction_type,
+            'radius_m': radius_km * 1000,
+            'limit': limit,
+            'area': float(reference.area_usable) if reference.area_usable else medians['area'],
+            'rooms': float(reference.rooms_count) if reference.rooms_count else medians['rooms'],
+            'price': float(reference.price) if reference.price else medians['price'],
+            **{f'median_{name}': value for name, value in medians.items()},
+            'grade': CONDITION_GRADES.get(reference.condition, DEFAULT_CONDITION_GRADE),
+            'location_scale': LOCATION_SCALE_KM,
+            'log_scale': LOG_SCALE,
+            'condition_scale': CONDITION_SCALE,
+        }
+        params.update({f'w_{name}': weight for name, weight in w.items()})
+        params.update({flag: bool(getattr(reference, flag)) for flag in FEATURE_FLAGS})
+
+        return [
+            (r.id, similarity_score(float(r.distance)), float(r.km))
+            for r in self.db.execute(sql, params)
+        ]
 
-    def create_property(self, property_data: PropertyCreate) -> Property:
+    def create_property(self, property_data: PropertyCreate, job_id: Optional[int] = None) -> Property:
         # Check if property already exists
         existing = self.get_property_by_external_id(
             property_data.external_id,
             property_data.source
         )
         if existing:
-            return self.update_property_from_create(existing, property_data)
+            return self.update_property_from_create(existing, property_data, job_id)
 
         # Create coordinates point if lat/lng provided
         coordinates = None
@@ -195,37 +564,38 @@ class PropertyService:
                 4326
             )
 
-        # Calculate price per sqm
-        price_per_sqm = None
-        if property_data.price and property_data.area_usable:
-            price_per_sqm = property_data.price / property_data.area_usable
-
-        property_dict = property_data.model_dump(exclude={'lat', 'lng'})
+        property_dict = property_data.model_dump(exclude=CREATE_EXCLUDED)
         property_dict['coordinates'] = coordinates
-        property_dict['price_per_sqm'] = price_per_sqm
+        property_dict['last_seen_job_id'] = job_id
+        if coordinates is not None:
+            property_dict['distance_to_center'] = compute_distances_to_center(
+                self.db, [(property_data.lat, property_data.lng)]
+            )[0]
 
         db_property = Property(**property_dict)
         self.db.add(db_property)
-        self.db.commit()
-        self.db.refresh(db_property)
+        self.db.flush()
 
-        # Record initial price in history
+        # Record initial price in history, in the same transaction
         if property_data.price:
             self.add_price_history(db_property.id, property_data.price)
 
+        self.db.commit()
+        self.db.refresh(db_property)
         return db_property
 
     def update_property_from_create(
         self,
         existing: Property,
-        property_data: PropertyCreate
+        property_data: PropertyCreate,
+        job_id: Optional[int] = None
     ) -> Property:
         # Check if price changed
         if property_data.price and existing.price != property_data.price:
             self.add_price_history(existing.id, property_data.price)
 
         # Update fields
-        for key, value in property_data.model_dump(exclude={'lat', 'lng'}).items():
+        for key, value in property_data.model_dump(exclude=CREATE_EXCLUDED).items():
             if value is not None:
                 setattr(existing, key, value)
 
@@ -235,10 +605,14 @@ class PropertyService:
                 func.ST_MakePoint(property_data.lng, property_data.lat),
                 4326
             )
+            existing.distance_to_center = compute_distances_to_center(
+                self.db, [(property_data.lat, property_data.lng)]
+            )[0]
 
-        # Recalculate price per sqm
-        if existing.price and existing.area_usable:
-            existing.price_per_sqm = existing.price / existing.area_usable
+        # Seen again by a scraper, so it is live
+        existing.is_active = True
+        if job_id is not None:
+            existing.last_seen_job_id = job_id
 
         existing.updated_at = datetime.utcnow()
         self.db.commit()
@@ -246,6 +620,90 @@ class PropertyService:
 
         return existing
 
+    def bulk_upsert_properties(self, items: List[PropertyCreate], job_id: Optional[int] = None) -> dict:
+        """
+        Insert or update a batch of scraped properties in one statement.
+
+        Uses ``INSERT ... ON CONFLICT (external_id, source) DO UPDATE``,
+        fills ``distance_to_center`` for the whole batch at once and
+        records price history for new listings and changed prices. Listings
+        are (re)activated and stamped with the scraping job that saw them.
+        """
+        # Last occurrence wins if the batch repeats a listing
+        unique = {}
+        for item in items:
+            unique[(item.external_id, item.source)] = item
+        items = list(unique.values())
+        if not items:
+            return {'inserted': 0, 'updated': 0, 'price_history_recorded': 0}
+
+        # Current prices, to detect repricing
+        existing_prices = dict(
+            ((r.external_id, r.source), r.price)
+            for r in self.db.query(
+                Property.external_id, Property.source, Property.price
+            ).filter(
+                tuple_(Property.external_id, Property.source).in_(list(unique.keys()))
+            )
+        )
+
+        distances = compute_distances_to_center(
+            self.db,
+            [(item.lat, item.lng) if item.lat and item.lng else (None, None) for item in items]
+        )
+
+        rows = []
+        for item, distance in zip(items, distances):
+            row = item.model_dump(exclude=CREATE_EXCLUDED)
+            row['coordinates'] = None
+            if item.lat and item.lng:
+                row['coordinates'] = WKTElement(f"POINT({item.lng} {item.lat})", srid=4326)
+            row['distance_to_center'] = distance
+            row['last_seen_job_id'] = job_id
+            rows.append(row)
+
+        stmt = insert(Property).values(rows)
+        columns = Property.__table__.c
+        # Like update_property_from_create: missing values keep the stored ones
+        update_set = {
+            key: func.coalesce(stmt.excluded[key], columns[key])
+            for key in rows[0].keys()
+            if key not in ('external_id', 'source')
+        }
+        update_set['is_active'] = true()
+        update_set['updated_at'] = func.now()
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[Property.external_id, Property.source],
+            set_=update_set
+        ).returning(
+            Property.id,
+            Property.external_id,
+            Property.source,
+            literal_column("xmax = 0").label('inserted')
+        )
+        results = self.db.execute(stmt).all()
+
+        history = []
+        for r in results:
+            item = unique[(r.external_id, r.source)]
+            if not item.price:
+                continue
+            old_price = existing_prices.get((r.external_id, r.source))
+            if r.inserted or old_price != item.price:
+                history.append({'property_id': r.id, 'price': item.price})
+        if history:
+            self.db.execute(insert(PriceHistory), history)
+
+        self.db.commit()
+
+        inserted = sum(1 for r in results if r.inserted)
+        return {
+            'inserted': inserted,
+            'updated': len(results) - inserted,
+            'price_history_recorded': len(history),
+            'property_ids': [r.id for r in results]
+        }
+
     def update_property(
         self,
         property_id: int,
@@ -255,17 +713,32 @@ class PropertyService:
         if not property:
             return None
 
-        for key, value in property_data.model_dump(exclude_unset=True).items():
+        changes = property_data.model_dump(exclude_unset=True)
+        new_price = changes.get('price')
+        if new_price is not None and new_price != property.price:
+            self.add_price_history(property.id, new_price)
+
+        for key, value in changes.items():
             setattr(property, key, value)
 
         self.db.commit()
         self.db.refresh(property)
         return property
 
-    def add_price_history(self, property_id: int, price: Decimal):
-        history = PriceHistory(property_id=property_id, price=price)
-        self.db.add(history)
-        self.db.commit()
+    def add_price_history(self, property_id: int, price: Decimal) -> bool:
+        """Record a price unless it repeats the latest recorded one."""
+        latest = self.db.query(PriceHistory.price).filter(
+            PriceHistory.property_id == property_id
+        ).order_by(PriceHistory.recorded_at.desc()).limit(1).scalar()
+        if latest is not None and latest == price:
+            return False
+
+        # Core insert: the change-only trigger may still drop the row, which
+        # an ORM flush expecting a returned primary key would treat as an error.
+        # Not committed here: the caller commits it with the listing's own
+        # change, so history never shows a price the listing did not get
+        self.db.execute(insert(PriceHistory).values(property_id=property_id, price=price))
+        return True
 
     def get_price_history(self, property_id: int) -> List[PriceHistory]:
         return self.db.query(PriceHistory).filter(
@@ -276,66 +749,50 @@ class PropertyService:
         self,
         property_id: int,
         predicted_price: float,
-        confidence: float,
-        assessment: str,
-        deviation_percent: float
+        confidence: float
     ):
+        """Store a prediction; the database derives the deviation and assessment from it."""
         property = self.get_property(property_id)
         if property:
             property.predicted_price = predicted_price
             property.prediction_confidence = confidence
-            property.price_assessment = assessment
-            property.price_deviation_percent = deviation_percent
             property.predicted_at = datetime.utcnow()
             self.db.commit()
 
-    def get_price_trends(
-        self,
-        city: Optional[str] = None,
-        property_type: Optional[str] = None,
-        days: int = 90
-    ) -> List[dict]:
-        start_date = datetime.utcnow() - timedelta(days=days)
-
-        query = self.db.query(
-            func.date_trunc('day', Property.scraped_at).label('date'),
-            func.avg(Property.price).label('avg_price'),
-            func.avg(Property.price_per_sqm).label('avg_price_per_sqm'),
-            func.count(Property.id).label('count')
-        ).filter(
-            Property.is_active == True,
-            Property.scraped_at >= start_date
-        )
-
-        if city:
-            query = query.filter(Property.address_city.ilike(f"%{city}%"))
-        if property_type:
-            query = query.filter(Property.property_type == property_type)
-
-        results = query.group_by(
-            func.date_trunc('day', Property.scraped_at)
-        ).order_by('date').all()
-
-        return [
-            {
-                'date': r.date.strftime('%Y-%m-%d'),
-                'avg_price': float(r.avg_price) if r.avg_price else 0,
-                'avg_price_per_sqm': float(r.avg_price_per_sqm) if r.avg_price_per_sqm else 0,
-                'count': r.count
-            }
-            for r in results
-        ]
+    def get_price_assessment_thresholds(self) -> Optional[Tuple[float, float]]:
+        """The (below_market, above_market) thresholds the database buckets with."""
+        row = self.db.execute(text(
+            "SELECT below_market, above_market FROM price_assessment_thresholds"
+        )).first()
+        return (float(row.below_market), float(row.above_market)) if row else None
+
+    def rebucket_price_assessments(self, below_market: float, above_market: float) -> int:
+        """
+        Store new assessment thresholds and re-bucket every listing in one
+        set-based UPDATE; returns how many listings changed bucket.
+        """
+        self.db.execute(text(
+            "UPDATE price_assessment_thresholds "
+            "SET below_market = :below, above_market = :above, updated_at = NOW()"
+        ), {'below': below_market, 'above': above_market})
+        changed = self.db.execute(text(
+            "UPDATE properties "
+            "SET price_assessment = price_assessment_bucket(price, predicted_price) "
+            "WHERE price_assessment IS DISTINCT FROM price_assessment_bucket(price, predicted_price)"
+        )).rowcount
+        self.db.commit()
+        return changed
 
-    def get_market_overview(self) -> dict:
-        base_query = self.db.query(Property).filter(Property.is_active == True)
+    @single_flight
+    def get_market_overview(self, dedupe: bool = False) -> dict:
+        live = [Property.is_active == True]
+        if dedupe:
+            live.append(Property.canonical_id.is_(None))
+        base_query = self.db.query(Property).filter(*live)
 
         total = base_query.count()
-        avg_price = self.db.query(func.avg(Property.price)).filter(
-            Property.is_active == True
-        ).scalar() or 0
-        avg_price_per_sqm = self.db.query(func.avg(Property.price_per_sqm)).filter(
-            Property.is_active == True
-        ).scalar() or 0
+        avg_price = self.db.query(func.avg(Property.price)).filter(*live).scalar() or 0
+        avg_price_per_sqm = self.db.query(func.avg(Property.price_per_sqm)).filter(*live).scalar() or 0
 
         below_market = base_query.filter(
             Property.price_assessment == 'below_market'
@@ -353,9 +810,7 @@ class PropertyService:
             Property.address_city,
             func.count(Property.id).label('count'),
             func.avg(Property.price).label('avg_price')
-        ).filter(
-            Property.is_active == True
-        ).group_by(Property.address_city).all()
+        ).filter(*live).group_by(Property.address_city).all()
 
         for stat in city_stats:
             if stat.address_city:
@@ -370,9 +825,7 @@ class PropertyService:
             Property.property_type,
             func.count(Property.id).label('count'),
             func.avg(Property.price).label('avg_price')
-        ).filter(
-            Property.is_active == True
-        ).group_by(Property.property_type).all()
+        ).filter(*live).group_by(Property.property_type).all()
 
         for stat in type_stats:
             if stat.property_type:
@@ -392,14 +845,16 @@ class PropertyService:
             'by_property_type': by_property_type
         }
 
+    @single_flight
     def get_heatmap_data(
         self,
         city: Optional[str] = None,
-        grid_size: float = 0.01  # ~1km grid
+        grid_size: float = 0.01,  # ~1km grid
+        dedupe: bool = False
     ) -> List[dict]:
         query = self.db.query(
-            func.round(func.cast(ST_Y(Property.coordinates), Decimal) / grid_size) * grid_size,
-            func.round(func.cast(ST_X(Property.coordinates), Decimal) / grid_size) * grid_size,
+            func.round(func.cast(Property.lat, Decimal) / grid_size) * grid_size,
+            func.round(func.cast(Property.lng, Decimal) / grid_size) * grid_size,
             func.avg(Property.price_per_sqm).label('intensity')
         ).filter(
             Property.is_active == True,
@@ -409,10 +864,12 @@ class PropertyService:
 
         if city:
             query = query.filter(Property.address_city.ilike(f"%{city}%"))
+        if dedupe:
+            query = query.filter(Property.canonical_id.is_(None))
 
         results = query.group_by(
-            func.round(func.cast(ST_Y(Property.coordinates), Decimal) / grid_size) * grid_size,
-            func.round(func.cast(ST_X(Property.coordinates), Decimal) / grid_size) * grid_size
+            func.round(func.cast(Property.lat, Decimal) / grid_size) * grid_size,
+            func.round(func.cast(Property.lng, Decimal) / grid_size) * grid_size
         ).all()
 
         # Normalize intensity values
@@ -431,14 +888,8 @@ class PropertyService:
     @staticmethod
     def property_to_response(property: Property) -> PropertyResponse:
         coordinates = None
-        if property.coordinates:
-            # Extract lat/lng from geometry
-            from sqlalchemy import func
-            # This would typically be done in the query, but for conversion:
-            coordinates = Coordinates(
-                lat=0,  # Would need to extract from geometry
-                lng=0
-            )
+        if property.lat is not None and property.lng is not None:
+            coordinates = Coordinates(lat=property.lat, lng=property.lng)
 
         return PropertyResponse(
             id=property.id,
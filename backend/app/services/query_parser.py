@@ -0,0 +1,398 @@
+"""
+Rule-based parser for free-text property searches in Czech and English.
+
+``parse_query`` compiles a chat message such as "2+kk v Brně do 6 milionů
+s balkonem" or "cheap flats near Praha center" into a ``PropertyFilter``
+(hard constraints), soft preferences and ranking weights for
+``RecommendationService``. Matching runs on lowercased text without
+diacritics, so "Brně", "brne" and "BRNĚ" read the same. No model is
+involved; unknown words are simply ignored.
+"""
+
+import re
+import unicodedata
+from dataclasses import dataclass, field, replace
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+
+from app.schemas.property import PropertyFilter
+from app.services.cache import filter_cache_key
+
+# Canonical city name -> prefixes of its (declined) forms
+CITY_FORMS = {
+    'Praha': ('praha', 'praze', 'prahy', 'prahou', 'prague', 'prag'),
+    'Brno': ('brno', 'brne', 'brna', 'brnem'),
+    'Ostrava': ('ostrav',),
+    'Plzeň': ('plzen', 'plzn', 'pilsen'),
+    'Olomouc': ('olomouc',),
+    'Liberec': ('liberec', 'liberc'),
+    'České Budějovice': ('budejovic',),
+    'Hradec Králové': ('hradec', 'hradci'),
+    'Pardubice': ('pardubic',),
+    'Zlín': ('zlin',),
+    'Ústí nad Labem': ('usti nad labem',),
+    'Karlovy Vary': ('karlovy var', 'karlovych var'),
+    'Jihlava': ('jihlav',),
+}
+
+# Features PropertyFilter can require; the rest are ranking preferences
+FILTER_FEATURES = ('has_balcony', 'has_parking', 'has_elevator')
+
+FEATURE_PATTERNS = {
+    'has_balcony': r'balk?on\w*|balcon\w*|lodzi\w*|loggi\w*',
+    'has_terrace': r'teras\w*|terrace\w*',
+    'has_parking': r'parkov\w*|parking|stani\b',
+    'has_garage': r'garaz\w*|garage\w*',
+    'has_elevator': r'vytah\w*|elevator\w*|lift\b',
+    'has_cellar': r'sklep\w*|cellar\w*|basement\w*',
+    'has_garden': r'zahrad\w*|garden\w*|yard',
+}
+
+FEATURE_LABELS = {
+    'has_balcony': 'balcony',
+    'has_terrace': 'terrace',
+    'has_parking': 'parking',
+    'has_garage': 'garage',
+    'has_elevator': 'elevator',
+    'has_cellar': 'cellar',
+    'has_garden': 'garden',
+}
+
+# Relative importance of each ranking signal when the query asks for it;
+# 'value' (below-market price) is always on
+DEFAULT_WEIGHTS = {
+    'value': 1.0,
+    'features': 1.0,
+    'district': 1.0,
+    'condition': 0.6,
+    'rooms': 0.5,
+}
+
+_NUMBER = r'\d{1,3}(?:[ .]\d{3})+(?!\d)|\d+(?:[.,]\d+)?'
+_MILLION = r'mil\w*|mio|million\w*|m(?![\w²])'
+_THOUSAND = r'tis\w*|thousand\w*|k(?!\w)'
+_AREA = r'm2|m\s2|metr\w*|sqm|sq\.?\s?m|square\s+met\w*'
+_UNIT = rf'(?:{_AREA}|{_MILLION}|{_THOUSAND})'
+
+_MAX_WORDS = r'do|pod|max\w*|nejvyse|under|below|up\s+to|less\s+than|at\s+most|cheaper\s+than|within|budget|rozpocet'
+_MIN_WORDS = r'od|nad|min\w*|alespon|aspon|nejmene|over|above|from|more\s+than|at\s+least|starting\s+at'
+_APPROX_WORDS = r'kolem|okolo|cca|zhruba|priblizne|around|about|approx\w*|roughly'
+
+_RANGE = re.compile(
+    rf'(?:\b(?:mezi|between|od|from)\s+)?(?<![\d+])(?P<a>{_NUMBER})\s*(?P<ua>{_MILLION}|{_THOUSAND})?'
+    rf'\s*(?:-|–|az|to|a|and)\s*(?P<b>{_NUMBER})\s*(?P<ub>{_UNIT})'
+)
+_BOUND = re.compile(
+    rf'\b(?P<kw>{_MAX_WORDS}|{_MIN_WORDS}|{_APPROX_WORDS})\s*:?\s*'
+    # The whole number: backing off to "1" of "do 10 minut" would dodge
+    # the distance check below
+    rf'(?P<num>{_NUMBER})(?![\d.,]*\d)(?!\s*\+)\s*(?P<unit>{_UNIT})?'
+    # "do 10 minut od centra" is a distance and "do 5. patra" a floor, not a price
+    r'(?!\.?\s*(?:minut\w*|min\b|km\b|pat\w*|floor\w*))'
+)
+_BARE = re.compile(rf'(?<![\d+])(?P<num>{_NUMBER})\s*(?P<unit>{_UNIT})(?!\w)')
+
+_LAYOUT = re.compile(r'\b([1-6])\s*\+\s*(kk|1)\b')
+_LARGER = re.compile(r'^\s*(?:or|nebo|a|and)?\s*(?:larger|bigger|more|vetsi|vice|vys\w*)')
+_ROOMS = re.compile(r'\b([1-6])\s*(?:pokoj\w*|room\w*|bedroom\w*|loznic\w*)')
+_DISTRICT = re.compile(r'\b(?:praha|praze|prague)\s*-?\s*(\d{1,2})\b')
+_NEGATION = r'(?:bez|without|no|not)\s+(?:\w+\s+)?'
+
+_RENT = re.compile(r'pronaj\w*|\bnaj[eo]m\w*|\brent\w*|\blease|podnaj\w*|mesicn\w*|za mesic|\bmonth\w*|per month')
+_SALE = re.compile(r'prodej\w*|\bkoup\w*|\bbuy\w*|purchase|for sale|\bsale\b|investic\w*|investment\w*')
+_HOUSE = re.compile(r'\bdum\b|\bdomu\b|\bdomy\b|\bdomek\w*|\bdomecek\w*|\bhouse\w*|\bvil+[ay]\w*|\bcottage')
+_APARTMENT = re.compile(r'\bbyt\w*|\bflat\w*|\bapartm\w*|garson\w*|\bstudio|\bcondo\w*')
+_STUDIO = re.compile(r'garson\w*|\bstudio')
+
+_UNDERVALUED = re.compile(
+    r'podhodnocen\w*|undervalued|under\s?valued|below\s+market|pod\s+(?:trzni\s+)?cenou|under\s+market'
+)
+_CHEAP = re.compile(
+    r'\blevn\w*|\bcheap\w*|affordable|\bdostupn\w*|bargain\w*|\bvyhodn\w*|\bdeals?\b|\bsleva\b|'
+    r'investic\w*|investment\w*'
+)
+_CENTER = re.compile(r'\bcentr\w*|\bcenter\b|\bcentre\b|downtown|city\s+cent\w*')
+_LARGE = re.compile(r'\bvelk\w*|prostorn\w*|\blarge\b|\bbig\b|spacious|\bvetsi\b')
+_SMALL = re.compile(r'\bmal[ey]\w*|\bsmall\b|compact|\bmensi\b')
+_FAMILY = re.compile(r'rodin\w*|\bfamily\b|\bkids\b|\bdeti\b')
+_NEW = re.compile(r'novostavb\w*|new\s+(?:build\w*|construction|development)|brand\s+new|\bnov[ya]\w*|\bnew\b')
+_RENOVATED = re.compile(r'rekonstru\w*|renovat\w*|refurbish\w*|zrekonstruovan\w*')
+_MODERN = re.compile(r'modern\w*')
+
+
+def normalize_query(message: str) -> str:
+    """Lowercase, strip diacritics (m² becomes m2) and collapse whitespace."""
+    decomposed = unicodedata.normalize('NFKD', message.lower())
+    stripped = ''.join(c for c in decomposed if not unicodedata.combining(c))
+    return ' '.join(stripped.split())
+
+
+@dataclass
+class ParsedQuery:
+    """A chat message compiled into hard filters and ranking preferences."""
+    filters: PropertyFilter
+    weights: Dict[str, float]
+    min_rooms: Optional[float] = None
+    rooms_required: bool = True  # min_rooms filters; otherwise it only ranks
+    district: Optional[str] = None
+    features: Dict[str, bool] = field(default_factory=dict)  # soft: wanted / unwanted
+    conditions: Tuple[str, ...] = ()
+    area_preference: int = 0  # +1 larger, -1 smaller
+    terms: List[str] = field(default_factory=list)  # what was understood, for the reply
+
+    def cache_key(self) -> tuple:
+        return (
+            filter_cache_key(self.filters),
+            tuple(sorted(self.weights.items())),
+            self.min_rooms,
+            self.rooms_required,
+            self.district,
+            tuple(sorted(self.features.items())),
+            self.conditions,
+            self.area_preference,
+        )
+
+    def relaxed(self) -> Optional["ParsedQuery"]:
+        """
+        The same query with required features, the below-market filter and
+        the minimum room count turned into preferences; None if nothing
+        can be relaxed.
+        """
+        features = dict(self.features)
+        updates = {}
+        for feat in FILTER_FEATURES:
+            value = getattr(self.filters, feat)
+            if value is not None:
+                features[feat] = value
+                updates[feat] = None
+        if self.filters.price_assessment:
+            updates['price_assessment'] = None
+        rooms_relaxable = self.min_rooms is not None and self.rooms_required
+        if not updates and not rooms_relaxable:
+            return None
+        return replace(
+            self,
+            filters=self.filters.model_copy(update=updates),
+            features=features,
+            rooms_required=False,
+            terms=list(self.terms),
+        )
+
+
+def _amount(raw: str) -> float:
+    if re.fullmatch(r'\d{1,3}(?:[ .]\d{3})+', raw):
+        return float(raw.replace(' ', '').replace('.', ''))
+    return float(raw.replace(',', '.'))
+
+
+def _unit_kind(unit: Optional[str]) -> Optional[str]:
+    if not unit:
+        return None
+    if re.fullmatch(_AREA, unit):
+        return 'area'
+    if re.fullmatch(_MILLION, unit):
+        return 'million'
+    return 'thousand'
+
+
+def _format_czk(value: float) -> str:
+    return f"{value:,.0f}".replace(',', ' ') + " CZK"
+
+
+def _has(pattern: str, text: str) -> Tuple[bool, bool]:
+    """(mentioned, negated) for a feature pattern."""
+    negated = re.search(rf'\b{_NEGATION}(?:{pattern})', text) is not None
+    mentioned = re.search(rf'\b(?:{pattern})', text) is not None
+    return mentioned, negated
+
+
+@lru_cache(maxsize=2048)
+def _parse(text: str) -> ParsedQuery:
+    filters = {'dedupe': True}
+    weights = dict(DEFAULT_WEIGHTS)
+    parsed = ParsedQuery(filters=PropertyFilter(), weights=weights)
+    terms = parsed.terms
+
+    # Layout ("2+kk", "3+1 or larger") and room counts
+    layout = _LAYOUT.search(text)
+    if layout:
+        rooms = f"{layout.group(1)}+{layout.group(2)}"
+        if _LARGER.match(text[layout.end():]):
+            parsed.min_rooms = float(layout.group(1))
+            terms.append(f"{rooms} or larger")
+        else:
+            filters['rooms'] = rooms
+            terms.append(rooms)
+    elif _STUDIO.search(text):
+        filters['rooms'] = '1+kk'
+        terms.append('studio')
+    else:
+        rooms = _ROOMS.search(text)
+        if rooms:
+            parsed.min_rooms = float(rooms.group(1))
+            terms.append(f"{rooms.group(1)}+ rooms")
+
+    # Property and transaction type
+    is_house = _HOUSE.search(text) is not None
+    is_apartment = _APARTMENT.search(text) is not None or (layout is not None and not is_house)
+    if is_house and not is_apartment:
+        filters['property_type'] = 'house'
+        terms.append('house')
+    elif is_apartment and not is_house:
+        filters['property_type'] = 'apartment'
+        terms.append('apartment')
+    wants_rent = _RENT.search(text) is not None
+    wants_sale = _SALE.search(text) is not None
+
+    # City and Prague district
+    for city, forms in CITY_FORMS.items():
+        if re.search(r'\b(?:' + '|'.join(re.escape(f) for f in forms) + ')', text):
+            filters['city'] = city
+            break
+    district = _DISTRICT.search(text)
+    if district:
+        filters['city'] = 'Praha'
+        parsed.district = f"Praha {int(district.group(1))}"
+        terms.append(f"in {parsed.district}")
+    elif 'city' in filters:
+        terms.append(f"in {filters['city']}")
+
+    # Price and area bounds: ranges first, then keyword bounds, then bare
+    # amounts ("6 milionů" alone reads as a budget)
+    amounts = []  # (bound, value, unit kind)
+    consumed = []
+    for match in _RANGE.finditer(text):
+        kind = _unit_kind(match.group('ub'))
+        amounts.append(('min', _amount(match.group('a')), _unit_kind(match.group('ua')) or kind))
+        amounts.append(('max', _amount(match.group('b')), kind))
+        consumed.append(match.span())
+    rest = text
+    for start, end in consumed:
+        rest = rest[:start] + ' ' * (end - start) + rest[end:]
+    for match in _BOUND.finditer(rest):
+        keyword = match.group('kw')
+        if re.fullmatch(_MAX_WORDS, keyword):
+            bound = 'max'
+        elif re.fullmatch(_MIN_WORDS, keyword):
+            bound = 'min'
+        else:
+            bound = 'approx'
+        amounts.append((bound, _amount(match.group('num')), _unit_kind(match.group('unit'))))
+        rest = rest[:match.start()] + ' ' * (match.end() - match.start()) + rest[match.end():]
+    for match in _BARE.finditer(rest):
+        kind = _unit_kind(match.group('unit'))
+        amounts.append(('approx' if kind == 'area' else 'max', _amount(match.group('num')), kind))
+
+    # Unitless small numbers take the message's explicit multiplier, else
+    # millions for sales and thousands for rent
+    explicit = next((kind for _, _, kind in amounts if kind in ('million', 'thousand')), None)
+    price = {}
+    area = {}
+    for bound, value, kind in amounts:
+        if kind == 'area':
+            target = area
+        else:
+            target = price
+            if kind == 'million':
+                value *= 1_000_000
+            elif kind == 'thousand':
+                value *= 1_000
+            elif value < 1000:
+                value *= {'million': 1_000_000, 'thousand': 1_000}.get(
+                    explicit, 1_000 if wants_rent else 1_000_000
+                )
+        if bound == 'approx':
+            target['min'], target['max'] = value * 0.85, value * 1.15
+        else:
+            target[bound] = value
+
+    if not wants_rent and not wants_sale and price:
+        # A monthly-sized budget means rent
+        top = price.get('max', price.get('min'))
+        wants_rent = top < 100_000
+        wants_sale = top >= 300_000
+    if wants_rent and not wants_sale:
+        filters['transaction_type'] = 'rent'
+        terms.append('for rent')
+    elif wants_sale and not wants_rent:
+        filters['transaction_type'] = 'sale'
+        terms.append('for sale')
+
+    if 'min' in price:
+        filters['price_min'] = round(price['min'])
+    if 'max' in price:
+        filters['price_max'] = round(price['max'])
+    if 'min' in price and 'max' in price:
+        terms.append(f"{_format_czk(price['min'])} - {_format_czk(price['max'])}")
+    elif 'max' in price:
+        terms.append(f"up to {_format_czk(price['max'])}")
+    elif 'min' in price:
+        terms.append(f"from {_format_czk(price['min'])}")
+    if 'min' in area:
+        filters['area_min'] = round(area['min'])
+    if 'max' in area:
+        filters['area_max'] = round(area['max'])
+    if area:
+        terms.append(
+            f"{round(area.get('min', 0))}-{round(area['max'])} m²" if 'max' in area
+            else f"from {round(area['min'])} m²"
+        )
+
+    # Features: the ones PropertyFilter knows are required, the rest ranked
+    for feat, pattern in FEATURE_PATTERNS.items():
+        mentioned, negated = _has(pattern, text)
+        if not mentioned:
+            continue
+        wanted = not negated
+        if feat in FILTER_FEATURES:
+            filters[feat] = wanted
+        else:
+            parsed.features[feat] = wanted
+        terms.append(("with " if wanted else "without ") + FEATURE_LABELS[feat])
+
+    # Condition
+    conditions = []
+    if _NEW.search(text):
+        conditions.append('new')
+    if _RENOVATED.search(text):
+        conditions.append('renovated')
+    if _MODERN.search(text) and not conditions:
+        conditions.extend(['new', 'renovated'])
+    if conditions:
+        parsed.conditions = tuple(conditions)
+        terms.append(' or '.join(conditions))
+
+    # Ranking intents
+    if _UNDERVALUED.search(text):
+        filters['price_assessment'] = 'below_market'
+        weights['value'] = 2.0
+        terms.append('below market price')
+    elif _CHEAP.search(text):
+        weights['value'] = 2.0
+        weights['price'] = 1.0
+        terms.append('good value')
+    if _CENTER.search(text):
+        weights['center'] = 1.5
+        terms.append('near the centre')
+    if _LARGE.search(text):
+        parsed.area_preference = 1
+        weights['area'] = 0.8
+        terms.append('spacious')
+    elif _SMALL.search(text):
+        parsed.area_preference = -1
+        weights['area'] = 0.5
+        terms.append('compact')
+    if _FAMILY.search(text):
+        if parsed.min_rooms is None and 'rooms' not in filters:
+            parsed.min_rooms = 3.0
+            terms.append('3+ rooms')
+        if filters.get('property_type') == 'house':
+            parsed.features.setdefault('has_garden', True)
+
+    parsed.filters = PropertyFilter(**filters)
+    return parsed
+
+
+def parse_query(message: str) -> ParsedQuery:
+    """Compile a chat message into filters and ranking preferences (cached)."""
+    return _parse(normalize_query(message))
@@ -0,0 +1,235 @@
+"""
+Chatbot recommendations from a parsed free-text query.
+
+The hard filters select candidates straight off
+``idx_properties_active_deviation``: active canonical listings walked from
+the most below-market ``price_deviation_percent`` upwards, so the pool of
+``chatbot_candidate_pool`` rows is found without sorting the table. The
+pool is then re-ranked in Python with the query's weights (value, price,
+centre distance, features, condition, district, size). Responses are
+cached per compiled query for ``chatbot_cache_ttl_seconds``.
+"""
+
+import logging
+from bisect import bisect_left
+from typing import List, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.config import get_settings
+from app.models.property import Property
+from app.services.cache import TTLCache
+from app.services.property_service import filter_conditions
+from app.services.query_parser import FEATURE_LABELS, ParsedQuery, parse_query
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+_results = TTLCache(maxsize=1024, ttl=settings.chatbot_cache_ttl_seconds)
+
+_CANDIDATE_COLUMNS = (
+    Property.id,
+    Property.title,
+    Property.price,
+    Property.price_per_sqm,
+    Property.transaction_type,
+    Property.property_type,
+    Property.address_city,
+    Property.address_district,
+    Property.rooms,
+    Property.rooms_count,
+    Property.area_usable,
+    Property.condition,
+    Property.main_image_url,
+    Property.price_assessment,
+    Property.price_deviation_percent,
+    Property.distance_to_center,
+    *(getattr(Property, feat) for feat in FEATURE_LABELS),
+)
+
+
+def format_price(price: Optional[float], transaction_type: Optional[str]) -> str:
+    if price is None:
+        return "Price on request"
+    formatted = f"{price:,.0f}".replace(',', ' ') + " CZK"
+    return formatted + "/month" if transaction_type == 'rent' else formatted
+
+
+def _in_district(value: Optional[str], district: str) -> bool:
+    # "Praha 2" but not "Praha 20"
+    if not value or not value.startswith(district):
+        return False
+    return not value[len(district):len(district) + 1].isdigit()
+
+
+class RecommendationService:
+    def __init__(self, db: Session):
+        self.db = db
+
+    def recommend(self, message: str, limit: int = 5) -> dict:
+        """Reply text plus ranked listings for a chat message."""
+        parsed = parse_query(message)
+        return _results.get_or_compute(
+            (parsed.cache_key(), limit), lambda: self._recommend(parsed, limit)
+        )
+
+    def _recommend(self, parsed: ParsedQuery, limit: int) -> dict:
+        rows = self._candidates(parsed)
+        relaxed = None
+        if not rows:
+            relaxed = parsed.relaxed()
+            if relaxed is not None:
+                rows = self._candidates(relaxed)
+        ranked = self._rank(relaxed or parsed, rows)[:limit]
+        return {
+            'message': self._reply(parsed, len(ranked), relaxed is not None),
+            'recommendations': [self._recommendation(row, score, reasons) for score, row, reasons in ranked],
+            'filters': (relaxed or parsed).filters,
+        }
+
+    def _candidates(self, parsed: ParsedQuery) -> list:
+        conditions = [Property.is_active == True, *filter_conditions(parsed.filters).values()]
+        if parsed.min_rooms is not None and parsed.rooms_required:
+            conditions.append(Property.rooms_count >= parsed.min_rooms)
+        return self.db.query(*_CANDIDATE_COLUMNS).filter(
+            *conditions
+        ).order_by(
+            Property.price_deviation_percent.asc().nullslast()
+        ).limit(settings.chatbot_candidate_pool).all()
+
+    def _rank(self, parsed: ParsedQuery, rows: list) -> List[Tuple[float, object, List[str]]]:
+        """(score in 0..1, row, reasons) sorted best first."""
+        weights = parsed.weights
+        per_sqm = sorted(float(r.price_per_sqm) for r in rows if r.price_per_sqm is not None)
+        areas = sorted(float(r.area_usable) for r in rows if r.area_usable is not None)
+
+        def percentile(values: List[float], value) -> float:
+            if value is None or not values:
+                return 0.5
+            return bisect_left(values, float(value)) / max(len(values) - 1, 1)
+
+        ranked = []
+        for row in rows:
+            # (signal, weight, component in 0..1, reason when it applies)
+            signals: List[Tuple[str, float, float, Optional[str]]] = []
+
+            deviation = float(row.price_deviation_percent) if row.price_deviation_percent is not None else None
+            if deviation is None:
+                signals.append(('value', weights['value'], 0.3, None))
+            else:
+                component = min(max((30 - deviation) / 60, 0.0), 1.0)
+                reason = f"{abs(deviation):.0f}% below market price" if deviation <= -5 else None
+                signals.append(('value', weights['value'], component, reason))
+
+            if 'price' in weights:
+                cheapness = 1 - percentile(per_sqm, row.price_per_sqm)
+                signals.append((
+                    'price', weights['price'], cheapness,
+                    "Low price per m²" if cheapness >= 0.75 and row.price_per_sqm is not None else None
+                ))
+
+            if 'center' in weights:
+                distance = float(row.distance_to_center) if row.distance_to_center is not None else None
+                component = 1 / (1 + distance / 2) if distance is not None else 0.2
+                reason = f"{distance:.1f} km from the centre" if distance is not None and distance < 3 else None
+                signals.append(('center', weights['center'], component, reason))
+
+            if parsed.district:
+                in_district = _in_district(row.address_district, parsed.district)
+                signals.append((
+                    'district', weights['district'], 1.0 if in_district else 0.0,
+                    f"In {parsed.district}" if in_district else None
+                ))
+
+            if parsed.features:
+                matched = [feat for feat, wanted in parsed.features.items() if bool(getattr(row, feat)) == wanted]
+                signals.append((
+                    'features', weights['features'], len(matched) / len(parsed.features),
+                    ", ".join(
+                        ("Has a " if parsed.features[feat] else "No ") + FEATURE_LABELS[feat] for feat in matched
+                    ) or None
+                ))
+
+            if parsed.conditions:
+                matches = row.condition in parsed.conditions
+                signals.append((
+                    'condition', weights['condition'], 1.0 if matches else 0.0,
+                    f"{row.condition.capitalize()} condition" if matches else None
+                ))
+
+            if parsed.min_rooms is not None:
+                enough = row.rooms_count is not None and float(row.rooms_count) >= parsed.min_rooms
+                signals.append((
+                    'rooms', weights['rooms'], 1.0 if enough else 0.0,
+                    (row.rooms or f"{float(row.rooms_count):g} rooms") if enough else None
+                ))
+
+            if parsed.area_preference and 'area' in weights:
+                size = percentile(areas, row.area_usable)
+                if parsed.area_preference < 0:
+                    size = 1 - size
+                spacious = parsed.area_preference > 0 and size >= 0.75 and row.area_usable is not None
+                signals.append((
+                    'area', weights['area'], size,
+                    f"Spacious ({float(row.area_usable):.0f} m²)" if spacious else None
+                ))
+
+            total_weight = sum(weight for _, weight, _, _ in signals)
+            score = sum(weight * component for _, weight, component, _ in signals) / total_weight
+            reasons = [
+                reason for _, weight, component, reason
+                in sorted(signals, key=lambda s: s[1] * s[2], reverse=True)
+                if reason
+            ]
+            # Hard filters held for every candidate; still worth saying
+            reasons.extend(
+                "Has a " + FEATURE_LABELS[feat] for feat in ('has_balcony', 'has_parking', 'has_elevator')
+                if getattr(parsed.filters, feat) is True
+            )
+            ranked.append((round(score, 3), row, reasons))
+
+        ranked.sort(key=lambda item: (-item[0], item[1].id))
+        return ranked
+
+    @staticmethod
+    def _recommendation(row, score: float, reasons: List[str]) -> dict:
+        return {
+            'id': row.id,
+            'title': row.title or '',
+            'price': float(row.price) if row.price is not None else 0,
+            'price_formatted': format_price(
+                float(row.price) if row.price is not None else None, row.transaction_type
+            ),
+            'location': row.address_district or row.address_city or '',
+            'rooms': row.rooms or (f"{float(row.rooms_count):g} rooms" if row.rooms_count else ''),
+            'area': float(row.area_usable) if row.area_usable is not None else 0,
+            'property_type': row.property_type or '',
+            'condition': row.condition,
+            'main_image_url': row.main_image_url,
+            'price_assessment': row.price_assessment,
+            'match_reasons': reasons,
+            'score': score,
+        }
+
+    @staticmethod
+    def _reply(parsed: ParsedQuery, count: int, relaxed: bool) -> str:
+        criteria = ", ".join(parsed.terms)
+        if count == 0:
+            if criteria:
+                return (
+                    f"I couldn't find any active listings matching: {criteria}. "
+                    "Try a higher budget, another area or fewer requirements."
+                )
+            return "There are no active listings at the moment."
+        if not criteria:
+            return (
+                f"Here are {count} of the best-value listings right now. Tell me a city, "
+                "a layout like 2+kk, a budget or features (balcony, parking, garden) to narrow it down."
+            )
+        found = f"{count} listing{'s' if count != 1 else ''}"
+        if relaxed:
+            return (
+                f"Nothing matched everything ({criteria}), so I treated the extras as "
+                f"preferences. Here are the closest {found}."
+            )
+        return f"I found {found} matching: {criteria}. Best-value deals come first."
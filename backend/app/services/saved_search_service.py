@@ -0,0 +1,332 @@
+import logging
+import threading
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import func, insert, tuple_
+from sqlalchemy.orm import Session
+
+from app.models.property import Property, SavedSearch, SavedSearchMatch
+from app.schemas.property import BoundingBox, PropertyFilter, SavedSearchCreate
+from app.services.watermark import commit_horizon
+
+logger = logging.getLogger(__name__)
+
+# Filter fields compared by equality against the listing column
+_EXACT_FIELDS = {
+    'source': 'source',
+    'rooms': 'rooms',
+    'price_assessment': 'price_assessment',
+    'has_balcony': 'has_balcony',
+    'has_parking': 'has_parking',
+    'has_elevator': 'has_elevator',
+}
+
+# Listing columns the matcher needs
+_LISTING_COLUMNS = [
+    Property.id, Property.transaction_type, Property.property_type,
+    Property.address_city, Property.source, Property.price, Property.area_usable,
+    Property.rooms, Property.price_assessment,
+    Property.has_balcony, Property.has_parking, Property.has_elevator,
+    Property.canonical_id,
+    Property.lat,
+    Property.lng,
+]
+
+
+def _bound(value, default: float) -> float:
+    # Zero bounds are ignored, as in filter_conditions()
+    return float(value) if value else default
+
+
+class _Leaf:
+    """Searches sharing type and city keys; numeric ranges kept as arrays."""
+
+    def __init__(self, searches: List[Tuple[int, PropertyFilter, Optional[BoundingBox]]]):
+        self.ids = np.array([s[0] for s in searches], dtype=np.int64)
+        self.price_lo = np.array([_bound(f.price_min, -np.inf) for _, f, _ in searches])
+        self.price_hi = np.array([_bound(f.price_max, np.inf) for _, f, _ in searches])
+        self.area_lo = np.array([_bound(f.area_min, -np.inf) for _, f, _ in searches])
+        self.area_hi = np.array([_bound(f.area_max, np.inf) for _, f, _ in searches])
+        # Remaining predicates, checked only for searches passing the ranges
+        self.residual = []
+        for _, filters, bounds in searches:
+            exact = [
+                (column, getattr(filters, field))
+                for field, column in _EXACT_FIELDS.items()
+                if getattr(filters, field) not in (None, '')
+            ]
+            if filters.dedupe:
+                exact.append(('canonical_id', None))
+            self.residual.append((exact, bounds))
+
+    def match(self, listing) -> List[int]:
+        price = float(listing.price) if listing.price is not None else np.nan
+        area = float(listing.area_usable) if listing.area_usable is not None else np.nan
+        # NULL fails any bound, but passes when the search sets none
+        mask = (
+            (np.isneginf(self.price_lo) | (price >= self.price_lo))
+            & (np.isposinf(self.price_hi) | (price <= self.price_hi))
+            & (np.isneginf(self.area_lo) | (area >= self.area_lo))
+            & (np.isposinf(self.area_hi) | (area <= self.area_hi))
+        )
+
+        matched = []
+        for i in np.flatnonzero(mask):
+            exact, bounds = self.residual[i]
+            if any(getattr(listing, column) != value for column, value in exact):
+                continue
+            if bounds is not None and not _in_bounds(listing, bounds):
+                continue
+            matched.append(int(self.ids[i]))
+        return matched
+
+
+def _in_bounds(listing, bounds: BoundingBox) -> bool:
+    if listing.lat is None or listing.lng is None:
+        return False
+    return (
+        bounds.south <= listing.lat <= bounds.north
+        and bounds.west <= listing.lng <= bounds.east
+    )
+
+
+class SearchIndex:
+    """
+    Predicate index over saved searches.
+
+    Searches are bucketed by (transaction_type, property_type), with None
+    as the wildcard, and then by city needle, so a listing is only tested
+    against searches that can match its type and city. Price and area
+    ranges within a bucket are evaluated as arrays.
+    """
+
+    def __init__(self, searches: Iterable[Tuple[int, PropertyFilter, Optional[BoundingBox]]]):
+        grouped = defaultdict(lambda: defaultdict(list))
+        size = 0
+        for search_id, filters, bounds in searches:
+            type_key = (filters.transaction_type or None, filters.property_type or None)
+            needle = filters.city.strip().casefold() if filters.city and filters.city.strip() else None
+            grouped[type_key][needle].append((search_id, filters, bounds))
+            size += 1
+
+        self.size = size
+        self._buckets: Dict[tuple, Dict[Optional[str], _Leaf]] = {
+            type_key: {needle: _Leaf(items) for needle, items in by_city.items()}
+            for type_key, by_city in grouped.items()
+        }
+
+    def __len__(self) -> int:
+        return self.size
+
+    def match(self, listing) -> List[int]:
+        """Ids of the saved searches the listing satisfies."""
+        city = (listing.address_city or '').casefold()
+        matched = []
+        for type_key in {
+            (listing.transaction_type, listing.property_type),
+            (listing.transaction_type, None),
+            (None, listing.property_type),
+            (None, None),
+        }:
+            by_city = self._buckets.get(type_key)
+            if not by_city:
+                continue
+            for needle, leaf in by_city.items():
+                # City filters are substring matches (ILIKE '%city%')
+                if needle is None or needle in city:
+                    matched.extend(leaf.match(listing))
+        return matched
+
+
+_index: Optional[SearchIndex] = None
+_index_signature = None
+_index_lock = threading.Lock()
+
+
+def _search_filters(search: SavedSearch) -> Tuple[PropertyFilter, Optional[BoundingBox]]:
+    bounds = None
+    if search.bounds_south is not None:
+        bounds = BoundingBox(
+            south=search.bounds_south, west=search.bounds_west,
+            north=search.bounds_north, east=search.bounds_east
+        )
+    return PropertyFilter.model_validate(search.filters or {}), bounds
+
+
+def get_search_index(db: Session) -> SearchIndex:
+    """
+    The predicate index for the active saved searches.
+
+    Rebuilt when the number of active searches or their latest update
+    changes, so every worker picks up new searches on its next batch.
+    """
+    global _index, _index_signature
+
+    signature = tuple(db.query(
+        func.count(SavedSearch.id), func.max(SavedSearch.updated_at)
+    ).filter(SavedSearch.is_active == True).one())
+
+    with _index_lock:
+        if _index is None or signature != _index_signature:
+            searches = db.query(SavedSearch).filter(SavedSearch.is_active == True).all()
+            _index = SearchIndex(
+                (s.id, *_search_filters(s)) for s in searches
+            )
+            _index_signature = signature
+        return _index
+
+
+class SavedSearchService:
+    def __init__(self, db: Session):
+        self.db = db
+
+    def create_search(self, data: SavedSearchCreate) -> SavedSearch:
+        bounds = data.bounds
+        search = SavedSearch(
+            name=data.name,
+            filters=data.filters.model_dump(mode='json', exclude_none=True),
+            bounds_south=bounds.south if bounds else None,
+            bounds_west=bounds.west if bounds else None,
+            bounds_north=bounds.north if bounds else None,
+            bounds_east=bounds.east if bounds else None,
+        )
+        self.db.add(search)
+        self.db.commit()
+        self.db.refresh(search)
+        return search
+
+    def get_search(self, search_id: int) -> Optional[SavedSearch]:
+        return self.db.query(SavedSearch).filter(SavedSearch.id == search_id).first()
+
+    def get_searches(self) -> List[SavedSearch]:
+        return self.db.query(SavedSearch).filter(
+            SavedSearch.is_active == True
+        ).order_by(SavedSearch.id).all()
+
+    def delete_search(self, search_id: int) -> bool:
+        search = self.get_search(search_id)
+        if not search:
+            return False
+        self.db.delete(search)
+        self.db.commit()
+        return True
+
+    def get_matches(
+        self,
+        search_id: int,
+        after: Optional[Tuple[datetime, int]] = None,
+        limit: int = 50,
+        settle_seconds: int = 5
+    ) -> List:
+        """
+        Matches after the ``(matched_at, id)`` position ``after``, oldest
+        first, with listing details.
+
+        Ids are taken at insert, not commit, so a slow matching batch can
+        commit lower ids after higher ones were read. Matches from open
+        transactions (and from the last ``settle_seconds``) are left for
+        the next call, as in PropertyService.get_changes.
+        """
+        horizon = commit_horizon(self.db, settle_seconds)
+        query = self.db.query(
+            SavedSearchMatch.id,
+            SavedSearchMatch.property_id,
+            SavedSearchMatch.event,
+            SavedSearchMatch.price,
+            SavedSearchMatch.price_assessment,
+            SavedSearchMatch.matched_at,
+            Property.title,
+            Property.property_type,
+            Property.address_city,
+            Property.area_usable,
+            Property.url,
+            Property.main_image_url,
+        ).join(
+            Property, Property.id == SavedSearchMatch.property_id
+        ).filter(
+            SavedSearchMatch.saved_search_id == search_id,
+            SavedSearchMatch.matched_at < horizon
+        )
+        if after is not None:
+            query = query.filter(tuple_(SavedSearchMatch.matched_at, SavedSearchMatch.id) > after)
+        return query.order_by(SavedSearchMatch.matched_at, SavedSearchMatch.id).limit(limit).all()
+
+    def match_listings(self, property_ids: List[int]) -> int:
+        """
+        Evaluate new or changed listings against all active saved searches.
+
+        A match is recorded when the listing is new to the search or its
+        price or assessment changed since it was last recorded for it.
+        Returns the number of matches recorded.
+        """
+        if not property_ids:
+            return 0
+        index = get_search_index(self.db)
+        if not len(index):
+            return 0
+
+        listings = self.db.query(*_LISTING_COLUMNS).filter(
+            Property.id.in_(property_ids),
+            Property.is_active == True
+        ).all()
+        candidates = [(listing, index.match(listing)) for listing in listings]
+        candidates = [(listing, ids) for listing, ids in candidates if ids]
+        if not candidates:
+            return 0
+
+        # Last recorded state per (search, listing)
+        previous = {
+            (r.saved_search_id, r.property_id): (r.price, r.price_assessment)
+            for r in self.db.query(
+                SavedSearchMatch.saved_search_id,
+                SavedSearchMatch.property_id,
+                SavedSearchMatch.price,
+                SavedSearchMatch.price_assessment,
+            ).filter(
+                SavedSearchMatch.property_id.in_([listing.id for listing, _ in candidates])
+            ).distinct(
+                SavedSearchMatch.saved_search_id, SavedSearchMatch.property_id
+            ).order_by(
+                SavedSearchMatch.saved_search_id,
+                SavedSearchMatch.property_id,
+                SavedSearchMatch.id.desc()
+            )
+        }
+
+        rows = []
+        for listing, search_ids in candidates:
+            for search_id in search_ids:
+                last = previous.get((search_id, listing.id))
+                if last is None:
+                    event = 'new'
+                elif last[0] != listing.price:
+                    event = 'repriced'
+                elif last[1] != listing.price_assessment:
+                    event = 'reassessed'
+                else:
+                    continue
+                rows.append({
+                    'saved_search_id': search_id,
+                    'property_id': listing.id,
+                    'event': event,
+                    'price': listing.price,
+                    'price_assessment': listing.price_assessment,
+                })
+
+        if rows:
+            self.db.execute(insert(SavedSearchMatch), rows)
+            self.db.commit()
+        return len(rows)
+
+
+def match_saved_searches(db: Session, property_ids: List[int]) -> int:
+    """Run saved-search matching for a write batch; failures never fail the write."""
+    try:
+        return SavedSearchService(db).match_listings(property_ids)
+    except Exception as e:
+        db.rollback()
+        logger.warning(f"Saved search matching failed for {len(property_ids)} listings: {e}")
+        return 0
@@ -0,0 +1,224 @@
+import json
+import logging
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional
+
+from sqlalchemy import func, text
+from sqlalchemy.orm import Session
+
+from app.config import get_settings
+from app.models.property import Property, ScrapingJob, ScrapingJobBatch
+from app.schemas.property import ScrapingBatchReport
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+FINISHED_STATUSES = {'completed', 'partial', 'failed'}
+
+# Deactivate the active listings of a source that none of its last
+# :missed_runs completed runs saw. Runs are ordered by id, so "unseen" is
+# last_seen_job_id below the oldest of those runs (or never stamped).
+# Partial and failed runs don't count: they may not have covered the
+# whole inventory. Scrapers are configured per city and category, so only
+# segments the latest run actually covered are swept.
+_DEACTIVATE_STALE_SQL = text("""
+WITH recent AS (
+    SELECT id
+    FROM scraping_jobs
+    WHERE source = :source AND status = 'completed' AND properties_found > 0
+    ORDER BY id DESC
+    LIMIT :missed_runs
+),
+cutoff AS (
+    SELECT MIN(id) AS oldest_run, MAX(id) AS latest_run, COUNT(*) AS runs FROM recent
+),
+covered AS (
+    SELECT DISTINCT p.address_city, p.property_type, p.transaction_type
+    FROM properties p, cutoff
+    WHERE p.source = :source AND p.is_active AND p.last_seen_job_id = cutoff.latest_run
+)
+UPDATE properties p
+SET is_active = FALSE
+FROM cutoff
+WHERE cutoff.runs = :missed_runs
+  AND p.source = :source
+  AND p.is_active
+  AND (p.last_seen_job_id IS NULL OR p.last_seen_job_id < cutoff.oldest_run)
+  AND EXISTS (
+      SELECT 1 FROM covered c
+      WHERE c.address_city IS NOT DISTINCT FROM p.address_city
+        AND c.property_type IS NOT DISTINCT FROM p.property_type
+        AND c.transaction_type IS NOT DISTINCT FROM p.transaction_type
+  )
+""")
+
+
+# Add a batch to the job totals in place; error samples are appended
+# until the job holds :max_samples of them
+_RECORD_BATCH_SQL = text("""
+UPDATE scraping_jobs
+SET batches_count = COALESCE(batches_count, 0) + 1,
+    rows_processed = COALESCE(rows_processed, 0) + :rows,
+    errors_count = COALESCE(errors_count, 0) + :errors_count,
+    fetch_ms = COALESCE(fetch_ms, 0) + :fetch_ms,
+    parse_ms = COALESCE(parse_ms, 0) + :parse_ms,
+    write_ms = COALESCE(write_ms, 0) + :write_ms,
+    error_samples = CASE
+        WHEN :samples = '[]' OR jsonb_array_length(COALESCE(error_samples, '[]')) >= :max_samples
+            THEN error_samples
+        ELSE (
+            SELECT jsonb_agg(sample ORDER BY position)
+            FROM jsonb_array_elements(COALESCE(error_samples, '[]') || CAST(:samples AS jsonb))
+                 WITH ORDINALITY AS s(sample, position)
+            WHERE position <= :max_samples
+        )
+    END
+WHERE id = :job_id
+""")
+
+
+class ScrapingService:
+    def __init__(self, db: Session):
+        self.db = db
+
+    def start_job(self, source: str) -> ScrapingJob:
+        job = ScrapingJob(source=source, status='running', started_at=datetime.now(timezone.utc))
+        self.db.add(job)
+        self.db.commit()
+        self.db.refresh(job)
+        return job
+
+    def get_job(self, job_id: int) -> Optional[ScrapingJob]:
+        return self.db.query(ScrapingJob).filter(ScrapingJob.id == job_id).first()
+
+    def finish_job(
+        self,
+        job: ScrapingJob,
+        status: str = 'completed',
+        errors_count: int = 0,
+        error_message: Optional[str] = None
+    ) -> ScrapingJob:
+        """
+        Close a run and fill its counters from the listings it stamped.
+
+        A completed run then triggers the stale-listing sweep for its source
+        (see ``stale_listing_missed_runs``).
+        """
+        counts = self.db.query(
+            func.count(Property.id),
+            func.count(Property.id).filter(Property.scraped_at >= job.started_at)
+        ).filter(
+            Property.source == job.source,
+            Property.is_active == True,
+            Property.last_seen_job_id == job.id
+        ).one()
+
+        job.properties_found = counts[0]
+        job.properties_new = counts[1]
+        job.properties_updated = counts[0] - counts[1]
+        # Batch reports may already have counted the run's errors
+        job.errors_count = max(errors_count, job.errors_count or 0)
+        job.error_message = error_message
+        job.status = status
+        job.completed_at = datetime.now(timezone.utc)
+        self.db.commit()
+
+        if status == 'completed' and settings.stale_listing_missed_runs > 0:
+            job.properties_deactivated = self.deactivate_stale(
+                job.source, settings.stale_listing_missed_runs
+            )
+            self.db.commit()
+
+        self.db.refresh(job)
+        return job
+
+    def record_batch(self, job: ScrapingJob, report: ScrapingBatchReport) -> ScrapingJob:
+        """Store one batch's timings and add them to the job totals."""
+        samples = [
+            message[:settings.scraping_error_sample_chars]
+            for message in report.errors[:settings.scraping_error_samples]
+        ]
+        errors_count = max(report.errors_count, len(report.errors))
+
+        self.db.add(ScrapingJobBatch(
+            job_id=job.id,
+            rows_count=report.rows,
+            errors_count=errors_count,
+            fetch_ms=report.fetch_ms,
+            parse_ms=report.parse_ms,
+            write_ms=report.write_ms,
+        ))
+        self.db.execute(_RECORD_BATCH_SQL, {
+            'job_id': job.id,
+            'rows': report.rows,
+            'errors_count': errors_count,
+            'fetch_ms': report.fetch_ms,
+            'parse_ms': report.parse_ms,
+            'write_ms': report.write_ms,
+            'samples': json.dumps(samples),
+            'max_samples': settings.scraping_error_samples,
+        })
+        self.db.commit()
+        self.db.refresh(job)
+        return job
+
+    def get_jobs(
+        self,
+        source: Optional[str] = None,
+        status: Optional[str] = None,
+        limit: int = 50
+    ) -> List[ScrapingJob]:
+        query = self.db.query(ScrapingJob)
+        if source:
+            query = query.filter(ScrapingJob.source == source)
+        if status:
+            query = query.filter(ScrapingJob.status == status)
+        return query.order_by(ScrapingJob.id.desc()).limit(limit).all()
+
+    def get_batches(self, job_id: int, after_id: int = 0, limit: int = 500) -> List[ScrapingJobBatch]:
+        return self.db.query(ScrapingJobBatch).filter(
+            ScrapingJobBatch.job_id == job_id,
+            ScrapingJobBatch.id > after_id
+        ).order_by(ScrapingJobBatch.id).limit(limit).all()
+
+    def get_series(self, days: int = 30, source: Optional[str] = None) -> List[dict]:
+        """Per-source throughput and phase timings of the runs started in the last ``days``."""
+        query = self.db.query(ScrapingJob).filter(
+            ScrapingJob.started_at >= datetime.now(timezone.utc) - timedelta(days=days)
+        )
+        if source:
+            query = query.filter(ScrapingJob.source == source)
+
+        series: Dict[str, List[dict]] = defaultdict(list)
+        for job in query.order_by(ScrapingJob.id):
+            batches = job.batches_count or 0
+            series[job.source].append({
+                'job_id': job.id,
+                'started_at': job.started_at,
+                'status': job.status,
+                'rows_processed': job.rows_processed or 0,
+                'errors_count': job.errors_count or 0,
+                'duration_seconds': job.duration_seconds,
+                'rows_per_second': job.rows_per_second,
+                'fetch_ms': job.fetch_ms / batches if batches else None,
+                'parse_ms': job.parse_ms / batches if batches else None,
+                'write_ms': job.write_ms / batches if batches else None,
+            })
+        return [{'source': name, 'points': points} for name, points in sorted(series.items())]
+
+    def deactivate_stale(self, source: str, missed_runs: int) -> int:
+        """Deactivate listings unseen for ``missed_runs`` completed runs; returns the count."""
+        deactivated = self.db.execute(_DEACTIVATE_STALE_SQL, {
+            'source': source,
+            'missed_runs': missed_runs,
+        }).rowcount
+        self.db.commit()
+        if deactivated:
+            logger.info(f"Deactivated {deactivated} stale {source} listings")
+        return deactivated
+
+    def get_sources(self) -> List[str]:
+        return [
+            row[0] for row in self.db.query(ScrapingJob.source).distinct().order_by(ScrapingJob.source)
+        ]
@@ -0,0 +1,405 @@
+"""
+Sample-data seeding behind the /seed endpoints.
+
+Generates listings and their change-only price history with
+``app.synthetic`` (the generator the benchmark loader uses too), scores
+the sale listings and bulk-loads everything with COPY. The load is split into chunks of
+``seed_chunk_size`` rows that ``seed_workers`` threads generate and copy
+over their own connections; each chunk commits on its own, so progress is
+visible while a large run is going. Chunk ``k`` always uses the RNG
+stream ``(seed, k)``, so a seed reproduces the same data.
+
+Sample listings have ``source = 'sample'``; clearing them never touches
+scraped data. The status counts come from planner statistics
+(``pg_class`` / ``pg_stats``), never from a COUNT(*) over the table.
+"""
+
+import io
+import logging
+import threading
+import time
+from concurrent.futures import FIRST_EXCEPTION, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta, timezone
+from functools import lru_cache
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pa_csv
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.config import get_settings
+from app.database import SessionLocal, engine
+from app.ml.predictor import PricePredictor
+from app.services.price_index_service import PriceIndexService
+from app.synthetic import LISTING_AGE_DAYS, generate_listings, generate_price_history, labels
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+SAMPLE_SOURCE = 'sample'
+
+PROPERTY_COLUMNS = [
+    'id', 'external_id', 'source', 'title', 'property_type', 'transaction_type',
+    'price', 'area_usable', 'area_land', 'rooms', 'rooms_count',
+    'floor', 'floors_total', 'condition', 'construction_type', 'energy_rating',
+    'has_balcony', 'has_terrace', 'has_parking', 'has_garage', 'has_elevator',
+    'has_cellar', 'has_garden', 'address_city', 'address_district', 'coordinates',
+    'distance_to_center', 'predicted_price', 'prediction_confidence', 'predicted_at',
+    'scraped_at', 'updated_at', 'is_active', 'deactivated_at',
+]
+
+_RESERVE_IDS_SQL = (
+    "SELECT array_agg(nextval(pg_get_serial_sequence('properties', 'id'))) "
+    "FROM generate_series(1, %s)"
+)
+
+_COPY_SQL = "COPY {table} ({columns}) FROM STDIN WITH (FORMAT csv)"
+
+# Planner statistics only: live tuples and the share of the 'sample' source
+_TABLE_STATS_SQL = text("""
+SELECT GREATEST(c.reltuples, COALESCE(s.n_live_tup, 0), 0)::bigint AS total,
+       (
+           SELECT st.most_common_freqs[array_position(st.most_common_vals::text::text[], :source)]
+           FROM pg_stats st
+           WHERE st.schemaname = n.nspname
+             AND st.tablename = 'properties'
+             AND st.attname = 'source'
+       ) AS sample_share
+FROM pg_class c
+JOIN pg_namespace n ON n.oid = c.relnamespace
+LEFT JOIN pg_stat_user_tables s ON s.relid = c.oid
+WHERE c.oid = 'properties'::regclass
+""")
+
+# Below this many rows an exact (bounded) count is as cheap as the statistics
+_EXACT_COUNT_LIMIT = 10000
+
+_BOUNDED_COUNTS_SQL = text("""
+SELECT count(*), count(*) FILTER (WHERE source = :source)
+FROM (SELECT source FROM properties LIMIT :limit) t
+""")
+
+
+@dataclass
+class SeedRun:
+    """Progress of one seeding run; updated by the loader threads."""
+    count: int
+    seed: int
+    run_predictions: bool
+    status: str = 'running'  # running, completed, failed
+    phase: str = 'starting'  # clearing, loading, analyzing, price_index, done
+    loaded: int = 0
+    price_points: int = 0
+    predicted: int = 0
+    started_at: datetime = field(default_factory=lambda: datetime.now(timezone.utc))
+    finished_at: Optional[datetime] = None
+    error: Optional[str] = None
+
+    @property
+    def elapsed_seconds(self) -> float:
+        end = self.finished_at or datetime.now(timezone.utc)
+        return round((end - self.started_at).total_seconds(), 2)
+
+    @property
+    def rows_per_second(self) -> Optional[float]:
+        elapsed = self.elapsed_seconds
+        return round(self.loaded / elapsed, 1) if elapsed > 0 else None
+
+
+# One run at a time per process; the last run stays visible in the status
+_lock = threading.Lock()
+_current: Optional[SeedRun] = None
+
+
+@lru_cache(maxsize=1)
+def _predictor() -> PricePredictor:
+    return PricePredictor()
+
+
+def _score(listings: Dict[str, np.ndarray], labelled: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+    """Bulk predictions for the sale listings; rentals stay unscored."""
+    n = listings['price'].shape[0]
+    sale = ~listings['is_rent']
+    frame = pd.DataFrame({
+        'property_type': labelled['property_type'],
+        'area_usable': listings['area_usable'],
+        'rooms_count': listings['rooms_count'],
+        'floor': listings['floor'],
+        'floors_total': listings['floors_total'],
+        'distance_to_center': listings['distance_to_center'],
+        'condition': labelled['condition'],
+        'construction_type': labelled['construction_type'],
+        'energy_rating': labelled['energy_rating'],
+        'city': labelled['address_city'],
+        **{feat: listings[feat] for feat in PricePredictor.BOOLEAN_FEATURES},
+    })[sale]
+    result = _predictor().predict_many(frame)
+
+    predicted = np.full(n, np.nan)
+    confidence = np.full(n, np.nan)
+    predicted[sale] = result['predicted_price'].to_numpy()
+    confidence[sale] = result['confidence'].to_numpy()
+    # Deviation and assessment bucket are derived by the database
+    return {
+        'predicted_price': predicted,
+        'prediction_confidence': confidence,
+    }
+
+
+def _property_table(
+    ids: np.ndarray,
+    listings: Dict[str, np.ndarray],
+    labelled: Dict[str, np.ndarray],
+    scores: Optional[Dict[str, np.ndarray]],
+    now: np.datetime64
+) -> pa.Table:
+    n = ids.shape[0]
+    coordinates = pc.binary_join_element_wise(
+        'SRID=4326;POINT(',
+        pc.cast(pa.array(np.round(listings['lng'], 7)), pa.string()),
+        ' ',
+        pc.cast(pa.array(np.round(listings['lat'], 7)), pa.string()),
+        ')',
+        ''
+    )
+    timestamp = pa.timestamp('us', tz='UTC')
+
+    def seconds_ago(seconds: np.ndarray) -> pa.Array:
+        return pa.array(now - (seconds * 1e6).astype('timedelta64[us]'), type=timestamp)
+
+    columns = {
+        'id': pa.array(ids),
+        'external_id': pc.binary_join_element_wise('sample-', pc.cast(pa.array(ids), pa.string()), ''),
+        'source': pa.array(np.full(n, SAMPLE_SOURCE)),
+        **{name: pa.array(values) for name, values in labelled.items()},
+        'price': pa.array(listings['price']),
+        'area_usable': pa.array(listings['area_usable']),
+        'area_land': pa.array(listings['area_land'], from_pandas=True),
+        'rooms_count': pa.array(listings['rooms_count']),
+        'floor': pa.array(listings['floor']),
+        'floors_total': pa.array(listings['floors_total']),
+        **{
+            feat: pa.array(listings[feat])
+            for feat in ('has_balcony', 'has_terrace', 'has_parking', 'has_garage',
+                         'has_elevator', 'has_cellar', 'has_garden')
+        },
+        'coordinates': coordinates,
+        'distance_to_center': pa.array(listings['distance_to_center']),
+        'scraped_at': seconds_ago(listings['listed_seconds']),
+        'updated_at': seconds_ago(listings['updated_seconds']),
+        'is_active': pa.array(listings['is_active']),
+        # Inactive listings were removed at their last update
+        'deactivated_at': pc.if_else(
+            pa.array(listings['is_active']), pa.scalar(None, type=timestamp), seconds_ago(listings['updated_seconds'])
+        ),
+    }
+    if scores is not None:
+        scored = ~np.isnan(scores['predicted_price'])
+        columns.update({
+            'predicted_price': pa.array(scores['predicted_price'], from_pandas=True),
+            'prediction_confidence': pa.array(scores['prediction_confidence'], from_pandas=True),
+            'predicted_at': pa.array(np.where(scored, now, np.datetime64('NaT')), type=timestamp, from_pandas=True),
+        })
+    return pa.table({name: columns[name] for name in PROPERTY_COLUMNS if name in columns})
+
+
+def _copy(cursor, table: str, data: pa.Table):
+    # pyarrow writes CSV in C++ without holding the GIL, so the loader
+    # threads overlap formatting with each other's COPY round trips
+    buffer = io.BytesIO()
+    pa_csv.write_csv(data, buffer, pa_csv.WriteOptions(include_header=False))
+    buffer.seek(0)
+    cursor.copy_expert(_COPY_SQL.format(table=table, columns=', '.join(data.column_names)), buffer)
+
+
+class SeedService:
+    def __init__(self, db: Session):
+        self.db = db
+
+    def status(self) -> dict:
+        """Listing counts (from statistics) and the current or last run."""
+        total, sample, estimated = self._counts()
+        run = _current
+        running = run is not None and run.status == 'running'
+        return {
+            'total_properties': total,
+            'sample_properties': sample,
+            'sample_data_ready': sample > 0 and not running,
+            'estimated': estimated,
+            'run': run,
+        }
+
+    def _counts(self) -> Tuple[int, int, bool]:
+        row = self.db.execute(_TABLE_STATS_SQL, {'source': SAMPLE_SOURCE}).one()
+        if row.total > _EXACT_COUNT_LIMIT:
+            return row.total, int(round(row.total * (row.sample_share or 0))), True
+        # Small (or never analysed) table: a bounded exact count is cheap
+        total, sample = self.db.execute(
+            _BOUNDED_COUNTS_SQL, {'source': SAMPLE_SOURCE, 'limit': _EXACT_COUNT_LIMIT + 1}
+        ).one()
+        return total, sample, total > _EXACT_COUNT_LIMIT
+
+    def start(
+        self,
+        count: int,
+        clear_existing: bool = False,
+        run_predictions: bool = True,
+        seed: Optional[int] = None,
+        wait: bool = True
+    ) -> Optional[SeedRun]:
+        """
+        Start a seeding run; returns None if one is already in progress.
+
+        With ``wait`` the run happens in the calling thread and the returned
+        run is finished; otherwise it continues in a background thread.
+        """
+        global _current
+        with _lock:
+            if _current is not None and _current.status == 'running':
+                return None
+            if seed is None:
+                seed = int(np.random.SeedSequence().entropy % 2**32)
+            run = SeedRun(count=count, seed=seed, run_predictions=run_predictions)
+            _current = run
+
+        if wait:
+            self._run(run, clear_existing)
+        else:
+            threading.Thread(
+                target=self._run_in_background, args=(run, clear_existing), name='seed-sample-data', daemon=True
+            ).start()
+        return run
+
+    @staticmethod
+    def _run_in_background(run: SeedRun, clear_existing: bool):
+        db = SessionLocal()
+        try:
+            SeedService(db)._run(run, clear_existing)
+        finally:
+            db.close()
+
+    def _run(self, run: SeedRun, clear_existing: bool):
+        try:
+            since = (run.started_at - timedelta(days=LISTING_AGE_DAYS)).date()
+            if clear_existing:
+                run.phase = 'clearing'
+                cleared_from = self.clear()
+                if cleared_from is not None:
+                    since = min(since, cleared_from)
+
+            run.phase = 'loading'
+            self._load(run)
+
+            run.phase = 'analyzing'
+            self.db.execute(text("ANALYZE properties"))
+            self.db.execute(text("ANALYZE price_history"))
+            self.db.commit()
+
+            run.phase = 'price_index'
+            PriceIndexService(self.db).refresh(since=since)
+
+            run.phase = 'done'
+            run.status = 'completed'
+            logger.info(
+                f"Seeded {run.loaded} sample listings and {run.price_points} price points "
+                f"in {run.elapsed_seconds}s ({run.rows_per_second} listings/s)"
+            )
+        except Exception as e:
+            self.db.rollback()
+            run.status = 'failed'
+            run.error = str(e)
+            logger.exception(f"Seeding failed after {run.loaded} listings")
+        finally:
+            run.finished_at = datetime.now(timezone.utc)
+
+    def clear(self) -> Optional[date]:
+        """
+        Remove earlier sample listings; their price history and saved-search
+        matches go with them through ON DELETE CASCADE.
+
+        Rollup rows from the first sample day on were computed with the
+        sample listings in them, so they are dropped as well; the next
+        price index refresh rebuilds them. Returns that day, or None when
+        there were no sample listings.
+        """
+        first_seen = self.db.execute(
+            text("SELECT min(scraped_at) FROM properties WHERE source = :source"),
+            {'source': SAMPLE_SOURCE}
+        ).scalar()
+        if first_seen is None:
+            return None
+        removed = self.db.execute(
+            text("DELETE FROM properties WHERE source = :source"), {'source': SAMPLE_SOURCE}
+        ).rowcount
+        cleared_from = first_seen.astimezone(timezone.utc).date()
+        self.db.execute(
+            text("DELETE FROM price_index_daily WHERE bucket_date >= :day"), {'day': cleared_from}
+        )
+        self.db.commit()
+        logger.info(f"Cleared {removed} sample listings; price index dropped from {cleared_from}")
+        return cleared_from
+
+    def _load(self, run: SeedRun):
+        chunk_size = settings.seed_chunk_size
+        chunks = [
+            (k, min(chunk_size, run.count - offset))
+            for k, offset in enumerate(range(0, run.count, chunk_size))
+        ]
+        now = np.datetime64(run.started_at.replace(tzinfo=None), 'us')
+        workers = max(1, min(settings.seed_workers, len(chunks)))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='seed') as pool:
+            futures = [pool.submit(self._load_chunk, run, k, n, now) for k, n in chunks]
+            done, pending = wait(futures, return_when=FIRST_EXCEPTION)
+            for future in pending:
+                future.cancel()
+            for future in done:
+                future.result()
+
+    def _load_chunk(self, run: SeedRun, index: int, n: int, now: np.datetime64):
+        if run.status != 'running':
+            return
+        started = time.perf_counter()
+        rng = np.random.default_rng([run.seed, index])
+        listings = generate_listings(n, rng)
+        labelled = labels(listings)
+        owner, history_price, history_age = generate_price_history(listings, rng)
+        scores = _score(listings, labelled) if run.run_predictions else None
+
+        conn = engine.raw_connection()
+        try:
+            with conn.cursor() as cursor:
+                # Generated history is already change-only and sample rows
+                # need no live events: skip both triggers (see 01_schema.sql)
+                cursor.execute("SET LOCAL app.bulk_load = 'on'")
+                cursor.execute("SET LOCAL synchronous_commit = off")
+                cursor.execute(_RESERVE_IDS_SQL, (n,))
+                ids = np.sort(np.array(cursor.fetchone()[0], dtype=np.int64))
+                _copy(cursor, 'properties', _property_table(ids, listings, labelled, scores, now))
+                _copy(cursor, 'price_history', pa.table({
+                    'property_id': pa.array(ids[owner]),
+                    'price': pa.array(history_price),
+                    'recorded_at': pa.array(
+                        now - (history_age * 1e6).astype('timedelta64[us]'), type=pa.timestamp('us', tz='UTC')
+                    ),
+                }))
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+
+        with _lock:
+            run.loaded += n
+            run.price_points += owner.shape[0]
+            if scores is not None:
+                run.predicted += int((~np.isnan(scores['predicted_price'])).sum())
+        logger.info(
+            f"Seed chunk {index}: {n} listings, {owner.shape[0]} price points "
+            f"in {time.perf_counter() - started:.2f}s ({run.loaded}/{run.count})"
+        )
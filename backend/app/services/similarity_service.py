@@ -0,0 +1,370 @@
+"""
+k-NN similarity index over active listings.
+
+Each listing becomes a weighted feature vector (location, log area, rooms,
+log price, condition, feature flags), so Euclidean distance between
+vectors is the weighted similarity distance. Vectors are kept per
+(property_type, transaction_type) segment with a haversine BallTree over
+their coordinates: a query takes the listings within its radius from the
+tree and ranks only those by vector distance. Listings changed since the
+last build go to a small brute-force tail and tombstones until the tree
+is rebuilt.
+
+Enabled with ``SIMILARITY_INDEX_ENABLED=true``; otherwise
+PropertyService.get_similar_properties scores candidates in SQL.
+"""
+
+import logging
+import math
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from sklearn.neighbors import BallTree
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.config import get_settings
+from app.models.property import Property
+from app.services.background import PeriodicTask
+from app.services.distance_service import EARTH_RADIUS_KM, haversine_km
+from app.services.watermark import ChangeWatermark
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+# Relative weight of each component in the similarity distance
+FEATURE_WEIGHTS = {
+    'location': 1.0,
+    'area': 1.0,
+    'rooms': 0.6,
+    'price': 0.8,
+    'condition': 0.4,
+    'features': 0.15,
+}
+
+# One unit of (unweighted) distance: 2 km apart, ~28% area or price
+# difference, one room, two condition grades
+LOCATION_SCALE_KM = 2.0
+LOG_SCALE = 0.25
+CONDITION_SCALE = 2.0
+
+CONDITION_GRADES = {
+    'new': 4,
+    'construction': 4,
+    'renovated': 3,
+    'good': 2,
+    'original': 1,
+    'to_renovate': 0,
+}
+DEFAULT_CONDITION_GRADE = 2
+
+FLAGS = [
+    'has_balcony', 'has_terrace', 'has_parking', 'has_garage',
+    'has_elevator', 'has_cellar', 'has_garden'
+]
+
+KM_PER_DEGREE = 111.32
+# Longitude scale at the latitude of Czechia (~49.8 N)
+KM_PER_DEGREE_LNG = KM_PER_DEGREE * math.cos(math.radians(49.8))
+
+_LOAD_CHUNK_ROWS = 50_000
+
+
+# Raw feature columns, before imputation and weighting
+_RAW_COLUMNS = ['lat', 'lng', 'area', 'rooms', 'price', 'grade'] + FLAGS
+
+
+def raw_features(rows) -> np.ndarray:
+    """Raw feature matrix (NaN for missing values) from query rows or Properties."""
+    raw = np.full((len(rows), len(_RAW_COLUMNS)), np.nan, dtype=np.float64)
+    for i, r in enumerate(rows):
+        raw[i, 0] = r.lat
+        raw[i, 1] = r.lng
+        if r.area_usable:
+            raw[i, 2] = float(r.area_usable)
+        if r.rooms_count:
+            raw[i, 3] = float(r.rooms_count)
+        if r.price:
+            raw[i, 4] = float(r.price)
+        raw[i, 5] = CONDITION_GRADES.get(r.condition, DEFAULT_CONDITION_GRADE)
+        for j, flag in enumerate(FLAGS):
+            raw[i, 6 + j] = 1.0 if getattr(r, flag) else 0.0
+    return raw
+
+
+# Imputed area/rooms/price for a segment with no known values at all
+DEFAULT_MEDIANS = {'area': 60.0, 'rooms': 2.0, 'price': 5_000_000.0}
+
+
+def segment_medians(raw: np.ndarray) -> Dict[str, float]:
+    def median(column: int, name: str) -> float:
+        values = raw[:, column]
+        values = values[~np.isnan(values)]
+        return float(np.median(values)) if values.shape[0] else DEFAULT_MEDIANS[name]
+    return {
+        'area': median(2, 'area'),
+        'rooms': median(3, 'rooms'),
+        'price': median(4, 'price'),
+    }
+
+
+def encode_features(raw: np.ndarray, medians: Dict[str, float]) -> np.ndarray:
+    """Weighted feature vectors; missing area/rooms/price use segment medians."""
+    w = FEATURE_WEIGHTS
+    area = np.where(np.isnan(raw[:, 2]), medians['area'], raw[:, 2])
+    rooms = np.where(np.isnan(raw[:, 3]), medians['rooms'], raw[:, 3])
+    price = np.where(np.isnan(raw[:, 4]), medians['price'], raw[:, 4])
+
+    vectors = np.empty((raw.shape[0], len(_RAW_COLUMNS)), dtype=np.float64)
+    vectors[:, 0] = raw[:, 0] * KM_PER_DEGREE / LOCATION_SCALE_KM * w['location']
+    vectors[:, 1] = raw[:, 1] * KM_PER_DEGREE_LNG / LOCATION_SCALE_KM * w['location']
+    vectors[:, 2] = np.log(np.maximum(area, 1.0)) / LOG_SCALE * w['area']
+    vectors[:, 3] = rooms * w['rooms']
+    vectors[:, 4] = np.log(np.maximum(price, 1.0)) / LOG_SCALE * w['price']
+    vectors[:, 5] = raw[:, 5] / CONDITION_SCALE * w['condition']
+    vectors[:, 6:] = raw[:, 6:] * w['features']
+    return vectors
+
+
+class _Segment:
+    """Vectors of one (property_type, transaction_type) segment."""
+
+    def __init__(self, ids, vectors, lats, lngs, medians: Dict[str, float]):
+        self.ids = ids
+        self.vectors = vectors
+        self.lats = lats
+        self.lngs = lngs
+        self.alive = np.ones(ids.shape[0], dtype=bool)
+        self.medians = medians
+        # Rows [0, tree_size) are in the spatial tree; the rest are the pending tail
+        self.tree = (
+            BallTree(np.radians(np.column_stack([lats, lngs])), metric='haversine')
+            if ids.shape[0] else None
+        )
+        self.tree_size = ids.shape[0]
+
+    @property
+    def size(self) -> int:
+        return self.ids.shape[0]
+
+    def needs_rebuild(self) -> bool:
+        pending = self.size - self.tree_size
+        dead = int((~self.alive).sum())
+        return pending > max(1000, self.tree_size // 10) or dead > max(1000, self.size // 5)
+
+    def with_changes(self, removed_ids: np.ndarray, ids, vectors, lats, lngs) -> "_Segment":
+        """Copy-on-write: tombstone changed ids and append new vectors to the tail."""
+        segment = _Segment.__new__(_Segment)
+        segment.medians = self.medians
+        segment.tree = self.tree
+        segment.tree_size = self.tree_size
+        segment.ids = np.concatenate([self.ids, ids])
+        segment.vectors = np.concatenate([self.vectors, vectors])
+        segment.lats = np.concatenate([self.lats, lats])
+        segment.lngs = np.concatenate([self.lngs, lngs])
+        alive = self.alive.copy()
+        if removed_ids.shape[0]:
+            alive &= ~np.isin(self.ids, removed_ids)
+        segment.alive = np.concatenate([alive, np.ones(ids.shape[0], dtype=bool)])
+        return segment
+
+    def rebuilt(self) -> "_Segment":
+        keep = self.alive
+        return _Segment(
+            self.ids[keep], self.vectors[keep], self.lats[keep], self.lngs[keep], self.medians
+        )
+
+    def query(
+        self,
+        vector: np.ndarray,
+        lat: float,
+        lng: float,
+        radius_km: float,
+        limit: int,
+        exclude_id: int
+    ) -> List[Tuple[int, float, float]]:
+        """Nearest (id, distance, km away) within ``radius_km``."""
+        # Listings within the radius first (tree, then the small tail), so
+        # only those are ranked by feature distance
+        candidates = []
+        if self.tree is not None:
+            point = np.radians([[lat, lng]])
+            candidates.append(self.tree.query_radius(point, r=radius_km / EARTH_RADIUS_KM)[0])
+        if self.size > self.tree_size:
+            tail = np.arange(self.tree_size, self.size)
+            candidates.append(tail[haversine_km(lat, lng, self.lats[tail], self.lngs[tail]) <= radius_km])
+        if not candidates:
+            return []
+        rows = np.concatenate(candidates)
+        rows = rows[self.alive[rows] & (self.ids[rows] != exclude_id)]
+        if not rows.shape[0]:
+            return []
+
+        dist = np.linalg.norm(self.vectors[rows] - vector, axis=1)
+        if rows.shape[0] > limit:
+            nearest = np.argpartition(dist, limit)[:limit]
+            rows, dist = rows[nearest], dist[nearest]
+        order = np.lexsort((self.ids[rows], dist))
+        rows, dist = rows[order], dist[order]
+        km = haversine_km(lat, lng, self.lats[rows], self.lngs[rows])
+        return [
+            (int(self.ids[row]), float(d), float(k))
+            for row, d, k in zip(rows, dist, km)
+        ]
+
+
+class SimilarityIndex:
+    def __init__(self):
+        self._segments: Dict[Tuple[str, str], _Segment] = {}
+        self._watermark = ChangeWatermark(settings.changes_settle_seconds)
+        self._refresh_lock = threading.Lock()
+
+    @property
+    def loaded(self) -> bool:
+        return self._watermark.position is not None
+
+    def stats(self) -> dict:
+        return {
+            f"{k[0]}/{k[1]}": {'rows': s.size, 'in_tree': s.tree_size, 'alive': int(s.alive.sum())}
+            for k, s in self._segments.items()
+        }
+
+    def refresh(self, db: Session) -> int:
+        """Load everything on first call, then apply updated_at deltas."""
+        with self._refresh_lock:
+            query = select(
+                Property.id,
+                Property.is_active,
+                Property.property_type,
+                Property.transaction_type,
+                Property.lat,
+                Property.lng,
+                Property.area_usable,
+                Property.rooms_count,
+                Property.price,
+                Property.condition,
+                *[getattr(Property, flag) for flag in FLAGS],
+                Property.updated_at
+            ).where(Property.coordinates.isnot(None))
+            since = self._watermark.start(db)
+            initial = since is None
+            if initial:
+                query = query.where(Property.is_active == True)
+            else:
+                query = query.where(Property.updated_at >= since)
+
+            # Per segment: lists of (ids, raw features) chunks
+            chunks: Dict[Tuple[str, str], list] = {}
+            removed = []
+            rows_read = 0
+            result = db.execute(query.execution_options(yield_per=_LOAD_CHUNK_ROWS))
+            for partition in result.partitions():
+                by_segment: Dict[Tuple[str, str], list] = {}
+                for r in partition:
+                    if not self._watermark.is_new(r.id, r.updated_at):
+                        continue
+                    rows_read += 1
+                    removed.append(r.id)
+                    if r.is_active:
+                        by_segment.setdefault((r.property_type, r.transaction_type), []).append(r)
+                for key, segment_rows in by_segment.items():
+                    chunks.setdefault(key, []).append((
+                        np.asarray([r.id for r in segment_rows], dtype=np.int64),
+                        raw_features(segment_rows)
+                    ))
+
+            if rows_read or initial:
+                self._apply(chunks, np.asarray(removed, dtype=np.int64), initial)
+            self._watermark.advance()
+            return rows_read
+
+    def _apply(self, chunks: Dict[Tuple[str, str], list], removed_ids: np.ndarray, initial: bool):
+        segments = dict(self._segments)
+        for key in set(segments) | set(chunks):
+            if key in chunks:
+                ids = np.concatenate([c[0] for c in chunks[key]])
+                raw = np.concatenate([c[1] for c in chunks[key]])
+            else:
+                ids = np.empty(0, dtype=np.int64)
+                raw = np.empty((0, len(_RAW_COLUMNS)))
+
+            segment = segments.get(key)
+            if segment is None or initial:
+                medians = segment_medians(raw)
+                segment = _Segment(ids, encode_features(raw, medians), raw[:, 0], raw[:, 1], medians)
+            else:
+                segment = segment.with_changes(
+                    removed_ids, ids, encode_features(raw, segment.medians), raw[:, 0], raw[:, 1]
+                )
+                if segment.needs_rebuild():
+                    segment = segment.rebuilt()
+            segments[key] = segment
+
+        self._segments = segments
+
+    def query(
+        self,
+        reference,
+        radius_km: float = 5.0,
+        limit: int = 10
+    ) -> List[Tuple[int, float, float]]:
+        """
+        Most similar listings as (id, similarity score 0..1, km away).
+
+        ``reference`` needs the loaded columns (lat/lng included), e.g. a
+        row from PropertyService.get_similarity_reference().
+        """
+        segment = self._segments.get((reference.property_type, reference.transaction_type))
+        if segment is None or not segment.size:
+            return []
+        raw = raw_features([reference])
+        vector = encode_features(raw, segment.medians)[0]
+        neighbours = segment.query(vector, raw[0, 0], raw[0, 1], radius_km, limit, reference.id)
+        return [(pid, similarity_score(d), km) for pid, d, km in neighbours]
+
+
+def similarity_score(distance: float) -> float:
+    return round(math.exp(-distance), 4)
+
+
+_index: Optional[SimilarityIndex] = None
+_refresher: Optional[PeriodicTask] = None
+
+
+def get_similarity_index() -> Optional[SimilarityIndex]:
+    """The loaded index, or None when disabled or still loading."""
+    if _index is not None and _index.loaded:
+        return _index
+    return None
+
+
+def _refresh_index(db: Session):
+    started = time.monotonic()
+    rows = _index.refresh(db)
+    if rows:
+        logger.info(f"Similarity index refreshed: {rows} rows in {time.monotonic() - started:.2f}s")
+
+
+def start_similarity_refresher(session_factory) -> None:
+    global _index, _refresher
+
+    if not settings.similarity_index_enabled or _refresher is not None:
+        return
+
+    _index = SimilarityIndex()
+    _refresher = PeriodicTask(
+        "similarity-index",
+        settings.similarity_index_refresh_seconds,
+        _refresh_index,
+        session_factory
+    )
+    _refresher.start()
+
+
+def stop_similarity_refresher() -> None:
+    global _refresher
+    if _refresher is not None:
+        _refresher.stop()
+        _refresher = None
@@ -0,0 +1,78 @@
+"""
+Incremental reads of listings by ``updated_at``.
+
+``updated_at`` is stamped with the writer's transaction start (or later),
+so a transaction still open in this database may yet commit rows older
+than anything already committed. Readers that follow ``updated_at`` -
+the changes feed, the analytics snapshot and the similarity index - stay
+behind the oldest open transaction instead of trusting a fixed overlap.
+"""
+
+from datetime import datetime
+from typing import Dict, Optional
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+# Other roles' transactions are only visible with pg_read_all_stats (their
+# xact_start reads as NULL)
+_COMMIT_HORIZON_SQL = text("""
+SELECT LEAST(
+    now() - make_interval(secs => :settle_seconds),
+    (
+        SELECT min(xact_start) FROM pg_stat_activity
+        WHERE datname = current_database()
+          AND backend_type = 'client backend'
+          AND pid <> pg_backend_pid()
+    )
+)
+""")
+
+
+def commit_horizon(db: Session, settle_seconds: float) -> datetime:
+    """
+    Oldest ``updated_at`` a not yet visible row can still get: the start of
+    the oldest open transaction, and at most ``settle_seconds`` ago.
+    """
+    return db.execute(_COMMIT_HORIZON_SQL, {'settle_seconds': settle_seconds}).scalar()
+
+
+class ChangeWatermark:
+    """
+    Read position of a background ``updated_at`` poller.
+
+    Each read starts where the previous read's horizon was, so rows from
+    there on are read again; ``is_new`` drops the ones already applied
+    with the same ``updated_at``, so unchanged rows don't count as changes.
+
+        since = watermark.start(db)  # None: full load
+        for row in rows updated at or after since:
+            if watermark.is_new(row.id, row.updated_at):
+                apply(row)
+        watermark.advance()
+    """
+
+    def __init__(self, settle_seconds: float):
+        self.settle_seconds = settle_seconds
+        self.position: Optional[datetime] = None
+        self._horizon: Optional[datetime] = None
+        self._seen: Dict[int, datetime] = {}
+        self._pending: Dict[int, datetime] = {}
+
+    def start(self, db: Session) -> Optional[datetime]:
+        """Take this read's horizon; returns the position to read from."""
+        self._horizon = commit_horizon(db, self.settle_seconds)
+        self._pending = {}
+        return self.position
+
+    def is_new(self, row_id: int, updated_at: Optional[datetime]) -> bool:
+        if updated_at is not None and updated_at >= self._horizon:
+            # Read again next time
+            self._pending[row_id] = updated_at
+        return self._seen.get(row_id) != updated_at
+
+    def advance(self):
+        """Move past everything read since ``start``, up to its horizon."""
+        self.position = self._horizon
+        self._seen = self._pending
+        self._pending = {}
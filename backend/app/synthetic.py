@@ -0,0 +1,202 @@
+"""
+Synthetic listings around the city_centers points.
+
+One generator for the /seed sample data and the benchmark loader.
+Listings have a dense core and a long suburban tail, price per m² falls
+off with distance from the centre and varies by city, condition and
+transaction type, and features agree with the property type. Each
+listing also gets a change-only price history ending at its current
+price. Everything is vectorised; categorical columns come back as codes
+into the tables below and ``labels`` turns them into stored values.
+"""
+
+from dataclasses import dataclass
+from typing import Dict, Tuple
+
+import numpy as np
+
+KM_PER_DEGREE_LAT = 111.32
+
+
+@dataclass(frozen=True)
+class City:
+    name: str
+    lat: float
+    lng: float
+    weight: float  # share of listings
+    price_per_sqm: float  # sale price per m² in the centre, CZK
+    spread_km: float
+
+
+# Same points as the city_centers seed rows in database/init/01_schema.sql
+CITIES = [
+    City('Praha', 50.0755, 14.4378, 0.50, 135_000, 6.0),
+    City('Brno', 49.1951, 16.6068, 0.25, 100_000, 4.0),
+    City('Ostrava', 49.8209, 18.2625, 0.13, 48_000, 4.5),
+    City('Plzeň', 49.7384, 13.3776, 0.12, 72_000, 3.5),
+]
+CITY_NAMES = np.array([c.name for c in CITIES])
+CITY_LAT = np.array([c.lat for c in CITIES])
+CITY_LNG = np.array([c.lng for c in CITIES])
+CITY_WEIGHTS = np.array([c.weight for c in CITIES])
+CITY_PRICE_PER_SQM = np.array([c.price_per_sqm for c in CITIES])
+CITY_SPREAD_KM = np.array([c.spread_km for c in CITIES])
+
+CONDITIONS = np.array(['new', 'good', 'renovated', 'original'])
+CONDITION_WEIGHTS = [0.15, 0.4, 0.25, 0.2]
+CONDITION_FACTOR = np.array([1.25, 1.0, 1.1, 0.8])
+CONSTRUCTION_TYPES = np.array(['brick', 'panel', 'mixed'])
+ENERGY_RATINGS = np.array(['A', 'B', 'C', 'D', 'E', 'F', 'G'])
+ROOM_LAYOUTS = np.array(['1+kk', '1+1', '2+kk', '2+1', '3+kk', '3+1', '4+kk', '4+1', '5+kk', '5+1'])
+
+# Listings were first seen up to this many days ago; the price history
+# starts then, well inside the pre-created price_history partitions
+LISTING_AGE_DAYS = 180
+
+
+def generate_listings(n: int, rng: np.random.Generator) -> Dict[str, np.ndarray]:
+    """Column arrays for ``n`` listings (no ids)."""
+    city = rng.choice(len(CITIES), size=n, p=CITY_WEIGHTS / CITY_WEIGHTS.sum())
+    spread = CITY_SPREAD_KM[city]
+
+    # Dense core plus a lognormal suburban tail
+    distance = np.where(
+        rng.random(n) < 0.7,
+        np.abs(rng.normal(0, spread / 2, n)),
+        rng.lognormal(np.log(spread), 0.5, n)
+    )
+    bearing = rng.uniform(0, 2 * np.pi, n)
+    lat = CITY_LAT[city] + distance * np.cos(bearing) / KM_PER_DEGREE_LAT
+    lng = CITY_LNG[city] + distance * np.sin(bearing) / (KM_PER_DEGREE_LAT * np.cos(np.radians(CITY_LAT[city])))
+
+    # Houses get more common towards the suburbs
+    is_house = rng.random(n) < np.clip(0.1 + distance / 60, 0.1, 0.5)
+    is_rent = rng.random(n) < 0.25
+    area = np.where(
+        is_house,
+        rng.lognormal(np.log(140), 0.3, n),
+        rng.lognormal(np.log(62), 0.35, n)
+    ).clip(18, 600).round(0)
+    area_land = np.where(is_house, rng.lognormal(np.log(650), 0.5, n).round(0), np.nan)
+    rooms_count = np.clip(np.round(area / 28 + rng.normal(0, 0.5, n)), 1, 5)
+    separate_kitchen = rng.random(n) >= 0.6
+    rooms = ROOM_LAYOUTS[(rooms_count.astype(int) - 1) * 2 + separate_kitchen]
+    floors_total = np.where(is_house, rng.integers(1, 3, n, endpoint=True), rng.integers(3, 13, n, endpoint=True))
+    floor = np.where(is_house, 0, (rng.random(n) * (floors_total + 1)).astype(int))
+    condition = rng.choice(len(CONDITIONS), size=n, p=CONDITION_WEIGHTS)
+
+    per_sqm = (
+        CITY_PRICE_PER_SQM[city]
+        * np.exp(-distance / 18)
+        * CONDITION_FACTOR[condition]
+        * np.where(is_house, 0.8, 1.0)
+        * rng.lognormal(0, 0.18, n)
+    )
+    # Monthly rent is roughly 0.4 % of the sale value
+    price = np.where(is_rent, np.round(per_sqm * 0.004 * area, -1), np.round(per_sqm * area, -3))
+
+    listed_days = rng.uniform(0, LISTING_AGE_DAYS, n)
+
+    return {
+        'city': city,
+        'district': rng.integers(1, 11, n),
+        'lat': lat,
+        'lng': lng,
+        'distance_to_center': np.round(distance, 2),
+        'is_house': is_house,
+        'is_rent': is_rent,
+        'price': price,
+        'area_usable': area,
+        'area_land': area_land,
+        'rooms': rooms,
+        'rooms_count': rooms_count,
+        'floor': floor,
+        'floors_total': floors_total,
+        'condition': condition,
+        'construction_type': np.where(
+            is_house, 0, rng.choice(len(CONSTRUCTION_TYPES), size=n, p=[0.5, 0.4, 0.1])
+        ),
+        'energy_rating': rng.integers(0, len(ENERGY_RATINGS), n),
+        'has_balcony': ~is_house & (rng.random(n) < 0.55),
+        'has_terrace': rng.random(n) < 0.15,
+        'has_parking': rng.random(n) < 0.35,
+        'has_garage': is_house & (rng.random(n) < 0.5),
+        'has_elevator': ~is_house & (floors_total > 4) & (rng.random(n) < 0.8),
+        'has_cellar': rng.random(n) < 0.6,
+        'has_garden': is_house & (rng.random(n) < 0.85),
+        # Seconds before "now" the listing was first seen / last updated
+        'listed_seconds': listed_days * 86400,
+        'updated_seconds': listed_days * rng.uniform(0, 1, n) * 86400,
+        'is_active': rng.random(n) < 0.95,
+    }
+
+
+def labels(listings: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+    """Stored values of the coded columns, plus the listing title."""
+    is_house, is_rent = listings['is_house'], listings['is_rent']
+    city = CITY_NAMES[listings['city']]
+    district = np.char.add(np.char.add(city, ' '), listings['district'].astype(str))
+    # "Prodej bytu 2+kk 62 m², Praha 3"; houses have no layout
+    title = np.where(is_rent, 'Pronájem ', 'Prodej ')
+    for part in (
+        np.where(is_house, 'domu ', 'bytu '),
+        np.where(is_house, '', np.char.add(listings['rooms'], ' ')),
+        listings['area_usable'].astype(int).astype(str),
+        ' m², ',
+        district,
+    ):
+        title = np.char.add(title, part)
+    return {
+        'title': title,
+        'property_type': np.where(is_house, 'house', 'apartment'),
+        'transaction_type': np.where(is_rent, 'rent', 'sale'),
+        'rooms': np.where(is_house, None, listings['rooms']),
+        'condition': CONDITIONS[listings['condition']],
+        'construction_type': CONSTRUCTION_TYPES[listings['construction_type']],
+        'energy_rating': ENERGY_RATINGS[listings['energy_rating']],
+        'address_city': city,
+        'address_district': district,
+    }
+
+
+def generate_price_history(
+    listings: Dict[str, np.ndarray],
+    rng: np.random.Generator
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Change-only price history as (listing index, price, seconds before now).
+
+    Each listing starts at its first-seen price and ends at its current
+    one; sellers mostly cut prices, in 2-8 % steps.
+    """
+    price = listings['price']
+    n = price.shape[0]
+    changes = rng.poisson(1.2, n)
+    owner = np.repeat(np.arange(n), changes)
+    age = listings['listed_seconds'][owner] * rng.random(owner.shape[0])
+    # Oldest change first within each listing
+    order = np.lexsort((-age, owner))
+    owner, age = owner[order], age[order]
+    log_steps = np.log1p(
+        rng.uniform(0.02, 0.08, owner.shape[0]) * np.where(rng.random(owner.shape[0]) < 0.8, 1, -1)
+    )
+
+    # The price after a change is the current price grown by every later
+    # step of the same listing: a suffix sum within each group
+    suffix = np.append(np.cumsum(log_steps[::-1])[::-1], 0.0)
+    group_end = np.cumsum(changes)[owner]
+    later = suffix[np.arange(owner.shape[0]) + 1] - suffix[group_end]
+    first = price * np.exp(np.bincount(owner, weights=log_steps, minlength=n))
+
+    owner = np.concatenate([np.arange(n), owner])
+    values = np.concatenate([first, price[owner[n:]] * np.exp(later)])
+    age = np.concatenate([listings['listed_seconds'], age])
+    order = np.lexsort((-age, owner))
+    owner, values, age = owner[order], values[order], age[order]
+
+    unit = np.where(listings['is_rent'][owner], 10.0, 100.0)
+    values = np.round(values / unit) * unit
+    # Rounding can merge neighbouring steps; keep the history change-only
+    keep = np.ones(owner.shape[0], dtype=bool)
+    keep[1:] = (owner[1:] != owner[:-1]) | (values[1:] != values[:-1])
+    return owner[keep], values[keep], age[keep]
@@ -0,0 +1,139 @@
+import asyncio
+
+import httpx
+from fastapi import FastAPI
+
+from app.admission import API, AdmissionController, AdmissionMiddleware, PriorityClass
+
+
+def controller(capacity=2, list_limit=2, queue_size=4, timeout=1.0) -> AdmissionController:
+    return AdmissionController(capacity, [
+        PriorityClass('cheap', 0, capacity, queue_size, timeout),
+        PriorityClass('list', 1, list_limit, queue_size, timeout),
+        PriorityClass('batch', 3, 1, queue_size, timeout),
+    ])
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def test_admits_up_to_capacity_then_queues():
+    async def scenario():
+        c = controller()
+        assert await c.acquire('list') is None
+        assert await c.acquire('list') is None
+        waiter = asyncio.create_task(c.acquire('cheap'))
+        await asyncio.sleep(0)
+        assert not waiter.done()
+        c.release('list')
+        assert await waiter is None
+        assert c.running == 2
+    run(scenario())
+
+
+def test_class_limit_leaves_slots_for_other_classes():
+    async def scenario():
+        c = controller(capacity=3)
+        assert await c.acquire('batch') is None
+        batch = asyncio.create_task(c.acquire('batch'))
+        await asyncio.sleep(0)
+        # Batch is at its cap, but a waiting batch request does not hold back cheap reads
+        assert await c.acquire('cheap') is None
+        assert not batch.done()
+        c.release('batch')
+        assert await batch is None
+    run(scenario())
+
+
+def test_higher_priority_waiter_goes_first():
+    async def scenario():
+        c = controller(capacity=1)
+        assert await c.acquire('list') is None
+        order = []
+
+        async def request(name):
+            await c.acquire(name)
+            order.append(name)
+
+        batch = asyncio.create_task(request('batch'))
+        await asyncio.sleep(0)
+        cheap = asyncio.create_task(request('cheap'))
+        await asyncio.sleep(0)
+        c.release('list')
+        await cheap
+        c.release('cheap')
+        await batch
+        assert order == ['cheap', 'batch']
+    run(scenario())
+
+
+def test_sheds_when_queue_full():
+    async def scenario():
+        c = controller(capacity=1, queue_size=1)
+        assert await c.acquire('list') is None
+        queued = asyncio.create_task(c.acquire('list'))
+        await asyncio.sleep(0)
+        assert await c.acquire('list') == 'queue_full'
+        c.release('list')
+        assert await queued is None
+    run(scenario())
+
+
+def test_sheds_after_timeout():
+    async def scenario():
+        c = controller(capacity=1, timeout=0.01)
+        assert await c.acquire('list') is None
+        assert await c.acquire('list') == 'timeout'
+        assert not c.classes['list'].waiters
+        assert c.running == 1
+    run(scenario())
+
+
+def test_cancelled_waiter_returns_its_slot():
+    async def scenario():
+        c = controller(capacity=1)
+        assert await c.acquire('list') is None
+        waiter = asyncio.create_task(c.acquire('list'))
+        await asyncio.sleep(0)
+        # The slot is handed over, then the client disconnects before resuming:
+        # the request either still owns the slot (and releases it) or gave it back
+        c.release('list')
+        waiter.cancel()
+        try:
+            if await waiter is None:
+                c.release('list')
+        except asyncio.CancelledError:
+            pass
+        assert c.running == 0
+        assert c.classes['list'].running == 0
+        assert await c.acquire('cheap') is None
+    run(scenario())
+
+
+def test_middleware_sheds_with_503_and_exempts_probes():
+    app = FastAPI()
+
+    @app.get(f"{API}/analytics/heatmap")
+    def heatmap():
+        return {}
+
+    @app.get("/health")
+    def health():
+        return {}
+
+    # No capacity and no queue: every classified request is shed
+    app.add_middleware(
+        AdmissionMiddleware, router=app.router,
+        controller=AdmissionController(0, [PriorityClass('analytics', 2, 0, 0, 2.5)])
+    )
+
+    async def scenario():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url='http://test') as client:
+            return await client.get(f"{API}/analytics/heatmap"), await client.get("/health")
+
+    shed, health = run(scenario())
+    assert shed.status_code == 503
+    assert shed.headers['retry-after'] == '3'
+    assert health.status_code == 200
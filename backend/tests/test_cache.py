@@ -0,0 +1,156 @@
+import asyncio
+import threading
+import time
+from decimal import Decimal
+
+import pytest
+
+from app.metrics import SINGLE_FLIGHT_COALESCED
+from app.schemas.property import PropertyFilter
+from app.services import cache
+from app.services.cache import SingleFlight, TTLCache, filter_cache_key, single_flight
+
+
+def wait_for_followers(name: str, count: int):
+    # Followers block inside the flight without a hook; the metric counts them in
+    deadline = time.monotonic() + 5
+    while SINGLE_FLIGHT_COALESCED._values[(name,)] < count:
+        assert time.monotonic() < deadline, "followers never joined"
+        time.sleep(0.001)
+
+
+def test_concurrent_callers_share_one_execution():
+    flight = SingleFlight('test-threads')
+    started, release = threading.Event(), threading.Event()
+    calls = []
+
+    def slow():
+        calls.append(1)
+        started.set()
+        release.wait(5)
+        return ['result']
+
+    results = {}
+    leader = threading.Thread(target=lambda: results.__setitem__(0, flight.do('k', slow)))
+    leader.start()
+    started.wait(5)
+    followers = [
+        threading.Thread(target=lambda i=i: results.__setitem__(i, flight.do('k', slow)))
+        for i in range(1, 4)
+    ]
+    for thread in followers:
+        thread.start()
+    wait_for_followers('test-threads', 3)
+    release.set()
+    for thread in [leader, *followers]:
+        thread.join(5)
+
+    assert len(calls) == 1
+    assert [results[i] for i in range(4)] == [['result']] * 4
+    assert all(results[i] is results[0] for i in range(4))
+
+
+def test_exception_is_shared_and_not_cached():
+    flight = SingleFlight('test')
+
+    def fail():
+        raise RuntimeError('boom')
+
+    with pytest.raises(RuntimeError):
+        flight.do('k', fail)
+    assert flight.do('k', lambda: 42) == 42
+
+
+def test_different_keys_run_separately():
+    flight = SingleFlight('test')
+    assert flight.do('a', lambda: 1) == 1
+    assert flight.do('b', lambda: 2) == 2
+
+
+def test_async_callers_share_one_execution():
+    flight = SingleFlight('test')
+    calls = []
+
+    async def slow():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return 'result'
+
+    async def scenario():
+        return await asyncio.gather(*(flight.do_async('k', slow) for _ in range(5)))
+
+    assert asyncio.run(scenario()) == ['result'] * 5
+    assert len(calls) == 1
+
+
+class Service:
+    db = None  # no session: keyed as a primary read
+
+    def __init__(self):
+        self.calls = 0
+        self.started = threading.Event()
+        self.release = threading.Event()
+
+    @single_flight
+    def read(self, filters: PropertyFilter, page: int = 1):
+        self.calls += 1
+        self.started.set()
+        self.release.wait(5)
+        return page
+
+
+def test_single_flight_coalesces_equivalent_arguments():
+    service = Service()
+    results = {}
+    leader = threading.Thread(
+        target=lambda: results.__setitem__(0, service.read(PropertyFilter(city=' Praha ')))
+    )
+    leader.start()
+    service.started.wait(5)
+    # Default page applied, city trimmed and case-folded: the same call
+    follower = threading.Thread(
+        target=lambda: results.__setitem__(1, service.read(filters=PropertyFilter(city='praha'), page=1))
+    )
+    follower.start()
+    wait_for_followers(Service.read.__qualname__, 1)
+    service.release.set()
+    leader.join(5)
+    follower.join(5)
+
+    assert service.calls == 1
+    assert results == {0: 1, 1: 1}
+    assert service.read(PropertyFilter(city='praha'), page=2) == 2
+    assert service.calls == 2
+
+
+def test_filter_cache_key_is_canonical():
+    assert filter_cache_key(PropertyFilter(city=' Praha ', price_max=Decimal('5000000.00'))) == \
+        filter_cache_key(PropertyFilter(city='praha', price_max=Decimal('5E+6')))
+    assert filter_cache_key(PropertyFilter(city='  ')) == ()
+    assert filter_cache_key(None) == ()
+
+
+def test_ttl_cache_computes_once_and_expires(monkeypatch):
+    clock = {'now': 100.0}
+    monkeypatch.setattr(cache.time, 'monotonic', lambda: clock['now'])
+    ttl_cache = TTLCache(maxsize=10, ttl=5)
+    calls = []
+
+    def compute():
+        calls.append(1)
+        return len(calls)
+
+    assert ttl_cache.get_or_compute('k', compute) == 1
+    assert ttl_cache.get_or_compute('k', compute) == 1
+    clock['now'] += 6
+    assert ttl_cache.get_or_compute('k', compute) == 2
+
+
+def test_ttl_cache_evicts_least_recently_used():
+    ttl_cache = TTLCache(maxsize=2, ttl=60)
+    ttl_cache.set('a', 1)
+    ttl_cache.set('b', 2)
+    ttl_cache.get('a')
+    ttl_cache.set('c', 3)
+    assert ttl_cache.get('b') is None
+    assert ttl_cache.get('a') == 1 and ttl_cache.get('c') == 3
@@ -0,0 +1,54 @@
+import numpy as np
+import pytest
+
+from app.services.distance_service import EARTH_RADIUS_KM, CityCenterIndex, haversine_km
+
+PRAHA = (50.0755, 14.4378)
+BRNO = (49.1951, 16.6068)
+
+
+def test_haversine_same_point_is_zero():
+    assert haversine_km(*PRAHA, *PRAHA) == pytest.approx(0.0)
+
+
+def test_haversine_one_degree_of_latitude():
+    assert haversine_km(49.0, 16.0, 50.0, 16.0) == pytest.approx(np.pi * EARTH_RADIUS_KM / 180)
+
+
+def test_haversine_known_distance():
+    # Praha - Brno centres, great-circle
+    assert haversine_km(*PRAHA, *BRNO) == pytest.approx(184.3, abs=0.5)
+
+
+def test_haversine_is_symmetric():
+    assert haversine_km(*PRAHA, *BRNO) == pytest.approx(haversine_km(*BRNO, *PRAHA))
+
+
+def test_haversine_antipodes_stay_finite():
+    assert haversine_km(0.0, 0.0, 0.0, 180.0) == pytest.approx(np.pi * EARTH_RADIUS_KM)
+
+
+def test_haversine_broadcasts():
+    lats = np.array([[PRAHA[0]], [BRNO[0]]])
+    lngs = np.array([[PRAHA[1]], [BRNO[1]]])
+    d = haversine_km(lats, lngs, lats.T, lngs.T)
+    assert d.shape == (2, 2)
+    assert np.allclose(np.diag(d), 0.0)
+    assert d[0, 1] == pytest.approx(d[1, 0])
+
+
+def test_nearest_picks_closest_center_and_skips_missing_coordinates():
+    index = CityCenterIndex(['Praha', 'Brno'], [PRAHA[0], BRNO[0]], [PRAHA[1], BRNO[1]])
+    distances, indexes = index.nearest(
+        np.array([50.08, 49.2, np.nan]),
+        np.array([14.44, 16.6, 14.0])
+    )
+    assert indexes.tolist() == [0, 1, -1]
+    assert distances[0] < 1 and distances[1] < 1
+    assert np.isnan(distances[2])
+
+
+def test_nearest_without_centers():
+    distances, indexes = CityCenterIndex([], [], []).nearest(np.array([50.0]), np.array([14.0]))
+    assert np.isnan(distances[0])
+    assert indexes[0] == -1
@@ -0,0 +1,130 @@
+import asyncio
+from datetime import datetime, timezone
+
+import httpx
+import pytest
+from fastapi import Depends, FastAPI
+
+from app import http_cache
+from app.database import get_read_db
+from app.http_cache import CacheHeadersMiddleware, _etag_matches, data_version_validators
+
+
+@pytest.mark.parametrize('header, etag, expected', [
+    ('W/"7-abc"', 'W/"7-abc"', True),
+    ('"7-abc"', 'W/"7-abc"', True),
+    ('"6-abc", W/"7-abc"', 'W/"7-abc"', True),
+    ('*', 'W/"7-abc"', True),
+    ('W/"6-abc"', 'W/"7-abc"', False),
+])
+def test_etag_weak_comparison(header, etag, expected):
+    assert _etag_matches(header, etag) is expected
+
+
+@pytest.fixture
+def version(monkeypatch):
+    current = {'value': 7}
+    monkeypatch.setattr(http_cache, 'get_data_version', lambda db: current['value'])
+    return current
+
+
+class Client:
+    def __init__(self, app: FastAPI):
+        self.app = app
+        self.calls = []
+
+    def get(self, url: str, headers: dict = None) -> httpx.Response:
+        async def request():
+            transport = httpx.ASGITransport(app=self.app)
+            async with httpx.AsyncClient(transport=transport, base_url='http://test') as client:
+                return await client.get(url, headers=headers)
+        return asyncio.run(request())
+
+
+@pytest.fixture
+def client(version):
+    app = FastAPI()
+    app.add_middleware(CacheHeadersMiddleware)
+    app.dependency_overrides[get_read_db] = lambda: None
+    client = Client(app)
+
+    @app.get('/items', dependencies=[Depends(data_version_validators(30))])
+    def items(page: int = 1, size: int = 20):
+        client.calls.append(page)
+        return {'page': page}
+
+    return client
+
+
+def test_validators_on_200(client):
+    response = client.get('/items')
+    assert response.status_code == 200
+    assert response.headers['etag'].startswith('W/"7-')
+    assert response.headers['cache-control'] == 'public, max-age=30'
+
+
+def test_matching_etag_answers_304_without_running_the_endpoint(client):
+    etag = client.get('/items').headers['etag']
+    response = client.get('/items', headers={'If-None-Match': etag})
+    assert response.status_code == 304
+    assert response.headers['etag'] == etag
+    assert response.content == b''
+    assert client.calls == [1]
+
+
+def test_etag_ignores_query_parameter_order(client):
+    assert client.get('/items?page=2&size=5').headers['etag'] == client.get('/items?size=5&page=2').headers['etag']
+    assert client.get('/items?page=2').headers['etag'] != client.get('/items?page=3').headers['etag']
+
+
+def test_new_data_version_invalidates(client, version):
+    etag = client.get('/items').headers['etag']
+    version['value'] = 8
+    assert client.get('/items', headers={'If-None-Match': etag}).status_code == 200
+
+
+def test_unsettled_version_sends_no_validator(client, version):
+    version['value'] = None
+    response = client.get('/items')
+    assert response.status_code == 200
+    assert 'etag' not in response.headers
+    assert response.headers['cache-control'] == 'no-cache'
+
+
+class _VersionSession:
+    def __init__(self, value):
+        self.value = value
+
+    def execute(self, *args, **kwargs):
+        return self
+
+    def scalar(self):
+        return self.value
+
+
+def test_data_version_is_withheld_until_settled(monkeypatch):
+    clock = {'now': 1000.0}
+    monkeypatch.setattr(http_cache.time, 'monotonic', lambda: clock['now'])
+    monkeypatch.setattr(http_cache.settings, 'http_cache_settle_seconds', 2.0)
+    monkeypatch.setattr(http_cache, '_seen_version', None)
+    monkeypatch.setattr(http_cache, '_seen_at', 0.0)
+
+    assert http_cache.get_data_version(_VersionSession(41)) is None
+    clock['now'] += 2.0
+    assert http_cache.get_data_version(_VersionSession(41)) == 41
+    assert http_cache.get_data_version(_VersionSession(42)) is None
+
+
+def test_if_modified_since():
+    class Request:
+        def __init__(self, headers):
+            self.headers = headers
+
+    updated = datetime(2026, 3, 1, 12, 0, 0, 500_000, tzinfo=timezone.utc)
+    assert http_cache._not_modified(
+        Request({'if-modified-since': 'Sun, 01 Mar 2026 12:00:00 GMT'}), 'W/"x"', updated
+    )
+    assert not http_cache._not_modified(
+        Request({'if-modified-since': 'Sun, 01 Mar 2026 11:59:59 GMT'}), 'W/"x"', updated
+    )
+    assert not http_cache._not_modified(Request({'if-modified-since': 'garbage'}), 'W/"x"', updated)
@@ -0,0 +1,97 @@
+from decimal import Decimal
+
+import pytest
+
+from app.services.query_parser import normalize_query, parse_query
+
+
+def filters_of(message: str) -> dict:
+    return parse_query(message).filters.model_dump(exclude_none=True)
+
+
+def test_normalize_strips_case_and_diacritics():
+    assert normalize_query("  BRNĚ   m²  ") == "brne m2"
+
+
+def test_czech_layout_city_budget_and_feature():
+    assert filters_of("2+kk v Brně do 6 milionů s balkonem") == {
+        'property_type': 'apartment',
+        'transaction_type': 'sale',
+        'city': 'Brno',
+        'rooms': '2+kk',
+        'price_max': Decimal('6000000'),
+        'has_balcony': True,
+        'dedupe': True,
+    }
+
+
+def test_declined_city_forms_match():
+    assert filters_of("byt v Praze")['city'] == 'Praha'
+    assert filters_of("flat in Pilsen")['city'] == 'Plzeň'
+
+
+def test_rent_budget_in_thousands():
+    filters = filters_of("byt k pronájmu do 20 tis")
+    assert filters['transaction_type'] == 'rent'
+    assert filters['price_max'] == Decimal('20000')
+
+
+def test_monthly_sized_budget_implies_rent():
+    assert filters_of("flat up to 25000")['transaction_type'] == 'rent'
+
+
+def test_range_with_shared_unit():
+    filters = filters_of("Praha 6 mezi 5 a 8 mil")
+    assert (filters['price_min'], filters['price_max']) == (Decimal('5000000'), Decimal('8000000'))
+    assert parse_query("Praha 6 mezi 5 a 8 mil").district == 'Praha 6'
+
+
+def test_area_range():
+    filters = filters_of("byt 60-80 m2")
+    assert (filters['area_min'], filters['area_max']) == (Decimal('60'), Decimal('80'))
+
+
+@pytest.mark.parametrize('message', ["do 10 minut od centra 2+1", "do 1,5 km od metra", "do 5. patra"])
+def test_distances_and_floors_are_not_prices(message):
+    filters = filters_of(message)
+    assert 'price_max' not in filters and 'price_min' not in filters
+
+
+def test_negated_feature():
+    assert filters_of("dům bez výtahu")['has_elevator'] is False
+
+
+def test_larger_layout_is_a_minimum_room_count():
+    parsed = parse_query("3+1 nebo větší")
+    assert parsed.min_rooms == 3.0
+    assert 'rooms' not in filters_of("3+1 nebo větší")
+
+
+def test_soft_features_and_intents_only_rank():
+    parsed = parse_query("cheap house with a garden near the center")
+    assert parsed.features == {'has_garden': True}
+    assert parsed.weights['value'] == 2.0
+    assert parsed.weights['center'] == 1.5
+
+
+def test_undervalued_filters_below_market():
+    assert filters_of("podhodnocené byty")['price_assessment'] == 'below_market'
+
+
+def test_relaxed_turns_hard_constraints_into_preferences():
+    parsed = parse_query("podhodnocený 2+kk s balkonem, 3 pokoje")
+    relaxed = parsed.relaxed()
+    assert relaxed.filters.has_balcony is None
+    assert relaxed.filters.price_assessment is None
+    assert relaxed.features['has_balcony'] is True
+    assert relaxed.relaxed() is None
+    # The cached original is untouched
+    assert parsed.filters.has_balcony is True
+
+
+def test_unknown_words_are_ignored():
+    assert filters_of("hello there") == {'dedupe': True}
+
+
+def test_cache_key_ignores_spelling_variants():
+    assert parse_query("Byt v BRNĚ").cache_key() == parse_query("byt v brne").cache_key()
@@ -0,0 +1,124 @@
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from app.services.similarity_service import (
+    DEFAULT_MEDIANS,
+    FLAGS,
+    SimilarityIndex,
+    encode_features,
+    raw_features,
+    segment_medians,
+    similarity_score,
+)
+
+
+def listing(id, lat=50.08, lng=14.43, area=60, rooms=2, price=6_000_000, condition='good', **flags):
+    return SimpleNamespace(
+        id=id, lat=lat, lng=lng, area_usable=area, rooms_count=rooms, price=price,
+        condition=condition, property_type='apartment', transaction_type='sale',
+        **{flag: flags.get(flag, False) for flag in FLAGS}
+    )
+
+
+def test_raw_features_marks_missing_values_as_nan():
+    raw = raw_features([listing(1, area=None, rooms=0, price=None)])
+    assert np.isnan(raw[0, 2]) and np.isnan(raw[0, 3]) and np.isnan(raw[0, 4])
+
+
+def test_segment_medians_ignore_missing_values():
+    raw = raw_features([listing(1, area=50), listing(2, area=None), listing(3, area=70)])
+    assert segment_medians(raw)['area'] == 60.0
+
+
+def test_segment_medians_default_for_an_empty_segment():
+    assert segment_medians(raw_features([listing(1, area=None, rooms=None, price=None)])) == DEFAULT_MEDIANS
+
+
+def test_missing_values_encode_as_the_segment_median():
+    medians = {'area': 60.0, 'rooms': 2.0, 'price': 6_000_000.0}
+    known = encode_features(raw_features([listing(1)]), medians)
+    missing = encode_features(raw_features([listing(2, area=None, rooms=None, price=None)]), medians)
+    assert np.allclose(known, missing)
+
+
+def test_similarity_score_decays_with_distance():
+    assert similarity_score(0.0) == 1.0
+    assert 0 < similarity_score(2.0) < similarity_score(1.0) < 1
+
+
+@pytest.fixture
+def index():
+    rows = [
+        listing(1),
+        listing(2, area=62, price=6_100_000),
+        listing(3, area=120, rooms=4, price=14_000_000),
+        listing(4, lat=49.19, lng=16.6),  # Brno, outside the radius
+    ]
+    index = SimilarityIndex()
+    index._apply(
+        {('apartment', 'sale'): [(np.array([r.id for r in rows]), raw_features(rows))]},
+        np.empty(0, dtype=np.int64),
+        initial=True
+    )
+    return index
+
+
+def test_query_ranks_by_similarity_within_radius(index):
+    results = index.query(listing(1), radius_km=5.0, limit=10)
+    assert [pid for pid, _, _ in results] == [2, 3]
+    assert results[0][1] > results[1][1]
+
+
+def test_query_skips_tombstoned_listings(index):
+    index._apply({}, np.array([2]), initial=False)
+    assert [pid for pid, _, _ in index.query(listing(1))] == [3]
+
+
+def test_query_filters_the_pending_tail_by_radius(index):
+    tail = [listing(5, area=61), listing(6, lat=49.19, lng=16.61, area=60)]
+    index._apply(
+        {('apartment', 'sale'): [(np.array([5, 6]), raw_features(tail))]},
+        np.array([5, 6]),
+        initial=False
+    )
+    assert [pid for pid, _, _ in index.query(listing(1), radius_km=5.0)] == [5, 2, 3]
+    # Brno listings are found from Brno, in the tree and in the tail
+    assert sorted(pid for pid, _, _ in index.query(listing(7, lat=49.19, lng=16.6))) == [4, 6]
+
+
+T0 = datetime(2026, 3, 1, 12, 0, tzinfo=timezone.utc)
+
+
+class _Session:
+    """Answers the horizon query and the listing read of SimilarityIndex.refresh."""
+
+    def __init__(self, horizon, rows):
+        self.horizon = horizon
+        self.rows = rows
+
+    def execute(self, statement, params=None):
+        if params is not None:
+            return SimpleNamespace(scalar=lambda: self.horizon)
+        return SimpleNamespace(partitions=lambda: iter([self.rows]))
+
+
+def versioned(row, updated_at, is_active=True):
+    row.updated_at, row.is_active = updated_at, is_active
+    return row
+
+
+def test_refresh_picks_up_a_long_writers_late_commit():
+    index = SimilarityIndex()
+    early = versioned(listing(1), T0 - timedelta(minutes=5))
+    recent = versioned(listing(2, area=62), T0 + timedelta(seconds=1))
+    assert index.refresh(_Session(T0, [early, recent])) == 2
+
+    # Re-read from the last horizon: the unchanged row is skipped, the row a
+    # writer open since T0 committed late (behind the newer one) is applied
+    late = versioned(listing(3, area=64), T0 + timedelta(milliseconds=1))
+    assert index.refresh(_Session(T0 + timedelta(minutes=5), [recent, late])) == 1
+    assert [pid for pid, _, _ in index.query(listing(1))] == [2, 3]
+    assert index.stats()['apartment/sale']['rows'] == 3
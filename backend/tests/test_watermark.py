@@ -0,0 +1,52 @@
+from datetime import datetime, timedelta, timezone
+
+from app.services.watermark import ChangeWatermark
+
+T0 = datetime(2026, 3, 1, 12, 0, tzinfo=timezone.utc)
+
+
+class _HorizonSession:
+    def __init__(self, horizon):
+        self.horizon = horizon
+
+    def execute(self, *args, **kwargs):
+        return self
+
+    def scalar(self):
+        return self.horizon
+
+
+def test_advances_only_to_the_horizon():
+    watermark = ChangeWatermark(settle_seconds=5)
+    assert watermark.start(_HorizonSession(T0)) is None
+    watermark.advance()
+    # A writer that started before T0 + 1 min is still open at the next read
+    assert watermark.start(_HorizonSession(T0 + timedelta(minutes=1))) == T0
+    watermark.advance()
+    assert watermark.position == T0 + timedelta(minutes=1)
+
+
+def test_rows_read_again_are_not_new_unless_changed():
+    watermark = ChangeWatermark(settle_seconds=5)
+    watermark.start(_HorizonSession(T0))
+    assert watermark.is_new(1, T0 + timedelta(seconds=1))
+    assert watermark.is_new(2, T0 - timedelta(seconds=1))
+    watermark.advance()
+
+    watermark.start(_HorizonSession(T0 + timedelta(seconds=30)))
+    # Row 1 is at or after the old horizon, so it is read again unchanged
+    assert not watermark.is_new(1, T0 + timedelta(seconds=1))
+    # A long writer's row committed behind later ones is still picked up
+    assert watermark.is_new(3, T0 + timedelta(milliseconds=1))
+    assert watermark.is_new(1, T0 + timedelta(seconds=20))
+
+
+def test_failed_read_is_repeated():
+    watermark = ChangeWatermark(settle_seconds=5)
+    watermark.start(_HorizonSession(T0))
+    watermark.advance()
+    watermark.start(_HorizonSession(T0 + timedelta(seconds=30)))
+    watermark.is_new(1, T0 + timedelta(seconds=1))
+    # No advance(): the read failed
+    assert watermark.start(_HorizonSession(T0 + timedelta(seconds=60))) == T0
+    assert watermark.is_new(1, T0 + timedelta(seconds=1))
@@ -0,0 +1,8 @@
+import os
+import sys
+
+# The synthetic data generator lives in the backend (app.synthetic) so the
+# /seed sample data and the benchmark dataset come from the same code
+_BACKEND = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'backend')
+if _BACKEND not in sys.path:
+    sys.path.append(_BACKEND)
@@ -0,0 +1,51 @@
+"""
+Compare two benchmark result files scenario by scenario.
+
+Usage:
+    python -m benchmarks.compare benchmarks/results/before.json benchmarks/results/after.json
+"""
+
+import argparse
+import json
+
+
+def _change(before, after) -> str:
+    if not before or after is None:
+        return ''
+    return f"{(after - before) / before * 100:+.1f}%"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("baseline")
+    parser.add_argument("candidate")
+    args = parser.parse_args()
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.candidate) as f:
+        candidate = json.load(f)
+
+    print(f"baseline:  {baseline['meta'].get('git_commit')} ({baseline['meta'].get('listings')} listings)")
+    print(f"candidate: {candidate['meta'].get('git_commit')} ({candidate['meta'].get('listings')} listings)")
+    print()
+    header = f"{'scenario':<16}{'metric':<10}{'baseline':>12}{'candidate':>12}{'change':>10}"
+    print(header)
+    print('-' * len(header))
+    for name, before in baseline['scenarios'].items():
+        after = candidate['scenarios'].get(name)
+        if after is None:
+            continue
+        rows = [('req/s', before['throughput_rps'], after['throughput_rps'])]
+        rows += [
+            (f"{p} ms", before['latency_ms'].get(p), after['latency_ms'].get(p))
+            for p in ('p50', 'p95', 'p99')
+        ]
+        rows.append(('errors', before['errors'], after['errors']))
+        for i, (metric, old, new) in enumerate(rows):
+            print(f"{name if i == 0 else '':<16}{metric:<10}{old if old is not None else '-':>12}"
+                  f"{new if new is not None else '-':>12}{_change(old, new):>10}")
+
+
+if __name__ == "__main__":
+    main()
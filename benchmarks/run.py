@@ -0,0 +1,315 @@
+"""
+Run scripted API scenarios and report throughput and latency percentiles.
+
+Usage:
+    python -m benchmarks.run [--base-url http://localhost:8000] [--duration 30]
+        [--concurrency 8] [--scenarios list_page,map_viewport] [--output results/run.json]
+
+Each scenario hammers the API from ``--concurrency`` threads for
+``--duration`` seconds after a short warm-up. Results are written as
+JSON (with the git commit) so runs can be compared with
+``python -m benchmarks.compare``.
+"""
+
+import argparse
+import json
+import logging
+import os
+import platform
+import subprocess
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional
+
+import httpx
+import numpy as np
+
+from benchmarks.synthetic import CITIES, generate_listings, to_payloads
+
+logger = logging.getLogger(__name__)
+
+API = "/api/v1"
+
+
+@dataclass
+class Request:
+    method: str
+    path: str
+    params: Optional[dict] = None
+    json: Optional[object] = None
+
+
+class Context:
+    """Dataset facts the scenarios draw from, read once from the API."""
+
+    def __init__(self, client: httpx.Client):
+        first = client.get(f"{API}/properties", params={'page_size': 100})
+        first.raise_for_status()
+        body = first.json()
+        self.total = body['total']
+        self.property_ids = [item['id'] for item in body['items']] or [1]
+        self._ingest_lock = threading.Lock()
+        self._ingest_batch = 0
+        self.run_tag = datetime.now(timezone.utc).strftime('%Y%m%d%H%M%S')
+
+    def next_ingest_batch(self) -> int:
+        with self._ingest_lock:
+            self._ingest_batch += 1
+            return self._ingest_batch
+
+
+def _city(rng: np.random.Generator):
+    return CITIES[rng.integers(len(CITIES))]
+
+
+def list_page(ctx: Context, rng: np.random.Generator) -> Request:
+    params = {'page': int(rng.integers(1, 6)), 'page_size': 20}
+    if rng.random() < 0.5:
+        params['city'] = _city(rng).name
+    if rng.random() < 0.5:
+        params['property_type'] = 'apartment'
+    return Request('GET', f"{API}/properties", params=params)
+
+
+def list_page_100(ctx: Context, rng: np.random.Generator) -> Request:
+    return Request('GET', f"{API}/properties", params={
+        'page': int(rng.integers(1, 6)), 'page_size': 100, 'city': _city(rng).name
+    })
+
+
+def deep_page(ctx: Context, rng: np.random.Generator) -> Request:
+    pages = max(ctx.total // 20, 1)
+    return Request('GET', f"{API}/properties", params={
+        'page': int(rng.integers(max(pages // 2, 1), pages + 1)), 'page_size': 20
+    })
+
+
+def map_viewport(ctx: Context, rng: np.random.Generator) -> Request:
+    city = _city(rng)
+    # Viewports from a district (~2 km) to the whole metro area (~30 km)
+    half_km = float(rng.choice([1, 3, 8, 15]))
+    lat = city.lat + rng.normal(0, 0.03)
+    lng = city.lng + rng.normal(0, 0.04)
+    dlat = half_km / 111.32
+    dlng = half_km / (111.32 * np.cos(np.radians(lat)))
+    return Request('GET', f"{API}/properties/map", params={
+        'south': lat - dlat, 'north': lat + dlat, 'west': lng - dlng, 'east': lng + dlng,
+    })
+
+
+def map_dense(ctx: Context, rng: np.random.Generator) -> Request:
+    # Whole-metro viewport at the marker cap: 1000-item responses
+    city = _city(rng)
+    dlat = 15 / 111.32
+    dlng = 15 / (111.32 * np.cos(np.radians(city.lat)))
+    return Request('GET', f"{API}/properties/map", params={
+        'south': city.lat - dlat, 'north': city.lat + dlat,
+        'west': city.lng - dlng, 'east': city.lng + dlng, 'limit': 1000,
+    })
+
+
+def heatmap(ctx: Context, rng: np.random.Generator) -> Request:
+    params = {'city': _city(rng).name} if rng.random() < 0.7 else {}
+    return Request('GET', f"{API}/analytics/heatmap", params=params)
+
+
+def analytics(ctx: Context, rng: np.random.Generator) -> Request:
+    endpoint = rng.choice(['market-overview', 'cities', 'room-distribution', 'price-trends'])
+    params = {'city': _city(rng).name} if endpoint in ('room-distribution', 'price-trends') else {}
+    return Request('GET', f"{API}/analytics/{endpoint}", params=params)
+
+
+def facets(ctx: Context, rng: np.random.Generator) -> Request:
+    return Request('GET', f"{API}/properties/facets", params={
+        'city': _city(rng).name, 'transaction_type': 'sale'
+    })
+
+
+def predict_single(ctx: Context, rng: np.random.Generator) -> Request:
+    area = float(rng.lognormal(np.log(62), 0.35))
+    return Request('POST', f"{API}/predictions/predict", json={
+        'property_type': 'apartment',
+        'transaction_type': 'sale',
+        'area_usable': round(area, 1),
+        'rooms_count': float(np.clip(round(area / 28), 1, 5)),
+        'floor': int(rng.integers(0, 8)),
+        'floors_total': 8,
+        'condition': 'good',
+        'city': _city(rng).name,
+        'has_balcony': bool(rng.random() < 0.5),
+    })
+
+
+def predict_batch(ctx: Context, rng: np.random.Generator) -> Request:
+    ids = rng.choice(ctx.property_ids, size=min(20, len(ctx.property_ids)), replace=False)
+    return Request('POST', f"{API}/predictions/batch", json={'property_ids': [int(i) for i in ids]})
+
+
+def ingest(ctx: Context, rng: np.random.Generator) -> Request:
+    # Fresh external ids each batch, so every request inserts 100 listings
+    batch = ctx.next_ingest_batch()
+    listings = generate_listings(
+        100, rng, start_id=batch * 100, id_prefix=f"ingest{ctx.run_tag}"
+    )
+    return Request('POST', f"{API}/properties/bulk", json=to_payloads(listings))
+
+
+SCENARIOS: Dict[str, Callable[[Context, np.random.Generator], Request]] = {
+    'list_page': list_page,
+    'list_page_100': list_page_100,
+    'deep_page': deep_page,
+    'map_viewport': map_viewport,
+    'map_dense': map_dense,
+    'heatmap': heatmap,
+    'analytics': analytics,
+    'facets': facets,
+    'predict_single': predict_single,
+    'predict_batch': predict_batch,
+    'ingest': ingest,
+}
+
+
+def run_scenario(
+    base_url: str,
+    ctx: Context,
+    build: Callable[[Context, np.random.Generator], Request],
+    duration: float,
+    concurrency: int,
+    warmup: int,
+    seed: int
+) -> dict:
+    latencies: List[List[float]] = [[] for _ in range(concurrency)]
+    statuses: List[Counter] = [Counter() for _ in range(concurrency)]
+    start = threading.Barrier(concurrency + 1)
+
+    def worker(index: int):
+        rng = np.random.default_rng(seed + index)
+        with httpx.Client(base_url=base_url, timeout=60) as client:
+            for _ in range(warmup):
+                _send(client, build(ctx, rng))
+            start.wait()
+            deadline = time.perf_counter() + duration
+            while time.perf_counter() < deadline:
+                request = build(ctx, rng)
+                began = time.perf_counter()
+                status = _send(client, request)
+                latencies[index].append(time.perf_counter() - began)
+                statuses[index][status] += 1
+
+    threads = [threading.Thread(target=worker, args=(i,), daemon=True) for i in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    start.wait()
+    began = time.perf_counter()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - began
+
+    samples = np.array([value for worker_latencies in latencies for value in worker_latencies]) * 1000
+    status_counts = sum(statuses, Counter())
+    errors = sum(count for status, count in status_counts.items() if status == 0 or status >= 400)
+    if not samples.shape[0]:
+        return {'requests': 0, 'errors': errors, 'status_counts': {}, 'throughput_rps': 0.0, 'latency_ms': {}}
+    return {
+        'requests': int(samples.shape[0]),
+        'errors': int(errors),
+        'status_counts': {str(status): count for status, count in sorted(status_counts.items())},
+        'throughput_rps': round(samples.shape[0] / elapsed, 2),
+        'latency_ms': {
+            'mean': round(float(samples.mean()), 2),
+            'p50': round(float(np.percentile(samples, 50)), 2),
+            'p95': round(float(np.percentile(samples, 95)), 2),
+            'p99': round(float(np.percentile(samples, 99)), 2),
+            'max': round(float(samples.max()), 2),
+        },
+    }
+
+
+def _send(client: httpx.Client, request: Request) -> int:
+    try:
+        response = client.request(request.method, request.path, params=request.params, json=request.json)
+        response.read()
+        return response.status_code
+    except httpx.HTTPError:
+        return 0
+
+
+def _git(*args: str) -> Optional[str]:
+    try:
+        return subprocess.run(
+            ['git', *args], capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__))
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--duration", type=float, default=30, help="Seconds per scenario")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--warmup", type=int, default=5, help="Untimed requests per worker")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS), help="Comma-separated scenario names")
+    parser.add_argument("--output", help="Result file (default: benchmarks/results/<time>-<commit>.json)")
+    args = parser.parse_args()
+
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+    # One log line per request would swamp the scenario summaries
+    logging.getLogger('httpx').setLevel(logging.WARNING)
+
+    names = [name.strip() for name in args.scenarios.split(",") if name.strip()]
+    unknown = [name for name in names if name not in SCENARIOS]
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(unknown)}")
+
+    with httpx.Client(base_url=args.base_url, timeout=60) as client:
+        ctx = Context(client)
+    logger.info(f"Dataset: {ctx.total} active listings")
+
+    commit = _git('rev-parse', '--short', 'HEAD')
+    result = {
+        'meta': {
+            'timestamp': datetime.now(timezone.utc).isoformat(),
+            'git_commit': commit,
+            'git_dirty': bool(_git('status', '--porcelain', '--untracked-files=no')),
+            'base_url': args.base_url,
+            'listings': ctx.total,
+            'duration_seconds': args.duration,
+            'concurrency': args.concurrency,
+            'seed': args.seed,
+            'python': platform.python_version(),
+            'host': platform.node(),
+        },
+        'scenarios': {},
+    }
+    for name in names:
+        stats = run_scenario(
+            args.base_url, ctx, SCENARIOS[name], args.duration, args.concurrency, args.warmup, args.seed
+        )
+        result['scenarios'][name] = stats
+        latency = stats['latency_ms']
+        logger.info(
+            f"{name}: {stats['throughput_rps']} req/s, p50 {latency.get('p50')} ms, "
+            f"p95 {latency.get('p95')} ms, p99 {latency.get('p99')} ms, {stats['errors']} errors"
+        )
+
+    output = args.output or os.path.join(
+        os.path.dirname(os.path.abspath(__file__)), 'results',
+        f"{datetime.now().strftime('%Y%m%d-%H%M%S')}-{commit or 'nogit'}.json"
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(result, f, indent=2)
+    logger.info(f"Results written to {output}")
+
+
+if __name__ == "__main__":
+    main()
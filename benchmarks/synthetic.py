@@ -0,0 +1,93 @@
+"""
+Benchmark views of the backend's synthetic generator (``app.synthetic``).
+
+The listings and their price history come from the same generator as the
+/seed sample data; this module only adds what the benchmark loader and
+the ingest scenario need on top: ids, scraped sources, a noisy stand-in
+for the model's prediction, timestamps, and PropertyCreate bodies.
+"""
+
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterator, List, Optional
+
+import numpy as np
+
+from app import synthetic
+from app.synthetic import CITIES
+
+__all__ = ['CITIES', 'generate_listings', 'generate_price_history', 'to_payloads']
+
+SOURCES = np.array(['sreality', 'bezrealitky'])
+
+
+def _seconds_ago(now: datetime, seconds: np.ndarray) -> np.ndarray:
+    return np.array([now - timedelta(seconds=float(s)) for s in seconds])
+
+
+def generate_listings(
+    n: int,
+    rng: np.random.Generator,
+    start_id: int = 1,
+    now: Optional[datetime] = None,
+    id_prefix: str = 'bench'
+) -> Dict[str, np.ndarray]:
+    """A batch of ``n`` listings as column arrays (ids ``start_id``...)."""
+    now = now or datetime.now(timezone.utc)
+    listings = synthetic.generate_listings(n, rng)
+    ids = np.arange(start_id, start_id + n)
+    updated_at = _seconds_ago(now, listings['updated_seconds'])
+    return {
+        **listings,
+        **synthetic.labels(listings),
+        'id': ids,
+        'external_id': np.array([f"{id_prefix}-{i}" for i in ids]),
+        'source': SOURCES[(rng.random(n) < 0.3).astype(int)],
+        # No model in the loader; deviation and assessment are derived by the database
+        'predicted_price': np.round(listings['price'] * rng.lognormal(0, 0.12, n), -2),
+        'scraped_at': _seconds_ago(now, listings['listed_seconds']),
+        'updated_at': updated_at,
+        # Inactive listings were removed at their last update
+        'deactivated_at': np.where(listings['is_active'], None, updated_at),
+    }
+
+
+def generate_price_history(
+    listings: Dict[str, np.ndarray],
+    rng: np.random.Generator,
+    now: Optional[datetime] = None
+) -> Iterator[tuple]:
+    """(property_id, price, recorded_at) rows; each history ends at the current price."""
+    now = now or datetime.now(timezone.utc)
+    owner, price, age = synthetic.generate_price_history(listings, rng)
+    for property_id, value, seconds in zip(listings['id'][owner], price, age):
+        yield property_id, float(value), now - timedelta(seconds=float(seconds))
+
+
+def to_payloads(listings: Dict[str, np.ndarray]) -> List[dict]:
+    """PropertyCreate bodies for POST /properties/bulk."""
+    payloads = []
+    for i in range(listings['id'].shape[0]):
+        payloads.append({
+            'external_id': str(listings['external_id'][i]),
+            'source': str(listings['source'][i]),
+            'title': str(listings['title'][i]),
+            'property_type': str(listings['property_type'][i]),
+            'transaction_type': str(listings['transaction_type'][i]),
+            'price': float(listings['price'][i]),
+            'area_usable': float(listings['area_usable'][i]),
+            'rooms': listings['rooms'][i],
+            'rooms_count': float(listings['rooms_count'][i]),
+            'floor': int(listings['floor'][i]),
+            'floors_total': int(listings['floors_total'][i]),
+            'condition': str(listings['condition'][i]),
+            'construction_type': str(listings['construction_type'][i]),
+            'energy_rating': str(listings['energy_rating'][i]),
+            'has_balcony': bool(listings['has_balcony'][i]),
+            'has_parking': bool(listings['has_parking'][i]),
+            'has_elevator': bool(listings['has_elevator'][i]),
+            'address_city': str(listings['address_city'][i]),
+            'address_district': str(listings['address_district'][i]),
+            'lat': float(listings['lat'][i]),
+            'lng': float(listings['lng'][i]),
+        })
+    return payloads
@@ -13,7 +13,9 @@ CREATE TABLE properties (
     property_type VARCHAR(50),    -- 'apartment', 'house'
     transaction_type VARCHAR(50), -- 'sale', 'rent'
     price DECIMAL(15, 2),
-    price_per_sqm DECIMAL(10, 2),
+    price_per_sqm DECIMAL(10, 2) GENERATED ALWAYS AS (
+        CASE WHEN area_usable > 0 THEN round(price / area_usable, 2) END
+    ) STORED,
     currency VARCHAR(10) DEFAULT 'CZK',
 
     -- Size and layout
@@ -44,12 +46,17 @@ CREATE TABLE properties (
     address_zip VARCHAR(20),
     address_country VARCHAR(100) DEFAULT 'Czech Republic',
     coordinates GEOMETRY(POINT, 4326),
+    lat DOUBLE PRECISION GENERATED ALWAYS AS (ST_Y(coordinates)) STORED,
+    lng DOUBLE PRECISION GENERATED ALWAYS AS (ST_X(coordinates)) STORED,
+    geohash VARCHAR(12) GENERATED ALWAYS AS (ST_GeoHash(coordinates, 12)) STORED,
     distance_to_center DECIMAL(10, 2), -- km to city center
 
     -- ML predictions
     predicted_price DECIMAL(15, 2),
-    price_assessment VARCHAR(20), -- 'below_market', 'at_market', 'above_market'
-    price_deviation_percent DECIMAL(5, 2),
+    price_assessment VARCHAR(20), -- 'below_market', 'at_market', 'above_market'; see properties_price_assessment
+    price_deviation_percent DECIMAL(6, 2) GENERATED ALWAYS AS (
+        CASE WHEN predicted_price > 0 THEN LEAST(round((price - predicted_price) / predicted_price * 100, 2), 9999.99) END
+    ) STORED,
     prediction_confidence DECIMAL(5, 4),
     predicted_at TIMESTAMP WITH TIME ZONE,
 
@@ -60,6 +67,7 @@ CREATE TABLE properties (
     liens_count INTEGER DEFAULT 0,
     encumbrances TEXT,
     historical_prices JSONB,
+    cadastral_checked_at TIMESTAMP WITH TIME ZONE,  -- last parcel lookup, found or not
 
     -- Media
     images JSONB,  -- Array of image URLs
@@ -71,46 +79,248 @@ CREATE TABLE properties (
     scraped_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
     updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
     is_active BOOLEAN DEFAULT TRUE,
+    deactivated_at TIMESTAMP WITH TIME ZONE,  -- when is_active last went false; NULL while active
+    last_seen_job_id INTEGER,  -- scraping_jobs.id of the last run that saw it
+    canonical_id INTEGER REFERENCES properties(id) ON DELETE SET NULL,  -- cross-source duplicate of; NULL = canonical
 
     UNIQUE(external_id, source)
 );
 
 -- Indexes for common queries
 CREATE INDEX idx_properties_coordinates ON properties USING GIST(coordinates);
+-- Metre-based radius searches (ST_DWithin on coordinates::geography)
+CREATE INDEX idx_properties_geography ON properties USING GIST((coordinates::geography));
 CREATE INDEX idx_properties_source ON properties(source);
 CREATE INDEX idx_properties_property_type ON properties(property_type);
 CREATE INDEX idx_properties_transaction_type ON properties(transaction_type);
 CREATE INDEX idx_properties_price ON properties(price);
 CREATE INDEX idx_properties_city ON properties(address_city);
-CREATE INDEX idx_properties_assessment ON properties(price_assessment);
-CREATE INDEX idx_properties_active ON properties(is_active);
+CREATE INDEX idx_properties_assessment ON properties(price_assessment, price_deviation_percent) WHERE is_active;
 CREATE INDEX idx_properties_scraped_at ON properties(scraped_at);
+-- Live inventory: stale listings are deactivated by the sweep, so these
+-- partial indexes only cover what list, map and analytics queries read
+CREATE INDEX idx_properties_active_segment ON properties(address_city, property_type, transaction_type) WHERE is_active;
+-- Listing sorts (SORTABLE_FIELDS in property_service): top-N pages in
+-- either direction are index scans, unfiltered or by transaction/property type
+CREATE INDEX idx_properties_active_scraped_at ON properties(scraped_at, id) WHERE is_active;
+CREATE INDEX idx_properties_active_price ON properties(price, id) WHERE is_active;
+CREATE INDEX idx_properties_active_price_per_sqm ON properties(price_per_sqm, id) WHERE is_active;
+CREATE INDEX idx_properties_active_area_usable ON properties(area_usable, id) WHERE is_active;
+CREATE INDEX idx_properties_active_type_scraped_at ON properties(transaction_type, property_type, scraped_at, id) WHERE is_active;
+CREATE INDEX idx_properties_active_type_price ON properties(transaction_type, property_type, price, id) WHERE is_active;
+CREATE INDEX idx_properties_active_type_price_per_sqm ON properties(transaction_type, property_type, price_per_sqm, id) WHERE is_active;
+CREATE INDEX idx_properties_active_type_area_usable ON properties(transaction_type, property_type, area_usable, id) WHERE is_active;
+CREATE INDEX idx_properties_active_coordinates ON properties USING GIST(coordinates) WHERE is_active;
+-- dedupe=true reads canonical listings only
+CREATE INDEX idx_properties_active_canonical ON properties(scraped_at, id) WHERE is_active AND canonical_id IS NULL;
+CREATE INDEX idx_properties_canonical_id ON properties(canonical_id) WHERE canonical_id IS NOT NULL;
+-- Chatbot recommendations walk canonical listings from the most below-market up
+CREATE INDEX idx_properties_active_deviation ON properties(price_deviation_percent) WHERE is_active AND canonical_id IS NULL;
+-- Stale-listing sweep: active listings of a source by the run that last saw them
+CREATE INDEX idx_properties_active_last_seen ON properties(source, last_seen_job_id) WHERE is_active;
+-- Listings removed on a day (price index rollup)
+CREATE INDEX idx_properties_deactivated_at ON properties(deactivated_at) WHERE NOT is_active;
+-- Keyset order for the delta sync endpoint (GET /properties/changes)
+CREATE INDEX idx_properties_updated_at_id ON properties(updated_at, id);
+-- Cadastral enrichment queue: listings still without a parcel, in geohash
+-- order so neighbouring listings come out together
+CREATE INDEX idx_properties_cadastral_queue ON properties(geohash, id)
+    WHERE is_active AND cadastral_number IS NULL AND coordinates IS NOT NULL;
 
 -- Price history for tracking changes
+-- Range-partitioned by recorded_at month; only price changes are stored
+-- (see price_history_skip_unchanged). Old months are downsampled by the
+-- backend maintenance job (python -m app.commands.maintain_price_history).
 CREATE TABLE price_history (
-    id SERIAL PRIMARY KEY,
-    property_id INTEGER REFERENCES properties(id) ON DELETE CASCADE,
+    id BIGSERIAL,
+    property_id INTEGER NOT NULL REFERENCES properties(id) ON DELETE CASCADE,
     price DECIMAL(15, 2) NOT NULL,
-    recorded_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+    recorded_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT NOW(),
+    PRIMARY KEY (id, recorded_at)
+) PARTITION BY RANGE (recorded_at);
+
+-- Serves per-property history lookups and "latest price as of" probes
+CREATE INDEX idx_price_history_property_recorded ON price_history(property_id, recorded_at);
+
+-- Catches rows outside the pre-created months until their partition exists
+CREATE TABLE price_history_default PARTITION OF price_history DEFAULT;
+
+-- Create the partition for the month containing month_start, moving any
+-- rows that already landed in the default partition
+CREATE OR REPLACE FUNCTION create_price_history_partition(month_start DATE)
+RETURNS TEXT AS $$
+DECLARE
+    range_start DATE := date_trunc('month', month_start)::date;
+    range_end DATE := (date_trunc('month', month_start) + INTERVAL '1 month')::date;
+    partition_name TEXT := format('price_history_y%sm%s',
+        to_char(range_start, 'YYYY'), to_char(range_start, 'MM'));
+BEGIN
+    IF to_regclass(partition_name) IS NOT NULL THEN
+        RETURN partition_name;
+    END IF;
+
+    EXECUTE format(
+        'CREATE TABLE %I (LIKE price_history INCLUDING DEFAULTS INCLUDING CONSTRAINTS)',
+        partition_name
+    );
+    EXECUTE format(
+        'WITH moved AS (DELETE FROM price_history_default
+                        WHERE recorded_at >= %L AND recorded_at < %L RETURNING *)
+         INSERT INTO %I SELECT * FROM moved',
+        range_start, range_end, partition_name
+    );
+    EXECUTE format(
+        'ALTER TABLE price_history ATTACH PARTITION %I FOR VALUES FROM (%L) TO (%L)',
+        partition_name, range_start, range_end
+    );
+    RETURN partition_name;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Create monthly partitions covering [from_month, to_month]
+CREATE OR REPLACE FUNCTION ensure_price_history_partitions(from_month DATE, to_month DATE)
+RETURNS INTEGER AS $$
+DECLARE
+    current_month DATE := date_trunc('month', from_month)::date;
+    created INTEGER := 0;
+BEGIN
+    WHILE current_month <= to_month LOOP
+        PERFORM create_price_history_partition(current_month);
+        created := created + 1;
+        current_month := (current_month + INTERVAL '1 month')::date;
+    END LOOP;
+    RETURN created;
+END;
+$$ LANGUAGE plpgsql;
+
+SELECT ensure_price_history_partitions(
+    (date_trunc('month', NOW()) - INTERVAL '12 months')::date,
+    (date_trunc('month', NOW()) + INTERVAL '3 months')::date
+);
+
+-- Change-only write path: drop inserts that repeat the property's latest price.
+-- Bulk loaders that already write change-only history (the sample-data
+-- seeder) skip the per-row probe with SET LOCAL app.bulk_load = 'on'.
+CREATE OR REPLACE FUNCTION price_history_skip_unchanged()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF current_setting('app.bulk_load', true) = 'on' THEN
+        RETURN NEW;
+    END IF;
+    IF EXISTS (
+        SELECT 1 FROM (
+            SELECT price FROM price_history
+            WHERE property_id = NEW.property_id AND recorded_at <= NEW.recorded_at
+            ORDER BY recorded_at DESC
+            LIMIT 1
+        ) latest
+        WHERE latest.price = NEW.price
+    ) THEN
+        RETURN NULL;
+    END IF;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER price_history_change_only
+    BEFORE INSERT ON price_history
+    FOR EACH ROW
+    EXECUTE FUNCTION price_history_skip_unchanged();
+
+-- Daily price index rollup built from price_history
+-- ('*' in city/property_type holds the total across that dimension)
+CREATE TABLE price_index_daily (
+    bucket_date DATE NOT NULL,
+    transaction_type VARCHAR(50) NOT NULL,
+    city VARCHAR(255) NOT NULL,
+    property_type VARCHAR(50) NOT NULL,
+    listings_count INTEGER NOT NULL DEFAULT 0,
+    avg_price DECIMAL(15, 2),
+    avg_price_per_sqm DECIMAL(10, 2),
+    median_price_per_sqm DECIMAL(10, 2),
+    new_listings INTEGER NOT NULL DEFAULT 0,
+    removed_listings INTEGER NOT NULL DEFAULT 0,
+    price_changes INTEGER NOT NULL DEFAULT 0,
+    log_change_sum DECIMAL(18, 8) NOT NULL DEFAULT 0, -- sum of ln(new/old) over repricings
+    computed_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    -- Series lookups filter on the dimensions and scan a date range
+    PRIMARY KEY (transaction_type, city, property_type, bucket_date)
 );
 
-CREATE INDEX idx_price_history_property ON price_history(property_id);
-CREATE INDEX idx_price_history_recorded ON price_history(recorded_at);
+-- Saved searches: a stored PropertyFilter plus an optional bounding box
+CREATE TABLE saved_searches (
+    id SERIAL PRIMARY KEY,
+    name VARCHAR(255) NOT NULL,
+    filters JSONB NOT NULL DEFAULT '{}',
+    bounds_south DOUBLE PRECISION,
+    bounds_west DOUBLE PRECISION,
+    bounds_north DOUBLE PRECISION,
+    bounds_east DOUBLE PRECISION,
+    is_active BOOLEAN DEFAULT TRUE,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+
+-- Append-only match feed; a listing is recorded again for a search only
+-- when its price or price assessment changed since the last match
+CREATE TABLE saved_search_matches (
+    id BIGSERIAL PRIMARY KEY,
+    saved_search_id INTEGER NOT NULL REFERENCES saved_searches(id) ON DELETE CASCADE,
+    property_id INTEGER NOT NULL REFERENCES properties(id) ON DELETE CASCADE,
+    event VARCHAR(20) NOT NULL, -- 'new', 'repriced', 'reassessed'
+    price DECIMAL(15, 2),
+    price_assessment VARCHAR(20),
+    matched_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+
+-- Match feed keyset: (matched_at, id) follows commit order once the feed
+-- stays behind open transactions, which id alone does not
+CREATE INDEX idx_saved_search_matches_feed ON saved_search_matches(saved_search_id, matched_at, id);
+CREATE INDEX idx_saved_search_matches_property ON saved_search_matches(property_id, saved_search_id, id DESC);
 
 -- Scraping jobs for tracking scraper runs
 CREATE TABLE scraping_jobs (
     id SERIAL PRIMARY KEY,
     source VARCHAR(50) NOT NULL,
-    status VARCHAR(20) DEFAULT 'running', -- 'running', 'completed', 'failed'
+    status VARCHAR(20) DEFAULT 'running', -- 'running', 'completed', 'partial', 'failed'
     properties_found INTEGER DEFAULT 0,
     properties_new INTEGER DEFAULT 0,
     properties_updated INTEGER DEFAULT 0,
     errors_count INTEGER DEFAULT 0,
+    properties_deactivated INTEGER DEFAULT 0,
     started_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
     completed_at TIMESTAMP WITH TIME ZONE,
-    error_message TEXT
+    error_message TEXT,
+    -- Telemetry totals over the batches reported so far
+    batches_count INTEGER DEFAULT 0,
+    rows_processed INTEGER DEFAULT 0,
+    fetch_ms DOUBLE PRECISION DEFAULT 0,
+    parse_ms DOUBLE PRECISION DEFAULT 0,
+    write_ms DOUBLE PRECISION DEFAULT 0,
+    error_samples JSONB DEFAULT '[]'  -- first few error messages of the run
 );
 
+CREATE INDEX idx_scraping_jobs_source ON scraping_jobs(source, id DESC);
+CREATE INDEX idx_scraping_jobs_started_at ON scraping_jobs(started_at DESC);
+
+-- Per-batch timings reported by the scrapers while a job runs
+CREATE TABLE scraping_job_batches (
+    id BIGSERIAL PRIMARY KEY,
+    job_id INTEGER NOT NULL REFERENCES scraping_jobs(id) ON DELETE CASCADE,
+    rows_count INTEGER DEFAULT 0,
+    errors_count INTEGER DEFAULT 0,
+    fetch_ms DOUBLE PRECISION DEFAULT 0,
+    parse_ms DOUBLE PRECISION DEFAULT 0,
+    write_ms DOUBLE PRECISION DEFAULT 0,
+    recorded_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+
+CREATE INDEX idx_scraping_job_batches_job ON scraping_job_batches(job_id, id);
+
+ALTER TABLE properties
+    ADD CONSTRAINT properties_last_seen_job_fk
+    FOREIGN KEY (last_seen_job_id) REFERENCES scraping_jobs(id) ON DELETE SET NULL;
+
 -- ML model metadata
 CREATE TABLE ml_models (
     id SERIAL PRIMARY KEY,
@@ -124,6 +334,19 @@ CREATE TABLE ml_models (
     model_path VARCHAR(500)
 );
 
+-- Parcel lookups cached per geohash cell (cadastral_cell_precision
+-- characters, about a building), so listings in the same building reuse one
+-- upstream WFS answer. cadastral_number NULL = no parcel found in the cell
+CREATE TABLE cadastral_parcels (
+    cell VARCHAR(12) PRIMARY KEY,
+    cadastral_number VARCHAR(50),
+    cadastral_area VARCHAR(255),
+    ownership_type VARCHAR(100),
+    liens_count INTEGER,
+    encumbrances TEXT,
+    fetched_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT NOW()
+);
+
 -- City centers for distance calculations
 CREATE TABLE city_centers (
     id SERIAL PRIMARY KEY,
@@ -152,7 +375,230 @@ CREATE TRIGGER properties_updated_at
     FOR EACH ROW
     EXECUTE FUNCTION update_updated_at();
 
+CREATE TRIGGER saved_searches_updated_at
+    BEFORE UPDATE ON saved_searches
+    FOR EACH ROW
+    EXECUTE FUNCTION update_updated_at();
+
+-- Market assessment thresholds: relative deviation of the asking price from
+-- the predicted price (-0.10 = 10 % below). A single row, written from the
+-- backend settings by python -m app.commands.rebucket_price_assessments,
+-- which re-buckets every listing in one UPDATE
+CREATE TABLE price_assessment_thresholds (
+    singleton BOOLEAN PRIMARY KEY DEFAULT TRUE CHECK (singleton),
+    below_market DECIMAL(6, 4) NOT NULL,
+    above_market DECIMAL(6, 4) NOT NULL,
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+
+INSERT INTO price_assessment_thresholds (below_market, above_market) VALUES (-0.10, 0.10);
+
+CREATE OR REPLACE FUNCTION price_assessment_bucket(price DECIMAL, predicted_price DECIMAL)
+RETURNS VARCHAR AS $$
+    SELECT CASE
+               WHEN (price - predicted_price) / predicted_price < t.below_market THEN 'below_market'
+               WHEN (price - predicted_price) / predicted_price > t.above_market THEN 'above_market'
+               ELSE 'at_market'
+           END
+    FROM price_assessment_thresholds t
+    WHERE price IS NOT NULL AND predicted_price > 0
+$$ LANGUAGE sql STABLE;
+
+-- price_assessment follows price and predicted_price on every write path
+-- (ORM, bulk upsert, COPY); price_per_sqm, price_deviation_percent, lat,
+-- lng and geohash are generated columns
+CREATE OR REPLACE FUNCTION set_price_assessment()
+RETURNS TRIGGER AS $$
+BEGIN
+    NEW.price_assessment := price_assessment_bucket(NEW.price, NEW.predicted_price);
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER properties_price_assessment
+    BEFORE INSERT OR UPDATE OF price, predicted_price ON properties
+    FOR EACH ROW
+    EXECUTE FUNCTION set_price_assessment();
+
+-- deactivated_at follows is_active on every write path (stale sweep, PATCH,
+-- re-activation by a scraper). updated_at moves on any write, so it cannot
+-- date a removal. Inserted inactive rows keep a deactivated_at they bring
+-- (bulk loads of historical data) and get NOW() otherwise
+CREATE OR REPLACE FUNCTION set_deactivated_at()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF NEW.is_active THEN
+        NEW.deactivated_at := NULL;
+    ELSIF TG_OP = 'INSERT' THEN
+        NEW.deactivated_at := COALESCE(NEW.deactivated_at, NOW());
+    ELSIF OLD.is_active THEN
+        NEW.deactivated_at := NOW();
+    END IF;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER properties_deactivated_at
+    BEFORE INSERT OR UPDATE OF is_active ON properties
+    FOR EACH ROW
+    EXECUTE FUNCTION set_deactivated_at();
+
+-- dedupe=true reads only canonical_id IS NULL rows, so a deactivated
+-- canonical listing would hide its whole duplicate group until the next
+-- dedup pass. Hand the group to its lowest-id active member instead, the
+-- same pick the dedup pass makes. Only canonical_id is written, so this
+-- does not re-fire itself
+CREATE OR REPLACE FUNCTION promote_canonical_listing()
+RETURNS TRIGGER AS $$
+DECLARE
+    heir INTEGER;
+BEGIN
+    SELECT id INTO heir
+    FROM properties
+    WHERE canonical_id = NEW.id AND is_active
+    ORDER BY id
+    LIMIT 1;
+
+    IF heir IS NOT NULL THEN
+        UPDATE properties
+        SET canonical_id = NULLIF(heir, id)
+        WHERE canonical_id = NEW.id;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER properties_promote_canonical
+    AFTER UPDATE OF is_active ON properties
+    FOR EACH ROW
+    WHEN (OLD.is_active AND NOT NEW.is_active AND NEW.canonical_id IS NULL)
+    EXECUTE FUNCTION promote_canonical_listing();
+
+-- Listing change events for the SSE stream (app/services/listing_stream.py).
+-- Statement-level with transition tables, so a bulk upsert sends a few
+-- batched notifications rather than one per row. Each payload is a JSON
+-- array of at most 40 events, well under the 8000-byte NOTIFY limit.
+-- Bulk loads (app.bulk_load = 'on') are not announced.
+CREATE OR REPLACE FUNCTION notify_listing_events()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF current_setting('app.bulk_load', true) = 'on' THEN
+        RETURN NULL;
+    END IF;
+    IF TG_OP = 'INSERT' THEN
+        PERFORM pg_notify('listing_events', json_agg(event)::text)
+        FROM (
+            SELECT json_build_object(
+                       'type', 'created', 'id', n.id, 'price', n.price,
+                       'assessment', n.price_assessment,
+                       'lat', round(ST_Y(n.coordinates)::numeric, 6),
+                       'lng', round(ST_X(n.coordinates)::numeric, 6)
+                   ) AS event,
+                   (row_number() OVER () - 1) / 40 AS chunk
+            FROM new_rows n
+            WHERE n.is_active
+        ) events
+        GROUP BY chunk;
+    ELSE
+        PERFORM pg_notify('listing_events', json_agg(event)::text)
+        FROM (
+            SELECT json_build_object(
+                       'type', changes.type, 'id', changes.id, 'price', changes.price,
+                       'assessment', changes.price_assessment,
+                       'lat', round(ST_Y(changes.coordinates)::numeric, 6),
+                       'lng', round(ST_X(changes.coordinates)::numeric, 6)
+                   ) AS event,
+                   (row_number() OVER () - 1) / 40 AS chunk
+            FROM (
+                SELECT n.id, n.price, n.price_assessment, n.coordinates,
+                       CASE
+                           WHEN o.is_active AND NOT n.is_active THEN 'deactivated'
+                           WHEN n.is_active AND NOT o.is_active THEN 'created'
+                           WHEN NOT n.is_active THEN NULL
+                           WHEN n.price IS DISTINCT FROM o.price THEN 'repriced'
+                           WHEN n.predicted_price IS DISTINCT FROM o.predicted_price
+                             OR n.price_assessment IS DISTINCT FROM o.price_assessment THEN 'rescored'
+                       END AS type
+                FROM new_rows n
+                JOIN old_rows o ON o.id = n.id
+            ) changes
+            WHERE changes.type IS NOT NULL
+        ) events
+        GROUP BY chunk;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Transition tables allow one event per trigger; INSERT ... ON CONFLICT
+-- DO UPDATE fires both
+CREATE TRIGGER properties_notify_insert
+    AFTER INSERT ON properties
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION notify_listing_events();
+
+CREATE TRIGGER properties_notify_update
+    AFTER UPDATE ON properties
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION notify_listing_events();
+
+-- Data version behind the list/map/analytics ETags (app/http_cache.py).
+-- Moves when a transaction that wrote the listing tables commits, not when
+-- it writes: a version taken mid-transaction would later validate data the
+-- client never saw. Each writing statement registers its transaction in
+-- listing_data_version_writers (one row per transaction); the deferred
+-- trigger on that row bumps the sequence during commit. A sequence rather
+-- than a counter row, so concurrent writers never queue on a row lock
+CREATE SEQUENCE listing_data_version;
+
+CREATE UNLOGGED TABLE listing_data_version_writers (
+    xid XID8 PRIMARY KEY
+);
+
+CREATE OR REPLACE FUNCTION register_listing_data_writer()
+RETURNS TRIGGER AS $$
+BEGIN
+    INSERT INTO listing_data_version_writers (xid) VALUES (pg_current_xact_id())
+    ON CONFLICT DO NOTHING;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION bump_listing_data_version()
+RETURNS TRIGGER AS $$
+BEGIN
+    PERFORM nextval('listing_data_version');
+    DELETE FROM listing_data_version_writers WHERE xid = NEW.xid;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE CONSTRAINT TRIGGER listing_data_version_commit
+    AFTER INSERT ON listing_data_version_writers
+    DEFERRABLE INITIALLY DEFERRED
+    FOR EACH ROW
+    EXECUTE FUNCTION bump_listing_data_version();
+
+CREATE TRIGGER properties_data_version
+    AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON properties
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION register_listing_data_writer();
+
+CREATE TRIGGER price_history_data_version
+    AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON price_history
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION register_listing_data_writer();
+
+CREATE TRIGGER price_index_daily_data_version
+    AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON price_index_daily
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION register_listing_data_writer();
+
 -- Function to calculate distance to nearest city center
+-- Ad-hoc use only: the backend fills distance_to_center for whole ingest
+-- batches in app/services/distance_service.py
 CREATE OR REPLACE FUNCTION calculate_distance_to_center(prop_coords GEOMETRY)
 RETURNS DECIMAL AS $$
 DECLARE
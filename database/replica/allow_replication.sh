@@ -0,0 +1,5 @@
+#!/bin/bash
+# Lets the streaming replica in docker-compose.replica.yml connect to the
+# primary. Runs only when the primary's data volume is first initialised.
+set -e
+echo "host replication all all scram-sha-256" >> "$PGDATA/pg_hba.conf"
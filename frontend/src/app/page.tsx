@@ -43,7 +43,7 @@ export default function Home() {
 
             // Check seed status first
             try {
-                const statusResponse = await fetch(`${API_URL}/api/v1/seed/status`);
+                const statusResponse = await fetch(`${API_URL}/api/v1/seed/status`, { credentials: 'include' });
                 if (statusResponse.ok) {
                     const status: SeedStatus = await statusResponse.json();
                     setNeedsSeed(status.total_properties === 0);
@@ -54,7 +54,8 @@ export default function Home() {
 
             // Fetch recent properties
             const propertiesResponse = await fetch(
-                `${API_URL}/api/v1/properties?page_size=6&sort_by=scraped_at&sort_order=desc`
+                `${API_URL}/api/v1/properties?page_size=6&sort_by=scraped_at&sort_order=desc`,
+                { credentials: 'include' }
             );
 
             if (propertiesResponse.ok) {
@@ -66,7 +67,7 @@ export default function Home() {
             }
 
             // Fetch market overview
-            const overviewResponse = await fetch(`${API_URL}/api/v1/analytics/market-overview`);
+            const overviewResponse = await fetch(`${API_URL}/api/v1/analytics/market-overview`, { credentials: 'include' });
 
             if (overviewResponse.ok) {
                 const overviewData = await overviewResponse.json();
@@ -86,6 +87,8 @@ export default function Home() {
             setSeeding(true);
             const response = await fetch(`${API_URL}/api/v1/seed/sample-data`, {
                 method: 'POST',
+                // Carries the read-your-writes cookie, so the refresh below reads from the primary
+                credentials: 'include',
                 headers: { 'Content-Type': 'application/json' },
                 body: JSON.stringify({ clear_existing: false, run_predictions: true }),
             });
@@ -121,7 +121,7 @@ export default function PropertyDetailPage() {
                 setLoading(true);
                 setError(null);
 
-                const response = await fetch(`${API_URL}/api/v1/properties/${propertyId}`);
+                const response = await fetch(`${API_URL}/api/v1/properties/${propertyId}`, { credentials: 'include' });
 
                 if (!response.ok) {
                     if (response.status === 404) {
@@ -39,7 +39,7 @@ export default function PropertiesPage() {
             if (rooms) params.append('rooms', rooms);
             if (debouncedSearch) params.append('search', debouncedSearch);
 
-            const response = await fetch(`${API_URL}/api/v1/properties?${params}`);
+            const response = await fetch(`${API_URL}/api/v1/properties?${params}`, { credentials: 'include' });
 
             if (!response.ok) {
                 throw new Error(`Failed to fetch properties: ${response.statusText}`);
@@ -196,6 +196,7 @@ export function Chatbot() {
         try {
             const response = await fetch(`${API_URL}/api/v1/chatbot/recommend`, {
                 method: 'POST',
+                credentials: 'include',
                 headers: {
                     'Content-Type': 'application/json',
                 },
@@ -115,7 +115,7 @@ export function PriceTrendChart() {
             setLoading(true);
             setError(null);
 
-            const response = await fetch(`${API_URL}/api/v1/analytics/price-trends?days=90`);
+            const response = await fetch(`${API_URL}/api/v1/analytics/price-trends?days=90`, { credentials: 'include' });
 
             if (!response.ok) {
                 throw new Error('Failed to fetch price trends');